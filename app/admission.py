@@ -0,0 +1,164 @@
+"""
+LLM admission control for the LumaHealth Conversational AI Service.
+
+This module bounds how many conversation turns call Claude concurrently.
+Turns beyond the limit wait in a bounded priority queue with a deadline;
+when the queue is full or the deadline passes, the turn is shed so the API
+can answer with 503 + Retry-After instead of piling up Anthropic requests.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from .observability import setup_logging, LatencyHistogram
+from .settings import settings
+
+# Setup logging
+logger = setup_logging()
+
+# Queue priorities (lower is served first)
+PRIORITY_VERIFIED = 0
+PRIORITY_UNVERIFIED = 1
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted."""
+
+    def __init__(self, reason: str, retry_after_seconds: int):
+        super().__init__(f"LLM capacity exceeded ({reason})")
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+
+class AdmissionController:
+    """
+    Concurrency limiter with a bounded priority wait queue.
+
+    A released slot is handed directly to the highest-priority waiter, so
+    verified sessions are served before unverified ones and FIFO order is
+    kept within a priority.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout_seconds: float):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+
+        self._in_flight = 0
+        self._waiting = 0
+        self._waiters: List[list] = []
+        self._sequence = itertools.count()
+
+        # Average service time, used to estimate Retry-After
+        self._avg_service_seconds = 1.0
+
+        # Metrics
+        self.admitted = 0
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_deadline = 0
+        self.peak_queue_depth = 0
+        self.wait_time = LatencyHistogram()
+
+    @asynccontextmanager
+    async def admit(self, priority: int = PRIORITY_UNVERIFIED, timeout: Optional[float] = None):
+        """Hold an LLM slot for the duration of the block."""
+        start = time.monotonic()
+        await self._acquire(priority, self.queue_timeout_seconds if timeout is None else timeout)
+
+        admitted_at = time.monotonic()
+        self.wait_time.observe((admitted_at - start) * 1000)
+
+        try:
+            yield
+        finally:
+            service_seconds = time.monotonic() - admitted_at
+            self._avg_service_seconds = 0.9 * self._avg_service_seconds + 0.1 * service_seconds
+            self._release()
+
+    async def _acquire(self, priority: int, timeout: float) -> None:
+        """Take a slot, waiting in the queue if necessary."""
+        if self._in_flight < self.max_in_flight and self._waiting == 0:
+            self._in_flight += 1
+            self.admitted += 1
+            return
+
+        if self._waiting >= self.max_queue:
+            self.shed_queue_full += 1
+            logger.warning(f"LLM queue full ({self._waiting} waiting), shedding request")
+            raise AdmissionRejected("queue_full", self.retry_after_seconds())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._sequence), future])
+        self._waiting += 1
+        self.queued += 1
+        self.peak_queue_depth = max(self.peak_queue_depth, self._waiting)
+
+        try:
+            await asyncio.wait({future}, timeout=timeout)
+        except asyncio.CancelledError:
+            self._abandon(future)
+            raise
+
+        if not future.done():
+            self._abandon(future)
+            self.shed_deadline += 1
+            logger.warning(f"LLM queue deadline of {timeout}s exceeded, shedding request")
+            raise AdmissionRejected("deadline_exceeded", self.retry_after_seconds())
+
+        self.admitted += 1
+
+    def _abandon(self, future: asyncio.Future) -> None:
+        """Leave the queue, giving back a slot that was already handed over."""
+        if future.done():
+            # The slot was handed to us just as we gave up
+            self._release()
+        else:
+            future.cancel()
+            self._waiting -= 1
+
+    def _release(self) -> None:
+        """Hand the slot to the next waiter, or free it."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # Cancelled waiter, already accounted for
+                continue
+            self._waiting -= 1
+            future.set_result(None)
+            return
+
+        self._in_flight -= 1
+
+    def retry_after_seconds(self) -> int:
+        """Estimate when capacity is likely to be available again."""
+        backlog = (self._waiting + 1) / max(self.max_in_flight, 1)
+        return max(1, math.ceil(backlog * self._avg_service_seconds))
+
+    def get_stats(self) -> dict:
+        """Get admission control statistics for monitoring."""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting,
+            "peak_queue_depth": self.peak_queue_depth,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_deadline": self.shed_deadline,
+            "wait_time": self.wait_time.snapshot()
+        }
+
+
+# Global LLM admission controller instance
+llm_admission = AdmissionController(
+    max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+    max_queue=settings.LLM_MAX_QUEUE,
+    queue_timeout_seconds=settings.LLM_QUEUE_TIMEOUT_SECONDS
+)
@@ -0,0 +1,168 @@
+"""
+Appointment archival for the LumaHealth Conversational AI Service.
+
+This module moves confirmed and cancelled appointments older than a
+horizon from the hot appointment table into appointment_archive, in
+batched transactions, so patient queries and their indexes only carry
+recent data. The job runs from the CLI (scripts/archive_appointments.py)
+or periodically from the application lifespan when ARCHIVE_ENABLED is set.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Optional
+
+from sqlalchemy import delete, func, insert
+from sqlmodel import Session, select
+
+from .db import engine, archive_engine
+from .models import Appointment, AppointmentArchive, AppointmentStatus
+from .observability import setup_logging
+from .settings import settings
+
+logger = setup_logging()
+
+# Only settled appointments are archived; old PENDING ones may still need follow-up
+ARCHIVABLE_STATUSES = (AppointmentStatus.CONFIRMED, AppointmentStatus.CANCELLED)
+
+ARCHIVED_COLUMNS = ("id", "patient_id", "when_utc", "location", "status", "doctor_name", "notes", "created_at", "updated_at")
+
+
+class AppointmentArchiver:
+    """
+    Batched mover from the appointment table to appointment_archive.
+
+    Each batch is selected oldest first. With a shared database the copy and
+    the delete commit in one transaction; with a separate archive database
+    the copy commits first and is an upsert, so a batch interrupted between
+    the two commits is simply moved again on the next run.
+    """
+
+    def __init__(self, hot_engine, cold_engine, after_days: int = 365, batch_size: int = 500):
+        self.hot_engine = hot_engine
+        self.cold_engine = cold_engine
+        self.after_days = after_days
+        self.batch_size = batch_size
+        self._lock = Lock()
+
+        # Counters
+        self.runs = 0
+        self.archived_total = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_run_archived = 0
+        self.last_run_ms = 0.0
+        self.last_error: Optional[str] = None
+
+    def cutoff(self, after_days: Optional[int] = None) -> datetime:
+        """Appointments before this time are eligible for archival."""
+        return datetime.utcnow() - timedelta(days=self.after_days if after_days is None else after_days)
+
+    def count_eligible(self, after_days: Optional[int] = None) -> int:
+        """Number of appointments the next run would archive."""
+        with Session(self.hot_engine) as session:
+            statement = select(func.count()).select_from(Appointment).where(
+                Appointment.when_utc < self.cutoff(after_days),
+                Appointment.status.in_(ARCHIVABLE_STATUSES)
+            )
+            return session.exec(statement).one()
+
+    def run(self, after_days: Optional[int] = None, max_batches: Optional[int] = None) -> dict:
+        """Archive eligible appointments in batches; returns a run summary."""
+        # One run at a time (background loop and CLI in the same process)
+        with self._lock:
+            started = time.perf_counter()
+            cutoff = self.cutoff(after_days)
+            archived, batches = 0, 0
+
+            try:
+                while max_batches is None or batches < max_batches:
+                    moved = self._archive_batch(cutoff)
+                    if not moved:
+                        break
+                    archived += moved
+                    batches += 1
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Appointment archival failed after {archived} rows: {e}", exc_info=True)
+                raise
+            finally:
+                self.runs += 1
+                self.archived_total += archived
+                self.last_run_at = datetime.utcnow()
+                self.last_run_archived = archived
+                self.last_run_ms = (time.perf_counter() - started) * 1000
+
+            logger.info(f"Archived {archived} appointments older than {cutoff.isoformat()} in {batches} batches")
+            return {
+                "archived": archived,
+                "batches": batches,
+                "cutoff": cutoff.isoformat(),
+                "duration_ms": round(self.last_run_ms, 2)
+            }
+
+    def _archive_batch(self, cutoff: datetime) -> int:
+        """Move one batch; returns the number of appointments moved."""
+        columns = [getattr(Appointment, name) for name in ARCHIVED_COLUMNS]
+        batch_select = (
+            select(*columns)
+            .where(Appointment.when_utc < cutoff, Appointment.status.in_(ARCHIVABLE_STATUSES))
+            .order_by(Appointment.when_utc, Appointment.id)
+            .limit(self.batch_size)
+        )
+
+        with Session(self.hot_engine) as hot:
+            rows = [dict(row._mapping) for row in hot.exec(batch_select).all()]
+            if not rows:
+                return 0
+
+            now = datetime.utcnow()
+            archive_rows = [{**row, "archived_at": now} for row in rows]
+            ids = [row["id"] for row in rows]
+            archive_insert = insert(AppointmentArchive.__table__).prefix_with("OR REPLACE")
+
+            if self.cold_engine is self.hot_engine:
+                hot.exec(archive_insert, params=archive_rows)
+            else:
+                with Session(self.cold_engine) as cold:
+                    cold.exec(archive_insert, params=archive_rows)
+                    cold.commit()
+
+            hot.exec(delete(Appointment).where(Appointment.id.in_(ids)))
+            hot.commit()
+            return len(rows)
+
+    async def run_periodically(self, interval_seconds: float) -> None:
+        """Archive on a fixed interval until cancelled (lifespan background task)."""
+        while True:
+            try:
+                await asyncio.to_thread(self.run)
+            except Exception:
+                # Logged in run(); try again next interval
+                pass
+            await asyncio.sleep(interval_seconds)
+
+    def get_stats(self) -> dict:
+        """Get archival statistics for monitoring."""
+        return {
+            "enabled": settings.ARCHIVE_ENABLED,
+            "after_days": self.after_days,
+            "separate_database": self.cold_engine is not self.hot_engine,
+            "runs": self.runs,
+            "archived_total": self.archived_total,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_run_archived": self.last_run_archived,
+            "last_run_ms": round(self.last_run_ms, 2),
+            "last_error": self.last_error
+        }
+
+
+# Global appointment archiver instance
+appointment_archiver = AppointmentArchiver(
+    engine,
+    archive_engine,
+    after_days=settings.ARCHIVE_AFTER_DAYS,
+    batch_size=settings.ARCHIVE_BATCH_SIZE
+)
@@ -0,0 +1,308 @@
+"""
+Appointment audit log for the LumaHealth Conversational AI Service.
+
+AppointmentCRUD mutations record who changed an appointment, what it
+became and through which channel (REST, agent or MCP) as rows of the
+append-only appointment_event table. Events are queued in memory once the
+change has committed and a writer thread commits them in groups, at most
+AUDIT_FLUSH_MS after the first event of a group, so confirm and cancel do
+not wait for a second commit.
+
+An event still queued when the process dies is lost. recover() closes
+those gaps: any appointment whose updated_at is newer than its latest
+event gets a "recovered" event with its current state, so every
+appointment's latest event always matches its row. The service runs it
+from run_periodically(), starting once the grace period has passed so
+changes made just before a crash are not skipped.
+"""
+
+import asyncio
+import atexit
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlmodel import Session, select
+
+from .models import Appointment, AppointmentEvent, AppointmentStatus
+from .observability import setup_logging
+from .settings import settings
+
+# Setup logging
+logger = setup_logging()
+
+# (channel, session_id) of the request making changes in the current task
+audit_context: ContextVar[Tuple[str, Optional[str]]] = ContextVar("audit_context", default=("system", None))
+
+# Attempts to commit a batch before its events are dropped (and left to recover())
+WRITE_ATTEMPTS = 3
+
+# Changes newer than this are skipped by recover(): another process may still have them queued
+RECOVERY_GRACE_SECONDS = 5.0
+
+RECOVERY_BATCH_SIZE = 2000
+
+_STOP = object()
+
+
+@contextmanager
+def audit_channel(channel: str, session_id: Optional[str] = None):
+    """Attribute appointment changes made inside the block to a channel and session."""
+    token = audit_context.set((channel, session_id))
+    try:
+        yield
+    finally:
+        audit_context.reset(token)
+
+
+class AuditLog:
+    """
+    Group-committing writer for appointment events.
+
+    record() only builds the row and puts it on a queue. One daemon thread
+    takes a group of events (up to batch_size, or whatever arrived within
+    flush_ms of the first) and inserts it in a single transaction, so a
+    group is committed whole or not at all and events keep their order.
+    When the queue is full, record() inserts the event itself instead of
+    dropping it.
+    """
+
+    def __init__(self, enabled: bool = True, flush_ms: float = 20.0, batch_size: int = 500, max_queue: int = 10000):
+        self.enabled = enabled
+        self.flush_ms = flush_ms
+        self.batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._written = threading.Condition()
+        self._enqueued = 0
+        self._done = 0
+
+        # Counters
+        self.events_recorded = 0
+        self.events_written = 0
+        self.events_failed = 0
+        self.events_recovered = 0
+        self.recovery_runs = 0
+        self.sync_writes = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.write_ms = 0.0
+
+    def record(
+        self,
+        session: Session,
+        appointment_id: int,
+        patient_id: int,
+        action: str,
+        status: AppointmentStatus,
+        when_utc: datetime,
+        occurred_at: datetime,
+        previous_when_utc: Optional[datetime] = None,
+        slot_id: Optional[int] = None
+    ) -> None:
+        """Queue an event for a change the session has just committed."""
+        if not self.enabled:
+            return
+
+        channel, session_id = audit_context.get()
+        row = {
+            "appointment_id": appointment_id,
+            "patient_id": patient_id,
+            "action": action,
+            "status": status,
+            "when_utc": when_utc,
+            "previous_when_utc": previous_when_utc,
+            "slot_id": slot_id,
+            "channel": channel,
+            "session_id": session_id,
+            "occurred_at": occurred_at,
+            "recorded_at": datetime.utcnow()
+        }
+        bind = session.get_bind()
+        self.events_recorded += 1
+        self._ensure_writer()
+        try:
+            with self._written:
+                self._queue.put_nowait((bind, row))
+                self._enqueued += 1
+        except queue.Full:
+            self.sync_writes += 1
+            self._insert(bind, [row])
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+                # Commit what is still queued on a normal interpreter exit
+                atexit.register(self.close)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_ms / 1000
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch: List[tuple]) -> None:
+        started = time.perf_counter()
+        # One transaction per database (events normally all go to the main one)
+        for bind, items in groupby(batch, key=lambda item: item[0]):
+            rows = [row for _, row in items]
+            for attempt in range(1, WRITE_ATTEMPTS + 1):
+                try:
+                    self._insert(bind, rows)
+                    break
+                except Exception as e:
+                    if attempt == WRITE_ATTEMPTS:
+                        self.events_failed += len(rows)
+                        logger.error(f"Dropped {len(rows)} audit events after {attempt} attempts: {e}")
+                    else:
+                        logger.warning(f"Audit batch of {len(rows)} events failed (attempt {attempt}): {e}")
+                        time.sleep(0.05 * attempt)
+        self.batches += 1
+        self.max_batch = max(self.max_batch, len(batch))
+        self.write_ms += (time.perf_counter() - started) * 1000
+        with self._written:
+            self._done += len(batch)
+            self._written.notify_all()
+
+    def _insert(self, bind, rows: List[Dict[str, Any]]) -> None:
+        with bind.begin() as conn:
+            conn.execute(insert(AppointmentEvent.__table__), rows)
+        self.events_written += len(rows)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every event queued so far is committed (or dropped); False on timeout."""
+        with self._written:
+            target = self._enqueued
+            return self._written.wait_for(lambda: self._done >= target, timeout=timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Commit the queued events and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout=timeout)
+
+    def recover(self, bind, grace_seconds: float = RECOVERY_GRACE_SECONDS, batch_size: int = RECOVERY_BATCH_SIZE) -> int:
+        """
+        Record the current state of appointments changed after their latest event; returns the number recorded.
+
+        Covers events lost in a crash, and appointments that predate the
+        audit log (their first event is a "recovered" one). Safe to re-run.
+        """
+        if not self.enabled:
+            return 0
+
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+        recovered, last_id = 0, 0
+        with Session(bind) as session:
+            while True:
+                rows = session.exec(
+                    select(Appointment.id, Appointment.patient_id, Appointment.status, Appointment.when_utc, Appointment.updated_at)
+                    .where(Appointment.id > last_id)
+                    .order_by(Appointment.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                latest = dict(session.exec(
+                    select(AppointmentEvent.appointment_id, func.max(AppointmentEvent.occurred_at))
+                    .where(AppointmentEvent.appointment_id.in_([row[0] for row in rows]))
+                    .group_by(AppointmentEvent.appointment_id)
+                ).all())
+                now = datetime.utcnow()
+                missing = [
+                    {
+                        "appointment_id": appointment_id,
+                        "patient_id": patient_id,
+                        "action": "recovered",
+                        "status": status,
+                        "when_utc": when_utc,
+                        "channel": "recovery",
+                        "occurred_at": updated_at,
+                        "recorded_at": now
+                    }
+                    for appointment_id, patient_id, status, when_utc, updated_at in rows
+                    if updated_at < cutoff and (appointment_id not in latest or latest[appointment_id] < updated_at)
+                ]
+                if missing:
+                    session.connection().execute(insert(AppointmentEvent.__table__), missing)
+                    session.commit()
+                    recovered += len(missing)
+
+        self.events_recovered += recovered
+        self.recovery_runs += 1
+        if recovered:
+            logger.warning(f"Audit log recovery recorded the current state of {recovered} appointments")
+        return recovered
+
+    async def run_periodically(self, bind, interval_seconds: float, grace_seconds: float = RECOVERY_GRACE_SECONDS) -> None:
+        """
+        Run recover() every interval_seconds until cancelled (lifespan background task).
+
+        The first run waits out the grace period, so every change made
+        before startup, including those just before a crash, is old enough
+        to be recovered. Later runs cover other processes that died.
+        """
+        await asyncio.sleep(grace_seconds)
+        while True:
+            try:
+                await asyncio.to_thread(self.recover, bind, grace_seconds)
+            except Exception as e:
+                logger.error(f"Audit log recovery failed: {e}", exc_info=True)
+            await asyncio.sleep(interval_seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get audit log statistics for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "queued": self._queue.qsize(),
+            "events_recorded": self.events_recorded,
+            "events_written": self.events_written,
+            "events_failed": self.events_failed,
+            "events_recovered": self.events_recovered,
+            "recovery_runs": self.recovery_runs,
+            "sync_writes": self.sync_writes,
+            "batches": self.batches,
+            "avg_batch": round(self.events_written / self.batches, 2) if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "write_ms": round(self.write_ms, 2)
+        }
+
+
+# Global audit log instance
+audit_log = AuditLog(
+    enabled=settings.AUDIT_LOG_ENABLED,
+    flush_ms=settings.AUDIT_FLUSH_MS,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    max_queue=settings.AUDIT_QUEUE_MAX
+)
@@ -0,0 +1,256 @@
+"""
+In-memory open-slot index for the LumaHealth Conversational AI Service.
+
+Provider schedules are stored as Slot rows. This module keeps the open ones
+in memory, one start-sorted array per (provider, location), so "next open
+slots for doctor X at location Y after Z" is a bisect plus a short merge
+instead of a query. Writes made through AppointmentCRUD/SlotCRUD update the
+index as they commit; slots changed by other processes are picked up
+incrementally (by updated_at) every SLOT_INDEX_REFRESH_SECONDS. The index
+only suggests slots: booking one is a conditional UPDATE, so a stale entry
+can never double-book.
+"""
+
+import heapq
+import re
+import time
+from bisect import bisect_left
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlmodel import Session, select
+
+from .models import Patient, Provider, Slot
+from .observability import setup_logging
+from .settings import settings
+
+# Setup logging
+logger = setup_logging()
+
+# Titles ignored when matching a doctor's name ("Dra. Ana" finds "Dra. Ana Rodrigues")
+TITLES = {"dr", "dra", "doctor", "doutor", "doutora"}
+
+LOAD_BATCH_SIZE = 50_000
+
+
+@lru_cache(maxsize=4096)
+def _name_tokens(name: str) -> Tuple[str, ...]:
+    return tuple(token for token in re.split(r"[\s.]+", Patient.normalize_name(name)) if token and token not in TITLES)
+
+
+def name_matches(name: str, doctor: Optional[str]) -> bool:
+    """Whether a provider name contains every word of `doctor` (titles, accents and case ignored)."""
+    if not doctor:
+        return True
+    tokens = _name_tokens(name)
+    return all(word in tokens for word in _name_tokens(doctor))
+
+
+def place_matches(place: str, location: Optional[str]) -> bool:
+    """Whether `location` appears in a slot location (accents and case ignored)."""
+    return not location or Patient.normalize_name(location) in Patient.normalize_name(place)
+
+
+class SlotIndex:
+    """
+    Open slots per (provider, location), as parallel start-sorted arrays.
+
+    (provider_id, start_utc) is unique, so within one array starts are
+    unique and a slot's position is found by bisect. Until load() has run
+    the index is not ready and callers query the database.
+    """
+
+    def __init__(self, enabled: bool = True, refresh_seconds: float = 5.0):
+        self.enabled = enabled
+        self.refresh_seconds = refresh_seconds
+        self._lock = RLock()
+        self._loaded = False
+        # (provider_id, location) -> (starts, slot IDs, ends)
+        self._open: Dict[Tuple[int, str], Tuple[List[datetime], List[int], List[datetime]]] = {}
+        self._keys_by_provider: Dict[int, Set[Tuple[int, str]]] = {}
+        self._places: Dict[Tuple[int, str], str] = {}
+        # slot ID -> ((provider_id, location), start_utc)
+        self._slot_keys: Dict[int, Tuple[Tuple[int, str], datetime]] = {}
+        self._providers: Dict[int, str] = {}
+        self._providers_by_token: Dict[str, Set[int]] = {}
+        self._seen_updated_at: Optional[datetime] = None
+        self._refreshed_at = 0.0
+
+        # Counters
+        self.searches = 0
+        self.refreshes = 0
+        self.changes_applied = 0
+        self.load_ms = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and self._loaded
+
+    @staticmethod
+    def columns():
+        """The slot columns, in the order apply_rows() expects."""
+        return select(Slot.id, Slot.provider_id, Slot.location, Slot.start_utc, Slot.end_utc, Slot.appointment_id, Slot.updated_at)
+
+    def load(self, engine) -> int:
+        """Build the index from the provider and slot tables; returns the number of open slots."""
+        if not self.enabled:
+            return 0
+
+        started = time.perf_counter()
+        with self._lock:
+            self._open, self._keys_by_provider, self._places, self._slot_keys = {}, {}, {}, {}
+            self._providers, self._providers_by_token = {}, {}
+            self._seen_updated_at = None
+            with Session(engine) as session:
+                for provider in session.exec(select(Provider)).all():
+                    self.add_provider(provider)
+                last_id = 0
+                now = datetime.utcnow()
+                while True:
+                    rows = session.exec(
+                        self.columns()
+                        .where(Slot.id > last_id, Slot.start_utc >= now)
+                        .order_by(Slot.id)
+                        .limit(LOAD_BATCH_SIZE)
+                    ).all()
+                    if not rows:
+                        break
+                    self._apply(rows)
+                    last_id = rows[-1][0]
+            self._loaded = True
+            self._refreshed_at = time.monotonic()
+        self.load_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Slot index loaded: {len(self._slot_keys)} open slots for {len(self._providers)} providers in {self.load_ms:.0f}ms")
+        return len(self._slot_keys)
+
+    def add_provider(self, provider: Provider) -> None:
+        with self._lock:
+            self._providers[provider.id] = provider.name
+            for token in _name_tokens(provider.name):
+                self._providers_by_token.setdefault(token, set()).add(provider.id)
+
+    def _apply(self, rows: Iterable[tuple]) -> None:
+        """Apply slot rows (open -> add, booked -> remove); idempotent."""
+        for slot_id, provider_id, location, start_utc, end_utc, appointment_id, updated_at in rows:
+            if appointment_id is None:
+                self._add_open(slot_id, provider_id, location, start_utc, end_utc)
+            else:
+                self._remove_open(slot_id)
+            if self._seen_updated_at is None or updated_at > self._seen_updated_at:
+                self._seen_updated_at = updated_at
+            self.changes_applied += 1
+
+    def _add_open(self, slot_id: int, provider_id: int, location: str, start_utc: datetime, end_utc: datetime) -> None:
+        if slot_id in self._slot_keys:
+            return
+        key = (provider_id, location)
+        starts, ids, ends = self._open.setdefault(key, ([], [], []))
+        position = bisect_left(starts, start_utc)
+        starts.insert(position, start_utc)
+        ids.insert(position, slot_id)
+        ends.insert(position, end_utc)
+        self._slot_keys[slot_id] = (key, start_utc)
+        if key not in self._places:
+            self._places[key] = Patient.normalize_name(location)
+            self._keys_by_provider.setdefault(provider_id, set()).add(key)
+
+    def _remove_open(self, slot_id: int) -> None:
+        entry = self._slot_keys.pop(slot_id, None)
+        if entry is None:
+            return
+        key, start_utc = entry
+        starts, ids, ends = self._open[key]
+        position = bisect_left(starts, start_utc)
+        del starts[position], ids[position], ends[position]
+
+    def apply_rows(self, rows: Iterable[tuple]) -> None:
+        """Apply slot rows written by this process (after they are committed)."""
+        if not self.ready:
+            return
+        with self._lock:
+            self._apply(rows)
+
+    def refresh_if_stale(self, session: Session) -> None:
+        """Pick up slot changes made by other processes since the last refresh (one indexed query per interval)."""
+        if not self.ready or time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+
+        with self._lock:
+            if time.monotonic() - self._refreshed_at < self.refresh_seconds:
+                return
+            statement = self.columns().where(Slot.start_utc >= datetime.utcnow())
+            if self._seen_updated_at is not None:
+                # >= rather than >: rows written in the same instant are re-applied harmlessly
+                statement = statement.where(Slot.updated_at >= self._seen_updated_at)
+            self._apply(session.exec(statement.order_by(Slot.updated_at)).all())
+            known = set(self._providers)
+            for provider in session.exec(select(Provider).where(Provider.id.not_in(known))).all():
+                self.add_provider(provider)
+            self._refreshed_at = time.monotonic()
+            self.refreshes += 1
+
+    def match_providers(self, doctor: Optional[str]) -> List[int]:
+        """Provider IDs whose name contains every word of `doctor` (titles, accents and case ignored)."""
+        wanted = _name_tokens(doctor) if doctor else ()
+        if not wanted:
+            return list(self._providers)
+        matches = self._providers_by_token.get(wanted[0], set())
+        for word in wanted[1:]:
+            matches = matches & self._providers_by_token.get(word, set())
+        return list(matches)
+
+    def find(self, doctor: Optional[str] = None, location: Optional[str] = None, after: Optional[datetime] = None,
+             limit: int = 5) -> List[dict]:
+        """The next `limit` open slots after `after` (default now), earliest first."""
+        after = max(after or datetime.min, datetime.utcnow())
+        wanted_place = Patient.normalize_name(location) if location else ""
+
+        with self._lock:
+            self.searches += 1
+            runs = []
+            for provider_id in self.match_providers(doctor):
+                for key in self._keys_by_provider.get(provider_id, ()):
+                    if wanted_place not in self._places[key]:
+                        continue
+                    starts, ids, ends = self._open[key]
+                    position = bisect_left(starts, after)
+                    stop = min(position + limit, len(starts))
+                    runs.append([
+                        (starts[i], ids[i], ends[i], key) for i in range(position, stop)
+                    ])
+            merged = list(islice(heapq.merge(*runs), limit))
+
+        return [
+            {
+                "slot_id": slot_id,
+                "doctor_name": self._providers[key[0]],
+                "location": key[1],
+                "start_utc": start_utc,
+                "end_utc": end_utc
+            }
+            for start_utc, slot_id, end_utc, key in merged
+        ]
+
+    def get_stats(self) -> dict:
+        """Get slot index statistics for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "providers": len(self._providers),
+            "schedules": len(self._open),
+            "open_slots": len(self._slot_keys),
+            "searches": self.searches,
+            "refreshes": self.refreshes,
+            "changes_applied": self.changes_applied,
+            "load_ms": round(self.load_ms, 2)
+        }
+
+
+# Global slot index instance
+slot_index = SlotIndex(
+    enabled=settings.SLOT_INDEX_ENABLED,
+    refresh_seconds=settings.SLOT_INDEX_REFRESH_SECONDS
+)
@@ -0,0 +1,445 @@
+"""
+Natural-language date and time references for the LumaHealth Conversational AI Service.
+
+confirm_appointment, cancel_appointment and reschedule_appointment accept
+a reference the way patients say it ("next Tuesday afternoon", "amanhã às
+15h", "March 5th", "5 de março", "25/09"), so the model can pass the
+phrase through instead of working out the date itself; find_available_slots
+takes one as its "after" bound. A phrase is parsed once into a reference
+that does not depend on today's date (LRU-cached: patients repeat the same
+few phrases) and resolved against today on every call. Matching runs over
+a per-session index of the last listed appointments, sorted by start time
+and searched with bisect.
+
+Dates and times are compared as listed to the patient (UTC).
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .settings import settings
+
+# Sessions whose appointment index is kept between calls
+MAX_INDEXED_SESSIONS = 1024
+
+MONTHS = {
+    "january": 1, "jan": 1, "janeiro": 1,
+    "february": 2, "feb": 2, "fevereiro": 2, "fev": 2,
+    "march": 3, "mar": 3, "marco": 3,
+    "april": 4, "apr": 4, "abril": 4, "abr": 4,
+    "may": 5, "maio": 5, "mai": 5,
+    "june": 6, "jun": 6, "junho": 6,
+    "july": 7, "jul": 7, "julho": 7,
+    "august": 8, "aug": 8, "agosto": 8, "ago": 8,
+    "september": 9, "sep": 9, "sept": 9, "setembro": 9, "set": 9,
+    "october": 10, "oct": 10, "outubro": 10, "out": 10,
+    "november": 11, "nov": 11, "novembro": 11,
+    "december": 12, "dec": 12, "dezembro": 12, "dez": 12,
+}
+
+WEEKDAYS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6,
+    "segunda": 0, "terca": 1, "quarta": 2, "quinta": 3, "sexta": 4, "sabado": 5, "domingo": 6,
+}
+
+# Portuguese weekdays that are also ordinals ("a segunda consulta"): need "-feira", "que vem" or a preposition
+AMBIGUOUS_WEEKDAYS = {"segunda", "terca", "quarta", "quinta", "sexta"}
+
+# Time-of-day windows (inclusive)
+PERIODS = {
+    "morning": (time(6, 0), time(11, 59)), "manha": (time(6, 0), time(11, 59)),
+    "afternoon": (time(12, 0), time(17, 59)), "tarde": (time(12, 0), time(17, 59)),
+    "evening": (time(18, 0), time(23, 59)), "night": (time(18, 0), time(23, 59)),
+    "tonight": (time(18, 0), time(23, 59)), "noite": (time(18, 0), time(23, 59)),
+}
+
+
+def _alternation(words) -> str:
+    return "|".join(sorted(words, key=len, reverse=True))
+
+
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+SLASH_DATE = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2}|\d{4}))?\b")
+DAY_MONTH = re.compile(
+    rf"\b(\d{{1,2}})(?:st|nd|rd|th|o)?\s+(?:of\s+|de\s+)?({_alternation(MONTHS)})\b(?:,?\s+(?:de\s+)?(\d{{4}}))?"
+)
+MONTH_DAY = re.compile(rf"\b({_alternation(MONTHS)})\s+(\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(\d{{4}}))?")
+OFFSET_DAYS = re.compile(r"\b(?:in|em|daqui a)\s+(\d{1,3})\s+(?:days?|dias?)\b")
+RELATIVE_DAYS = [
+    (re.compile(r"\b(?:the\s+)?day\s+after\s+tomorrow\b|\bdepois\s+de\s+amanha\b"), 2),
+    (re.compile(r"\btomorrow\b|\bamanha\b"), 1),
+    (re.compile(r"\btoday\b|\bhoje\b|\btonight\b"), 0),
+]
+WEEKS = [
+    (re.compile(r"\bnext\s+week\b|\bproxima\s+semana\b|\bsemana\s+que\s+vem\b"), 1),
+    (re.compile(r"\bthis\s+week\b|\b(?:n?esta|essa)\s+semana\b"), 0),
+]
+NEXT_MONTH = re.compile(r"\bnext\s+month\b|\bproximo\s+mes\b|\bmes\s+que\s+vem\b")
+WEEKDAY = re.compile(
+    rf"\b(?:(next|this|on|proxim[ao]|n?est[ae]|n?ess[ae]|n[ao])\s+)?({_alternation(WEEKDAYS)})"
+    r"(-feira|\s+feira)?\b(\s+que\s+vem)?"
+)
+PERIOD = re.compile(rf"\b({_alternation(PERIODS)})\b")
+NOON = re.compile(r"\bnoon\b|\bmeio[\s-]dia\b")
+CLOCK_TIME = re.compile(r"\b(\d{1,2}):(\d{2})\s*(am|pm|a\.m\.|p\.m\.)?")
+HOUR_SUFFIX = re.compile(r"\b(\d{1,2})\s*h\s*(\d{2})?\b")
+HOUR_MERIDIEM = re.compile(r"\b(\d{1,2})\s*(am|pm|a\.m\.|p\.m\.)")
+AT_HOUR = re.compile(r"\b(?:at|as|a)\s+(\d{1,2})\b(?!\s*(?:/|-|\d|days?|dias?))")
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents ("Terça às 15h" -> "terca as 15h")."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def _valid_day(month: int, day: int, year: int = 2000) -> bool:
+    return 1 <= month <= 12 and 1 <= day <= monthrange(year, month)[1]
+
+
+@dataclass(frozen=True)
+class DateReference:
+    """
+    A parsed phrase, independent of today's date.
+
+    date_rule is one of ("date", y, m, d), ("month_day", m, d),
+    ("offset", days), ("weekday", weekday, strictly_after_today),
+    ("week", weeks_ahead) or ("month", months_ahead); None when only a time
+    was given. times are exact clock times (alternatives when "at 3" could
+    be 03:00 or 15:00); window is a time-of-day range.
+    """
+    date_rule: Optional[tuple] = None
+    times: Tuple[time, ...] = ()
+    window: Optional[Tuple[time, time]] = None
+
+    def date_range(self, today: date) -> Optional[Tuple[date, date]]:
+        """Inclusive date range this reference points at, or None for any date."""
+        rule = self.date_rule
+        if rule is None:
+            return None
+        kind = rule[0]
+        if kind == "date":
+            day = date(rule[1], rule[2], rule[3])
+            return day, day
+        if kind == "month_day":
+            year = today.year
+            while not _valid_day(rule[1], rule[2], year) or date(year, rule[1], rule[2]) < today:
+                year += 1
+            day = date(year, rule[1], rule[2])
+            return day, day
+        if kind == "offset":
+            day = today + timedelta(days=rule[1])
+            return day, day
+        if kind == "weekday":
+            ahead = (rule[1] - today.weekday()) % 7
+            if ahead == 0 and rule[2]:
+                ahead = 7
+            day = today + timedelta(days=ahead)
+            return day, day
+        if kind == "week":
+            monday = today - timedelta(days=today.weekday()) + timedelta(weeks=rule[1])
+            return max(monday, today), monday + timedelta(days=6)
+        if kind == "month":
+            year, month = divmod(today.month - 1 + rule[1], 12)
+            year, month = today.year + year, month + 1
+            return max(date(year, month, 1), today), date(year, month, monthrange(year, month)[1])
+        return None
+
+
+# A date was written but does not exist ("31/02"); the whole reference is rejected
+INVALID_DATE = ("invalid",)
+
+
+def _take(pattern: re.Pattern, text: str):
+    """First match of pattern and the text with it blanked out (so numbers are not reused)."""
+    match = pattern.search(text)
+    if not match:
+        return None, text
+    return match, text[:match.start()] + " " * (match.end() - match.start()) + text[match.end():]
+
+
+def _parse_date(text: str) -> Tuple[Optional[tuple], str]:
+    match, rest = _take(ISO_DATE, text)
+    if match:
+        year, month, day = (int(group) for group in match.groups())
+        return (("date", year, month, day) if _valid_day(month, day, year) else INVALID_DATE), rest
+
+    match, rest = _take(SLASH_DATE, text)
+    if match:
+        first, second = int(match.group(1)), int(match.group(2))
+        # Day first (pt-BR) unless that cannot be a date
+        day, month = (second, first) if first <= 12 < second else (first, second)
+        if match.group(3):
+            year = int(match.group(3))
+            year = year + 2000 if year < 100 else year
+            return (("date", year, month, day) if _valid_day(month, day, year) else INVALID_DATE), rest
+        return (("month_day", month, day) if _valid_day(month, day) else INVALID_DATE), rest
+
+    for pattern, day_group, month_group in ((DAY_MONTH, 1, 2), (MONTH_DAY, 2, 1)):
+        match, rest = _take(pattern, text)
+        if match:
+            day, month = int(match.group(day_group)), MONTHS[match.group(month_group)]
+            if match.group(3):
+                year = int(match.group(3))
+                return (("date", year, month, day) if _valid_day(month, day, year) else INVALID_DATE), rest
+            return (("month_day", month, day) if _valid_day(month, day) else INVALID_DATE), rest
+
+    match, rest = _take(OFFSET_DAYS, text)
+    if match:
+        return ("offset", int(match.group(1))), rest
+    for pattern, days in RELATIVE_DAYS:
+        match, rest = _take(pattern, text)
+        if match:
+            return ("offset", days), rest
+    for pattern, weeks in WEEKS:
+        match, rest = _take(pattern, text)
+        if match:
+            return ("week", weeks), rest
+    match, rest = _take(NEXT_MONTH, text)
+    if match:
+        return ("month", 1), rest
+
+    for match in WEEKDAY.finditer(text):
+        modifier, name, feira, que_vem = match.groups()
+        if name in AMBIGUOUS_WEEKDAYS and not (feira or modifier or que_vem):
+            continue
+        strict = bool(que_vem) or (modifier or "").startswith(("next", "proxim"))
+        rest = text[:match.start()] + " " * (match.end() - match.start()) + text[match.end():]
+        return ("weekday", WEEKDAYS[name], strict), rest
+
+    return None, text
+
+
+def _hour_options(hour: int, minute: int, meridiem: Optional[str], window: Optional[Tuple[time, time]],
+                  clock: bool) -> Tuple[time, ...]:
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return ()
+        hour = hour % 12 + (12 if meridiem.startswith("p") else 0)
+        return (time(hour, minute),)
+    if not 0 <= hour <= 23 or not 0 <= minute <= 59:
+        return ()
+    if clock or hour >= 12 or hour == 0:
+        # 24-hour notation ("10:30", "15h") means what it says
+        return (time(hour, minute),)
+    if window is not None:
+        # "at 3 in the afternoon"
+        options = [t for t in (time(hour, minute), time(hour + 12, minute)) if window[0] <= t <= window[1]]
+        return tuple(options) or (time(hour, minute),)
+    # "at 3": clinics rarely open at 3 a.m., but 8 (a.m.) and 8 (p.m.) are both plausible
+    return (time(hour, minute), time(hour + 12, minute))
+
+
+def _parse_time(text: str) -> Tuple[Tuple[time, ...], Optional[Tuple[time, time]]]:
+    window = None
+    match = PERIOD.search(text)
+    if match:
+        window = PERIODS[match.group(1)]
+    if NOON.search(text):
+        return (time(12, 0),), window
+
+    for pattern in (CLOCK_TIME, HOUR_SUFFIX, HOUR_MERIDIEM, AT_HOUR):
+        match = pattern.search(text)
+        if not match:
+            continue
+        groups = match.groups() + (None, None)
+        hour = int(groups[0])
+        minute = int(groups[1]) if pattern in (CLOCK_TIME, HOUR_SUFFIX) and groups[1] else 0
+        meridiem = groups[2] if pattern is CLOCK_TIME else groups[1] if pattern is HOUR_MERIDIEM else None
+        times = _hour_options(hour, minute, meridiem, window, clock=pattern in (CLOCK_TIME, HOUR_SUFFIX) and not meridiem)
+        if times:
+            return times, None
+    return (), window
+
+
+def parse_reference(text: str) -> Optional[DateReference]:
+    """Parse a date/time phrase (English or Portuguese); None if it names no date or time."""
+    folded = fold(text)
+    date_rule, rest = _parse_date(folded)
+    if date_rule == INVALID_DATE:
+        return None
+    times, window = _parse_time(rest)
+    if date_rule is None and not times and window is None:
+        return None
+    return DateReference(date_rule=date_rule, times=times, window=window)
+
+
+def _appointment_start(appointment: dict) -> Optional[datetime]:
+    """Start time of an appointment as listed (serialize_appointment or the simple list format)."""
+    try:
+        if appointment.get("datetime_utc"):
+            return datetime.fromisoformat(appointment["datetime_utc"]).replace(tzinfo=None)
+        return datetime.fromisoformat(f"{appointment['date']}T{appointment.get('time') or '00:00'}")
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class AppointmentDateIndex:
+    """A session's listed appointments sorted by start time, for bisect range lookups."""
+
+    def __init__(self, appointments: Sequence[dict]):
+        entries = sorted(
+            (start, appointment["id"])
+            for appointment in appointments
+            if appointment.get("id") is not None and (start := _appointment_start(appointment)) is not None
+        )
+        self.starts = [start for start, _ in entries]
+        self.ids = [appointment_id for _, appointment_id in entries]
+
+    def match(self, reference: DateReference, today: date) -> List[int]:
+        """IDs of the appointments the reference points at, in start order."""
+        date_range = reference.date_range(today)
+        if date_range is None:
+            low, high = 0, len(self.starts)
+        else:
+            low = bisect_left(self.starts, datetime.combine(date_range[0], time.min))
+            high = bisect_right(self.starts, datetime.combine(date_range[1], time.max))
+
+        matches = []
+        for i in range(low, high):
+            start = self.starts[i].time().replace(second=0, microsecond=0)
+            if reference.times and start not in reference.times:
+                continue
+            if reference.window and not reference.window[0] <= start <= reference.window[1]:
+                continue
+            matches.append(self.ids[i])
+        return matches
+
+
+class DateResolver:
+    """
+    Cached phrase parser plus per-session appointment indexes.
+
+    An index is reused while the session's listed appointments are
+    unchanged (same IDs and start times) and rebuilt when a new listing
+    replaces them.
+    """
+
+    def __init__(self, cache_size: int = 1024):
+        self._parse = lru_cache(maxsize=cache_size)(parse_reference)
+        # session_id -> (listed appointments, their count, fingerprint, index)
+        self._indexes: "OrderedDict[str, Tuple[Sequence[dict], int, tuple, AppointmentDateIndex]]" = OrderedDict()
+        self._lock = Lock()
+
+        # Counters
+        self.index_builds = 0
+        self.index_reuses = 0
+        self.resolved = 0
+        self.ambiguous = 0
+        self.unmatched = 0
+        self.unparsed = 0
+
+    def parse(self, text: str) -> Optional[DateReference]:
+        """Parse a phrase (cached)."""
+        return self._parse((text or "").strip())
+
+    def index_for(self, session_id: Optional[str], appointments: Sequence[dict]) -> AppointmentDateIndex:
+        """The session's appointment index, rebuilt only when its appointments changed."""
+        if session_id is None:
+            return AppointmentDateIndex(appointments)
+
+        with self._lock:
+            cached = self._indexes.get(session_id)
+            # Same list object (session state is reused between turns): skip the fingerprint
+            if cached is not None and cached[0] is appointments and cached[1] == len(appointments):
+                self._indexes.move_to_end(session_id)
+                self.index_reuses += 1
+                return cached[3]
+
+        fingerprint = tuple((a.get("id"), a.get("datetime_utc") or a.get("date"), a.get("time")) for a in appointments)
+        with self._lock:
+            if cached is not None and cached[2] == fingerprint:
+                self._indexes[session_id] = (appointments, len(appointments), fingerprint, cached[3])
+                self._indexes.move_to_end(session_id)
+                self.index_reuses += 1
+                return cached[3]
+
+        index = AppointmentDateIndex(appointments)
+        with self._lock:
+            self._indexes[session_id] = (appointments, len(appointments), fingerprint, index)
+            self._indexes.move_to_end(session_id)
+            while len(self._indexes) > MAX_INDEXED_SESSIONS:
+                self._indexes.popitem(last=False)
+            self.index_builds += 1
+        return index
+
+    def match(
+        self,
+        session_id: Optional[str],
+        appointments: Sequence[dict],
+        date_text: Optional[str],
+        time_text: Optional[str] = None,
+        today: Optional[date] = None
+    ) -> Optional[List[int]]:
+        """
+        IDs of listed appointments matching a date/time reference.
+
+        Returns None when the text names no date or time, [] when nothing
+        matches and several IDs when the reference is ambiguous.
+        """
+        reference = self.parse(" ".join(part for part in (date_text, time_text) if part))
+        if reference is None:
+            self.unparsed += 1
+            return None
+
+        matches = self.index_for(session_id, appointments).match(reference, today or datetime.utcnow().date())
+        if len(matches) == 1:
+            self.resolved += 1
+        elif matches:
+            self.ambiguous += 1
+        else:
+            self.unmatched += 1
+        return matches
+
+    def earliest(self, text: Optional[str], now: Optional[datetime] = None) -> Optional[datetime]:
+        """
+        First moment a phrase can refer to, for "slots after ..." searches.
+
+        "next Tuesday afternoon" -> Tuesday 12:00, "2026-11-03" -> that
+        midnight. Returns None when the text names no date or time.
+        """
+        if not text:
+            return None
+        try:
+            return datetime.fromisoformat(text.strip()).replace(tzinfo=None)
+        except ValueError:
+            pass
+        reference = self.parse(text)
+        if reference is None:
+            self.unparsed += 1
+            return None
+
+        now = now or datetime.utcnow()
+        date_range = reference.date_range(now.date())
+        day = date_range[0] if date_range else now.date()
+        if reference.times:
+            return datetime.combine(day, min(reference.times))
+        return datetime.combine(day, reference.window[0] if reference.window else time.min)
+
+    def get_stats(self) -> Dict[str, object]:
+        """Get resolver statistics for monitoring."""
+        cache = self._parse.cache_info()
+        return {
+            "parse_cache_hits": cache.hits,
+            "parse_cache_misses": cache.misses,
+            "parse_cache_size": cache.currsize,
+            "indexed_sessions": len(self._indexes),
+            "index_builds": self.index_builds,
+            "index_reuses": self.index_reuses,
+            "resolved": self.resolved,
+            "ambiguous": self.ambiguous,
+            "unmatched": self.unmatched,
+            "unparsed": self.unparsed
+        }
+
+
+# Global date resolver instance
+date_resolver = DateResolver(cache_size=settings.DATE_RESOLVER_CACHE_SIZE)
@@ -5,12 +5,18 @@ This module handles SQLite database initialization, session management,
 and provides CRUD operations for patients and appointments.
 """
 
+import base64
+import heapq
 import os
-import re
 from datetime import datetime, timedelta
-from typing import List, Optional
-from sqlmodel import SQLModel, create_engine, Session, select
-from .models import Patient, Appointment, AppointmentStatus
+from itertools import islice
+from typing import List, Optional, Tuple
+from sqlalchemy import bindparam, inspect, or_, text, tuple_
+from sqlmodel import SQLModel, create_engine, Session, select, update
+from .audit import audit_log
+from .availability import name_matches, place_matches, slot_index
+from .models import Patient, Appointment, AppointmentArchive, AppointmentStatus, Provider, Slot
+from .patient_index import patient_lookup_index
 from .settings import settings
 
 
@@ -18,10 +24,83 @@ from .settings import settings
 DATABASE_URL = settings.DATABASE_URL
 engine = create_engine(DATABASE_URL, echo=settings.DB_ECHO)
 
+# Archived appointments live in the main database unless ARCHIVE_DATABASE_URL points elsewhere
+archive_engine = (
+    create_engine(settings.ARCHIVE_DATABASE_URL, echo=settings.DB_ECHO)
+    if settings.ARCHIVE_DATABASE_URL else engine
+)
+
 
 def create_db_and_tables():
     """Create database tables if they don't exist."""
-    SQLModel.metadata.create_all(engine)
+    archive_table = AppointmentArchive.__table__
+    hot_tables = [table for table in SQLModel.metadata.sorted_tables if table is not archive_table]
+    
+    SQLModel.metadata.create_all(engine, tables=hot_tables)
+    SQLModel.metadata.create_all(archive_engine, tables=[archive_table])
+    _ensure_columns(engine, hot_tables)
+    _ensure_indexes(engine, hot_tables)
+    _ensure_indexes(archive_engine, [archive_table])
+    backfill_lookup_keys(engine)
+
+
+def _ensure_columns(bind, tables):
+    """Add nullable columns added after a database was first created (create_all skips existing tables)."""
+    inspector = inspect(bind)
+    for table in tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(dialect=bind.dialect)
+                with bind.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+def backfill_lookup_keys(bind, batch_size: int = 1000) -> int:
+    """
+    Fill in Patient.lookup_key and name_normalized where missing; returns the number of rows updated.
+    
+    If VERIFICATION_LOOKUP_SECRET or the name normalization changed since the
+    keys were written, every key is recomputed.
+    """
+    with Session(bind) as session:
+        sample = session.exec(select(Patient).where(Patient.lookup_key.is_not(None)).limit(1)).first()
+        rebuild = sample is not None and sample.lookup_key != Patient.make_lookup_key(
+            sample.full_name, sample.dob, sample.phone_hash
+        )
+        
+        set_key = (
+            update(Patient)
+            .where(Patient.id == bindparam("patient_id"))
+            .values(lookup_key=bindparam("new_lookup_key"), name_normalized=bindparam("new_name_normalized"))
+        )
+        updated, last_id = 0, 0
+        while True:
+            statement = select(Patient.id, Patient.full_name, Patient.dob, Patient.phone_hash).where(Patient.id > last_id)
+            if not rebuild:
+                statement = statement.where(or_(Patient.lookup_key.is_(None), Patient.name_normalized.is_(None)))
+            rows = session.exec(statement.order_by(Patient.id).limit(batch_size)).all()
+            if not rows:
+                break
+            session.connection().execute(set_key, [
+                {
+                    "patient_id": patient_id,
+                    "new_lookup_key": Patient.make_lookup_key(full_name, dob, phone_hash),
+                    "new_name_normalized": Patient.normalize_name(full_name)
+                }
+                for patient_id, full_name, dob, phone_hash in rows
+            ])
+            session.commit()
+            updated += len(rows)
+            last_id = rows[-1][0]
+    return updated
+
+
+def _ensure_indexes(bind, tables):
+    """Create indexes added after a database was first created (create_all skips existing tables)."""
+    for table in tables:
+        for index in table.indexes:
+            index.create(bind, checkfirst=True)
 
 
 def get_session():
@@ -30,6 +109,69 @@ def get_session():
         yield session
 
 
+def encode_cursor(when_utc: datetime, appointment_id: int) -> str:
+    """Opaque keyset cursor for the position after an appointment in (when_utc, id) order."""
+    raw = f"{when_utc.isoformat()}|{appointment_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor made by encode_cursor; raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        when_utc, appointment_id = raw.split("|")
+        return datetime.fromisoformat(when_utc), int(appointment_id)
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _parse_date_bound(value: str, end: bool) -> datetime:
+    """Parse YYYY-MM-DD or an ISO datetime; a bare end date includes that whole day."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError as e:
+        raise ValueError(f"Invalid date: {value} (expected YYYY-MM-DD)") from e
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed.replace(tzinfo=None)
+
+
+def resolve_appointment_filters(
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: Optional[int] = None,
+    upcoming_by_default: bool = True
+) -> dict:
+    """
+    Turn list filters into AppointmentCRUD.list_by_patient_id arguments.
+    
+    With no dates the window starts now, and with no status only pending
+    and confirmed appointments are listed, so the default is "upcoming"
+    (pass upcoming_by_default=False for history, where the default is
+    everything). status is a comma-separated list of statuses, or "all".
+    limit is clamped to APPOINTMENTS_MAX_PAGE_SIZE.
+    """
+    start = _parse_date_bound(from_date, end=False) if from_date else None
+    end = _parse_date_bound(to_date, end=True) if to_date else None
+    if start is None and end is None and upcoming_by_default:
+        start = datetime.utcnow()
+    
+    if not status:
+        statuses = [AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED] if upcoming_by_default else None
+    elif status.strip().lower() == "all":
+        statuses = None
+    else:
+        try:
+            statuses = [AppointmentStatus(s.strip().upper()) for s in status.split(",") if s.strip()]
+        except ValueError as e:
+            raise ValueError(f"Invalid status: {status} (expected pending, confirmed, cancelled or all)") from e
+    
+    limit = max(1, min(limit or settings.APPOINTMENTS_PAGE_SIZE, settings.APPOINTMENTS_MAX_PAGE_SIZE))
+    
+    return {"start": start, "end": end, "statuses": statuses, "limit": limit}
+
+
 # CRUD Operations
 class PatientCRUD:
     """CRUD operations for Patient model."""
@@ -42,11 +184,17 @@ class PatientCRUD:
     
     @staticmethod
     def get_by_name_and_dob(session: Session, full_name: str, dob: str) -> Optional[Patient]:
-        """Get patient by full name and date of birth."""
-        statement = select(Patient).where(
-            Patient.full_name == full_name,
-            Patient.dob == dob
-        )
+        """Get patient by full name and date of birth.
+        
+        Names are compared normalized (accents, case, spaces) unless
+        PATIENT_NAME_MATCH is "exact". Without a phone there is no fuzzy
+        fallback: a typo in the name is not enough to tell patients apart.
+        """
+        if settings.PATIENT_NAME_MATCH == "exact":
+            name_filter = Patient.full_name == full_name
+        else:
+            name_filter = Patient.name_normalized == Patient.normalize_name(full_name)
+        statement = select(Patient).where(Patient.dob == dob, name_filter)
         return session.exec(statement).first()
     
     @staticmethod
@@ -54,34 +202,82 @@ class PatientCRUD:
         """Get patient by full name, date of birth, and phone number.
 
         Note: We store only the phone hash (PII protection). So we must
-        normalize and hash the provided phone before querying.
+        normalize and hash the provided phone, then match on the lookup key.
         """
-        # Normalize phone (remove spaces, dashes, parentheses)
-        phone_clean = re.sub(r"[\s\-\(\)]", "", phone or "")
-        phone_hash = Patient.hash_phone(phone_clean)
-
-        statement = select(Patient).where(
-            Patient.full_name == full_name,
-            Patient.dob == dob,
-            Patient.phone_hash == phone_hash
-        )
+        phone_hash = Patient.hash_phone(Patient.normalize_phone(phone))
+        patient = PatientCRUD.get_by_lookup_key(session, Patient.make_lookup_key(full_name, dob, phone_hash))
+        
+        if settings.PATIENT_NAME_MATCH == "exact":
+            return patient if patient is not None and patient.full_name == full_name else None
+        if patient is None and settings.PATIENT_NAME_MATCH == "fuzzy":
+            patient = PatientCRUD.find_by_similar_name(session, full_name, dob, phone_hash)
+        return patient
+    
+    @staticmethod
+    def find_by_similar_name(session: Session, full_name: str, dob: str, phone_hash: str) -> Optional[Patient]:
+        """Patient with this exact DOB and phone whose name is within PATIENT_NAME_MIN_SIMILARITY.
+        
+        Candidates come from the phone hash index, so this is one indexed
+        query, and none when the lookup index knows no such contact.
+        """
+        if not patient_lookup_index.may_know_contact(dob, phone_hash):
+            return None
+        
+        name = Patient.normalize_name(full_name)
+        statement = select(Patient).where(Patient.phone_hash == phone_hash, Patient.dob == dob)
+        best, best_score = None, settings.PATIENT_NAME_MIN_SIMILARITY
+        for candidate in session.exec(statement).all():
+            score = Patient.name_similarity(name, candidate.name_normalized or Patient.normalize_name(candidate.full_name))
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+    
+    @staticmethod
+    def get_by_lookup_key(session: Session, lookup_key: str) -> Optional[Patient]:
+        """Get patient by verification lookup key.
+        
+        With the in-memory index loaded, unknown keys return None without a
+        query and known keys are fetched by primary key.
+        """
+        if patient_lookup_index.ready:
+            patient_lookup_index.refresh_if_stale(session.get_bind())
+            present, patient_id = patient_lookup_index.lookup(lookup_key)
+            if not present:
+                return None
+            if patient_id is not None:
+                patient = session.get(Patient, patient_id)
+                if patient is not None and patient.lookup_key == lookup_key:
+                    return patient
+        
+        statement = select(Patient).where(Patient.lookup_key == lookup_key)
         return session.exec(statement).first()
     
     @staticmethod
     def create(session: Session, full_name: str, dob: str, phone: str) -> Patient:
         """Create a new patient."""
-        phone_hash = Patient.hash_phone(phone)
+        phone_hash = Patient.hash_phone(Patient.normalize_phone(phone))
         patient = Patient(
             full_name=full_name,
             dob=dob,
-            phone_hash=phone_hash
+            phone_hash=phone_hash,
+            name_normalized=Patient.normalize_name(full_name),
+            lookup_key=Patient.make_lookup_key(full_name, dob, phone_hash)
         )
         session.add(patient)
         session.commit()
         session.refresh(patient)
+        patient_lookup_index.add(patient)
         return patient
 
 
+# Statuses an appointment may move from into each target status; CANCELLED is final
+# (its slot may already be booked again), and reschedule refuses it too
+ALLOWED_TRANSITIONS = {
+    AppointmentStatus.CONFIRMED: (AppointmentStatus.PENDING,),
+    AppointmentStatus.CANCELLED: (AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED)
+}
+
+
 class AppointmentCRUD:
     """CRUD operations for Appointment model."""
     
@@ -93,6 +289,25 @@ class AppointmentCRUD:
         ).order_by(Appointment.when_utc)
         return list(session.exec(statement).all())
     
+    @staticmethod
+    def list_by_patient_id(
+        session: Session,
+        patient_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        statuses: Optional[List[AppointmentStatus]] = None,
+        cursor: Optional[str] = None,
+        limit: int = 10
+    ) -> Tuple[List[Appointment], Optional[str]]:
+        """Get one page of a patient's appointments in (when_utc, id) order.
+        
+        Filters are start <= when_utc < end and status in statuses. Pages
+        use keyset pagination: cursor is the next_cursor of the previous
+        page, so deep pages cost the same as the first one. Returns the
+        page and the cursor for the next page (None on the last page).
+        """
+        return _list_page(Appointment, session, patient_id, start, end, statuses, cursor, limit)
+    
     @staticmethod
     def get_pending_by_patient_id(session: Session, patient_id: int) -> List[Appointment]:
         """Get pending appointments for a patient."""
@@ -108,28 +323,72 @@ class AppointmentCRUD:
         return session.get(Appointment, appointment_id)
     
     @staticmethod
-    def confirm_appointment(session: Session, appointment_id: int, patient_id: int) -> Optional[Appointment]:
-        """Confirm an appointment."""
-        appointment = session.get(Appointment, appointment_id)
-        if appointment and appointment.patient_id == patient_id:
-            appointment.status = AppointmentStatus.CONFIRMED
-            appointment.updated_at = datetime.utcnow()
-            session.commit()
-            session.refresh(appointment)
-            return appointment
-        return None
+    def confirm_appointment(
+        session: Session, appointment_id: int, patient_id: int
+    ) -> Tuple[Optional[Appointment], Optional[str]]:
+        """Confirm a pending appointment; returns (appointment, None) or (None, reason)."""
+        return AppointmentCRUD._transition_status(
+            session, appointment_id, patient_id, AppointmentStatus.CONFIRMED
+        )
     
     @staticmethod
-    def cancel_appointment(session: Session, appointment_id: int, patient_id: int) -> Optional[Appointment]:
-        """Cancel an appointment."""
-        appointment = session.get(Appointment, appointment_id)
-        if appointment and appointment.patient_id == patient_id:
-            appointment.status = AppointmentStatus.CANCELLED
-            appointment.updated_at = datetime.utcnow()
+    def cancel_appointment(
+        session: Session, appointment_id: int, patient_id: int
+    ) -> Tuple[Optional[Appointment], Optional[str]]:
+        """Cancel an appointment; returns (appointment, None) or (None, reason)."""
+        return AppointmentCRUD._transition_status(
+            session, appointment_id, patient_id, AppointmentStatus.CANCELLED
+        )
+    
+    @staticmethod
+    def _transition_status(
+        session: Session, appointment_id: int, patient_id: int, target: AppointmentStatus
+    ) -> Tuple[Optional[Appointment], Optional[str]]:
+        """Move an appointment to a target status with a conditional update.
+
+        The UPDATE only matches rows in a status the target may follow
+        (ALLOWED_TRANSITIONS), so repeating a transition (e.g. a retried
+        confirm) does not write to the database at all, and a cancelled
+        appointment, whose slot may already belong to someone else, is
+        never confirmed again. Cancelling also frees the appointment's
+        schedule slot in the same transaction. A transition that changed
+        the row is queued for the audit log after it commits. Returns
+        (appointment, None) when the appointment is in the target status
+        afterwards, else (None, reason) with reason one of not_found,
+        cancelled.
+        """
+        now = datetime.utcnow()
+        statement = (
+            update(Appointment)
+            .where(
+                Appointment.id == appointment_id,
+                Appointment.patient_id == patient_id,
+                Appointment.status.in_(ALLOWED_TRANSITIONS[target])
+            )
+            .values(status=target, updated_at=now)
+        )
+        result = session.exec(statement)
+        changed = bool(result.rowcount)
+        released = []
+        if changed:
+            if target == AppointmentStatus.CANCELLED:
+                released = SlotCRUD.release(session, appointment_id)
             session.commit()
-            session.refresh(appointment)
-            return appointment
-        return None
+        else:
+            session.rollback()
+        SlotCRUD.notify_index(session, released)
+        
+        appointment = session.get(Appointment, appointment_id, populate_existing=True)
+        if not appointment or appointment.patient_id != patient_id:
+            return None, "not_found"
+        if changed:
+            audit_log.record(
+                session, appointment_id, patient_id, target.value.lower(), target, appointment.when_utc, now
+            )
+        if appointment.status != target:
+            # Only a cancelled appointment can fail to reach CONFIRMED or CANCELLED
+            return None, "cancelled"
+        return appointment, None
     
     @staticmethod
     def create(session: Session, patient_id: int, when_utc: datetime, 
@@ -144,7 +403,331 @@ class AppointmentCRUD:
         session.add(appointment)
         session.commit()
         session.refresh(appointment)
+        audit_log.record(
+            session, appointment.id, patient_id, "created", appointment.status, appointment.when_utc, appointment.updated_at
+        )
         return appointment
+    
+    @staticmethod
+    def reschedule(
+        session: Session, appointment_id: int, patient_id: int, slot_id: int
+    ) -> Tuple[Optional[Appointment], Optional[str]]:
+        """Move an appointment into an open slot, atomically.
+
+        One transaction claims the slot with a conditional UPDATE (only
+        while appointment_id IS NULL), moves the appointment and frees
+        its previous slot. Of two racing reschedules into the same slot
+        exactly one claim matches a row; the other rolls back. Returns
+        (appointment, None) or (None, reason) with reason one of
+        not_found, cancelled, slot_not_found, slot_in_past, slot_taken.
+        """
+        now = datetime.utcnow()
+        appointment = session.get(Appointment, appointment_id)
+        if not appointment or appointment.patient_id != patient_id:
+            return None, "not_found"
+        if appointment.status == AppointmentStatus.CANCELLED:
+            return None, "cancelled"
+        
+        slot = session.get(Slot, slot_id)
+        if not slot:
+            return None, "slot_not_found"
+        if slot.appointment_id == appointment_id:
+            # Retried reschedule: the appointment already holds this slot
+            return appointment, None
+        if slot.start_utc <= now:
+            return None, "slot_in_past"
+        provider = session.get(Provider, slot.provider_id)
+        previous_when_utc = appointment.when_utc
+        
+        claimed = session.exec(
+            update(Slot)
+            .where(Slot.id == slot_id, Slot.appointment_id.is_(None))
+            .values(appointment_id=appointment_id, updated_at=now)
+        )
+        if not claimed.rowcount:
+            session.rollback()
+            SlotCRUD.notify_index(session, [slot_id])
+            return None, "slot_taken"
+        
+        moved = session.exec(
+            update(Appointment)
+            .where(
+                Appointment.id == appointment_id,
+                Appointment.patient_id == patient_id,
+                Appointment.status != AppointmentStatus.CANCELLED
+            )
+            .values(
+                when_utc=slot.start_utc,
+                location=slot.location,
+                doctor_name=provider.name if provider else appointment.doctor_name,
+                status=AppointmentStatus.PENDING,
+                reminder_sent_at=None,
+                updated_at=now
+            )
+        )
+        if not moved.rowcount:
+            # Cancelled between the read above and the claim
+            session.rollback()
+            return None, "cancelled"
+        
+        released = SlotCRUD.release(session, appointment_id, keep_slot_id=slot_id)
+        session.commit()
+        SlotCRUD.notify_index(session, released + [slot_id])
+        audit_log.record(
+            session, appointment_id, patient_id, "rescheduled", AppointmentStatus.PENDING, slot.start_utc, now,
+            previous_when_utc=previous_when_utc, slot_id=slot_id
+        )
+        
+        return session.get(Appointment, appointment_id, populate_existing=True), None
+
+
+class SlotCRUD:
+    """CRUD operations for Provider and Slot models (provider schedules)."""
+    
+    @staticmethod
+    def get_or_create_provider(session: Session, name: str) -> Provider:
+        """Get a provider by name, creating it if needed."""
+        provider = session.exec(select(Provider).where(Provider.name == name)).first()
+        if provider:
+            return provider
+        provider = Provider(name=name)
+        session.add(provider)
+        session.commit()
+        session.refresh(provider)
+        slot_index.add_provider(provider)
+        return provider
+    
+    @staticmethod
+    def generate_schedule(
+        session: Session,
+        provider: Provider,
+        location: str,
+        start_date: datetime,
+        days: int,
+        slot_minutes: int = settings.SLOT_DURATION_MINUTES,
+        day_start_hour: int = 9,
+        day_end_hour: int = 17
+    ) -> int:
+        """Create weekday slots for a provider at a location; returns the number created.
+
+        Existing starts for the provider (at any location) are skipped, so
+        running it again over an overlapping range is safe.
+        """
+        now = datetime.utcnow()
+        first_day = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        existing = set(session.exec(
+            select(Slot.start_utc).where(
+                Slot.provider_id == provider.id,
+                Slot.start_utc >= first_day,
+                Slot.start_utc < first_day + timedelta(days=days)
+            )
+        ).all())
+        
+        rows = []
+        for day in range(days):
+            date = first_day + timedelta(days=day)
+            if date.weekday() >= 5:
+                continue
+            start = date.replace(hour=day_start_hour)
+            while start + timedelta(minutes=slot_minutes) <= date.replace(hour=day_end_hour):
+                if start > now and start not in existing:
+                    rows.append({
+                        "provider_id": provider.id,
+                        "location": location,
+                        "start_utc": start,
+                        "end_utc": start + timedelta(minutes=slot_minutes),
+                        "updated_at": now
+                    })
+                start += timedelta(minutes=slot_minutes)
+        
+        if rows:
+            session.execute(Slot.__table__.insert(), rows)
+            session.commit()
+            if slot_index.ready:
+                slot_index.apply_rows(session.exec(
+                    slot_index.columns().where(Slot.provider_id == provider.id, Slot.updated_at >= now)
+                ).all())
+        return len(rows)
+    
+    @staticmethod
+    def link_appointments(session: Session) -> int:
+        """Attach upcoming appointments to the slot at their doctor and time; returns the number linked."""
+        now = datetime.utcnow()
+        providers = {provider.name: provider.id for provider in session.exec(select(Provider)).all()}
+        appointments = session.exec(
+            select(Appointment).where(
+                Appointment.when_utc > now,
+                Appointment.status != AppointmentStatus.CANCELLED
+            )
+        ).all()
+        
+        linked = []
+        for appointment in appointments:
+            provider_id = providers.get(appointment.doctor_name)
+            if provider_id is None:
+                continue
+            result = session.exec(
+                update(Slot)
+                .where(
+                    Slot.provider_id == provider_id,
+                    Slot.start_utc == appointment.when_utc,
+                    Slot.appointment_id.is_(None)
+                )
+                .values(appointment_id=appointment.id, updated_at=now)
+            )
+            if result.rowcount:
+                linked.append(appointment.id)
+        session.commit()
+        if linked:
+            SlotCRUD.notify_index(session, session.exec(select(Slot.id).where(Slot.appointment_id.in_(linked))).all())
+        return len(linked)
+    
+    @staticmethod
+    def find_open(
+        session: Session,
+        doctor: Optional[str] = None,
+        location: Optional[str] = None,
+        after: Optional[datetime] = None,
+        limit: int = settings.SLOT_SEARCH_LIMIT
+    ) -> List[dict]:
+        """Next open slots for a doctor/location after a time, from the slot index when it is loaded."""
+        if slot_index.ready:
+            slot_index.refresh_if_stale(session)
+            return slot_index.find(doctor, location, after, limit)
+        return SlotCRUD.find_open_in_db(session, doctor, location, after, limit)
+    
+    @staticmethod
+    def alternatives(session: Session, slot_id: int, limit: int = settings.SLOT_SEARCH_LIMIT) -> List[dict]:
+        """Open slots on the same schedule after a slot (offered when a reschedule loses the race for it)."""
+        slot = session.get(Slot, slot_id)
+        provider = session.get(Provider, slot.provider_id) if slot else None
+        if not provider:
+            return []
+        return [
+            open_slot for open_slot in SlotCRUD.find_open(session, provider.name, slot.location, slot.start_utc, limit + 1)
+            if open_slot["slot_id"] != slot_id
+        ][:limit]
+    
+    @staticmethod
+    def find_open_in_db(
+        session: Session,
+        doctor: Optional[str] = None,
+        location: Optional[str] = None,
+        after: Optional[datetime] = None,
+        limit: int = settings.SLOT_SEARCH_LIMIT
+    ) -> List[dict]:
+        """Same search as SlotIndex.find, as queries (used before the index is loaded)."""
+        after = max(after or datetime.min, datetime.utcnow())
+        providers = {
+            provider.id: provider.name
+            for provider in session.exec(select(Provider)).all()
+            if name_matches(provider.name, doctor)
+        }
+        if not providers:
+            return []
+        
+        schedules = [
+            (provider_id, place)
+            for provider_id, place in session.exec(
+                select(Slot.provider_id, Slot.location)
+                .where(Slot.provider_id.in_(providers), Slot.start_utc >= after)
+                .distinct()
+            ).all()
+            if place_matches(place, location)
+        ]
+        if not schedules:
+            return []
+        
+        open_after = (Slot.start_utc >= after, Slot.appointment_id.is_(None))
+        if len(schedules) <= 16:
+            # One indexed (provider_id, location, start_utc) range per schedule, merged like the slot index
+            rows = list(islice(heapq.merge(*[
+                session.exec(
+                    select(Slot)
+                    .where(Slot.provider_id == provider_id, Slot.location == place, *open_after)
+                    .order_by(Slot.start_utc)
+                    .limit(limit)
+                ).all()
+                for provider_id, place in schedules
+            ], key=lambda slot: (slot.start_utc, slot.id)), limit))
+        else:
+            rows = session.exec(
+                select(Slot)
+                .where(tuple_(Slot.provider_id, Slot.location).in_(schedules), *open_after)
+                .order_by(Slot.start_utc, Slot.id)
+                .limit(limit)
+            ).all()
+        return [
+            {
+                "slot_id": slot.id,
+                "doctor_name": providers[slot.provider_id],
+                "location": slot.location,
+                "start_utc": slot.start_utc,
+                "end_utc": slot.end_utc
+            }
+            for slot in rows
+        ]
+    
+    @staticmethod
+    def release(session: Session, appointment_id: int, keep_slot_id: Optional[int] = None) -> List[int]:
+        """Free the slots held by an appointment (inside the caller's transaction); returns their IDs."""
+        statement = select(Slot.id).where(Slot.appointment_id == appointment_id)
+        if keep_slot_id is not None:
+            statement = statement.where(Slot.id != keep_slot_id)
+        slot_ids = list(session.exec(statement).all())
+        if slot_ids:
+            session.exec(
+                update(Slot)
+                .where(Slot.id.in_(slot_ids), Slot.appointment_id == appointment_id)
+                .values(appointment_id=None, updated_at=datetime.utcnow())
+            )
+        return slot_ids
+    
+    @staticmethod
+    def notify_index(session: Session, slot_ids: List[int]) -> None:
+        """Apply committed slot changes to this process's slot index."""
+        if slot_ids and slot_index.ready:
+            slot_index.apply_rows(session.exec(slot_index.columns().where(Slot.id.in_(slot_ids))).all())
+
+
+class AppointmentArchiveCRUD:
+    """Read operations for archived appointments (use a Session on archive_engine)."""
+    
+    @staticmethod
+    def list_by_patient_id(
+        session: Session,
+        patient_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        statuses: Optional[List[AppointmentStatus]] = None,
+        cursor: Optional[str] = None,
+        limit: int = 10
+    ) -> Tuple[List[AppointmentArchive], Optional[str]]:
+        """Get one page of a patient's archived appointments (see AppointmentCRUD.list_by_patient_id)."""
+        return _list_page(AppointmentArchive, session, patient_id, start, end, statuses, cursor, limit)
+
+
+def _list_page(model, session, patient_id, start, end, statuses, cursor, limit) -> tuple:
+    """Keyset-paginated, filtered listing shared by the hot and archive tables."""
+    statement = select(model).where(model.patient_id == patient_id)
+    if start is not None:
+        statement = statement.where(model.when_utc >= start)
+    if end is not None:
+        statement = statement.where(model.when_utc < end)
+    if statuses:
+        statement = statement.where(model.status.in_(statuses))
+    if cursor:
+        after_when, after_id = decode_cursor(cursor)
+        statement = statement.where(tuple_(model.when_utc, model.id) > (after_when, after_id))
+    
+    # Fetch one extra row to learn whether another page exists
+    statement = statement.order_by(model.when_utc, model.id).limit(limit + 1)
+    rows = list(session.exec(statement).all())
+    
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].when_utc, rows[-1].id)
+    return rows, None
 
 
 def seed_database():
@@ -199,6 +782,16 @@ def seed_database():
             doctor_name="Dr. Pedro Lima"
         )
         
+        # Two weeks of open slots for each doctor, with the appointments above in theirs
+        for doctor_name, location in [
+            ("Dr. Carlos Mendes", "Clínica Central - Sala 201"),
+            ("Dra. Ana Rodrigues", "Hospital São Paulo - Consultório 15"),
+            ("Dr. Pedro Lima", "Clínica Central - Sala 105")
+        ]:
+            provider = SlotCRUD.get_or_create_provider(session, doctor_name)
+            SlotCRUD.generate_schedule(session, provider, location, datetime.utcnow(), days=14)
+        SlotCRUD.link_appointments(session)
+        
         print("Database seeded successfully!")
 
 
@@ -0,0 +1,260 @@
+"""
+Streaming report exports for the LumaHealth Conversational AI Service.
+
+Appointments (filtered by date, status, location and doctor) and the
+in-memory request/security metrics are exported as CSV or NDJSON for
+operations staff, instead of ad-hoc SQL against the database.
+
+Rows are read in keyset chunks on the primary key, each chunk in its own
+short read, and encoded one chunk at a time. The export is an async
+generator behind a StreamingResponse, which awaits every send: the next
+chunk is only read once the previous one has been handed to a client
+that is keeping up. Memory therefore stays at about one chunk however
+many rows are exported, and a slow client slows the export down instead
+of piling rows up in the server. A request reserves one of
+EXPORT_MAX_CONCURRENT slots before its response starts; the slot is given
+back when the stream ends, or when the response closes if the stream never
+started.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import String, literal_column, type_coerce
+from sqlmodel import select
+
+from .models import AppointmentStatus
+from .observability import setup_logging
+from .settings import settings
+
+# Setup logging
+logger = setup_logging()
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson"
+}
+
+# Appointment columns in export order (patient details are left out: only patient_id)
+APPOINTMENT_EXPORT_COLUMNS = (
+    "id", "patient_id", "when_utc", "status", "doctor_name", "location",
+    "reminder_sent_at", "created_at", "updated_at"
+)
+
+METRIC_EXPORT_COLUMNS = ("section", "metric", "value")
+
+
+class ExportBusy(Exception):
+    """Raised when EXPORT_MAX_CONCURRENT exports are already streaming."""
+
+
+class ExportSlot:
+    """A reserved concurrent-export slot; release() may be called more than once."""
+
+    def __init__(self, exporter: "AppointmentExporter"):
+        self._exporter = exporter
+        self.released = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self._exporter._active -= 1
+
+
+class ExportResponse(StreamingResponse):
+    """StreamingResponse that releases its export slot when it closes, even if the stream never started."""
+
+    def __init__(self, content: AsyncIterator[bytes], slot: ExportSlot, **kwargs):
+        super().__init__(content, **kwargs)
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.slot.release()
+
+
+def encode_rows(rows: Sequence[Sequence[Any]], columns: Sequence[str], fmt: str, header: bool = False) -> bytes:
+    """Encode one chunk of rows as CSV (optionally with the header line) or NDJSON."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if header:
+            writer.writerow(columns)
+        writer.writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+    return "".join(
+        json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n" for row in rows
+    ).encode("utf-8")
+
+
+def _flatten(prefix: str, value: Any) -> Iterable[Tuple[str, Any]]:
+    """Dotted (name, value) pairs for the scalars in nested dicts; lists are skipped."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(f"{prefix}.{key}" if prefix else str(key), item)
+    elif not isinstance(value, (list, tuple)):
+        yield prefix, value
+
+
+def metric_rows(sections: Dict[str, dict]) -> List[Tuple[str, str, Any]]:
+    """(section, metric, value) rows for metric summaries, e.g. {"requests": metrics.get_metrics()}."""
+    return [
+        (section, name, value)
+        for section, summary in sections.items()
+        for name, value in _flatten("", summary)
+    ]
+
+
+def violation_counts(violations: Iterable[Any]) -> Dict[str, Dict[str, int]]:
+    """Security violation counts by type and severity."""
+    counts: Dict[str, Dict[str, int]] = {}
+    for violation in violations:
+        by_severity = counts.setdefault(violation.violation_type, {})
+        by_severity[violation.severity] = by_severity.get(violation.severity, 0) + 1
+    return counts
+
+
+class AppointmentExporter:
+    """
+    Chunked, back-pressured appointment exports.
+
+    Works on any table shaped like Appointment (AppointmentArchive for
+    archived history); columns the table lacks are left out.
+    """
+
+    def __init__(self, chunk_size: int = 2000, max_concurrent: int = 2):
+        self.chunk_size = chunk_size
+        self.max_concurrent = max_concurrent
+        self._active = 0
+
+        # Counters
+        self.exports_started = 0
+        self.exports_completed = 0
+        self.exports_aborted = 0
+        self.rows_exported = 0
+        self.bytes_exported = 0
+        self.chunks_read = 0
+
+    @staticmethod
+    def columns_for(model) -> Tuple[str, ...]:
+        return tuple(name for name in APPOINTMENT_EXPORT_COLUMNS if name in model.__table__.c)
+
+    def _fetch_chunk(
+        self,
+        engine,
+        model,
+        columns: Sequence[str],
+        start: Optional[datetime],
+        end: Optional[datetime],
+        statuses: Optional[List[AppointmentStatus]],
+        location: Optional[str],
+        doctor: Optional[str],
+        after_id: int
+    ) -> Sequence[tuple]:
+        """The next chunk of matching rows after a primary key."""
+        # Untyped columns: values come back as stored (datetimes as "YYYY-MM-DD HH:MM:SS.ffffff" text on
+        # SQLite, statuses as their names), skipping per-value conversion for every exported row
+        statement = select(*[type_coerce(getattr(model, name), String) for name in columns]).where(model.id > after_id)
+        if start is not None:
+            statement = statement.where(model.when_utc >= start)
+        if end is not None:
+            statement = statement.where(model.when_utc < end)
+        if statuses:
+            # On SQLite "+status" keeps the planner on the primary-key walk; through the status
+            # index it would sort every matching row again for each chunk
+            status = literal_column(f"+{model.__tablename__}.status") if engine.dialect.name == "sqlite" else model.status
+            statement = statement.where(status.in_([value.value for value in statuses]))
+        if location:
+            statement = statement.where(model.location.contains(location, autoescape=True))
+        if doctor:
+            statement = statement.where(model.doctor_name.contains(doctor, autoescape=True))
+        # Walk the primary key, so each chunk resumes where the last stopped instead of re-sorting
+        statement = statement.order_by(model.id).limit(self.chunk_size)
+        with engine.connect() as conn:
+            return conn.execute(statement).all()
+
+    def reserve(self) -> ExportSlot:
+        """Take a concurrent-export slot, or raise ExportBusy at the limit (call before starting a response)."""
+        if self._active >= self.max_concurrent:
+            raise ExportBusy(f"{self._active} exports already running; try again later")
+        self._active += 1
+        return ExportSlot(self)
+
+    async def stream(
+        self,
+        engine,
+        model,
+        fmt: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        statuses: Optional[List[AppointmentStatus]] = None,
+        location: Optional[str] = None,
+        doctor: Optional[str] = None,
+        slot: Optional[ExportSlot] = None
+    ) -> AsyncIterator[bytes]:
+        """Encoded export chunks, in a slot reserved with reserve() (taken here if not given)."""
+        slot = slot or self.reserve()
+        columns = self.columns_for(model)
+        started = time.perf_counter()
+        rows_sent = 0
+        completed = False
+        self.exports_started += 1
+        try:
+            if fmt == "csv":
+                yield encode_rows([], columns, fmt, header=True)
+            after_id = 0
+            while True:
+                # Reads run in a worker thread; the next one starts only after this chunk was sent
+                rows = await asyncio.to_thread(
+                    self._fetch_chunk, engine, model, columns, start, end, statuses, location, doctor, after_id
+                )
+                self.chunks_read += 1
+                if not rows:
+                    break
+                after_id = rows[-1][0]
+                chunk = encode_rows(rows, columns, fmt)
+                rows_sent += len(rows)
+                self.rows_exported += len(rows)
+                self.bytes_exported += len(chunk)
+                yield chunk
+                if len(rows) < self.chunk_size:
+                    break
+            completed = True
+        finally:
+            slot.release()
+            duration_ms = (time.perf_counter() - started) * 1000
+            if completed:
+                self.exports_completed += 1
+                logger.info(f"Export of {model.__tablename__} finished: {rows_sent} rows in {duration_ms:.0f}ms")
+            else:
+                # Client went away (or the read failed) mid-stream
+                self.exports_aborted += 1
+                logger.warning(f"Export of {model.__tablename__} stopped after {rows_sent} rows ({duration_ms:.0f}ms)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get export statistics for monitoring."""
+        return {
+            "active": self._active,
+            "exports_started": self.exports_started,
+            "exports_completed": self.exports_completed,
+            "exports_aborted": self.exports_aborted,
+            "rows_exported": self.rows_exported,
+            "bytes_exported": self.bytes_exported,
+            "chunks_read": self.chunks_read,
+            "chunk_size": self.chunk_size
+        }
+
+
+# Global appointment exporter instance
+appointment_exporter = AppointmentExporter(
+    chunk_size=settings.EXPORT_CHUNK_SIZE,
+    max_concurrent=settings.EXPORT_MAX_CONCURRENT
+)
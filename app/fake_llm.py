@@ -0,0 +1,315 @@
+"""
+Scripted chat model for offline development and load testing.
+
+This module provides a deterministic stand-in for ChatAnthropic. It follows
+the same conversation flow as Claude (verify, list, confirm, cancel,
+reschedule), emits real tool calls, and sleeps according to a
+latency/token-rate profile, so the whole service can be exercised without
+network access or an API key.
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from .date_resolver import parse_reference
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    """Latency model for a fake LLM call."""
+    time_to_first_token_ms: float
+    tokens_per_second: float
+    jitter: float = 0.1  # +/- fraction applied deterministically
+
+
+# Built-in latency profiles (rough public figures for Claude models)
+LATENCY_PROFILES: Dict[str, LatencyProfile] = {
+    "instant": LatencyProfile(time_to_first_token_ms=0, tokens_per_second=0, jitter=0),
+    "fast": LatencyProfile(time_to_first_token_ms=20, tokens_per_second=2000),
+    "claude-haiku": LatencyProfile(time_to_first_token_ms=350, tokens_per_second=150),
+    "claude-sonnet": LatencyProfile(time_to_first_token_ms=700, tokens_per_second=70),
+}
+
+# Rough characters-per-token ratio used for usage accounting
+CHARS_PER_TOKEN = 4
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic, scripted chat model.
+
+    Replies depend only on the conversation, the seed and the profile, so
+    repeated runs produce the same tool calls and the same latencies.
+    """
+
+    model: str = "fake-claude"
+    profile: str = "instant"
+    seed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-scripted-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "profile": self.profile, "seed": self.seed}
+
+    def bind_tools(self, tools, **kwargs):
+        """Bind tools in OpenAI format, like the real chat models do."""
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    # LangChain entry points
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self._script_reply(messages, self._session_id(run_manager), bool(kwargs.get("tools")))
+        time.sleep(self._latency_seconds(messages, message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self._script_reply(messages, self._session_id(run_manager), bool(kwargs.get("tools")))
+        await asyncio.sleep(self._latency_seconds(messages, message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._script_reply(messages, self._session_id(run_manager), bool(kwargs.get("tools")))
+        profile = LATENCY_PROFILES.get(self.profile, LATENCY_PROFILES["instant"])
+        scale = self._jitter_scale(messages)
+
+        await asyncio.sleep(profile.time_to_first_token_ms / 1000 * scale)
+
+        words = re.findall(r"\S+\s*", message.content) or [""]
+        for word in words:
+            if profile.tokens_per_second:
+                await asyncio.sleep(len(word) / CHARS_PER_TOKEN / profile.tokens_per_second * scale)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager:
+                await run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
+
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="",
+            tool_call_chunks=[
+                {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+                for i, tc in enumerate(message.tool_calls)
+            ],
+            usage_metadata=message.usage_metadata
+        ))
+
+    # Scripted behaviour
+
+    def _script_reply(self, messages: List[BaseMessage], session_id: str, tools_bound: bool) -> AIMessage:
+        """Decide the next assistant message from the conversation so far."""
+        last = messages[-1] if messages else None
+
+        if isinstance(last, ToolMessage):
+            content = self._summarize_tool_result(last)
+            return self._message(messages, content)
+
+        text = last.content if isinstance(last, HumanMessage) and isinstance(last.content, str) else ""
+        lowered = text.lower()
+
+        if tools_bound:
+            identity = self._extract_identity(text)
+            if identity:
+                return self._tool_call(messages, "verify_user", {"session_id": session_id, **identity})
+
+            slot_id = self._pick_slot(messages, lowered)
+            if slot_id is not None:
+                appointment_id = self._pick_appointment(messages, lowered)
+                if appointment_id is not None:
+                    return self._tool_call(messages, "reschedule_appointment", {
+                        "session_id": session_id, "appointment_id": appointment_id, "slot_id": slot_id
+                    })
+
+            if any(word in lowered for word in ["reschedule", "remarcar"]):
+                appointment = self._pick_listed(messages, lowered)
+                if appointment is None:
+                    return self._tool_call(messages, "list_appointments", {"session_id": session_id})
+                args = {"session_id": session_id, "doctor": appointment.get("doctor")}
+                if parse_reference(text):
+                    args["after"] = text
+                return self._tool_call(messages, "find_available_slots", args)
+
+            if any(word in lowered for word in ["confirm", "cancel"]):
+                action = "confirm_appointment" if "confirm" in lowered else "cancel_appointment"
+                appointment_id = self._pick_appointment(messages, lowered)
+                if appointment_id is None:
+                    return self._tool_call(messages, "list_appointments", {"session_id": session_id})
+                if not any(word in lowered for word in ("last", "second", "third")) and parse_reference(text):
+                    # Pass date/time references through in the patient's words, as Claude does
+                    return self._tool_call(messages, action, {"session_id": session_id, "date": text})
+                return self._tool_call(messages, action, {"session_id": session_id, "appointment_id": appointment_id})
+
+            if any(word in lowered for word in ["appointment", "list", "show", "schedule"]):
+                return self._tool_call(messages, "list_appointments", {"session_id": session_id})
+
+        return self._message(
+            messages,
+            "👋 Hello! I'm the LumaHealth assistant. I can verify your identity and then list, "
+            "confirm, cancel or reschedule your appointments. To get started, please tell me your full name, "
+            "date of birth and phone number."
+        )
+
+    def _summarize_tool_result(self, tool_message: ToolMessage) -> str:
+        """Write a Claude-like reply for a tool result."""
+        result = self._parse_tool_content(tool_message.content)
+        name = tool_message.name or ""
+
+        if name == "verify_user":
+            if isinstance(result, dict) and result.get("success"):
+                upcoming = result.get("upcoming_appointments")
+                if upcoming:
+                    lines = ["✅ **Identity verified!** Here are your upcoming appointments:", ""]
+                    lines += [f"• **{apt.get('date')} {apt.get('time')}** with {apt.get('doctor')} ({apt.get('status')})" for apt in upcoming]
+                    return "\n".join(lines)
+                return "✅ **Identity verified!** How can I help you with your appointments today?"
+            return "❌ I couldn't verify your identity. Please check your name, date of birth and phone number."
+
+        if name == "list_appointments":
+            appointments = result.get("appointments", result) if isinstance(result, dict) else result
+            appointments = [a for a in appointments or [] if isinstance(a, dict) and "error" not in a]
+            if not appointments:
+                return "📅 You have no appointments scheduled."
+
+            lines = ["📅 **Your Appointments**", ""]
+            for apt in appointments:
+                lines += [
+                    f"• **Date:** {apt.get('date')}",
+                    f"• **Time:** {apt.get('time')}",
+                    f"• **Doctor:** {apt.get('doctor')}",
+                    f"• **Location:** {apt.get('location')}",
+                    f"• **Status:** {apt.get('status')}",
+                    ""
+                ]
+            lines.append("💬 **Can I help you with anything else?** You can confirm, cancel or reschedule your appointments.")
+            return "\n".join(lines)
+
+        if name in ("find_available_slots", "reschedule_appointment") and isinstance(result, dict) and result.get("slots"):
+            lines = [f"{'🗓️' if result.get('success') else '❌'} {result.get('message')}", ""]
+            lines += [
+                f"• **Slot {slot.get('slot_id')}:** {slot.get('date')} {slot.get('time')} with {slot.get('doctor')} ({slot.get('location')})"
+                for slot in result["slots"]
+            ]
+            lines.append("")
+            lines.append("💬 Which slot would you like? Reply with its number, e.g. \"slot 12\".")
+            return "\n".join(lines)
+
+        if isinstance(result, dict) and result.get("message"):
+            return f"{'✅' if result.get('success') else '❌'} {result['message']}"
+
+        return "Done. Can I help you with anything else?"
+
+    @staticmethod
+    def _parse_tool_content(content: Any) -> Any:
+        """Parse a tool message payload, tolerating non-JSON content."""
+        if not isinstance(content, str):
+            return content
+        try:
+            return json.loads(content)
+        except ValueError:
+            return content
+
+    @staticmethod
+    def _extract_identity(text: str) -> Optional[Dict[str, str]]:
+        """Extract full name, date of birth and phone from a message."""
+        name = re.search(r"(?:i am|i'm|my name is)\s+([A-Za-zÀ-ÿ]+(?:\s+[A-Za-zÀ-ÿ]+)+?)(?=\s*(?:,|born|$))", text, re.IGNORECASE)
+        dob = re.search(r"(\d{4}-\d{2}-\d{2})", text)
+        phone = re.search(r"(\+?\d{10,13})", text)
+
+        if not (name and dob and phone):
+            return None
+        return {"full_name": name.group(1).strip(), "dob": dob.group(1), "phone": phone.group(1)}
+
+    def _pick_appointment(self, messages: List[BaseMessage], lowered: str) -> Optional[int]:
+        """Pick the appointment a confirm/cancel/reschedule request refers to."""
+        appointment = self._pick_listed(messages, lowered)
+        return appointment["id"] if appointment else None
+
+    def _pick_slot(self, messages: List[BaseMessage], lowered: str) -> Optional[int]:
+        """The slot a "slot 12" / "first slot" reply picks from the last slots offered."""
+        if "slot" not in lowered:
+            return None
+        for message in reversed(messages):
+            if isinstance(message, ToolMessage) and message.name in ("find_available_slots", "reschedule_appointment"):
+                result = self._parse_tool_content(message.content)
+                slots = result.get("slots") if isinstance(result, dict) else None
+                if not slots:
+                    return None
+                number = re.search(r"slot\s*#?(\d+)", lowered)
+                if number and any(slot.get("slot_id") == int(number.group(1)) for slot in slots):
+                    return int(number.group(1))
+                return slots[0].get("slot_id")
+        return None
+
+    def _pick_listed(self, messages: List[BaseMessage], lowered: str) -> Optional[Dict[str, Any]]:
+        """Pick the listed appointment a request refers to."""
+        for message in reversed(messages):
+            if isinstance(message, ToolMessage) and message.name == "list_appointments":
+                result = self._parse_tool_content(message.content)
+                appointments = result.get("appointments", []) if isinstance(result, dict) else result
+                appointments = [a for a in appointments or [] if isinstance(a, dict) and "id" in a]
+                if not appointments:
+                    return None
+
+                if "last" in lowered:
+                    return appointments[-1]
+                for ordinal, index in (("second", 1), ("third", 2)):
+                    if ordinal in lowered and index < len(appointments):
+                        return appointments[index]
+
+                pending = [a for a in appointments if a.get("status") == "PENDING"]
+                return (pending or appointments)[0]
+        return None
+
+    # Helpers
+
+    def _tool_call(self, messages: List[BaseMessage], name: str, args: Dict[str, Any]) -> AIMessage:
+        return self._message(messages, "", tool_calls=[{"name": name, "args": args, "id": f"call_{len(messages)}_{name}"}])
+
+    def _message(self, messages: List[BaseMessage], content: str, tool_calls: Optional[list] = None) -> AIMessage:
+        input_chars = sum(len(str(m.content)) for m in messages)
+        output_chars = len(content) + sum(len(json.dumps(tc["args"])) + len(tc["name"]) for tc in tool_calls or [])
+        input_tokens = input_chars // CHARS_PER_TOKEN
+        output_tokens = max(1, output_chars // CHARS_PER_TOKEN)
+
+        return AIMessage(
+            content=content,
+            tool_calls=tool_calls or [],
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens
+            },
+            response_metadata={"model": self.model, "fake_profile": self.profile}
+        )
+
+    def _jitter_scale(self, messages: List[BaseMessage]) -> float:
+        """Deterministic latency jitter derived from the seed and conversation."""
+        profile = LATENCY_PROFILES.get(self.profile, LATENCY_PROFILES["instant"])
+        last = str(messages[-1].content) if messages else ""
+        rng = random.Random(f"{self.seed}:{len(messages)}:{last}")
+        return 1 + rng.uniform(-profile.jitter, profile.jitter)
+
+    def _latency_seconds(self, messages: List[BaseMessage], reply: AIMessage) -> float:
+        """Total simulated latency for a non-streaming call."""
+        profile = LATENCY_PROFILES.get(self.profile, LATENCY_PROFILES["instant"])
+        seconds = profile.time_to_first_token_ms / 1000
+        if profile.tokens_per_second:
+            seconds += reply.usage_metadata["output_tokens"] / profile.tokens_per_second
+        return seconds * self._jitter_scale(messages)
+
+    @staticmethod
+    def _session_id(run_manager) -> str:
+        """Use the LangGraph thread ID as the session ID, as Claude would be told."""
+        metadata = getattr(run_manager, "metadata", None) or {}
+        return str(metadata.get("thread_id", "fake-session"))
@@ -6,6 +6,7 @@ with Claude LLM, state persistence, and MCP tool integration.
 """
 
 import asyncio
+import hashlib
 import os
 import uuid
 from datetime import datetime
@@ -21,12 +22,21 @@ from langchain_anthropic import ChatAnthropic
 from langgraph.graph import StateGraph, START, END, MessagesState
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
-from langgraph.checkpoint.memory import MemorySaver
 
 from .session_manager import SessionManager
-from .observability import setup_logging, trace_operation
+from .observability import setup_logging, trace_operation, metrics
+from .instrumentation import TurnTimingHandler, TracingCallbackHandler, current_turn_timing
+from .tracing import is_tracing_enabled
 from .models import SessionState
 from .mcp_tools import mcp_tools_manager, create_fallback_tools
+from .request_coalescing import request_coalescer
+from .admission import llm_admission, AdmissionRejected, PRIORITY_VERIFIED, PRIORITY_UNVERIFIED
+from .response_cache import response_cache
+from .tool_registry import tool_registry
+from .http_client import anthropic_http
+from .offload import cpu_offloader
+from .model_router import model_router, TIER_SMALL, TIER_LARGE
+from .settings import settings
 
 
 # Setup logging
@@ -66,35 +76,51 @@ class LumaHealthAgent:
         
         # Initialize Claude LLM with configurable model
         claude_model = os.getenv("CLAUDE_MODEL", "claude-3-5-sonnet-20241022")
-        self.llm = ChatAnthropic(
-            model=claude_model,
-            api_key=anthropic_api_key,
-            temperature=0.1,
-            max_tokens=1024
+        self.model_name = claude_model
+        self.llm = self._create_llm(claude_model, anthropic_api_key)
+        
+        # Small model tier for simple turns (see model_router)
+        self.small_model_name = settings.CLAUDE_SMALL_MODEL
+        self.small_llm = self._create_llm(
+            self.small_model_name, anthropic_api_key, fake_profile=settings.FAKE_LLM_SMALL_PROFILE or None
         )
+        self.tier_graphs = {}
         
-        logger.info(f"Initialized Claude LLM with model: {claude_model}")
+        logger.info(f"Initialized {settings.LLM_PROVIDER} LLM with model: {claude_model} (small tier: {self.small_model_name})")
         
-        # State persistence
-        self.memory = MemorySaver()
+        # State persistence (shared by every agent in the process)
+        self.memory = tool_registry.checkpointer
         
         # Initialize tools and graph immediately with fallback
         self._initialize_tools_sync()
         
         logger.info("LumaHealth LangGraph Agent initialized")
     
+    def _create_llm(self, model: str, api_key: Optional[str], fake_profile: Optional[str] = None):
+        """Create the chat model for the configured LLM provider."""
+        if settings.LLM_PROVIDER == "fake":
+            # Scripted offline model for development and load testing
+            from .fake_llm import FakeChatModel
+            return FakeChatModel(model=model, profile=fake_profile or settings.FAKE_LLM_PROFILE, seed=settings.FAKE_LLM_SEED)
+        
+        client_kwargs = {"base_url": settings.ANTHROPIC_BASE_URL} if settings.ANTHROPIC_BASE_URL else {}
+        llm = ChatAnthropic(
+            model=model,
+            api_key=api_key,
+            temperature=0.1,
+            max_tokens=1024,
+            **client_kwargs
+        )
+        
+        # Pooled keep-alive connections, timeouts and counted retries
+        anthropic_http.configure_chat_anthropic(llm)
+        return llm
+    
     def _initialize_tools_sync(self):
         """Initialize tools synchronously with fallback approach."""
         try:
             logger.info("Initializing tools in fallback mode for immediate availability")
-            self.tools = create_fallback_tools()
-            self.use_mcp = False
-            
-            # Bind tools to LLM
-            self.llm_with_tools = self.llm.bind_tools(self.tools)
-            
-            # Build the graph now that tools are ready
-            self.graph = self._build_graph()
+            self._use_tool_set("fallback", create_fallback_tools)
             
             logger.info(f"Initialized {len(self.tools)} tools (fallback mode)")
             
@@ -105,46 +131,61 @@ class LumaHealthAgent:
             self.use_mcp = False
             self.llm_with_tools = self.llm
             self.graph = None
+            self.tier_graphs = {}
     
     async def _initialize_tools(self):
         """Initialize MCP tools with fallback to direct calls (async version for future use)."""
         try:
             # Try to initialize MCP connection
             if await mcp_tools_manager.initialize_mcp_connection():
-                self.tools = mcp_tools_manager.get_tools()
-                self.use_mcp = True
+                self._use_tool_set("mcp", mcp_tools_manager.get_tools)
                 logger.info("Using true MCP protocol for tools")
             else:
                 raise Exception("MCP connection failed")
                 
         except Exception as e:
             logger.warning(f"MCP initialization failed: {e}. Using fallback tools.")
-            self.tools = create_fallback_tools()
-            self.use_mcp = False
-        
-        # Bind tools to LLM
-        self.llm_with_tools = self.llm.bind_tools(self.tools)
-        
-        # Build the graph now that tools are ready
-        self.graph = self._build_graph()
+            self._use_tool_set("fallback", create_fallback_tools)
         
         logger.info(f"Initialized {len(self.tools)} tools ({'MCP' if self.use_mcp else 'fallback'} mode)")
     
-    def _build_graph(self):
+    def _use_tool_set(self, mode: str, factory):
+        """Switch to a tool set, reusing registry-cached tools, specs and graph."""
+        self.tools = tool_registry.get_tools(mode, factory)
+        self.use_mcp = mode == "mcp"
+        
+        # Bind precomputed specs; create_react_agent sees the tools as already bound
+        specs = tool_registry.get_tool_specs(mode, self.tools)
+        self.llm_with_tools = self.llm.bind_tools(specs)
+        small_llm_with_tools = self.small_llm.bind_tools(specs)
+        
+        # One graph per model tier; both share the checkpointer, so a thread can switch tiers between turns
+        self.graph = tool_registry.get_graph(
+            self._graph_key(mode, self.model_name, settings.FAKE_LLM_PROFILE),
+            lambda: self._build_graph(self.llm_with_tools)
+        )
+        small_graph = tool_registry.get_graph(
+            self._graph_key(mode, self.small_model_name, settings.FAKE_LLM_SMALL_PROFILE or settings.FAKE_LLM_PROFILE),
+            lambda: self._build_graph(small_llm_with_tools)
+        )
+        self.tier_graphs = {TIER_LARGE: self.graph, TIER_SMALL: small_graph}
+    
+    def _graph_key(self, mode: str, model_name: str, fake_profile: str) -> tuple:
+        """Compiled graphs are shared by agents with the same model configuration."""
+        key_hash = hashlib.sha256((self.anthropic_api_key or "").encode()).hexdigest()[:12]
+        return (mode, settings.LLM_PROVIDER, model_name, fake_profile, settings.FAKE_LLM_SEED, key_hash)
+    
+    def _build_graph(self, llm_with_tools=None):
         """Build the LangGraph agent using prebuilt tools pattern."""
         if not self.tools:
             return None
             
         # Use LangGraph's prebuilt agent with tools
         from langgraph.prebuilt import create_react_agent
-        from langchain_core.messages import SystemMessage
-        
-        # Create system message with context
-        system_message = SystemMessage(content=self._get_base_system_prompt())
         
-        # Create the agent with tools
+        # Create the agent with the pre-bound model
         agent = create_react_agent(
-            self.llm,
+            llm_with_tools or self.llm_with_tools,
             self.tools,
             checkpointer=self.memory
         )
@@ -161,6 +202,7 @@ YOUR CAPABILITIES:
 - List scheduled appointments
 - Confirm pending appointments
 - Cancel appointments when requested
+- Reschedule appointments to open slots on the doctor's schedule
 - Provide information about appointments
 
 IMPORTANT RULES:
@@ -205,9 +247,11 @@ When presenting appointments, use this EXACT format:
 
 AVAILABLE TOOLS:
 - verify_user: To verify patient identity
-- list_appointments: To list appointments for verified patient
+- list_appointments: To list appointments for verified patient (upcoming by default; use from_date/to_date/status for past or cancelled ones, and cursor=next_cursor for more)
 - confirm_appointment: To confirm pending appointments
 - cancel_appointment: To cancel appointments
+- find_available_slots: To find open slots for a doctor/location (after a date) before rescheduling
+- reschedule_appointment: To move an appointment to a slot_id from find_available_slots (offer the returned alternatives if the slot was taken)
 - get_session_info: To check session status
 
 TEST PATIENT DATA:
@@ -218,417 +262,34 @@ TEST PATIENT DATA:
 
 EXPECTED FLOW:
 1. If user not verified → ask for name and date of birth → use verify_user
-2. If user verified → can use list_appointments, confirm_appointment, cancel_appointment
-3. Always confirm important actions before executing
+2. If verify_user returns upcoming_appointments → show them in your reply without calling list_appointments
+3. If user verified → can use list_appointments, confirm_appointment, cancel_appointment
+4. To reschedule → find_available_slots for the appointment's doctor → let the patient pick → reschedule_appointment
+5. Always confirm important actions before executing
 
 IMPORTANT: Always format dates in English (January, February, March, etc.) and use emojis and markdown formatting to create beautiful and organized responses."""
     
-    def _get_system_prompt(self, state: ConversationState) -> str:
-        """Generate dynamic system prompt based on conversation state."""
-        
-        base_prompt = """You are a virtual assistant for LumaHealth, specialized in helping patients with medical appointments.
-
-YOUR CAPABILITIES:
-- Verify patient identity (full name + date of birth)
-- List scheduled appointments
-- Confirm pending appointments
-- Cancel appointments when requested
-- Provide information about appointments
-
-IMPORTANT RULES:
-1. ALWAYS verify identity before showing medical information
-2. Be empathetic and professional
-3. Confirm important actions before executing them
-4. If you don't understand something, ask for clarification
-5. Keep conversations focused on medical appointments
-
-TEST PATIENT DATA:
-- Name: Maria Santos
-- Date of birth: 07/22/1990
-- Phone: +5511876543210
-- Has scheduled appointments available
-
-"""
-        
-        # Add context based on conversation stage
-        if state.get("conversation_stage") == "greeting":
-            base_prompt += "\nCURRENT SITUATION: Patient started conversation. Need to verify identity first."
-        
-        elif state.get("conversation_stage") == "verification":
-            base_prompt += "\nCURRENT SITUATION: Verification process ongoing. Waiting for name and date of birth."
-        
-        elif state.get("is_verified") and state.get("patient_id"):
-            base_prompt += f"\nCURRENT SITUATION: Patient verified (ID: {state.get('patient_id')}). Can access appointments."
-            
-            if state.get("appointments_context"):
-                appointments = state["appointments_context"]
-                base_prompt += f"\nKNOWN APPOINTMENTS: {len(appointments)} appointment(s) in context."
-        
-        return base_prompt
-    
-    async def _process_message_node(self, state: ConversationState) -> ConversationState:
-        """Process incoming message and determine conversation context."""
-        
-        try:
-            with trace_operation("process_message", session_id=state["session_id"]):
-                # Get the latest human message
-                latest_message = state["messages"][-1] if state["messages"] else None
-                
-                if not latest_message or not isinstance(latest_message, HumanMessage):
-                    logger.warning(f"No human message found in state for session {state['session_id']}")
-                    return {**state, "conversation_stage": "error"}
-                
-                message_content = latest_message.content.lower().strip()
-                
-                # Update session manager
-                session_state = self.session_manager.get_or_create_session(state["session_id"])
-                session_state.last_activity = datetime.utcnow()
-                
-                # Analyze message for intent and context
-                if not state.get("is_verified"):
-                    # Check if message contains identification info
-                    if any(keyword in message_content for keyword in ["i am", "my name", "born", "birth", "phone"]):
-                        return {**state, "conversation_stage": "verification", "last_intent": "verify_user"}
-                    else:
-                        return {**state, "conversation_stage": "greeting", "last_intent": "greeting"}
-                
-                else:
-                    # User is verified, analyze intent
-                    if any(keyword in message_content for keyword in ["appointments", "list", "show", "schedule"]):
-                        return {**state, "conversation_stage": "authenticated", "last_intent": "list_appointments"}
-                    elif any(keyword in message_content for keyword in ["confirm", "accept"]):
-                        return {**state, "conversation_stage": "authenticated", "last_intent": "confirm_appointment"}
-                    elif any(keyword in message_content for keyword in ["cancel", "remove"]):
-                        return {**state, "conversation_stage": "authenticated", "last_intent": "cancel_appointment"}
-                    else:
-                        return {**state, "conversation_stage": "authenticated", "last_intent": "general_query"}
-        
-        except Exception as e:
-            logger.error(f"Error in process_message_node: {e}", exc_info=True)
-            return {**state, "conversation_stage": "error", "error_count": state.get("error_count", 0) + 1}
-    
-    def _route_conversation(self, state: ConversationState) -> str:
-        """Route conversation based on state and intent."""
-        
-        stage = state.get("conversation_stage", "greeting")
-        intent = state.get("last_intent", "unknown")
-        
-        # Error handling
-        if stage == "error" or state.get("error_count", 0) > 3:
-            return "error"
-        
-        # Verification flow
-        if stage == "verification" and intent == "verify_user":
-            return "verify"
-        
-        # Authenticated user flows
-        if state.get("is_verified"):
-            if intent == "list_appointments":
-                return "list"
-            elif intent in ["confirm_appointment", "cancel_appointment"]:
-                return "manage"
-        
-        # Default to response generation for greetings and general queries
-        return "respond"
-    
-    async def _verify_user_node(self, state: ConversationState) -> ConversationState:
-        """Handle user verification using MCP tools."""
-        
-        try:
-            with trace_operation("verify_user", session_id=state["session_id"]):
-                # Import MCP verification tool
-                from .mcp_server import verify_user_tool
-                
-                # Extract name, DOB, and phone from message
-                latest_message = state["messages"][-1]
-                message_content = latest_message.content
-                
-                # Simple extraction (could be enhanced with NER)
-                extracted_info = self._extract_user_info(message_content)
-                
-                if extracted_info.get("name") and extracted_info.get("dob") and extracted_info.get("phone"):
-                    # Call MCP verification tool
-                    result = await verify_user_tool({
-                        "session_id": state["session_id"],
-                        "full_name": extracted_info["name"],
-                        "dob": extracted_info["dob"],
-                        "phone": extracted_info["phone"]
-                    })
-                    
-                    if result.get("success"):
-                        # Update state with verified info
-                        return {
-                            **state,
-                            "is_verified": True,
-                            "patient_id": result.get("patient_id"),
-                            "conversation_stage": "authenticated",
-                            "metadata": {**state.get("metadata", {}), "verification_result": result}
-                        }
-                    else:
-                        return {
-                            **state,
-                            "conversation_stage": "verification_failed",
-                            "metadata": {**state.get("metadata", {}), "verification_error": result.get("message")}
-                        }
-                else:
-                    return {
-                        **state,
-                        "conversation_stage": "verification_incomplete",
-                        "metadata": {**state.get("metadata", {}), "extraction_result": extracted_info}
-                    }
-        
-        except Exception as e:
-            logger.error(f"Error in verify_user_node: {e}", exc_info=True)
-            return {**state, "conversation_stage": "error", "error_count": state.get("error_count", 0) + 1}
-    
-    async def _list_appointments_node(self, state: ConversationState) -> ConversationState:
-        """Handle appointment listing using MCP tools."""
-        
-        try:
-            with trace_operation("list_appointments", session_id=state["session_id"]):
-                from .mcp_server import list_appointments_tool
-                
-                # Call MCP tool to get appointments
-                appointments = await list_appointments_tool({
-                    "session_id": state["session_id"]
-                })
-                
-                return {
-                    **state,
-                    "appointments_context": appointments,
-                    "metadata": {**state.get("metadata", {}), "last_appointment_list": appointments}
-                }
-        
-        except Exception as e:
-            logger.error(f"Error in list_appointments_node: {e}", exc_info=True)
-            return {**state, "conversation_stage": "error", "error_count": state.get("error_count", 0) + 1}
-    
-    async def _manage_appointment_node(self, state: ConversationState) -> ConversationState:
-        """Handle appointment confirmation/cancellation using MCP tools."""
-        
-        try:
-            with trace_operation("manage_appointment", session_id=state["session_id"]):
-                intent = state.get("last_intent")
-                latest_message = state["messages"][-1]
-                
-                # Determine which appointment to manage
-                appointment_ref = self._extract_appointment_reference(
-                    latest_message.content, 
-                    state.get("appointments_context", [])
-                )
-                
-                if intent == "confirm_appointment":
-                    from .mcp_server import confirm_appointment_tool
-                    result = await confirm_appointment_tool({
-                        "session_id": state["session_id"],
-                        **appointment_ref
-                    })
-                elif intent == "cancel_appointment":
-                    from .mcp_server import cancel_appointment_tool
-                    result = await cancel_appointment_tool({
-                        "session_id": state["session_id"],
-                        **appointment_ref
-                    })
-                else:
-                    result = {"success": False, "message": "Action not recognized"}
-                
-                return {
-                    **state,
-                    "metadata": {**state.get("metadata", {}), "appointment_action_result": result}
-                }
-        
-        except Exception as e:
-            logger.error(f"Error in manage_appointment_node: {e}", exc_info=True)
-            return {**state, "conversation_stage": "error", "error_count": state.get("error_count", 0) + 1}
-    
-    async def _handle_error_node(self, state: ConversationState) -> ConversationState:
-        """Handle errors and provide helpful responses."""
-        
-        error_count = state.get("error_count", 0)
-        
-        if error_count > 3:
-            # Too many errors, reset conversation
-            return {
-                **state,
-                "conversation_stage": "reset",
-                "is_verified": False,
-                "patient_id": None,
-                "error_count": 0,
-                "metadata": {**state.get("metadata", {}), "reset_reason": "too_many_errors"}
-            }
-        
-        return {
-            **state,
-            "conversation_stage": "error_handled",
-            "metadata": {**state.get("metadata", {}), "error_handled": True}
-        }
-    
-    async def _generate_response_node(self, state: ConversationState) -> ConversationState:
-        """Generate natural language response using Claude."""
-        
-        try:
-            with trace_operation("generate_response", session_id=state["session_id"]):
-                # Build context for Claude
-                system_prompt = self._get_system_prompt(state)
-                
-                # Add system message if not present
-                messages = []
-                if not any(isinstance(msg, SystemMessage) for msg in state["messages"]):
-                    messages.append(SystemMessage(content=system_prompt))
-                
-                # Add conversation history
-                messages.extend(state["messages"])
-                
-                # Add context about current action results
-                metadata = state.get("metadata", {})
-                if "verification_result" in metadata:
-                    result = metadata["verification_result"]
-                    if result.get("success"):
-                        context_msg = "User was successfully verified. Can now access appointments."
-                    else:
-                        context_msg = f"Verification failed: {result.get('message', 'Incorrect data')}"
-                    messages.append(SystemMessage(content=f"CONTEXT: {context_msg}"))
-                
-                if "last_appointment_list" in metadata:
-                    appointments = metadata["last_appointment_list"]
-                    if appointments and not any("error" in apt for apt in appointments):
-                        apt_summary = "\\n".join([
-                            f"- {apt['date']} at {apt['time']} - {apt['doctor']} ({apt['status']})"
-                            for apt in appointments[:5]  # Limit to first 5
-                        ])
-                        messages.append(SystemMessage(content=f"CURRENT APPOINTMENTS:\\n{apt_summary}"))
-                
-                if "appointment_action_result" in metadata:
-                    result = metadata["appointment_action_result"]
-                    action_context = f"Action result: {result.get('message', 'Action processed')}"
-                    messages.append(SystemMessage(content=f"CONTEXT: {action_context}"))
-                
-                # Generate response with Claude
-                response = await self.llm.ainvoke(messages)
-                
-                return {
-                    **state,
-                    "messages": [response],
-                    "metadata": {**metadata, "response_generated": True, "timestamp": datetime.utcnow().isoformat()}
-                }
-        
-        except Exception as e:
-            logger.error(f"Error generating response: {e}", exc_info=True)
-            # Fallback response
-            fallback_response = AIMessage(content="Sorry, there was a problem. Can you try again?")
-            return {
-                **state,
-                "messages": [fallback_response],
-                "error_count": state.get("error_count", 0) + 1
-            }
-    
-    def _extract_user_info(self, message: str) -> Dict[str, str]:
-        """Extract user name and date of birth from message."""
-        import re
-        
-        result = {}
-        
-        # Extract name patterns
-        name_patterns = [
-            r"(?:i am|my name is|i'm)\\s+([A-Z][a-z]+(?:\\s+[A-Z][a-z]+)*)",
-            r"([A-Z][a-z]+\\s+[A-Z][a-z]+)(?=.*(?:born|birth))"
-        ]
-        
-        for pattern in name_patterns:
-            match = re.search(pattern, message, re.IGNORECASE)
-            if match:
-                result["name"] = match.group(1).strip()
-                break
-        
-        # Extract date patterns
-        date_patterns = [
-            r"(\\d{1,2}/\\d{1,2}/\\d{4})",
-            r"(\\d{4}-\\d{2}-\\d{2})",
-            r"(?:born|birth).*?(\\d{1,2}/\\d{1,2}/\\d{4})",
-            r"(?:on|in)\\s+(\\d{1,2}/\\d{1,2}/\\d{4})"
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, message)
-            if match:
-                date_str = match.group(1)
-                # Convert DD/MM/YYYY to YYYY-MM-DD if needed
-                if "/" in date_str:
-                    parts = date_str.split("/")
-                    if len(parts) == 3:
-                        result["dob"] = f"{parts[2]}-{parts[1]:0>2}-{parts[0]:0>2}"
-                else:
-                    result["dob"] = date_str
-                break
-        
-        # Extract phone patterns
-        phone_patterns = [
-            r"(\+?55\d{2}\d{8,9})",  # Brazilian format +5511987654321
-            r"(\+?\d{1,3}\d{10,11})",  # General international format
-            r"phone.*?(\+?\d[\d\s\-\(\)]{8,15})",  # After word "phone"
-            r"(\+?\d{3,4}[\s\-]?\d{8,9})"  # Area code + number
-        ]
-        
-        for pattern in phone_patterns:
-            match = re.search(pattern, message)
-            if match:
-                phone_str = match.group(1).strip()
-                # Clean phone number (remove spaces, dashes, parentheses)
-                phone_clean = re.sub(r'[\s\-\(\)]', '', phone_str)
-                result["phone"] = phone_clean
-                break
-        
-        return result
-    
-    def _extract_appointment_reference(self, message: str, appointments: List[Dict]) -> Dict[str, Any]:
-        """Extract appointment reference from message."""
-        import re
-        
-        message_lower = message.lower()
-        
-        # Look for appointment ID
-        id_match = re.search(r'(?:consulta|appointment)\\s*(?:id\\s*)?(?:#)?([0-9]+)', message_lower)
-        if id_match:
-            return {"appointment_id": int(id_match.group(1))}
-        
-        # Look for ordinal references (first, second, etc.)
-        ordinals = {
-            "first": 0, "1st": 0,
-            "second": 1, "2nd": 1,
-            "third": 2, "3rd": 2,
-            "last": -1
-        }
-        
-        for ordinal, index in ordinals.items():
-            if ordinal in message_lower:
-                if appointments and 0 <= index < len(appointments):
-                    return {"appointment_id": appointments[index]["id"]}
-                elif index == -1 and appointments:
-                    return {"appointment_id": appointments[-1]["id"]}
-        
-        # Look for date references
-        date_match = re.search(r'(\\d{1,2}/\\d{1,2}/\\d{4}|\\d{4}-\\d{2}-\\d{2})', message)
-        if date_match:
-            return {"date": date_match.group(1)}
-        
-        # Look for relative date references
-        if "tomorrow" in message_lower:
-            from datetime import date, timedelta
-            tomorrow = (date.today() + timedelta(days=1)).isoformat()
-            return {"date": tomorrow}
-        
-        # Default to first appointment if available
-        if appointments:
-            return {"appointment_id": appointments[0]["id"]}
-        
-        return {}
-    
     async def process_conversation(self, session_id: str, message: str) -> Dict[str, Any]:
         """
         Process a conversation message and return AI response.
         
-        This is the main entry point for conversation processing.
+        This is the main entry point for conversation processing. Duplicate
+        in-flight messages on a session share one result, and different
+        messages on the same session are processed one at a time.
         """
+        result, coalesced = await request_coalescer.run(
+            session_id,
+            message,
+            lambda: self._process_conversation(session_id, message)
+        )
+        
+        if coalesced:
+            result.setdefault("observability", {})["coalesced"] = True
+        
+        return result
+    
+    async def _process_conversation(self, session_id: str, message: str) -> Dict[str, Any]:
+        """Run a single conversation turn through the LangGraph agent."""
         try:
             with trace_operation("process_conversation", session_id=session_id):
                 # Wait for graph to be ready
@@ -650,9 +311,16 @@ TEST PATIENT DATA:
                 try:
                     # Try to get existing state to see if we have conversation history
                     existing_state = await self.graph.aget_state(config)
-                    has_history = bool(existing_state.values.get("messages", []))
+                    history = existing_state.values.get("messages", [])
                 except:
-                    has_history = False
+                    history = []
+                has_history = bool(history)
+                
+                # Pick the model tier from local features of the turn and the pending tool context
+                routing = await cpu_offloader.run(
+                    model_router.route, message, history, session_state.is_verified, size=len(message)
+                )
+                graph = self.tier_graphs.get(routing.tier) or self.graph
                 
                 if not has_history:
                     # First message - include system message
@@ -664,9 +332,61 @@ TEST PATIENT DATA:
                     # Subsequent messages - just add the human message
                     messages = [HumanMessage(content=message)]
                 
+                # Stateless opening turns (greetings, general questions) can be
+                # answered from the response cache without calling Claude
+                cache_key = None
+                if not has_history and response_cache.is_cacheable_message(message):
+                    cache_key = response_cache.make_key(
+                        routing.model, self._get_base_system_prompt(), message, session_state.is_verified
+                    )
+                    cached_reply = response_cache.get(cache_key)
+                    
+                    if cached_reply is not None:
+                        # Record the turn in the checkpoint so the conversation continues normally
+                        await self.graph.aupdate_state(
+                            config, {"messages": messages + [AIMessage(content=cached_reply)]}, as_node="agent"
+                        )
+                        session_state.last_activity = datetime.utcnow()
+                        self.session_manager.update_session(session_id, session_state)
+                        
+                        return {
+                            "reply": cached_reply,
+                            "state": {
+                                "is_verified": session_state.is_verified,
+                                "patient_id": session_state.patient_id,
+                                "last_intent": session_state.last_intent
+                            },
+                            "observability": {
+                                "tools_used": ["response_cache"],
+                                "message_count": len(messages) + 1,
+                                "mcp_mode": self.use_mcp,
+                                "model": routing.model,
+                                "model_tier": routing.tier,
+                                "routing_reason": routing.reason,
+                                "cache_hit": True,
+                                "verified_this_turn": False
+                            }
+                        }
+                
                 input_message = {"messages": messages}
                 
-                result = await self.graph.ainvoke(input_message, config=config)
+                # Time each agent step, LLM call, tool call and DB query in this turn
+                timing = TurnTimingHandler()
+                timing_token = current_turn_timing.set(timing)
+                
+                try:
+                    # Bound concurrent Claude calls; verified sessions are served first
+                    priority = PRIORITY_VERIFIED if session_state.is_verified else PRIORITY_UNVERIFIED
+                    async with llm_admission.admit(priority):
+                        timing.mark_admitted()
+                        callbacks = [timing, TracingCallbackHandler()] if is_tracing_enabled() else [timing]
+                        result = await graph.ainvoke(input_message, config={**config, "callbacks": callbacks})
+                finally:
+                    current_turn_timing.reset(timing_token)
+                
+                timing_summary = timing.summary()
+                metrics.record_timing(timing_summary)
+                turn_cost = model_router.record_turn(routing, timing_summary)
                 
                 # Extract response from agent
                 messages = result.get("messages", [])
@@ -713,6 +433,10 @@ TEST PATIENT DATA:
                                             logger.info(f"Detected verification in message: {content[:100]}...")
                                             break
                 
+                # Only replies that needed no tools are safe to reuse
+                if cache_key and not tools_used and isinstance(response_text, str):
+                    response_cache.put(cache_key, response_text)
+                
                 # Update session state if verification occurred
                 if verified_in_this_conversation:
                     session_state.is_verified = True
@@ -735,11 +459,19 @@ TEST PATIENT DATA:
                         "tools_used": ["langgraph", "claude"] + tools_used,
                         "message_count": len(messages),
                         "mcp_mode": self.use_mcp,
-                        "model": os.getenv("CLAUDE_MODEL", "claude-3-5-sonnet-20241022"),
-                        "verified_this_turn": verified_in_this_conversation
+                        "model": routing.model,
+                        "model_tier": routing.tier,
+                        "routing_reason": routing.reason,
+                        "estimated_cost_usd": round(turn_cost, 6),
+                        "verified_this_turn": verified_in_this_conversation,
+                        "timing": timing_summary
                     }
                 }
         
+        except AdmissionRejected:
+            # Let the API layer shed the request with 503 + Retry-After
+            raise
+        
         except Exception as e:
             logger.error(f"Error in process_conversation: {e}", exc_info=True)
             return {
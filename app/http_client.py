@@ -0,0 +1,258 @@
+"""
+Pooled HTTP client for the Anthropic API.
+
+This module provides one shared httpx.AsyncClient for all Claude calls:
+bounded connection pool with keep-alive, optional HTTP/2, explicit connect
+and read timeouts, and a retrying transport with jittered exponential
+backoff that honors Retry-After. Connection reuse and retry counters are
+exported for /metrics.
+"""
+
+import asyncio
+import functools
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+from .observability import setup_logging
+from .settings import settings
+
+logger = setup_logging()
+
+# Statuses worth retrying: rate limited, transient server errors, Anthropic "overloaded"
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504, 529})
+
+
+class HTTPClientMetrics:
+    """Counters for requests, connections and retries."""
+
+    def __init__(self):
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.retries_by_reason = {}
+        self.retry_after_honored = 0
+        self.failures = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.http2_requests = 0
+        self.status_counts = {}
+
+    def record_retry(self, reason: str) -> None:
+        self.retries += 1
+        self.retries_by_reason[reason] = self.retries_by_reason.get(reason, 0) + 1
+
+    async def trace(self, event_name: str, info: dict) -> None:
+        """httpcore trace hook: counts new connections and protocol per request."""
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+        elif event_name == "http2.send_request_headers.started":
+            self.http2_requests += 1
+
+    def get_stats(self) -> dict:
+        reused = max(0, self.attempts - self.connections_opened)
+        return {
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "retries_by_reason": dict(self.retries_by_reason),
+            "retry_after_honored": self.retry_after_honored,
+            "failures": self.failures,
+            "status_counts": dict(self.status_counts),
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "connection_reuse_percent": round(reused / self.attempts * 100, 2) if self.attempts else 0,
+            "http2_requests": self.http2_requests
+        }
+
+
+def parse_retry_after(headers: httpx.Headers) -> Optional[float]:
+    """Seconds to wait from retry-after-ms / Retry-After (seconds or HTTP date)."""
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryingTransport(httpx.AsyncBaseTransport):
+    """
+    Transport wrapper that retries transient failures.
+
+    Backoff is exponential with full jitter, capped at backoff_max. A
+    server-provided Retry-After overrides the computed delay (still capped),
+    and connect errors and timeouts are retried like 5xx responses.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        metrics: HTTPClientMetrics,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0
+    ):
+        self._transport = transport
+        self.metrics = metrics
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.metrics.requests += 1
+        request.extensions.setdefault("trace", self.metrics.trace)
+
+        attempt = 0
+        while True:
+            self.metrics.attempts += 1
+            try:
+                response = await self._transport.handle_async_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError) as e:
+                if attempt >= self.max_retries:
+                    self.metrics.failures += 1
+                    raise
+                reason = type(e).__name__
+                delay = self._backoff(attempt)
+            else:
+                status = response.status_code
+                self.metrics.status_counts[status] = self.metrics.status_counts.get(status, 0) + 1
+                if status not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    if status >= 500 or status == 429:
+                        self.metrics.failures += 1
+                    return response
+
+                reason = str(status)
+                retry_after = parse_retry_after(response.headers)
+                if retry_after is not None:
+                    self.metrics.retry_after_honored += 1
+                    delay = min(retry_after, self.backoff_max)
+                else:
+                    delay = self._backoff(attempt)
+                await response.aclose()
+
+            self.metrics.record_retry(reason)
+            logger.warning(f"Retrying {request.method} {request.url.path} after {reason} in {delay:.2f}s (attempt {attempt + 1})")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def build_timeout() -> httpx.Timeout:
+    """Timeouts for Claude calls from settings."""
+    return httpx.Timeout(
+        connect=settings.LLM_CONNECT_TIMEOUT_SECONDS,
+        read=settings.LLM_READ_TIMEOUT_SECONDS,
+        write=settings.LLM_READ_TIMEOUT_SECONDS,
+        pool=settings.LLM_CONNECT_TIMEOUT_SECONDS
+    )
+
+
+class AnthropicHTTPClient:
+    """Lazily created, process-wide pooled client for the Anthropic API."""
+
+    def __init__(self):
+        self.metrics = HTTPClientMetrics()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        """Get (creating on first use) the shared httpx.AsyncClient."""
+        if self._client is None or self._client.is_closed:
+            http2 = settings.LLM_HTTP2 and _http2_available()
+            if settings.LLM_HTTP2 and not http2:
+                logger.warning("LLM_HTTP2 is enabled but the h2 package is not installed; using HTTP/1.1")
+
+            limits = httpx.Limits(
+                max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS
+            )
+            transport = RetryingTransport(
+                httpx.AsyncHTTPTransport(http2=http2, limits=limits),
+                self.metrics,
+                max_retries=settings.LLM_MAX_RETRIES,
+                backoff_base=settings.LLM_RETRY_BACKOFF_BASE_SECONDS,
+                backoff_max=settings.LLM_RETRY_BACKOFF_MAX_SECONDS
+            )
+            self._client = httpx.AsyncClient(transport=transport, timeout=build_timeout())
+        return self._client
+
+    def configure_chat_anthropic(self, llm) -> bool:
+        """
+        Make a ChatAnthropic instance send its async calls through the shared client.
+
+        Relies on ChatAnthropic internals (_client_params and the
+        _async_client cached_property, langchain-anthropic 0.3.x). If they
+        are missing, logs a warning and leaves the model on its own client;
+        returns whether the shared client is in use.
+        """
+        import anthropic
+
+        async_client = getattr(type(llm), "_async_client", None)
+        if not hasattr(llm, "_client_params") or not isinstance(async_client, functools.cached_property):
+            logger.warning(
+                f"{type(llm).__name__} has no _client_params/_async_client (unsupported langchain-anthropic version); "
+                "using its own HTTP client without connection pooling or counted retries"
+            )
+            return False
+
+        client_params = dict(llm._client_params)
+        client_params.pop("timeout", None)
+        # Retries happen in RetryingTransport, where they are counted
+        client_params["max_retries"] = 0
+
+        # _async_client is a cached_property on ChatAnthropic; seed it
+        llm.__dict__["_async_client"] = anthropic.AsyncClient(
+            **client_params,
+            timeout=build_timeout(),
+            http_client=self.get_client()
+        )
+        return True
+
+    async def aclose(self) -> None:
+        """Close pooled connections (on shutdown)."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+
+    def get_stats(self) -> dict:
+        """Get connection and retry statistics for monitoring."""
+        return {
+            **self.metrics.get_stats(),
+            "http2_enabled": settings.LLM_HTTP2 and _http2_available(),
+            "max_connections": settings.LLM_HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.LLM_HTTP_MAX_KEEPALIVE
+        }
+
+
+# Global Anthropic HTTP client
+anthropic_http = AnthropicHTTPClient()
@@ -0,0 +1,118 @@
+"""
+Idempotency support for the LumaHealth Conversational AI Service.
+
+This module stores the responses of appointment mutations under a
+client-supplied idempotency key, so retried requests replay the original
+response instead of touching the database again. Each response is stored
+with a fingerprint of the request that produced it; reusing a key for a
+different request raises IdempotencyKeyReused instead of replaying.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Optional, Tuple
+
+from .settings import settings
+
+
+class IdempotencyKeyReused(Exception):
+    """Raised when an idempotency key is replayed with a different request than the one stored."""
+
+
+def request_fingerprint(request: Any) -> str:
+    """SHA-256 of a request's canonical JSON (sorted keys), stored alongside its response."""
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Compact in-memory response store with TTL and size-bounded eviction.
+
+    Responses are kept as compact JSON strings, with the fingerprint of the
+    request, keyed by (scope, session_id, idempotency key). In production
+    this would be backed by Redis.
+    """
+
+    def __init__(self, ttl_seconds: int = 3600, max_entries: int = 10000):
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, str, str]]" = OrderedDict()
+        self._lock = Lock()
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.mismatches = 0
+
+    def get(self, scope: str, session_id: str, key: str, fingerprint: str) -> Optional[Any]:
+        """
+        Get a stored response, or None if missing or expired.
+
+        Raises IdempotencyKeyReused if the key was stored for a request with
+        a different fingerprint.
+        """
+        entry_key = (scope, session_id, key)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(entry_key)
+
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[entry_key]
+                self.misses += 1
+                return None
+
+            if entry[1] != fingerprint:
+                self.mismatches += 1
+                raise IdempotencyKeyReused(f"Idempotency key already used for a different {scope} request")
+
+            self.hits += 1
+            return json.loads(entry[2])
+
+    def put(self, scope: str, session_id: str, key: str, fingerprint: str, response: Any) -> None:
+        """Store a JSON-serializable response under an idempotency key."""
+        entry_key = (scope, session_id, key)
+        payload = json.dumps(response, separators=(",", ":"), default=str)
+        expires_at = time.monotonic() + self.ttl_seconds
+
+        with self._lock:
+            self._entries[entry_key] = (expires_at, fingerprint, payload)
+            self._entries.move_to_end(entry_key)
+
+            # Evict oldest entries beyond capacity
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def cleanup_expired(self) -> int:
+        """Remove expired entries and return count of removed entries."""
+        now = time.monotonic()
+
+        with self._lock:
+            expired = [k for k, (expires_at, _, _) in self._entries.items() if expires_at <= now]
+            for k in expired:
+                del self._entries[k]
+
+        return len(expired)
+
+    def get_stats(self) -> dict:
+        """Get idempotency store statistics for monitoring."""
+        with self._lock:
+            return {
+                "stored_responses": len(self._entries),
+                "stored_bytes": sum(len(payload) for _, _, payload in self._entries.values()),
+                "replays": self.hits,
+                "misses": self.misses,
+                "key_reuse_rejected": self.mismatches
+            }
+
+
+# Global idempotency store instance
+idempotency_store = IdempotencyStore(
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    max_entries=settings.IDEMPOTENCY_MAX_KEYS
+)
@@ -0,0 +1,282 @@
+"""
+Per-turn timing instrumentation for the LumaHealth Conversational AI Service.
+
+This module provides LangGraph callback handlers: one that times every
+agent step, LLM call and tool call in a conversation turn (plus SQLAlchemy
+hooks that attribute database time to the turn that caused it), and one
+that emits OpenTelemetry spans for the same runs. The timing breakdown is
+attached to the /chat response and fed into RequestMetrics.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+
+from .db import engine
+from .tracing import tracer
+
+# Timing of the conversation turn running in the current task, if any
+current_turn_timing: ContextVar[Optional["TurnTimingHandler"]] = ContextVar("current_turn_timing", default=None)
+
+
+class TurnTimingHandler(AsyncCallbackHandler):
+    """
+    Collects wall time per agent step, LLM call and tool call for one turn.
+
+    The handler also implements the streaming-handler hooks as pass-throughs.
+    LangChain chat models stream when such a handler is attached, which is
+    what makes time-to-first-token observable.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.queue_ms = 0.0
+        self.nodes: Dict[str, float] = {}
+        self.llm_calls: List[Dict[str, Any]] = []
+        self.tool_calls: List[Dict[str, Any]] = []
+        self.db_ms = 0.0
+        self.db_queries = 0
+        self._runs: Dict[UUID, Dict[str, Any]] = {}
+
+    def mark_admitted(self) -> None:
+        """Record the time spent waiting for an LLM admission slot."""
+        self.queue_ms = (time.perf_counter() - self.started_at) * 1000
+
+    # Streaming hooks (pass-through)
+
+    def tap_output_aiter(self, run_id, output):
+        return output
+
+    def tap_output_iter(self, run_id, output):
+        return output
+
+    # Agent steps
+
+    async def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node's own run, not the runnables nested inside it or LangGraph's internal nodes
+        if node and kwargs.get("name") == node and not node.startswith("__"):
+            self._runs[run_id] = {"node": node, "start": time.perf_counter()}
+
+    async def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end_node(run_id)
+
+    async def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end_node(run_id)
+
+    def _end_node(self, run_id: UUID) -> None:
+        run = self._runs.pop(run_id, None)
+        if run:
+            elapsed = (time.perf_counter() - run["start"]) * 1000
+            self.nodes[run["node"]] = self.nodes.get(run["node"], 0.0) + elapsed
+
+    # LLM calls
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._runs[run_id] = {"start": time.perf_counter(), "first_token": None}
+
+    async def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._runs[run_id] = {"start": time.perf_counter(), "first_token": None}
+
+    async def on_llm_new_token(self, token, *, run_id, **kwargs):
+        run = self._runs.get(run_id)
+        if run is not None and run["first_token"] is None:
+            run["first_token"] = time.perf_counter()
+
+    async def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+
+        call = {
+            "ms": round((time.perf_counter() - run["start"]) * 1000, 2),
+            "ttft_ms": round((run["first_token"] - run["start"]) * 1000, 2) if run["first_token"] else None,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cached_tokens": 0
+        }
+
+        for generations in response.generations or []:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                call["input_tokens"] += usage.get("input_tokens", 0)
+                call["output_tokens"] += usage.get("output_tokens", 0)
+                call["cached_tokens"] += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+
+        self.llm_calls.append(call)
+
+    async def on_llm_error(self, error, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            self.llm_calls.append({"ms": round((time.perf_counter() - run["start"]) * 1000, 2), "error": True})
+
+    # Tool calls
+
+    async def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "unknown")
+        self._runs[run_id] = {"tool": name, "start": time.perf_counter()}
+
+    async def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end_tool(run_id, success=True)
+
+    async def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end_tool(run_id, success=False)
+
+    def _end_tool(self, run_id: UUID, success: bool) -> None:
+        run = self._runs.pop(run_id, None)
+        if run:
+            self.tool_calls.append({
+                "name": run["tool"],
+                "ms": round((time.perf_counter() - run["start"]) * 1000, 2),
+                "success": success
+            })
+
+    # Database time (fed by the SQLAlchemy hooks below)
+
+    def record_db_query(self, elapsed_ms: float) -> None:
+        self.db_ms += elapsed_ms
+        self.db_queries += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact timing breakdown for the turn."""
+        total_ms = (time.perf_counter() - self.started_at) * 1000
+        llm_ms = sum(call["ms"] for call in self.llm_calls)
+        tools_ms = sum(call["ms"] for call in self.tool_calls)
+
+        return {
+            "total_ms": round(total_ms, 2),
+            "queue_ms": round(self.queue_ms, 2),
+            "llm_ms": round(llm_ms, 2),
+            "tools_ms": round(tools_ms, 2),
+            "db_ms": round(self.db_ms, 2),
+            "db_queries": self.db_queries,
+            # Everything that is neither queueing, Claude nor a tool: graph, checkpointer, our own code
+            "other_ms": round(max(0.0, total_ms - self.queue_ms - llm_ms - tools_ms), 2),
+            "nodes": {node: round(ms, 2) for node, ms in self.nodes.items()},
+            "llm_calls": self.llm_calls,
+            "tool_calls": self.tool_calls,
+            "tokens": {
+                "input": sum(call.get("input_tokens", 0) for call in self.llm_calls),
+                "output": sum(call.get("output_tokens", 0) for call in self.llm_calls),
+                "cached": sum(call.get("cached_tokens", 0) for call in self.llm_calls)
+            }
+        }
+
+
+class TracingCallbackHandler(AsyncCallbackHandler):
+    """
+    Opens child spans for graph nodes, LLM calls and tool calls.
+
+    Runs inline so tool spans become the current context while the tool
+    executes; SQL statements and MCP calls made by the tool nest under it.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._spans: Dict[UUID, Any] = {}
+        self._tokens: Dict[UUID, Any] = {}
+        self._parents: Dict[UUID, Optional[UUID]] = {}
+
+    def _parent_context(self, parent_run_id: Optional[UUID]):
+        """Context of the nearest traced ancestor run, or the current context."""
+        run_id = parent_run_id
+        while run_id is not None:
+            span = self._spans.get(run_id)
+            if span is not None:
+                return trace.set_span_in_context(span)
+            run_id = self._parents.get(run_id)
+        return otel_context.get_current()
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, kind=SpanKind.INTERNAL, **attributes):
+        span = tracer.start_span(name, context=self._parent_context(parent_run_id), kind=kind, attributes=attributes)
+        self._spans[run_id] = span
+        return span
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None) -> None:
+        self._parents.pop(run_id, None)
+        token = self._tokens.pop(run_id, None)
+        if token is not None:
+            try:
+                otel_context.detach(token)
+            except Exception:
+                pass
+
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            if error is not None:
+                span.record_exception(error)
+                span.set_status(Status(StatusCode.ERROR, str(error)))
+            span.end()
+
+    async def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._parents[run_id] = parent_run_id
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node and not node.startswith("__"):
+            self._start(run_id, parent_run_id, f"graph.node {node}", **{"langgraph.node": node})
+
+    async def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    async def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        model = (kwargs.get("invocation_params") or {}).get("model") or (kwargs.get("metadata") or {}).get("ls_model_name", "")
+        self._start(run_id, parent_run_id, "llm.chat", kind=SpanKind.CLIENT, **{"gen_ai.request.model": str(model)})
+
+    async def on_llm_end(self, response, *, run_id, **kwargs):
+        span = self._spans.get(run_id)
+        if span is not None:
+            for generations in response.generations or []:
+                for generation in generations:
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    span.set_attribute("gen_ai.usage.input_tokens", usage.get("input_tokens", 0))
+                    span.set_attribute("gen_ai.usage.output_tokens", usage.get("output_tokens", 0))
+        self._end(run_id)
+
+    async def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    async def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "unknown")
+        span = self._start(run_id, parent_run_id, f"tool {name}", **{"tool.name": name})
+        # Make the tool span current for the tool body (SQL, MCP calls)
+        self._tokens[run_id] = otel_context.attach(trace.set_span_in_context(span))
+
+    async def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    async def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+def instrument_engine_timing(db_engine) -> None:
+    """Attribute SQL execution time to the conversation turn that issued it."""
+
+    @event.listens_for(db_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(db_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        timing = current_turn_timing.get()
+        if timing is not None:
+            timing.record_db_query((time.perf_counter() - started) * 1000)
+
+    @event.listens_for(db_engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+instrument_engine_timing(engine)
@@ -0,0 +1,172 @@
+"""
+Event-loop lag monitoring for the LumaHealth Conversational AI Service.
+
+A sampler coroutine sleeps for a fixed interval and records how late it
+wakes up, which is the scheduling delay every request sees. A watchdog
+thread checks the sampler's heartbeat; when the loop has not come back
+for longer than LOOP_SLOW_CALLBACK_MS it captures the loop thread's
+current stack, so blocking hot spots (sync DB calls, regex work) show up
+under real load without running asyncio in debug mode.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional
+
+from .observability import setup_logging, LatencyHistogram
+from .settings import settings
+
+# Setup logging
+logger = setup_logging()
+
+LAG_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Slow-callback locations kept for /metrics
+MAX_TRACKED_LOCATIONS = 50
+
+# The innermost frame under this path names the location (else the innermost frame)
+APP_PACKAGE = "/app/"
+
+
+def _blocking_location(stack: List[traceback.FrameSummary]) -> str:
+    """Innermost frame in our own code (else the innermost frame) as file:line in function."""
+    frame = next((f for f in reversed(stack) if APP_PACKAGE in f.filename.replace("\\", "/")), stack[-1])
+    filename = frame.filename.replace("\\", "/")
+    short = filename[filename.rfind(APP_PACKAGE) + 1:] if APP_PACKAGE in filename else filename.rsplit("/", 1)[-1]
+    return f"{short}:{frame.lineno} in {frame.name}"
+
+
+class LoopLagMonitor:
+    """
+    Scheduling-delay sampler plus a slow-callback watchdog.
+
+    The watchdog reports each stall once: the first stack seen for a
+    location is logged in full, later stalls at the same location log one
+    line. Stall durations are attributed when the loop wakes up again.
+    """
+
+    def __init__(self, enabled: bool = True, interval_ms: float = 100.0, slow_threshold_ms: float = 100.0):
+        self.enabled = enabled
+        self.interval = interval_ms / 1000
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.lag = LatencyHistogram(LAG_BUCKETS_MS)
+        self.stalls = 0
+        self.slow_callbacks: Dict[str, dict] = {}
+
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._loop_thread_id: Optional[int] = None
+        self._last_tick = 0.0
+        self._reported_tick: Optional[float] = None
+        self._reported_location: Optional[str] = None
+
+    def start(self) -> None:
+        """Start the sampler on the running loop and the watchdog thread."""
+        if not self.enabled or self._task is not None:
+            return
+
+        self._stop.clear()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._task = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Event-loop monitor started (interval {self.interval * 1000:.0f}ms, "
+                    f"slow callback {self.slow_threshold * 1000:.0f}ms)")
+
+    async def stop(self) -> None:
+        """Stop sampling (application shutdown)."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _sample(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag_ms = max(0.0, now - expected) * 1000
+            self.lag.observe(lag_ms)
+
+            with self._lock:
+                # The watchdog caught this stall mid-flight; record how long it lasted
+                if self._reported_location is not None:
+                    entry = self.slow_callbacks.get(self._reported_location)
+                    if entry is not None:
+                        entry["max_blocked_ms"] = max(entry["max_blocked_ms"], round(lag_ms, 2))
+                    self._reported_location = None
+                self._last_tick = now
+
+    def _watch(self) -> None:
+        poll = max(self.slow_threshold / 2, 0.01)
+        while not self._stop.wait(poll):
+            with self._lock:
+                tick = self._last_tick
+                blocked = time.monotonic() - tick - self.interval
+                if blocked < self.slow_threshold or self._reported_tick == tick:
+                    continue
+                self._reported_tick = tick
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self._report(traceback.extract_stack(frame), blocked * 1000)
+
+    def _report(self, stack: List[traceback.FrameSummary], blocked_ms: float) -> None:
+        location = _blocking_location(stack)
+        with self._lock:
+            self.stalls += 1
+            self._reported_location = location
+            entry = self.slow_callbacks.get(location)
+            first_seen = entry is None
+            if first_seen:
+                if len(self.slow_callbacks) >= MAX_TRACKED_LOCATIONS:
+                    # Make room by dropping the least frequent location
+                    del self.slow_callbacks[min(self.slow_callbacks, key=lambda k: self.slow_callbacks[k]["count"])]
+                entry = self.slow_callbacks[location] = {"count": 0, "max_blocked_ms": 0.0, "stack": []}
+            entry["count"] += 1
+            entry["max_blocked_ms"] = max(entry["max_blocked_ms"], round(blocked_ms, 2))
+            entry["stack"] = [f"{f.filename}:{f.lineno} in {f.name}" for f in stack[-8:]]
+
+        if first_seen:
+            logger.warning(
+                f"Event loop blocked for over {blocked_ms:.0f}ms at {location}\n"
+                + "".join(traceback.format_list(stack))
+            )
+        else:
+            logger.warning(f"Event loop blocked for over {blocked_ms:.0f}ms at {location} ({entry['count']} times)")
+
+    def get_stats(self) -> dict:
+        """Get event-loop lag statistics for monitoring."""
+        with self._lock:
+            top = sorted(self.slow_callbacks.items(), key=lambda item: item[1]["count"], reverse=True)[:10]
+            return {
+                "enabled": self.enabled,
+                "running": self._task is not None,
+                "interval_ms": round(self.interval * 1000, 2),
+                "slow_threshold_ms": round(self.slow_threshold * 1000, 2),
+                "lag": self.lag.snapshot(),
+                "stalls": self.stalls,
+                "slow_callbacks": [{"location": location, **entry} for location, entry in top]
+            }
+
+
+# Global event-loop monitor instance
+loop_monitor = LoopLagMonitor(
+    enabled=settings.LOOP_MONITOR_ENABLED,
+    interval_ms=settings.LOOP_MONITOR_INTERVAL_MS,
+    slow_threshold_ms=settings.LOOP_SLOW_CALLBACK_MS
+)
@@ -5,33 +5,63 @@ This module provides the REST API endpoints for the conversational AI service,
 supporting patient verification, appointment management, and session handling.
 """
 
+import asyncio
+import hmac
 import os
 import uuid
 from datetime import datetime
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 from contextlib import asynccontextmanager
 
 # Load environment variables from .env file
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel
 from sqlmodel import Session
 
-from .db import create_db_and_tables, get_session, seed_database, PatientCRUD, AppointmentCRUD
+from .db import (
+    create_db_and_tables, get_session, seed_database, PatientCRUD, AppointmentCRUD,
+    AppointmentArchiveCRUD, SlotCRUD, archive_engine, engine, resolve_appointment_filters
+)
 from .models import (
     ChatRequest, ChatResponse, VerifyUserRequest, VerifyUserResponse,
     AppointmentResponse, ConfirmAppointmentRequest, CancelAppointmentRequest,
-    ActionResponse, AppointmentStatus, Patient
+    RescheduleAppointmentRequest, SlotResponse, SlotListResponse, ActionResponse, Appointment, AppointmentArchive,
+    AppointmentStatus, Patient
 )
 from .session_manager import SessionManager
-from .observability import setup_logging, log_request
-from .graph import LumaHealthAgent
+from .observability import setup_logging, log_request, get_observability_summary
 from .settings import settings
 from .security import guardrails
+from .request_coalescing import request_coalescer
+from .idempotency import IdempotencyKeyReused, idempotency_store, request_fingerprint
+from .admission import llm_admission, AdmissionRejected
+from .response_cache import response_cache
+from .model_router import model_router
+from .prefetch import appointment_prefetcher
+from .offload import cpu_offloader
+from .loop_monitor import loop_monitor
+from .profiling import profiler, ProfilerBusy
+from .patient_index import patient_lookup_index
+from .date_resolver import date_resolver
+from .archival import appointment_archiver
+from .reminders import reminder_job
+from .availability import slot_index
+from .audit import audit_log, audit_channel
+from .export import (
+    appointment_exporter, encode_rows, metric_rows, violation_counts, ExportBusy, ExportResponse,
+    EXPORT_MEDIA_TYPES, METRIC_EXPORT_COLUMNS
+)
+from .tracing import setup_tracing, TracingMiddleware
+
+if TYPE_CHECKING:
+    # Imported lazily in warmup(): LangChain, LangGraph and MCP dominate import time
+    from .graph import LumaHealthAgent
 
 # Setup structured logging
 logger = setup_logging()
@@ -39,37 +69,144 @@ logger = setup_logging()
 # Global session manager (in-memory for MVP)
 session_manager = SessionManager()
 
-# Global LangGraph agent (will be initialized in lifespan)
-langgraph_agent: Optional[LumaHealthAgent] = None
+# Global LangGraph agent (will be initialized by warmup)
+langgraph_agent: Optional["LumaHealthAgent"] = None
+
+# Resolved once the database and agent are ready (created in lifespan)
+service_ready: Optional[asyncio.Future] = None
+
+
+def create_agent() -> Optional["LumaHealthAgent"]:
+    """Import the LangGraph/Claude stack and build the agent."""
+    anthropic_api_key = settings.ANTHROPIC_API_KEY or os.getenv("ANTHROPIC_API_KEY")
+    if not (anthropic_api_key or settings.LLM_PROVIDER == "fake"):
+        logger.warning("ANTHROPIC_API_KEY not found - using simple NLU mode")
+        return None
+    
+    try:
+        from .graph import LumaHealthAgent
+        agent = LumaHealthAgent(anthropic_api_key, session_manager)
+        logger.info("LangGraph Agent with Claude initialized successfully")
+        return agent
+    except Exception as e:
+        logger.error(f"Failed to initialize LangGraph Agent: {e}")
+        logger.warning("Falling back to simple NLU mode")
+        return None
+
+
+async def warmup():
+    """
+    Initialize the database and agent in the background.
+    
+    Runs after the server starts listening, so /health answers immediately
+    on a cold start while requests that need the agent wait on service_ready.
+    """
+    global langgraph_agent
+    
+    try:
+        started = datetime.utcnow()
+        await asyncio.to_thread(create_db_and_tables)
+        await asyncio.to_thread(seed_database)
+        await asyncio.to_thread(patient_lookup_index.load, engine)
+        await asyncio.to_thread(slot_index.load, engine)
+        logger.info("Database initialized and seeded")
+        
+        langgraph_agent = await asyncio.to_thread(create_agent)
+        
+        warmup_ms = int((datetime.utcnow() - started).total_seconds() * 1000)
+        logger.info(f"Service ready after {warmup_ms}ms warmup")
+        service_ready.set_result(True)
+    
+    except Exception as e:
+        logger.error(f"Warmup failed: {e}", exc_info=True)
+        service_ready.set_exception(e)
+
+
+async def wait_until_ready():
+    """Dependency that holds a request until warmup has finished."""
+    if service_ready is None:
+        raise HTTPException(status_code=503, detail="Service is starting up", headers={"Retry-After": "1"})
+    
+    try:
+        await asyncio.wait_for(asyncio.shield(service_ready), timeout=settings.READINESS_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Service is starting up", headers={"Retry-After": "1"})
+    except Exception:
+        raise HTTPException(status_code=503, detail="Service failed to start")
+
+
+async def run_archival():
+    """Run the archival job every ARCHIVE_INTERVAL_HOURS once the database is ready."""
+    try:
+        await asyncio.shield(service_ready)
+    except Exception:
+        return
+    await appointment_archiver.run_periodically(settings.ARCHIVE_INTERVAL_HOURS * 3600)
+
+
+async def run_reminders():
+    """Run the reminder job every REMINDER_INTERVAL_MINUTES once the database is ready."""
+    try:
+        await asyncio.shield(service_ready)
+    except Exception:
+        return
+    await reminder_job.run_periodically(settings.REMINDER_INTERVAL_MINUTES * 60)
+
+
+async def run_audit_recovery():
+    """Record the state of appointments whose audit events were lost (e.g. in a crash) every AUDIT_RECOVERY_INTERVAL_SECONDS."""
+    try:
+        await asyncio.shield(service_ready)
+    except Exception:
+        return
+    await audit_log.run_periodically(engine, settings.AUDIT_RECOVERY_INTERVAL_SECONDS)
+
+
+def is_ready() -> bool:
+    """Check whether warmup finished successfully."""
+    return service_ready is not None and service_ready.done() and service_ready.exception() is None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
-    global langgraph_agent
+    global service_ready
     
-    # Startup
+    # Startup: serve immediately, warm up in the background
     logger.info("Starting LumaHealth Conversational AI Service")
-    create_db_and_tables()
-    seed_database()
-    logger.info("Database initialized and seeded")
+    service_ready = asyncio.get_running_loop().create_future()
+    loop_monitor.start()
+    warmup_task = asyncio.create_task(warmup())
+    audit_recovery_task = asyncio.create_task(run_audit_recovery())
     
-    # Initialize LangGraph Agent with Claude
-    anthropic_api_key = settings.ANTHROPIC_API_KEY or os.getenv("ANTHROPIC_API_KEY")
-    if anthropic_api_key:
-        try:
-            langgraph_agent = LumaHealthAgent(anthropic_api_key, session_manager)
-            logger.info("LangGraph Agent with Claude initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize LangGraph Agent: {e}")
-            logger.warning("Falling back to simple NLU mode")
-    else:
-        logger.warning("ANTHROPIC_API_KEY not found - using simple NLU mode")
+    # Move old appointments to the archive table periodically (opt-in)
+    archival_task = None
+    if settings.ARCHIVE_ENABLED:
+        archival_task = asyncio.create_task(run_archival())
+    
+    # Push reminders for upcoming PENDING appointments periodically (opt-in)
+    reminder_task = None
+    if settings.REMINDERS_ENABLED:
+        reminder_task = asyncio.create_task(run_reminders())
     
     yield
     
     # Shutdown
     logger.info("Shutting down LumaHealth Conversational AI Service")
+    if not warmup_task.done():
+        warmup_task.cancel()
+    if archival_task is not None:
+        archival_task.cancel()
+    if reminder_task is not None:
+        reminder_task.cancel()
+    audit_recovery_task.cancel()
+    # Commit the audit events still queued
+    await asyncio.to_thread(audit_log.close)
+    cpu_offloader.shutdown()
+    await loop_monitor.stop()
+    if langgraph_agent is not None:
+        from .http_client import anthropic_http
+        await anthropic_http.aclose()
 
 
 # FastAPI application
@@ -80,6 +217,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Tracing: exporter and sampling from TRACING_* settings (off by default)
+setup_tracing()
+app.add_middleware(TracingMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -87,6 +228,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -103,6 +245,62 @@ def format_appointment_response(appointment) -> AppointmentResponse:
     )
 
 
+def format_prefetched_appointment(appointment: dict) -> AppointmentResponse:
+    """Format a prefetched (serialized) appointment for API response."""
+    return AppointmentResponse(
+        id=appointment["id"],
+        when_utc=datetime.fromisoformat(appointment["datetime_utc"]),
+        location=appointment["location"],
+        status=appointment["status"],
+        doctor_name=appointment["doctor"],
+        formatted_datetime=f"{appointment['date']} {appointment['time']}"
+    )
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """Return the cursor of the next page in the X-Next-Cursor header; listings stay bare lists."""
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+
+def replay_idempotent_action(
+    scope: str, request: BaseModel, idempotency_key: Optional[str], response: Response
+) -> Optional[ActionResponse]:
+    """
+    Return the stored response for a replayed idempotency key, if any.
+    
+    A key reused with a different request body is rejected with 422.
+    """
+    if not idempotency_key:
+        return None
+    
+    try:
+        stored = idempotency_store.get(
+            scope, request.session_id, idempotency_key, request_fingerprint(request.model_dump(mode="json"))
+        )
+    except IdempotencyKeyReused:
+        logger.warning(f"Rejected reused {scope} idempotency key for session: {request.session_id}")
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    if stored is None:
+        return None
+    
+    logger.info(f"Replaying idempotent {scope} response for session: {request.session_id}")
+    response.headers["Idempotent-Replayed"] = "true"
+    return ActionResponse(**stored)
+
+
+def store_idempotent_action(
+    scope: str, request: BaseModel, idempotency_key: Optional[str], result: ActionResponse
+) -> ActionResponse:
+    """Store an action response, with the request's fingerprint, under its idempotency key and return it."""
+    if idempotency_key:
+        idempotency_store.put(
+            scope, request.session_id, idempotency_key,
+            request_fingerprint(request.model_dump(mode="json")), result.model_dump(mode="json")
+        )
+    return result
+
+
 # Web UI HTML Template
 # WEB_UI_HTML = """
 # <!DOCTYPE html>
@@ -750,8 +948,16 @@ async def api_status():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    """Health check endpoint (answers immediately, even during warmup)."""
+    return {"status": "healthy", "ready": is_ready(), "timestamp": datetime.utcnow().isoformat()}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 503 until the database and agent are ready."""
+    if not is_ready():
+        return JSONResponse(status_code=503, content={"status": "starting"}, headers={"Retry-After": "1"})
+    return {"status": "ready", "langgraph_enabled": langgraph_agent is not None}
 
 
 @app.get("/security/summary")
@@ -766,7 +972,196 @@ async def security_summary(session_id: Optional[str] = None):
     return summary
 
 
-@app.post("/chat", response_model=ChatResponse)
+@app.get("/metrics")
+async def metrics_summary():
+    """Get request metrics and runtime statistics for monitoring."""
+    summary = get_observability_summary()
+    summary["sessions"] = session_manager.get_session_stats()
+    summary["request_coalescing"] = request_coalescer.get_stats()
+    summary["idempotency"] = idempotency_store.get_stats()
+    summary["llm_admission"] = llm_admission.get_stats()
+    summary["response_cache"] = response_cache.get_stats()
+    summary["model_routing"] = model_router.get_stats()
+    summary["appointment_prefetch"] = appointment_prefetcher.get_stats()
+    summary["cpu_offload"] = cpu_offloader.get_stats()
+    summary["event_loop"] = loop_monitor.get_stats()
+    summary["archival"] = appointment_archiver.get_stats()
+    summary["reminders"] = reminder_job.get_stats()
+    summary["profiling"] = profiler.get_stats()
+    summary["date_resolver"] = date_resolver.get_stats()
+    summary["patient_lookup_index"] = patient_lookup_index.get_stats()
+    summary["slot_index"] = slot_index.get_stats()
+    summary["exports"] = appointment_exporter.get_stats()
+    summary["audit_log"] = audit_log.get_stats()
+    
+    if langgraph_agent is not None:
+        # Loaded with the agent stack; not imported at module level
+        from .tool_registry import tool_registry
+        from .http_client import anthropic_http
+        summary["tool_registry"] = tool_registry.get_stats()
+        summary["anthropic_http"] = anthropic_http.get_stats()
+    return summary
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None, alias="X-Admin-Token")):
+    """Allow /admin endpoints only with the configured ADMIN_TOKEN (hidden when unset)."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def memory_structures() -> dict:
+    """Sizes of the in-memory structures that grow with traffic."""
+    structures = {
+        "sessions": session_manager.get_session_count(),
+        "security_violation_history": len(guardrails.violation_history),
+        "security_rate_limited_identifiers": len(guardrails.rate_limiter.requests)
+    }
+    if langgraph_agent is not None:
+        storage = getattr(langgraph_agent.memory, "storage", {})
+        structures["checkpoint_threads"] = len(storage)
+        structures["checkpoints"] = sum(len(checkpoints) for namespaces in storage.values() for checkpoints in namespaces.values())
+        structures["checkpoint_pending_writes"] = len(getattr(langgraph_agent.memory, "writes", {}))
+    return structures
+
+
+@app.get("/admin/profile/cpu", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def profile_cpu(
+    seconds: float = Query(default=10.0, gt=0),
+    interval_ms: float = Query(default=5.0, ge=1),
+    threads: str = Query(default="loop", pattern="^(loop|all)$")
+):
+    """
+    Sample live stacks for a bounded time and return them collapsed.
+    
+    The response is folded-stack text ("frame;frame;frame count" per
+    line), ready for flamegraph.pl, inferno or speedscope. threads=loop
+    samples only the event-loop thread; all includes worker threads.
+    """
+    try:
+        result = await profiler.sample_cpu(seconds, interval_ms, all_threads=threads == "all")
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    filename = f"cpu-{datetime.utcnow():%Y%m%dT%H%M%S}.folded"
+    return PlainTextResponse(
+        result["folded"],
+        headers={"Content-Disposition": f"attachment; filename={filename}", "X-Profile-Samples": str(result["samples"])}
+    )
+
+
+@app.get("/admin/profile/cprofile", dependencies=[Depends(require_admin)])
+async def profile_cprofile(
+    seconds: float = Query(default=10.0, gt=0),
+    sort: str = Query(default="cumulative"),
+    limit: int = Query(default=40, ge=1, le=500),
+    format: str = Query(default="text", pattern="^(text|prof)$")
+):
+    """
+    Run cProfile over the event-loop thread for a bounded time.
+    
+    format=text returns the pstats report; format=prof returns the raw
+    profile for snakeviz or pstats.Stats.
+    """
+    try:
+        result = await profiler.cprofile(seconds, limit=limit, sort=sort)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if format == "prof":
+        filename = f"cpu-{datetime.utcnow():%Y%m%dT%H%M%S}.prof"
+        return Response(
+            result["prof"],
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+    return PlainTextResponse(result["report"])
+
+
+@app.post("/admin/profile/memory/start", dependencies=[Depends(require_admin)])
+async def start_memory_profile(nframes: int = Query(default=10, ge=1, le=50)):
+    """Start tracemalloc and take the baseline snapshot for diffs."""
+    return {**profiler.start_memory(nframes), "structures": memory_structures()}
+
+
+@app.get("/admin/profile/memory", dependencies=[Depends(require_admin)])
+async def memory_profile(
+    limit: int = Query(default=20, ge=1, le=200),
+    group_by: str = Query(default="lineno")
+):
+    """Top allocators now and their growth since memory tracing started."""
+    try:
+        snapshot = await asyncio.to_thread(profiler.memory_snapshot, limit, group_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**snapshot, "structures": memory_structures()}
+
+
+@app.post("/admin/profile/memory/stop", dependencies=[Depends(require_admin)])
+async def stop_memory_profile():
+    """Stop tracemalloc (it slows every allocation while running)."""
+    return profiler.stop_memory()
+
+
+@app.get("/admin/export/appointments", dependencies=[Depends(require_admin)])
+async def export_appointments(
+    format: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+    from_date: Optional[str] = Query(default=None, alias="from", description="YYYY-MM-DD or ISO datetime"),
+    to_date: Optional[str] = Query(default=None, alias="to", description="YYYY-MM-DD (inclusive)"),
+    status: Optional[str] = Query(default=None, description="pending, confirmed, cancelled (comma-separated); default: all"),
+    location: Optional[str] = Query(default=None, description="Only locations containing this text"),
+    doctor: Optional[str] = Query(default=None, description="Only doctors whose name contains this text"),
+    archived: bool = Query(default=False, description="Export archived history instead")
+):
+    """
+    Stream matching appointments as CSV or NDJSON, in ID order.
+    
+    Rows are read and sent one chunk (EXPORT_CHUNK_SIZE rows) at a time,
+    and the next chunk is only read once the client has taken the last
+    one, so memory stays flat for any export size.
+    """
+    try:
+        filters = resolve_appointment_filters(from_date, to_date, status or "all", upcoming_by_default=False)
+        slot = appointment_exporter.reserve()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExportBusy as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    model, bind = (AppointmentArchive, archive_engine) if archived else (Appointment, engine)
+    filename = f"{model.__tablename__}-{datetime.utcnow():%Y%m%dT%H%M%S}.{format}"
+    return ExportResponse(
+        appointment_exporter.stream(
+            bind, model, format, filters["start"], filters["end"], filters["statuses"], location, doctor, slot
+        ),
+        slot,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@app.get("/admin/export/metrics", dependencies=[Depends(require_admin)])
+async def export_metrics(format: str = Query(default="csv", pattern="^(csv|ndjson)$")):
+    """Aggregated request, timing and security metrics as (section, metric, value) rows."""
+    observability = get_observability_summary()
+    rows = metric_rows({
+        "requests": observability["metrics"],
+        "timing": observability["timing"],
+        "security": guardrails.get_security_summary(),
+        "violations": violation_counts(guardrails.violation_history)
+    })
+    filename = f"metrics-{datetime.utcnow():%Y%m%dT%H%M%S}.{format}"
+    return Response(
+        encode_rows(rows, METRIC_EXPORT_COLUMNS, format, header=True),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@app.post("/chat", response_model=ChatResponse, dependencies=[Depends(wait_until_ready)])
 async def chat_endpoint(
     request: ChatRequest,
     db: Session = Depends(get_session)
@@ -787,10 +1182,12 @@ async def chat_endpoint(
         if langgraph_agent:
             logger.info(f"Processing with LangGraph Agent: {session_id}")
             
-            result = await langgraph_agent.process_conversation(
-                session_id=session_id,
-                message=request.message
-            )
+            # Changes made by the agent's tools are audited as "agent" (as "mcp" when it calls the MCP server)
+            with audit_channel("agent", session_id):
+                result = await langgraph_agent.process_conversation(
+                    session_id=session_id,
+                    message=request.message
+                )
             
             # Calculate response time
             latency_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
@@ -799,7 +1196,9 @@ async def chat_endpoint(
             result["observability"]["latency_ms"] = latency_ms
             
             # Log the interaction
-            log_request(
+            await cpu_offloader.run(
+                log_request,
+                size=len(request.message),
                 session_id=session_id,
                 intent=result["observability"].get("intent", "unknown"),
                 message=request.message,
@@ -850,7 +1249,9 @@ async def chat_endpoint(
                 if not session_state.is_verified:
                     reply = "I need to verify your identity first. Please provide your full name and date of birth."
                 else:
-                    appointments = AppointmentCRUD.get_by_patient_id(db, session_state.patient_id)
+                    appointments, _ = AppointmentCRUD.list_by_patient_id(
+                        db, session_state.patient_id, **resolve_appointment_filters()
+                    )
                     if appointments:
                         apt_list = []
                         for apt in appointments:
@@ -890,7 +1291,9 @@ async def chat_endpoint(
             latency_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
             
             # Log the interaction
-            log_request(
+            await cpu_offloader.run(
+                log_request,
+                size=len(request.message),
                 session_id=session_id,
                 intent=intent,
                 message=request.message,
@@ -916,11 +1319,22 @@ async def chat_endpoint(
                 }
             )
         
+    except AdmissionRejected as e:
+        logger.warning(f"Chat request shed for session {session_id}: {e.reason}")
+        
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Service is busy, please retry shortly.", "reason": e.reason},
+            headers={"Retry-After": str(e.retry_after_seconds)}
+        )
+    
     except Exception as e:
         logger.error(f"Error processing chat request: {e}", exc_info=True)
         
         # Log the error
-        log_request(
+        await cpu_offloader.run(
+            log_request,
+            size=len(request.message),
             session_id=session_id,
             intent="error",
             message=request.message,
@@ -932,7 +1346,7 @@ async def chat_endpoint(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.post("/verify", response_model=VerifyUserResponse)
+@app.post("/verify", response_model=VerifyUserResponse, dependencies=[Depends(wait_until_ready)])
 async def verify_user(
     request: VerifyUserRequest,
     db: Session = Depends(get_session)
@@ -955,6 +1369,9 @@ async def verify_user(
             session_state.patient_id = patient.id
             session_manager.update_session(request.session_id, session_state)
             
+            # The next request is almost always the appointment list
+            appointment_prefetcher.start(session_manager, request.session_id, patient.id)
+            
             logger.info(f"User verified successfully: {request.session_id}")
             
             return VerifyUserResponse(
@@ -975,104 +1392,296 @@ async def verify_user(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.get("/appointments/{session_id}")
+@app.get(
+    "/appointments/{session_id}",
+    response_model=List[AppointmentResponse],
+    dependencies=[Depends(wait_until_ready)]
+)
 async def list_appointments(
     session_id: str,
+    response: Response,
+    from_date: Optional[str] = Query(default=None, alias="from", description="YYYY-MM-DD; default: now"),
+    to_date: Optional[str] = Query(default=None, alias="to", description="YYYY-MM-DD (inclusive)"),
+    status: Optional[str] = Query(default=None, description="pending, confirmed, cancelled (comma-separated) or all"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    limit: Optional[int] = Query(default=None, ge=1),
     db: Session = Depends(get_session)
 ):
-    """List appointments for a verified session."""
+    """
+    List one page of appointments for a verified session.
+    
+    Defaults to upcoming (pending and confirmed) appointments. Pages are
+    keyset-paginated on (when_utc, id): the X-Next-Cursor header, set when
+    there are more, goes back as cursor.
+    """
     session_state = session_manager.get_session(session_id)
     
     if not session_state or not session_state.is_verified:
         raise HTTPException(status_code=401, detail="Session not verified")
     
     try:
-        appointments = AppointmentCRUD.get_by_patient_id(db, session_state.patient_id)
+        is_default_listing = not any([from_date, to_date, status, cursor, limit])
+        if is_default_listing:
+            prefetched = await appointment_prefetcher.get(session_manager, session_id)
+            if prefetched is not None:
+                set_next_cursor(response, prefetched["next_cursor"])
+                return [format_prefetched_appointment(apt) for apt in prefetched["appointments"]]
+        
+        appointments, next_cursor = AppointmentCRUD.list_by_patient_id(
+            db, session_state.patient_id, cursor=cursor,
+            **resolve_appointment_filters(from_date, to_date, status, limit)
+        )
+        set_next_cursor(response, next_cursor)
         return [format_appointment_response(apt) for apt in appointments]
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
         
     except Exception as e:
         logger.error(f"Error listing appointments: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.post("/confirm", response_model=ActionResponse)
+@app.get(
+    "/appointments/{session_id}/history",
+    response_model=List[AppointmentResponse],
+    dependencies=[Depends(wait_until_ready)]
+)
+async def list_archived_appointments(
+    session_id: str,
+    response: Response,
+    from_date: Optional[str] = Query(default=None, alias="from", description="YYYY-MM-DD"),
+    to_date: Optional[str] = Query(default=None, alias="to", description="YYYY-MM-DD (inclusive)"),
+    status: Optional[str] = Query(default=None, description="confirmed, cancelled (comma-separated) or all"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    limit: Optional[int] = Query(default=None, ge=1)
+):
+    """
+    List one page of archived appointment history for a verified session.
+    
+    Archived appointments are kept out of /appointments; with no filters
+    this returns the whole history, oldest first.
+    """
+    session_state = session_manager.get_session(session_id)
+    
+    if not session_state or not session_state.is_verified:
+        raise HTTPException(status_code=401, detail="Session not verified")
+    
+    try:
+        filters = resolve_appointment_filters(from_date, to_date, status, limit, upcoming_by_default=False)
+        with Session(archive_engine) as archive_db:
+            appointments, next_cursor = AppointmentArchiveCRUD.list_by_patient_id(
+                archive_db, session_state.patient_id, cursor=cursor, **filters
+            )
+            set_next_cursor(response, next_cursor)
+            return [format_appointment_response(apt) for apt in appointments]
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+        
+    except Exception as e:
+        logger.error(f"Error listing archived appointments: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.post("/confirm", response_model=ActionResponse, dependencies=[Depends(wait_until_ready)])
 async def confirm_appointment(
     request: ConfirmAppointmentRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
     db: Session = Depends(get_session)
 ):
-    """Confirm an appointment."""
+    """
+    Confirm an appointment.
+    
+    Requests carrying an Idempotency-Key header replay the stored response
+    on retry without touching the database.
+    """
     session_state = session_manager.get_session(request.session_id)
     
     if not session_state or not session_state.is_verified:
         raise HTTPException(status_code=401, detail="Session not verified")
     
+    replayed = replay_idempotent_action("confirm", request, idempotency_key, response)
+    if replayed:
+        return replayed
+    
     try:
         if request.appointment_id:
-            appointment = AppointmentCRUD.confirm_appointment(
-                db, request.appointment_id, session_state.patient_id
-            )
+            with audit_channel("rest", request.session_id):
+                appointment, reason = AppointmentCRUD.confirm_appointment(
+                    db, request.appointment_id, session_state.patient_id
+                )
             
             if appointment:
-                return ActionResponse(
+                appointment_prefetcher.invalidate(session_manager, request.session_id)
+                result = ActionResponse(
                     success=True,
                     message="Consulta confirmada com sucesso!",
                     appointment=format_appointment_response(appointment)
                 )
+            elif reason == "cancelled":
+                result = ActionResponse(
+                    success=False,
+                    message="Consultas canceladas não podem ser confirmadas."
+                )
             else:
-                return ActionResponse(
+                result = ActionResponse(
                     success=False,
                     message="Não foi possível confirmar a consulta."
                 )
         else:
-            return ActionResponse(
+            result = ActionResponse(
                 success=False,
                 message="ID da consulta é obrigatório."
             )
+        
+        return store_idempotent_action("confirm", request, idempotency_key, result)
             
     except Exception as e:
         logger.error(f"Error confirming appointment: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@app.post("/cancel", response_model=ActionResponse)
+@app.post("/cancel", response_model=ActionResponse, dependencies=[Depends(wait_until_ready)])
 async def cancel_appointment(
     request: CancelAppointmentRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
     db: Session = Depends(get_session)
 ):
-    """Cancel an appointment."""
+    """
+    Cancel an appointment.
+    
+    Requests carrying an Idempotency-Key header replay the stored response
+    on retry without touching the database.
+    """
     session_state = session_manager.get_session(request.session_id)
     
     if not session_state or not session_state.is_verified:
         raise HTTPException(status_code=401, detail="Session not verified")
     
+    replayed = replay_idempotent_action("cancel", request, idempotency_key, response)
+    if replayed:
+        return replayed
+    
     try:
         if request.appointment_id:
-            appointment = AppointmentCRUD.cancel_appointment(
-                db, request.appointment_id, session_state.patient_id
-            )
+            with audit_channel("rest", request.session_id):
+                appointment, reason = AppointmentCRUD.cancel_appointment(
+                    db, request.appointment_id, session_state.patient_id
+                )
             
             if appointment:
-                return ActionResponse(
+                appointment_prefetcher.invalidate(session_manager, request.session_id)
+                result = ActionResponse(
                     success=True,
                     message="Consulta cancelada com sucesso!",
                     appointment=format_appointment_response(appointment)
                 )
             else:
-                return ActionResponse(
+                result = ActionResponse(
                     success=False,
                     message="Não foi possível cancelar a consulta."
                 )
         else:
-            return ActionResponse(
+            result = ActionResponse(
                 success=False,
                 message="ID da consulta é obrigatório."
             )
+        
+        return store_idempotent_action("cancel", request, idempotency_key, result)
             
     except Exception as e:
         logger.error(f"Error cancelling appointment: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.get("/slots", response_model=SlotListResponse, dependencies=[Depends(wait_until_ready)])
+async def find_available_slots(
+    doctor: Optional[str] = Query(default=None, description="Doctor's name or part of it"),
+    location: Optional[str] = Query(default=None, description="Location or part of it"),
+    after: Optional[str] = Query(default=None, description="YYYY-MM-DD[THH:MM] or e.g. 'next Tuesday afternoon'; default: now"),
+    limit: Optional[int] = Query(default=None, ge=1),
+    db: Session = Depends(get_session)
+):
+    """
+    Find the next open slots for a doctor and/or location, earliest first.
+    
+    Served from the in-memory slot index once warmup has loaded it.
+    """
+    after_utc = date_resolver.earliest(after)
+    if after and after_utc is None:
+        raise HTTPException(status_code=400, detail=f"Unrecognized date: {after}")
+    
+    try:
+        slots = SlotCRUD.find_open(
+            db, doctor, location, after_utc,
+            min(limit or settings.SLOT_SEARCH_LIMIT, settings.APPOINTMENTS_MAX_PAGE_SIZE)
+        )
+        return SlotListResponse(slots=[SlotResponse(**slot) for slot in slots])
+    
+    except Exception as e:
+        logger.error(f"Error finding available slots: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.post("/reschedule", response_model=ActionResponse, dependencies=[Depends(wait_until_ready)])
+async def reschedule_appointment(
+    request: RescheduleAppointmentRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+    db: Session = Depends(get_session)
+):
+    """
+    Move an appointment to an open slot.
+    
+    The slot is claimed with a conditional update, so of two requests
+    racing for the same slot exactly one succeeds; the other gets
+    success=false and the next open slots on that schedule. Requests
+    carrying an Idempotency-Key header replay the stored response on retry.
+    """
+    session_state = session_manager.get_session(request.session_id)
+    
+    if not session_state or not session_state.is_verified:
+        raise HTTPException(status_code=401, detail="Session not verified")
+    
+    replayed = replay_idempotent_action("reschedule", request, idempotency_key, response)
+    if replayed:
+        return replayed
+    
+    try:
+        with audit_channel("rest", request.session_id):
+            appointment, reason = AppointmentCRUD.reschedule(
+                db, request.appointment_id, session_state.patient_id, request.slot_id
+            )
+        
+        if appointment:
+            appointment_prefetcher.invalidate(session_manager, request.session_id)
+            result = ActionResponse(
+                success=True,
+                message="Consulta remarcada com sucesso!",
+                appointment=format_appointment_response(appointment)
+            )
+        elif reason == "slot_taken":
+            result = ActionResponse(
+                success=False,
+                message="Esse horário acabou de ser reservado. Escolha outro horário.",
+                slots=[SlotResponse(**slot) for slot in SlotCRUD.alternatives(db, request.slot_id)]
+            )
+        else:
+            result = ActionResponse(
+                success=False,
+                message="Não foi possível remarcar a consulta."
+            )
+        
+        return store_idempotent_action("reschedule", request, idempotency_key, result)
+    
+    except Exception as e:
+        logger.error(f"Error rescheduling appointment: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -7,6 +7,7 @@ other MCP-compatible clients.
 """
 
 import asyncio
+import json
 import os
 from datetime import datetime
 from typing import List, Optional, Dict, Any
@@ -19,10 +20,19 @@ import mcp.types as types
 
 from sqlmodel import Session
 
-from .db import create_db_and_tables, PatientCRUD, AppointmentCRUD, engine
+from .db import create_db_and_tables, PatientCRUD, AppointmentCRUD, SlotCRUD, engine
+from .audit import audit_channel
+from .availability import slot_index
 from .session_manager import SessionManager
 from .observability import setup_logging
 from .security import with_guardrails, guardrails
+from .idempotency import IdempotencyKeyReused, idempotency_store, request_fingerprint
+from .prefetch import appointment_prefetcher, load_appointment_page
+from .patient_index import patient_lookup_index
+from .date_resolver import date_resolver
+from .settings import settings
+from .tracing import setup_tracing, tracer, extract_trace_context
+from opentelemetry.trace import SpanKind
 
 # Setup logging
 logger = setup_logging()
@@ -55,11 +65,17 @@ async def handle_list_tools() -> list[types.Tool]:
         ),
         types.Tool(
             name="list_appointments",
-            description="List all appointments for a verified session",
+            description="List appointments for a verified session (upcoming by default, one page at a time)",
             inputSchema={
                 "type": "object",
                 "properties": {
-                    "session_id": {"type": "string", "description": "Unique session identifier"}
+                    "session_id": {"type": "string", "description": "Unique session identifier"},
+                    "from_date": {"type": "string", "description": "Only appointments on or after this date (YYYY-MM-DD)"},
+                    "to_date": {"type": "string", "description": "Only appointments on or before this date (YYYY-MM-DD)"},
+                    "status": {"type": "string", "description": "pending, confirmed, cancelled (comma-separated) or all"},
+                    "cursor": {"type": "string", "description": "next_cursor from the previous page"},
+                    "limit": {"type": "integer", "description": "Page size"},
+                    "archived": {"type": "boolean", "description": "List archived history (older appointments) instead"}
                 },
                 "required": ["session_id"]
             }
@@ -72,8 +88,9 @@ async def handle_list_tools() -> list[types.Tool]:
                 "properties": {
                     "session_id": {"type": "string", "description": "Unique session identifier"},
                     "appointment_id": {"type": "integer", "description": "Specific appointment ID to confirm"},
-                    "date": {"type": "string", "description": "Date reference (YYYY-MM-DD format)"},
-                    "time": {"type": "string", "description": "Time reference (HH:MM format)"}
+                    "date": {"type": "string", "description": "Date reference: YYYY-MM-DD or the patient's words, e.g. 'next Tuesday afternoon', 'amanhã às 15h'"},
+                    "time": {"type": "string", "description": "Time reference: HH:MM or e.g. '3pm', 'afternoon'"},
+                    "idempotency_key": {"type": "string", "description": "Client key that makes retries of this call safe"}
                 },
                 "required": ["session_id"]
             }
@@ -86,12 +103,44 @@ async def handle_list_tools() -> list[types.Tool]:
                 "properties": {
                     "session_id": {"type": "string", "description": "Unique session identifier"},
                     "appointment_id": {"type": "integer", "description": "Specific appointment ID to cancel"},
-                    "date": {"type": "string", "description": "Date reference (YYYY-MM-DD format)"},
-                    "time": {"type": "string", "description": "Time reference (HH:MM format)"}
+                    "date": {"type": "string", "description": "Date reference: YYYY-MM-DD or the patient's words, e.g. 'next Tuesday afternoon', 'amanhã às 15h'"},
+                    "time": {"type": "string", "description": "Time reference: HH:MM or e.g. '3pm', 'afternoon'"},
+                    "idempotency_key": {"type": "string", "description": "Client key that makes retries of this call safe"}
+                },
+                "required": ["session_id"]
+            }
+        ),
+        types.Tool(
+            name="find_available_slots",
+            description="Find the next open slots on a doctor's schedule, for rescheduling",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "session_id": {"type": "string", "description": "Unique session identifier"},
+                    "doctor": {"type": "string", "description": "Doctor's name or part of it, e.g. 'Ana Rodrigues'"},
+                    "location": {"type": "string", "description": "Location or part of it, e.g. 'Clínica Central'"},
+                    "after": {"type": "string", "description": "Only slots from this moment: YYYY-MM-DD or e.g. 'next Tuesday afternoon'"},
+                    "limit": {"type": "integer", "description": "Number of slots to return"}
                 },
                 "required": ["session_id"]
             }
         ),
+        types.Tool(
+            name="reschedule_appointment",
+            description="Move an appointment to an open slot returned by find_available_slots",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "session_id": {"type": "string", "description": "Unique session identifier"},
+                    "appointment_id": {"type": "integer", "description": "Appointment ID to move"},
+                    "date": {"type": "string", "description": "Date reference of the appointment to move, instead of its ID"},
+                    "time": {"type": "string", "description": "Time reference of the appointment to move"},
+                    "slot_id": {"type": "integer", "description": "Open slot to move it to"},
+                    "idempotency_key": {"type": "string", "description": "Client key that makes retries of this call safe"}
+                },
+                "required": ["session_id", "slot_id"]
+            }
+        ),
         types.Tool(
             name="get_session_info",
             description="Get current session information and status",
@@ -111,6 +160,18 @@ async def handle_call_tool(name: str, arguments: dict) -> list[types.TextContent
     """
     Handle tool calls from MCP clients.
     """
+    # Continue the caller's trace (context arrives in the request _meta); changes are audited as "mcp"
+    with tracer.start_as_current_span(
+        f"mcp.tool {name}",
+        context=extract_trace_context(server.request_context.meta),
+        kind=SpanKind.SERVER,
+        attributes={"tool.name": name}
+    ), audit_channel("mcp", arguments.get("session_id")):
+        return await _dispatch_tool(name, arguments)
+
+
+async def _dispatch_tool(name: str, arguments: dict) -> list[types.TextContent]:
+    """Run the named tool and wrap its result as JSON text content."""
     try:
         if name == "verify_user":
             result = await verify_user_tool(arguments)
@@ -120,16 +181,20 @@ async def handle_call_tool(name: str, arguments: dict) -> list[types.TextContent
             result = await confirm_appointment_tool(arguments)
         elif name == "cancel_appointment":
             result = await cancel_appointment_tool(arguments)
+        elif name == "find_available_slots":
+            result = await find_available_slots_tool(arguments)
+        elif name == "reschedule_appointment":
+            result = await reschedule_appointment_tool(arguments)
         elif name == "get_session_info":
             result = await get_session_info_tool(arguments)
         else:
             result = {"error": f"Unknown tool: {name}"}
         
-        return [types.TextContent(type="text", text=str(result))]
+        return [types.TextContent(type="text", text=json.dumps(result, default=str))]
     
     except Exception as e:
         logger.error(f"Error handling tool call {name}: {e}", exc_info=True)
-        return [types.TextContent(type="text", text=f"Error: {str(e)}")]
+        return [types.TextContent(type="text", text=json.dumps({"error": str(e)}))]
 
 
 @with_guardrails("verify_user")
@@ -153,29 +218,41 @@ async def verify_user_tool(args: dict) -> Dict[str, Any]:
             # Look up patient by name, DOB, and phone
             patient = PatientCRUD.get_by_name_dob_and_phone(db, full_name, dob, phone)
             
-            if patient:
-                # Update session state
-                session_state = session_manager.get_or_create_session(session_id)
-                session_state.is_verified = True
-                session_state.patient_id = patient.id
-                session_manager.update_session(session_id, session_state)
-                
-                logger.info(f"User verified via MCP: {session_id}")
-                
-                return {
-                    "success": True,
-                    "message": "Identity verification successful!",
-                    "patient_id": patient.id,
-                    "session_verified": True
-                }
-            else:
-                logger.warning(f"MCP verification failed for session: {session_id}")
-                
-                return {
-                    "success": False,
-                    "message": "Unable to verify your identity. Please check the name, date of birth, and phone number provided.",
-                    "session_verified": False
-                }
+        if patient:
+            # Update session state
+            session_state = session_manager.get_or_create_session(session_id)
+            session_state.is_verified = True
+            session_state.patient_id = patient.id
+            session_manager.update_session(session_id, session_state)
+            
+            logger.info(f"User verified via MCP: {session_id}")
+            
+            result = {
+                "success": True,
+                "message": "Identity verification successful!",
+                "patient_id": patient.id,
+                "session_verified": True
+            }
+            
+            # The next turn is almost always a listing: load it in the background now, and
+            # include upcoming appointments in this result if the load finishes right away
+            if appointment_prefetcher.start(session_manager, session_id, patient.id):
+                page = await appointment_prefetcher.wait_for(session_id, settings.PREFETCH_INLINE_WAIT_SECONDS)
+                if page is not None:
+                    session_state.last_list = page["appointments"]
+                    session_manager.update_session(session_id, session_state)
+                    result["upcoming_appointments"] = page["appointments"]
+                    result["next_cursor"] = page["next_cursor"]
+            
+            return result
+        else:
+            logger.warning(f"MCP verification failed for session: {session_id}")
+            
+            return {
+                "success": False,
+                "message": "Unable to verify your identity. Please check the name, date of birth, and phone number provided.",
+                "session_verified": False
+            }
                 
     except Exception as e:
         logger.error(f"Error during MCP verification: {e}", exc_info=True)
@@ -187,55 +264,120 @@ async def verify_user_tool(args: dict) -> Dict[str, Any]:
 
 
 @with_guardrails("list_appointments")
-async def list_appointments_tool(args: dict) -> List[Dict[str, Any]]:
+async def list_appointments_tool(args: dict) -> Dict[str, Any]:
     """
-    List all appointments for a verified session.
+    List one page of appointments for a verified session.
+    
+    Defaults to upcoming (pending and confirmed) appointments; from_date,
+    to_date and status widen or narrow the window, and cursor continues
+    from the next_cursor of a previous page. archived=True lists the
+    archived history instead.
     """
     session_id = args.get("session_id")
     
     if not session_id:
-        return [{"error": "Missing session_id parameter"}]
+        return {"error": "Missing session_id parameter", "appointments": []}
+    
+    filters = {
+        "from_date": args.get("from_date"),
+        "to_date": args.get("to_date"),
+        "status": args.get("status"),
+        "limit": args.get("limit")
+    }
+    cursor = args.get("cursor")
+    archived = bool(args.get("archived"))
     
     try:
         # Check session verification
         session_state = session_manager.get_session(session_id)
         
         if not session_state or not session_state.is_verified:
-            return [{
+            return {
                 "error": "Session not verified",
-                "message": "Por favor, verifique sua identidade primeiro."
-            }]
+                "message": "Por favor, verifique sua identidade primeiro.",
+                "appointments": []
+            }
         
-        with Session(engine) as db:
-            appointments = AppointmentCRUD.get_by_patient_id(db, session_state.patient_id)
-            
-            appointment_list = []
-            for apt in appointments:
-                appointment_list.append({
-                    "id": apt.id,
-                    "date": apt.when_utc.strftime("%Y-%m-%d"),
-                    "time": apt.when_utc.strftime("%H:%M"),
-                    "datetime_utc": apt.when_utc.isoformat(),
-                    "doctor": apt.doctor_name,
-                    "location": apt.location,
-                    "status": apt.status.value,
-                    "notes": apt.notes
-                })
-            
-            # Update session state with last list
-            session_state.last_list = appointment_list
-            session_manager.update_session(session_id, session_state)
-            
-            logger.info(f"Listed {len(appointment_list)} appointments for session: {session_id}")
-            
-            return appointment_list
+        page = None
+        if not cursor and not archived and not any(filters.values()):
+            # Default listing: served from the prefetch started at verification when available
+            page = await appointment_prefetcher.get(session_manager, session_id)
+        
+        if page is None:
+            page = load_appointment_page(session_state.patient_id, cursor=cursor, archived=archived, **filters)
+        
+        # Update session state with last list
+        session_state.last_list = page["appointments"]
+        session_manager.update_session(session_id, session_state)
+        
+        logger.info(f"Listed {len(page['appointments'])} appointments for session: {session_id}")
+        
+        return page
+    
+    except ValueError as e:
+        return {"error": "Invalid filter", "message": str(e), "appointments": []}
             
     except Exception as e:
         logger.error(f"Error listing appointments via MCP: {e}", exc_info=True)
-        return [{
+        return {
             "error": "Internal error",
-            "message": f"Erro ao listar consultas: {str(e)}"
-        }]
+            "message": f"Erro ao listar consultas: {str(e)}",
+            "appointments": []
+        }
+
+
+def _replay_idempotent(scope: str, args: dict) -> Optional[Dict[str, Any]]:
+    """
+    Stored result for a retried call, or None if its idempotency key is new.
+    
+    A key reused with different arguments gets a failure instead of a replay.
+    """
+    idempotency_key = args.get("idempotency_key")
+    if not idempotency_key:
+        return None
+    
+    session_id = args.get("session_id")
+    try:
+        stored = idempotency_store.get(scope, session_id, idempotency_key, _args_fingerprint(args))
+    except IdempotencyKeyReused:
+        logger.warning(f"Rejected reused {scope} idempotency key for session: {session_id}")
+        return {
+            "success": False,
+            "message": "Esta chave de idempotência já foi usada para outra solicitação.",
+            "appointment": None
+        }
+    if stored is not None:
+        logger.info(f"Replaying idempotent {scope} for session: {session_id}")
+    return stored
+
+
+def _store_idempotent(scope: str, args: dict, result: Dict[str, Any]) -> None:
+    """Store a tool result, with the fingerprint of its arguments, under its idempotency key."""
+    idempotency_key = args.get("idempotency_key")
+    if idempotency_key:
+        idempotency_store.put(scope, args.get("session_id"), idempotency_key, _args_fingerprint(args), result)
+
+
+def _args_fingerprint(args: dict) -> str:
+    """Fingerprint of a tool call's arguments, leaving out the idempotency key itself."""
+    return request_fingerprint({name: value for name, value in args.items() if name != "idempotency_key"})
+
+
+def _ambiguous_reference_result(appointments: list, matches: list) -> Dict[str, Any]:
+    """Tool result asking which of several matching appointments was meant."""
+    candidates = [apt for apt in appointments if apt.get("id") in matches]
+    return {
+        "success": False,
+        "message": "Mais de uma consulta corresponde a essa data/hora. Informe o ID ou o horário.",
+        "appointment": None,
+        "candidates": candidates
+    }
+
+
+CONFIRM_FAILURES = {
+    "not_found": "Não foi possível confirmar a consulta. Verifique o ID ou data/hora.",
+    "cancelled": "Consultas canceladas não podem ser confirmadas."
+}
 
 
 @with_guardrails("confirm_appointment")
@@ -262,29 +404,34 @@ async def confirm_appointment_tool(args: dict) -> Dict[str, Any]:
                 "appointment": None
             }
         
+        # Replay the stored response for a retried call
+        stored = _replay_idempotent("confirm_appointment", args)
+        if stored is not None:
+            return stored
+        
         with Session(engine) as db:
-            appointment = None
+            appointment, reason = None, "not_found"
             
             if appointment_id:
                 # Direct ID confirmation
-                appointment = AppointmentCRUD.confirm_appointment(
+                appointment, reason = AppointmentCRUD.confirm_appointment(
                     db, appointment_id, session_state.patient_id
                 )
-            elif date and session_state.last_list:
-                # Try to match by date from last list
-                for apt_data in session_state.last_list:
-                    if apt_data.get("date") == date:
-                        if time and apt_data.get("time") != time:
-                            continue
-                        appointment = AppointmentCRUD.confirm_appointment(
-                            db, apt_data["id"], session_state.patient_id
-                        )
-                        break
+            elif (date or time) and session_state.last_list:
+                # Resolve the date/time reference against the last list
+                matches = date_resolver.match(session_id, session_state.last_list, date, time)
+                if matches and len(matches) > 1:
+                    return _ambiguous_reference_result(session_state.last_list, matches)
+                if matches:
+                    appointment, reason = AppointmentCRUD.confirm_appointment(
+                        db, matches[0], session_state.patient_id
+                    )
             
             if appointment:
                 logger.info(f"Appointment {appointment.id} confirmed via MCP for session: {session_id}")
+                appointment_prefetcher.invalidate(session_manager, session_id)
                 
-                return {
+                result = {
                     "success": True,
                     "message": "Consulta confirmada com sucesso!",
                     "appointment": {
@@ -297,11 +444,15 @@ async def confirm_appointment_tool(args: dict) -> Dict[str, Any]:
                     }
                 }
             else:
-                return {
+                result = {
                     "success": False,
-                    "message": "Não foi possível confirmar a consulta. Verifique o ID ou data/hora.",
+                    "message": CONFIRM_FAILURES[reason],
                     "appointment": None
                 }
+        
+        _store_idempotent("confirm_appointment", args, result)
+        
+        return result
                 
     except Exception as e:
         logger.error(f"Error confirming appointment via MCP: {e}", exc_info=True)
@@ -336,29 +487,34 @@ async def cancel_appointment_tool(args: dict) -> Dict[str, Any]:
                 "appointment": None
             }
         
+        # Replay the stored response for a retried call
+        stored = _replay_idempotent("cancel_appointment", args)
+        if stored is not None:
+            return stored
+        
         with Session(engine) as db:
-            appointment = None
+            appointment, reason = None, "not_found"
             
             if appointment_id:
                 # Direct ID cancellation
-                appointment = AppointmentCRUD.cancel_appointment(
+                appointment, reason = AppointmentCRUD.cancel_appointment(
                     db, appointment_id, session_state.patient_id
                 )
-            elif date and session_state.last_list:
-                # Try to match by date from last list
-                for apt_data in session_state.last_list:
-                    if apt_data.get("date") == date:
-                        if time and apt_data.get("time") != time:
-                            continue
-                        appointment = AppointmentCRUD.cancel_appointment(
-                            db, apt_data["id"], session_state.patient_id
-                        )
-                        break
+            elif (date or time) and session_state.last_list:
+                # Resolve the date/time reference against the last list
+                matches = date_resolver.match(session_id, session_state.last_list, date, time)
+                if matches and len(matches) > 1:
+                    return _ambiguous_reference_result(session_state.last_list, matches)
+                if matches:
+                    appointment, reason = AppointmentCRUD.cancel_appointment(
+                        db, matches[0], session_state.patient_id
+                    )
             
             if appointment:
                 logger.info(f"Appointment {appointment.id} cancelled via MCP for session: {session_id}")
+                appointment_prefetcher.invalidate(session_manager, session_id)
                 
-                return {
+                result = {
                     "success": True,
                     "message": "Consulta cancelada com sucesso!",
                     "appointment": {
@@ -371,11 +527,15 @@ async def cancel_appointment_tool(args: dict) -> Dict[str, Any]:
                     }
                 }
             else:
-                return {
+                result = {
                     "success": False,
                     "message": "Não foi possível cancelar a consulta. Verifique o ID ou data/hora.",
                     "appointment": None
                 }
+        
+        _store_idempotent("cancel_appointment", args, result)
+        
+        return result
                 
     except Exception as e:
         logger.error(f"Error cancelling appointment via MCP: {e}", exc_info=True)
@@ -386,6 +546,150 @@ async def cancel_appointment_tool(args: dict) -> Dict[str, Any]:
         }
 
 
+def _slot_result(slot: dict) -> Dict[str, Any]:
+    """An open slot as shown to the model."""
+    return {
+        "slot_id": slot["slot_id"],
+        "date": slot["start_utc"].strftime("%Y-%m-%d"),
+        "time": slot["start_utc"].strftime("%H:%M"),
+        "doctor": slot["doctor_name"],
+        "location": slot["location"]
+    }
+
+
+@with_guardrails("find_available_slots")
+async def find_available_slots_tool(args: dict) -> Dict[str, Any]:
+    """
+    Find the next open slots for a doctor and/or location.
+    """
+    session_id = args.get("session_id")
+    after_text = args.get("after")
+    limit = min(int(args.get("limit") or settings.SLOT_SEARCH_LIMIT), settings.APPOINTMENTS_MAX_PAGE_SIZE)
+    
+    if not session_id:
+        return {"success": False, "message": "Missing session_id parameter"}
+    
+    after = date_resolver.earliest(after_text)
+    if after_text and after is None:
+        return {
+            "success": False,
+            "message": f"Não entendi a data '{after_text}'. Use AAAA-MM-DD ou, por exemplo, 'próxima terça à tarde'.",
+            "slots": []
+        }
+    
+    try:
+        with Session(engine) as db:
+            slots = SlotCRUD.find_open(db, args.get("doctor"), args.get("location"), after, limit)
+        
+        return {
+            "success": True,
+            "message": f"{len(slots)} horário(s) disponível(is)." if slots else "Nenhum horário disponível para esses critérios.",
+            "slots": [_slot_result(slot) for slot in slots]
+        }
+    
+    except Exception as e:
+        logger.error(f"Error finding available slots via MCP: {e}", exc_info=True)
+        return {
+            "success": False,
+            "message": f"Erro ao buscar horários: {str(e)}",
+            "slots": []
+        }
+
+
+RESCHEDULE_FAILURES = {
+    "not_found": "Consulta não encontrada. Verifique o ID ou data/hora.",
+    "cancelled": "Consultas canceladas não podem ser remarcadas.",
+    "slot_not_found": "Horário não encontrado. Busque os horários disponíveis novamente.",
+    "slot_in_past": "Esse horário já passou. Escolha outro horário.",
+    "slot_taken": "Esse horário acabou de ser reservado. Escolha um dos horários abaixo."
+}
+
+
+@with_guardrails("reschedule_appointment")
+async def reschedule_appointment_tool(args: dict) -> Dict[str, Any]:
+    """
+    Move an appointment (by ID or by date/time reference) to an open slot.
+    """
+    session_id = args.get("session_id")
+    appointment_id = args.get("appointment_id")
+    slot_id = args.get("slot_id")
+    date = args.get("date")
+    time = args.get("time")
+    
+    if not session_id or not slot_id:
+        return {"success": False, "message": "Missing session_id or slot_id parameter"}
+    
+    try:
+        # Check session verification
+        session_state = session_manager.get_session(session_id)
+        
+        if not session_state or not session_state.is_verified:
+            return {
+                "success": False,
+                "message": "Session não verificada. Por favor, verifique sua identidade primeiro.",
+                "appointment": None
+            }
+        
+        # Replay the stored response for a retried call
+        stored = _replay_idempotent("reschedule_appointment", args)
+        if stored is not None:
+            return stored
+        
+        if not appointment_id and (date or time) and session_state.last_list:
+            # Resolve the date/time reference against the last list
+            matches = date_resolver.match(session_id, session_state.last_list, date, time)
+            if matches and len(matches) > 1:
+                return _ambiguous_reference_result(session_state.last_list, matches)
+            if matches:
+                appointment_id = matches[0]
+        
+        if not appointment_id:
+            return {"success": False, "message": RESCHEDULE_FAILURES["not_found"], "appointment": None}
+        
+        with Session(engine) as db:
+            appointment, reason = AppointmentCRUD.reschedule(
+                db, int(appointment_id), session_state.patient_id, int(slot_id)
+            )
+            
+            if appointment:
+                logger.info(f"Appointment {appointment.id} rescheduled to slot {slot_id} via MCP for session: {session_id}")
+                appointment_prefetcher.invalidate(session_manager, session_id)
+                
+                result = {
+                    "success": True,
+                    "message": "Consulta remarcada com sucesso!",
+                    "appointment": {
+                        "id": appointment.id,
+                        "date": appointment.when_utc.strftime("%Y-%m-%d"),
+                        "time": appointment.when_utc.strftime("%H:%M"),
+                        "doctor": appointment.doctor_name,
+                        "location": appointment.location,
+                        "status": appointment.status.value
+                    }
+                }
+            else:
+                result = {
+                    "success": False,
+                    "message": RESCHEDULE_FAILURES[reason],
+                    "appointment": None
+                }
+                if reason == "slot_taken":
+                    # Lost a race for the slot: offer the next open ones on the same schedule
+                    result["slots"] = [_slot_result(slot) for slot in SlotCRUD.alternatives(db, int(slot_id))]
+        
+        _store_idempotent("reschedule_appointment", args, result)
+        
+        return result
+    
+    except Exception as e:
+        logger.error(f"Error rescheduling appointment via MCP: {e}", exc_info=True)
+        return {
+            "success": False,
+            "message": f"Erro ao remarcar consulta: {str(e)}",
+            "appointment": None
+        }
+
+
 async def get_session_info_tool(args: dict) -> Dict[str, Any]:
     """
     Get current session information and status.
@@ -429,8 +733,12 @@ async def run_mcp_server():
     try:
         # Initialize database
         create_db_and_tables()
+        patient_lookup_index.load(engine)
+        slot_index.load(engine)
         logger.info("MCP Server: Database initialized")
         
+        setup_tracing(service_name=f"{settings.TRACING_SERVICE_NAME}-mcp")
+        
         # Run the server with stdio transport
         logger.info("Starting LumaHealth MCP Server with stdio transport...")
         
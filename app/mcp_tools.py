@@ -6,6 +6,7 @@ allowing Claude to use MCP tools through the standard protocol.
 """
 
 import asyncio
+import json
 import os
 from typing import List, Dict, Any
 
@@ -13,8 +14,10 @@ from langchain_core.tools import BaseTool, StructuredTool
 from langchain_core.pydantic_v1 import BaseModel, Field
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+import mcp.types as types
 
 from .observability import setup_logging
+from .tracing import inject_trace_context
 
 logger = setup_logging()
 
@@ -30,22 +33,72 @@ class VerifyUserInput(BaseModel):
 class ListAppointmentsInput(BaseModel):
     """Input schema for listing appointments."""
     session_id: str = Field(description="Unique session identifier")
+    from_date: str = Field(description="Only appointments on or after this date (YYYY-MM-DD); default: now", default=None)
+    to_date: str = Field(description="Only appointments on or before this date (YYYY-MM-DD)", default=None)
+    status: str = Field(description="pending, confirmed, cancelled (comma-separated) or all; default: pending,confirmed", default=None)
+    cursor: str = Field(description="next_cursor from the previous page, to get the next page", default=None)
+    limit: int = Field(description="Page size", default=None)
+    archived: bool = Field(description="Set to true to list archived history (appointments older than about a year)", default=None)
+
+
+# Description shared by the MCP and fallback list_appointments tools
+LIST_APPOINTMENTS_DESCRIPTION = (
+    "List a verified patient's appointments, upcoming ones by default. Use from_date/to_date/status "
+    "for past or cancelled appointments, archived=true for old history, and pass next_cursor as cursor to get more."
+)
+
+
+def _list_appointments_args(session_id: str, **filters) -> Dict[str, Any]:
+    """list_appointments arguments without unset filters."""
+    return {"session_id": session_id, **{k: v for k, v in filters.items() if v is not None}}
 
 
 class ConfirmAppointmentInput(BaseModel):
     """Input schema for confirming appointments."""
     session_id: str = Field(description="Unique session identifier")
     appointment_id: int = Field(description="Specific appointment ID to confirm", default=None)
-    date: str = Field(description="Date reference (YYYY-MM-DD format)", default=None)
-    time: str = Field(description="Time reference (HH:MM format)", default=None)
+    date: str = Field(description="Date reference: YYYY-MM-DD or the patient's words, e.g. 'next Tuesday afternoon', 'amanhã às 15h'", default=None)
+    time: str = Field(description="Time reference: HH:MM or e.g. '3pm', 'afternoon'", default=None)
+    idempotency_key: str = Field(description="Client key that makes retries of this call safe", default=None)
 
 
 class CancelAppointmentInput(BaseModel):
     """Input schema for cancelling appointments."""
     session_id: str = Field(description="Unique session identifier")
     appointment_id: int = Field(description="Specific appointment ID to cancel", default=None)
-    date: str = Field(description="Date reference (YYYY-MM-DD format)", default=None)
-    time: str = Field(description="Time reference (HH:MM format)", default=None)
+    date: str = Field(description="Date reference: YYYY-MM-DD or the patient's words, e.g. 'next Tuesday afternoon', 'amanhã às 15h'", default=None)
+    time: str = Field(description="Time reference: HH:MM or e.g. '3pm', 'afternoon'", default=None)
+    idempotency_key: str = Field(description="Client key that makes retries of this call safe", default=None)
+
+
+class FindAvailableSlotsInput(BaseModel):
+    """Input schema for finding open slots."""
+    session_id: str = Field(description="Unique session identifier")
+    doctor: str = Field(description="Doctor's name or part of it, e.g. 'Ana Rodrigues'", default=None)
+    location: str = Field(description="Location or part of it, e.g. 'Clínica Central'", default=None)
+    after: str = Field(description="Only slots from this moment: YYYY-MM-DD or e.g. 'next Tuesday afternoon'", default=None)
+    limit: int = Field(description="Number of slots to return", default=None)
+
+
+class RescheduleAppointmentInput(BaseModel):
+    """Input schema for rescheduling appointments."""
+    session_id: str = Field(description="Unique session identifier")
+    slot_id: int = Field(description="Open slot (from find_available_slots) to move the appointment to")
+    appointment_id: int = Field(description="Appointment ID to move", default=None)
+    date: str = Field(description="Date reference of the appointment to move, instead of its ID", default=None)
+    time: str = Field(description="Time reference of the appointment to move", default=None)
+    idempotency_key: str = Field(description="Client key that makes retries of this call safe", default=None)
+
+
+# Descriptions shared by the MCP and fallback rescheduling tools
+FIND_AVAILABLE_SLOTS_DESCRIPTION = (
+    "Find the next open slots on a doctor's schedule (by doctor, location and/or an 'after' date), "
+    "to offer the patient new times before rescheduling."
+)
+RESCHEDULE_APPOINTMENT_DESCRIPTION = (
+    "Move an appointment (by ID or date/time reference) to a slot_id returned by find_available_slots. "
+    "If the slot was just taken, the result lists alternative slots."
+)
 
 
 class GetSessionInfoInput(BaseModel):
@@ -94,6 +147,22 @@ class MCPToolsManager:
             self.is_connected = False
             return False
     
+    async def _call_tool(self, name: str, arguments: Dict[str, Any]):
+        """Call an MCP tool, carrying the current trace context in the request _meta."""
+        return await self.mcp_session.send_request(
+            types.ClientRequest(
+                types.CallToolRequest(
+                    method="tools/call",
+                    params=types.CallToolRequestParams(
+                        name=name,
+                        arguments=arguments,
+                        _meta=inject_trace_context() or None
+                    )
+                )
+            ),
+            types.CallToolResult
+        )
+    
     async def _create_langchain_tools(self):
         """Create LangChain-compatible tools from MCP tools."""
         
@@ -101,34 +170,46 @@ class MCPToolsManager:
         async def verify_user_mcp(session_id: str, full_name: str, dob: str, phone: str) -> Dict[str, Any]:
             """Verify user identity using MCP protocol."""
             try:
-                result = await self.mcp_session.call_tool(
+                result = await self._call_tool(
                     "verify_user",
                     {"session_id": session_id, "full_name": full_name, "dob": dob, "phone": phone}
                 )
-                return eval(result.content[0].text) if result.content else {"error": "No response"}
+                return json.loads(result.content[0].text) if result.content else {"error": "No response"}
             except Exception as e:
                 logger.error(f"MCP verify_user error: {e}")
                 return {"success": False, "message": str(e)}
         
         # List Appointments Tool
-        async def list_appointments_mcp(session_id: str) -> List[Dict[str, Any]]:
+        async def list_appointments_mcp(
+            session_id: str,
+            from_date: str = None,
+            to_date: str = None,
+            status: str = None,
+            cursor: str = None,
+            limit: int = None,
+            archived: bool = None
+        ) -> Dict[str, Any]:
             """List appointments using MCP protocol."""
             try:
-                result = await self.mcp_session.call_tool(
+                result = await self._call_tool(
                     "list_appointments",
-                    {"session_id": session_id}
+                    _list_appointments_args(
+                        session_id, from_date=from_date, to_date=to_date, status=status, cursor=cursor, limit=limit,
+                        archived=archived
+                    )
                 )
-                return eval(result.content[0].text) if result.content else []
+                return json.loads(result.content[0].text) if result.content else {"appointments": []}
             except Exception as e:
                 logger.error(f"MCP list_appointments error: {e}")
-                return [{"error": str(e)}]
+                return {"error": str(e), "appointments": []}
         
         # Confirm Appointment Tool
         async def confirm_appointment_mcp(
             session_id: str, 
             appointment_id: int = None, 
             date: str = None, 
-            time: str = None
+            time: str = None,
+            idempotency_key: str = None
         ) -> Dict[str, Any]:
             """Confirm appointment using MCP protocol."""
             try:
@@ -139,9 +220,11 @@ class MCPToolsManager:
                     args["date"] = date
                 if time:
                     args["time"] = time
+                if idempotency_key:
+                    args["idempotency_key"] = idempotency_key
                     
-                result = await self.mcp_session.call_tool("confirm_appointment", args)
-                return eval(result.content[0].text) if result.content else {"error": "No response"}
+                result = await self._call_tool("confirm_appointment", args)
+                return json.loads(result.content[0].text) if result.content else {"error": "No response"}
             except Exception as e:
                 logger.error(f"MCP confirm_appointment error: {e}")
                 return {"success": False, "message": str(e)}
@@ -151,7 +234,8 @@ class MCPToolsManager:
             session_id: str, 
             appointment_id: int = None, 
             date: str = None, 
-            time: str = None
+            time: str = None,
+            idempotency_key: str = None
         ) -> Dict[str, Any]:
             """Cancel appointment using MCP protocol."""
             try:
@@ -162,22 +246,77 @@ class MCPToolsManager:
                     args["date"] = date
                 if time:
                     args["time"] = time
+                if idempotency_key:
+                    args["idempotency_key"] = idempotency_key
                     
-                result = await self.mcp_session.call_tool("cancel_appointment", args)
-                return eval(result.content[0].text) if result.content else {"error": "No response"}
+                result = await self._call_tool("cancel_appointment", args)
+                return json.loads(result.content[0].text) if result.content else {"error": "No response"}
             except Exception as e:
                 logger.error(f"MCP cancel_appointment error: {e}")
                 return {"success": False, "message": str(e)}
         
+        # Find Available Slots Tool
+        async def find_available_slots_mcp(
+            session_id: str,
+            doctor: str = None,
+            location: str = None,
+            after: str = None,
+            limit: int = None
+        ) -> Dict[str, Any]:
+            """Find open slots using MCP protocol."""
+            try:
+                args = {"session_id": session_id}
+                if doctor:
+                    args["doctor"] = doctor
+                if location:
+                    args["location"] = location
+                if after:
+                    args["after"] = after
+                if limit:
+                    args["limit"] = limit
+                
+                result = await self._call_tool("find_available_slots", args)
+                return json.loads(result.content[0].text) if result.content else {"slots": []}
+            except Exception as e:
+                logger.error(f"MCP find_available_slots error: {e}")
+                return {"success": False, "message": str(e), "slots": []}
+        
+        # Reschedule Appointment Tool
+        async def reschedule_appointment_mcp(
+            session_id: str,
+            slot_id: int,
+            appointment_id: int = None,
+            date: str = None,
+            time: str = None,
+            idempotency_key: str = None
+        ) -> Dict[str, Any]:
+            """Reschedule appointment using MCP protocol."""
+            try:
+                args = {"session_id": session_id, "slot_id": slot_id}
+                if appointment_id:
+                    args["appointment_id"] = appointment_id
+                if date:
+                    args["date"] = date
+                if time:
+                    args["time"] = time
+                if idempotency_key:
+                    args["idempotency_key"] = idempotency_key
+                
+                result = await self._call_tool("reschedule_appointment", args)
+                return json.loads(result.content[0].text) if result.content else {"error": "No response"}
+            except Exception as e:
+                logger.error(f"MCP reschedule_appointment error: {e}")
+                return {"success": False, "message": str(e)}
+        
         # Get Session Info Tool
         async def get_session_info_mcp(session_id: str) -> Dict[str, Any]:
             """Get session info using MCP protocol."""
             try:
-                result = await self.mcp_session.call_tool(
+                result = await self._call_tool(
                     "get_session_info",
                     {"session_id": session_id}
                 )
-                return eval(result.content[0].text) if result.content else {"error": "No response"}
+                return json.loads(result.content[0].text) if result.content else {"error": "No response"}
             except Exception as e:
                 logger.error(f"MCP get_session_info error: {e}")
                 return {"error": str(e)}
@@ -194,7 +333,7 @@ class MCPToolsManager:
             StructuredTool.from_function(
                 func=list_appointments_mcp,
                 name="list_appointments", 
-                description="List all appointments for a verified session",
+                description=LIST_APPOINTMENTS_DESCRIPTION,
                 args_schema=ListAppointmentsInput,
                 return_direct=False
             ),
@@ -212,6 +351,20 @@ class MCPToolsManager:
                 args_schema=CancelAppointmentInput,
                 return_direct=False
             ),
+            StructuredTool.from_function(
+                func=find_available_slots_mcp,
+                name="find_available_slots",
+                description=FIND_AVAILABLE_SLOTS_DESCRIPTION,
+                args_schema=FindAvailableSlotsInput,
+                return_direct=False
+            ),
+            StructuredTool.from_function(
+                func=reschedule_appointment_mcp,
+                name="reschedule_appointment",
+                description=RESCHEDULE_APPOINTMENT_DESCRIPTION,
+                args_schema=RescheduleAppointmentInput,
+                return_direct=False
+            ),
             StructuredTool.from_function(
                 func=get_session_info_mcp,
                 name="get_session_info",
@@ -252,17 +405,28 @@ async def verify_user_fallback(session_id: str, full_name: str, dob: str, phone:
     })
 
 
-async def list_appointments_fallback(session_id: str) -> List[Dict[str, Any]]:
+async def list_appointments_fallback(
+    session_id: str,
+    from_date: str = None,
+    to_date: str = None,
+    status: str = None,
+    cursor: str = None,
+    limit: int = None,
+    archived: bool = None
+) -> Dict[str, Any]:
     """Fallback list appointments function when MCP is not available."""
     from .mcp_server import list_appointments_tool
-    return await list_appointments_tool({"session_id": session_id})
+    return await list_appointments_tool(_list_appointments_args(
+        session_id, from_date=from_date, to_date=to_date, status=status, cursor=cursor, limit=limit, archived=archived
+    ))
 
 
 async def confirm_appointment_fallback(
     session_id: str, 
     appointment_id: int = None, 
     date: str = None, 
-    time: str = None
+    time: str = None,
+    idempotency_key: str = None
 ) -> Dict[str, Any]:
     """Fallback confirm appointment function when MCP is not available."""
     from .mcp_server import confirm_appointment_tool
@@ -273,6 +437,8 @@ async def confirm_appointment_fallback(
         args["date"] = date
     if time:
         args["time"] = time
+    if idempotency_key:
+        args["idempotency_key"] = idempotency_key
     return await confirm_appointment_tool(args)
 
 
@@ -280,7 +446,8 @@ async def cancel_appointment_fallback(
     session_id: str, 
     appointment_id: int = None, 
     date: str = None, 
-    time: str = None
+    time: str = None,
+    idempotency_key: str = None
 ) -> Dict[str, Any]:
     """Fallback cancel appointment function when MCP is not available."""
     from .mcp_server import cancel_appointment_tool
@@ -291,9 +458,54 @@ async def cancel_appointment_fallback(
         args["date"] = date
     if time:
         args["time"] = time
+    if idempotency_key:
+        args["idempotency_key"] = idempotency_key
     return await cancel_appointment_tool(args)
 
 
+async def find_available_slots_fallback(
+    session_id: str,
+    doctor: str = None,
+    location: str = None,
+    after: str = None,
+    limit: int = None
+) -> Dict[str, Any]:
+    """Fallback find available slots function when MCP is not available."""
+    from .mcp_server import find_available_slots_tool
+    args = {"session_id": session_id}
+    if doctor:
+        args["doctor"] = doctor
+    if location:
+        args["location"] = location
+    if after:
+        args["after"] = after
+    if limit:
+        args["limit"] = limit
+    return await find_available_slots_tool(args)
+
+
+async def reschedule_appointment_fallback(
+    session_id: str,
+    slot_id: int,
+    appointment_id: int = None,
+    date: str = None,
+    time: str = None,
+    idempotency_key: str = None
+) -> Dict[str, Any]:
+    """Fallback reschedule appointment function when MCP is not available."""
+    from .mcp_server import reschedule_appointment_tool
+    args = {"session_id": session_id, "slot_id": slot_id}
+    if appointment_id:
+        args["appointment_id"] = appointment_id
+    if date:
+        args["date"] = date
+    if time:
+        args["time"] = time
+    if idempotency_key:
+        args["idempotency_key"] = idempotency_key
+    return await reschedule_appointment_tool(args)
+
+
 def create_fallback_tools() -> List[BaseTool]:
     """Create fallback tools when MCP is not available."""
     return [
@@ -308,7 +520,7 @@ def create_fallback_tools() -> List[BaseTool]:
         StructuredTool.from_function(
             func=list_appointments_fallback,
             name="list_appointments",
-            description="List all appointments for a verified session",
+            description=LIST_APPOINTMENTS_DESCRIPTION,
             args_schema=ListAppointmentsInput,
             return_direct=False,
             coroutine=list_appointments_fallback  # Add coroutine parameter for async
@@ -328,6 +540,22 @@ def create_fallback_tools() -> List[BaseTool]:
             args_schema=CancelAppointmentInput,
             return_direct=False,
             coroutine=cancel_appointment_fallback  # Add coroutine parameter for async
+        ),
+        StructuredTool.from_function(
+            func=find_available_slots_fallback,
+            name="find_available_slots",
+            description=FIND_AVAILABLE_SLOTS_DESCRIPTION,
+            args_schema=FindAvailableSlotsInput,
+            return_direct=False,
+            coroutine=find_available_slots_fallback  # Add coroutine parameter for async
+        ),
+        StructuredTool.from_function(
+            func=reschedule_appointment_fallback,
+            name="reschedule_appointment",
+            description=RESCHEDULE_APPOINTMENT_DESCRIPTION,
+            args_schema=RescheduleAppointmentInput,
+            return_direct=False,
+            coroutine=reschedule_appointment_fallback  # Add coroutine parameter for async
         )
     ]
 
@@ -0,0 +1,260 @@
+"""
+Model routing for the LumaHealth Conversational AI Service.
+
+This module classifies each conversation turn locally, with no LLM call,
+from keyword intents, message length and the pending tool context of the
+thread, and picks a model tier: the small model for greetings,
+acknowledgements, confirmations and appointment listing, and the large
+model for identity verification and anything ambiguous. Per-tier latency,
+token and cost metrics are kept for /metrics and the replay harness.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from .date_resolver import date_resolver
+from .observability import LatencyHistogram
+from .settings import settings
+
+TIER_SMALL = "small"
+TIER_LARGE = "large"
+
+# Intent keywords; IDENTITY_KEYWORDS also keeps identity messages out of the response cache
+IDENTITY_KEYWORDS = ["i am", "i'm", "my name", "born", "birth", "phone", "sou ", "nome", "nasci"]
+LIST_KEYWORDS = ["appointments", "list", "show", "schedule"]
+CONFIRM_KEYWORDS = ["confirm", "accept"]
+CANCEL_KEYWORDS = ["cancel", "remove"]
+
+# Requests that need reasoning over several appointments or constraints
+COMPLEX_KEYWORDS = [
+    "reschedule", "move", "change", "instead", "both", "all of", "overlap", "conflict",
+    "why", "but", "except", "earlier", "later", "between"
+]
+
+GREETING_WORDS = {"hi", "hello", "hey", "good morning", "good afternoon", "good evening", "oi", "ola", "olá"}
+ACKNOWLEDGEMENT_WORDS = {
+    "yes", "yeah", "yep", "ok", "okay", "sure", "no", "nope", "thanks", "thank you", "great", "perfect", "bye"
+}
+
+# USD per million tokens (input, output), matched by substring of the model name
+MODEL_PRICING = {
+    "haiku": (0.80, 4.00),
+    "sonnet": (3.00, 15.00),
+    "opus": (15.00, 75.00),
+}
+DEFAULT_PRICING = MODEL_PRICING["sonnet"]
+
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}|\d{1,2}/\d{1,2}")
+
+
+@dataclass
+class RoutingDecision:
+    """Model tier chosen for a turn and why."""
+    tier: str
+    model: str
+    reason: str
+    features: Dict[str, Any] = field(default_factory=dict)
+
+
+def estimate_cost_usd(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Estimate the cost of a call from token counts and list prices."""
+    lowered = (model or "").lower()
+    input_price, output_price = next(
+        (prices for name, prices in MODEL_PRICING.items() if name in lowered), DEFAULT_PRICING
+    )
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+def _normalize(message: str) -> str:
+    return re.sub(r"\s+", " ", (message or "").casefold()).strip().rstrip(" .!?,;")
+
+
+def _pending_tool_context(history: List[Any]) -> Dict[str, Any]:
+    """Last tool result in the thread: tool name, error flag and appointments shown."""
+    for message in reversed(history or []):
+        if getattr(message, "type", None) != "tool":
+            continue
+
+        content = message.content if isinstance(message.content, str) else json.dumps(message.content, default=str)
+        try:
+            payload = json.loads(content)
+        except (TypeError, ValueError):
+            payload = None
+
+        if isinstance(payload, dict):
+            failed = payload.get("success") is False or "error" in payload
+            appointments = payload.get("appointments")
+        else:
+            failed = "error" in content.lower()
+            appointments = payload if isinstance(payload, list) else None
+
+        return {
+            "pending_tool": getattr(message, "name", None),
+            "pending_error": failed,
+            "appointments_in_context": len(appointments) if isinstance(appointments, list) else 0
+        }
+
+    return {"pending_tool": None, "pending_error": False, "appointments_in_context": 0}
+
+
+class TierMetrics:
+    """Latency, token and cost counters for one model tier."""
+
+    def __init__(self):
+        self.turns = 0
+        self.latency = LatencyHistogram()
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "turns": self.turns,
+            "latency": self.latency.snapshot(),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "estimated_cost_usd": round(self.cost_usd, 6),
+            "avg_cost_per_turn_usd": round(self.cost_usd / self.turns, 6) if self.turns else 0
+        }
+
+
+class ModelRouter:
+    """
+    Rule-based turn classifier that picks the small or large model tier.
+
+    Rules are checked in order and the first match wins; anything not
+    clearly simple goes to the large model.
+    """
+
+    def __init__(self, small_model: str, large_model: str, enabled: bool = True, small_max_chars: int = 160):
+        self.small_model = small_model
+        self.large_model = large_model
+        self.enabled = enabled
+        self.small_max_chars = small_max_chars
+        self._lock = Lock()
+        self.decisions_by_reason: Dict[str, int] = {}
+        self.tiers = {TIER_SMALL: TierMetrics(), TIER_LARGE: TierMetrics()}
+
+    def extract_features(self, message: str, history: Optional[List[Any]], is_verified: bool) -> Dict[str, Any]:
+        """Local features of a turn: intent keywords, length and pending tool context."""
+        lowered = (message or "").lower().strip()
+        normalized = _normalize(message)
+
+        if any(keyword in lowered for keyword in IDENTITY_KEYWORDS):
+            intent = "verify_user"
+        elif any(keyword in lowered for keyword in CONFIRM_KEYWORDS):
+            intent = "confirm_appointment"
+        elif any(keyword in lowered for keyword in CANCEL_KEYWORDS):
+            intent = "cancel_appointment"
+        elif any(keyword in lowered for keyword in LIST_KEYWORDS):
+            intent = "list_appointments"
+        elif normalized in GREETING_WORDS:
+            intent = "greeting"
+        elif normalized in ACKNOWLEDGEMENT_WORDS:
+            intent = "acknowledgement"
+        else:
+            intent = "general_query"
+
+        # Dates the tools resolve locally need no reasoning from the model
+        date_reference = intent in ("confirm_appointment", "cancel_appointment") and date_resolver.parse(message) is not None
+
+        return {
+            "intent": intent,
+            "chars": len(message or ""),
+            "words": len(normalized.split()),
+            "has_date": bool(DATE_PATTERN.search(lowered)),
+            "date_reference": date_reference,
+            "has_digits": any(ch.isdigit() for ch in lowered),
+            "complex_keywords": [keyword for keyword in COMPLEX_KEYWORDS if re.search(rf"\b{keyword}\b", lowered)],
+            "is_verified": is_verified,
+            "has_history": bool(history),
+            **_pending_tool_context(history)
+        }
+
+    def route(self, message: str, history: Optional[List[Any]] = None, is_verified: bool = False) -> RoutingDecision:
+        """Pick the model tier for a turn."""
+        features = self.extract_features(message, history, is_verified)
+        tier, reason = self._classify(features)
+
+        with self._lock:
+            self.decisions_by_reason[reason] = self.decisions_by_reason.get(reason, 0) + 1
+
+        model = self.small_model if tier == TIER_SMALL else self.large_model
+        return RoutingDecision(tier=tier, model=model, reason=reason, features=features)
+
+    def _classify(self, features: Dict[str, Any]) -> tuple:
+        if not self.enabled:
+            return TIER_LARGE, "routing_disabled"
+        if features["chars"] > self.small_max_chars:
+            return TIER_LARGE, "long_message"
+        if features["pending_error"]:
+            return TIER_LARGE, "tool_error_pending"
+        if features["intent"] == "verify_user" or (not features["is_verified"] and features["has_digits"]):
+            return TIER_LARGE, "identity_verification"
+        if features["complex_keywords"] or (features["has_date"] and not features["date_reference"]):
+            return TIER_LARGE, "complex_request"
+
+        intent = features["intent"]
+        if intent == "greeting":
+            return TIER_SMALL, "greeting"
+        if intent == "acknowledgement":
+            return TIER_SMALL, "acknowledgement"
+        if intent == "list_appointments" and features["is_verified"]:
+            return TIER_SMALL, "list_appointments"
+        if intent in ("confirm_appointment", "cancel_appointment") and features["is_verified"]:
+            # A short reference to appointments the patient was just shown
+            if features["appointments_in_context"] and features["words"] <= 8:
+                return TIER_SMALL, f"{intent}_in_context"
+            # "Cancel the one next Tuesday afternoon": the tool resolves the phrase itself
+            if features["appointments_in_context"] and features["date_reference"]:
+                return TIER_SMALL, f"{intent}_date_reference"
+            return TIER_LARGE, f"{intent}_without_context"
+
+        return TIER_LARGE, "default"
+
+    def record_turn(self, decision: RoutingDecision, timing_summary: Dict[str, Any]) -> float:
+        """Record latency, tokens and estimated cost of a routed turn; returns the cost."""
+        tokens = timing_summary.get("tokens", {})
+        input_tokens = tokens.get("input", 0)
+        output_tokens = tokens.get("output", 0)
+        cost = estimate_cost_usd(decision.model, input_tokens, output_tokens)
+
+        with self._lock:
+            tier = self.tiers[decision.tier]
+            tier.turns += 1
+            tier.latency.observe(timing_summary.get("total_ms", 0.0))
+            tier.input_tokens += input_tokens
+            tier.output_tokens += output_tokens
+            tier.cost_usd += cost
+
+        return cost
+
+    def get_stats(self) -> dict:
+        """Get routing statistics for monitoring."""
+        with self._lock:
+            total_turns = sum(tier.turns for tier in self.tiers.values())
+            return {
+                "enabled": self.enabled,
+                "models": {TIER_SMALL: self.small_model, TIER_LARGE: self.large_model},
+                "small_tier_percent": round(self.tiers[TIER_SMALL].turns / total_turns * 100, 2) if total_turns else 0,
+                "decisions_by_reason": dict(self.decisions_by_reason),
+                "tiers": {name: tier.snapshot() for name, tier in self.tiers.items()}
+            }
+
+    def reset_stats(self) -> None:
+        """Clear counters (used between replay runs)."""
+        with self._lock:
+            self.decisions_by_reason.clear()
+            self.tiers = {TIER_SMALL: TierMetrics(), TIER_LARGE: TierMetrics()}
+
+
+# Global model router instance
+model_router = ModelRouter(
+    small_model=settings.CLAUDE_SMALL_MODEL,
+    large_model=settings.CLAUDE_MODEL,
+    enabled=settings.MODEL_ROUTING_ENABLED,
+    small_max_chars=settings.ROUTING_SMALL_MAX_CHARS
+)
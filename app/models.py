@@ -8,9 +8,15 @@ the application for patient data, appointments, and session management.
 from datetime import datetime
 from enum import Enum
 from typing import Optional, List
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from pydantic import BaseModel
 import hashlib
+import hmac
+import re
+import unicodedata
+
+from .settings import settings
 
 
 # Enums
@@ -24,10 +30,15 @@ class AppointmentStatus(str, Enum):
 class Patient(SQLModel, table=True):
     """Patient database model with PII protection."""
     
+    # Serves name + DOB verification and fuzzy-match candidates by DOB
+    __table_args__ = (Index("ix_patient_dob_name_normalized", "dob", "name_normalized"),)
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     full_name: str = Field(index=True, max_length=255)
+    name_normalized: Optional[str] = Field(default=None, max_length=255, description="Accent- and case-folded full name")
     dob: str = Field(description="Date of birth in YYYY-MM-DD format")
     phone_hash: str = Field(index=True, unique=True, description="Hashed phone number for privacy")
+    lookup_key: Optional[str] = Field(default=None, index=True, description="HMAC of normalized name, DOB and phone hash")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Relationships
@@ -37,11 +48,59 @@ class Patient(SQLModel, table=True):
     def hash_phone(phone: str) -> str:
         """Hash phone number for privacy protection."""
         return hashlib.sha256(phone.encode()).hexdigest()
+    
+    @staticmethod
+    def normalize_phone(phone: str) -> str:
+        """Remove spaces, dashes and parentheses from a phone number."""
+        return re.sub(r"[\s\-\(\)]", "", phone or "")
+    
+    @staticmethod
+    def normalize_name(full_name: str) -> str:
+        """Fold accents and case and collapse whitespace ("  JOÃO  silva" -> "joao silva")."""
+        decomposed = unicodedata.normalize("NFKD", full_name or "")
+        stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+        return " ".join(stripped.casefold().split())
+    
+    @staticmethod
+    def name_similarity(a: str, b: str) -> float:
+        """Dice coefficient of the padded character trigrams of two normalized names (0.0 to 1.0)."""
+        def trigrams(name: str) -> set:
+            padded = f"  {name} "
+            return {padded[i:i + 3] for i in range(len(padded) - 2)}
+        
+        left, right = trigrams(a), trigrams(b)
+        if not left or not right:
+            return 0.0
+        return 2 * len(left & right) / (len(left) + len(right))
+    
+    @staticmethod
+    def make_lookup_key(full_name: str, dob: str, phone_hash: str) -> str:
+        """
+        Verification lookup key: HMAC-SHA256 of normalized name, DOB and phone hash.
+        
+        Names match regardless of accents, case and extra whitespace. Built
+        from the stored phone hash rather than the phone, so keys can be
+        backfilled for existing patients.
+        """
+        message = f"{Patient.normalize_name(full_name)}|{(dob or '').strip()}|{phone_hash}".encode()
+        return hmac.new(settings.VERIFICATION_LOOKUP_SECRET.encode(), message, hashlib.sha256).hexdigest()
+    
+    @staticmethod
+    def make_contact_key(dob: str, phone_hash: str) -> str:
+        """HMAC of DOB and phone hash only: lets fuzzy name matching skip the database for unknown contacts."""
+        message = f"contact|{(dob or '').strip()}|{phone_hash}".encode()
+        return hmac.new(settings.VERIFICATION_LOOKUP_SECRET.encode(), message, hashlib.sha256).hexdigest()
 
 
 class Appointment(SQLModel, table=True):
     """Appointment database model."""
     
+    # Per-patient listing, and the reminder scan over due PENDING appointments, in (when_utc, id) keyset order
+    __table_args__ = (
+        Index("ix_appointment_patient_when_id", "patient_id", "when_utc", "id"),
+        Index("ix_appointment_status_when_id", "status", "when_utc", "id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     patient_id: int = Field(foreign_key="patient.id")
     when_utc: datetime = Field(description="Appointment datetime in UTC")
@@ -49,6 +108,7 @@ class Appointment(SQLModel, table=True):
     status: AppointmentStatus = Field(default=AppointmentStatus.PENDING)
     doctor_name: Optional[str] = Field(default=None, max_length=255)
     notes: Optional[str] = Field(default=None)
+    reminder_sent_at: Optional[datetime] = Field(default=None, description="When a reminder for when_utc was sent")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
@@ -56,6 +116,97 @@ class Appointment(SQLModel, table=True):
     patient: Patient = Relationship(back_populates="appointments")
 
 
+class AppointmentArchive(SQLModel, table=True):
+    """Archived (historical) appointment, moved out of the appointment table.
+    
+    Keeps the original id. There is no foreign key, so the table can live
+    in a separate archive database (ARCHIVE_DATABASE_URL).
+    """
+    
+    __tablename__ = "appointment_archive"
+    __table_args__ = (Index("ix_appointment_archive_patient_when_id", "patient_id", "when_utc", "id"),)
+    
+    id: int = Field(primary_key=True)
+    patient_id: int
+    when_utc: datetime = Field(description="Appointment datetime in UTC")
+    location: str = Field(max_length=255)
+    status: AppointmentStatus
+    doctor_name: Optional[str] = Field(default=None, max_length=255)
+    notes: Optional[str] = Field(default=None)
+    created_at: datetime
+    updated_at: datetime
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class AppointmentEvent(SQLModel, table=True):
+    """One change to an appointment: what it became, who made it and through which channel.
+
+    Append-only: rows are inserted by the audit log writer and never
+    updated. There is no foreign key, so history outlives archival.
+    """
+
+    __tablename__ = "appointment_event"
+    # An appointment's history in order, and the latest event per appointment for recovery
+    __table_args__ = (Index("ix_appointment_event_appointment_occurred", "appointment_id", "occurred_at"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    appointment_id: int
+    patient_id: int = Field(description="Patient whose verified session made the change")
+    action: str = Field(max_length=32, description="created, confirmed, cancelled, rescheduled or recovered")
+    status: AppointmentStatus = Field(description="Status after the change")
+    when_utc: datetime = Field(description="Appointment time after the change")
+    previous_when_utc: Optional[datetime] = Field(default=None, description="Appointment time before a reschedule")
+    slot_id: Optional[int] = Field(default=None, description="Slot claimed by a reschedule")
+    channel: str = Field(max_length=16, description="rest, agent, mcp, system or recovery")
+    session_id: Optional[str] = Field(default=None, max_length=64)
+    occurred_at: datetime = Field(description="The appointment's updated_at written by the change")
+    recorded_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class Provider(SQLModel, table=True):
+    """A doctor whose schedule is published as bookable slots."""
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str = Field(index=True, unique=True, max_length=255, description="Matches Appointment.doctor_name")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class Slot(SQLModel, table=True):
+    """A bookable time on a provider's schedule; open while appointment_id is NULL."""
+    
+    __table_args__ = (
+        # A provider is in one place at a time
+        Index("ix_slot_provider_start", "provider_id", "start_utc", unique=True),
+        Index("ix_slot_provider_location_start", "provider_id", "location", "start_utc"),
+        # Incremental refresh of the in-memory slot index
+        Index("ix_slot_updated_at", "updated_at"),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    provider_id: int = Field(foreign_key="provider.id")
+    location: str = Field(max_length=255)
+    start_utc: datetime = Field(description="Slot start in UTC")
+    end_utc: datetime = Field(description="Slot end in UTC")
+    appointment_id: Optional[int] = Field(default=None, index=True, description="Appointment holding the slot")
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ReminderCheckpoint(SQLModel, table=True):
+    """Progress of a reminder run, so a run that crashed resumes after the last recorded chunk."""
+    
+    __tablename__ = "reminder_checkpoint"
+    
+    job: str = Field(primary_key=True, max_length=64)
+    window_end: datetime = Field(description="Appointments up to this time are in the run")
+    last_when_utc: Optional[datetime] = Field(default=None, description="Keyset position of the last recorded chunk")
+    last_appointment_id: Optional[int] = Field(default=None)
+    sent: int = Field(default=0)
+    failed: int = Field(default=0)
+    started_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = Field(default=None)
+
+
 # Session State Models (in-memory)
 class SessionState(BaseModel):
     """Session state management for conversational flow."""
@@ -65,6 +216,8 @@ class SessionState(BaseModel):
     is_verified: bool = False
     last_intent: Optional[str] = None
     last_list: List[dict] = []
+    prefetched_page: Optional[dict] = None
+    prefetched_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     last_activity: datetime = Field(default_factory=datetime.utcnow)
 
@@ -74,7 +227,7 @@ class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
     
     session_id: Optional[str] = None
-    message: str
+    message: str = Field(max_length=settings.CHAT_MAX_MESSAGE_CHARS)
     metadata: Optional[dict] = None
 
 
@@ -132,9 +285,34 @@ class CancelAppointmentRequest(BaseModel):
     time: Optional[str] = None  # For natural language time reference
 
 
+class RescheduleAppointmentRequest(BaseModel):
+    """Request model for moving an appointment to an open slot."""
+    
+    session_id: str
+    appointment_id: int
+    slot_id: int
+
+
+class SlotResponse(BaseModel):
+    """Response model for an open slot."""
+    
+    slot_id: int
+    doctor_name: str
+    location: str
+    start_utc: datetime
+    end_utc: datetime
+
+
+class SlotListResponse(BaseModel):
+    """Response model for an open-slot search."""
+    
+    slots: List[SlotResponse]
+
+
 class ActionResponse(BaseModel):
-    """Generic response model for confirm/cancel actions."""
+    """Generic response model for confirm/cancel/reschedule actions."""
     
     success: bool
     message: str
     appointment: Optional[AppointmentResponse] = None
+    slots: Optional[List[SlotResponse]] = None  # Alternatives when a reschedule lost its slot
@@ -5,14 +5,17 @@ This module provides structured logging, metrics collection, and request tracing
 for monitoring and debugging the conversational AI system.
 """
 
+import bisect
 import json
 import logging
 import time
+import uuid
 from datetime import datetime
 from typing import Any, Dict, Optional
 from contextlib import contextmanager
 
 import structlog
+from opentelemetry import trace
 from structlog.processors import JSONRenderer
 
 
@@ -54,6 +57,62 @@ def setup_logging(log_level: str = "INFO") -> structlog.BoundLogger:
 # Global logger instance
 logger = setup_logging()
 
+# Tracer for trace_operation (no-op until tracing.setup_tracing() installs a provider)
+_tracer = trace.get_tracer("lumahealth")
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram in milliseconds.
+    
+    Cheap enough to observe on every request; percentiles are estimated
+    from bucket upper bounds.
+    """
+    
+    DEFAULT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+    
+    def __init__(self, buckets_ms: tuple = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.bucket_counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+    
+    def observe(self, value_ms: float) -> None:
+        """Record a latency observation."""
+        self.bucket_counts[bisect.bisect_left(self.buckets_ms, value_ms)] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+    
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th percentile (0-100) from bucket upper bounds."""
+        if self.count == 0:
+            return 0.0
+        
+        rank = q / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.bucket_counts):
+            seen += bucket_count
+            if seen >= rank:
+                return float(self.buckets_ms[i]) if i < len(self.buckets_ms) else self.max_ms
+        return self.max_ms
+    
+    def snapshot(self) -> dict:
+        """Get a summary of the histogram."""
+        buckets = {f"le_{b}": c for b, c in zip(self.buckets_ms, self.bucket_counts)}
+        buckets["le_inf"] = self.bucket_counts[-1]
+        
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum_ms / self.count, 2) if self.count else 0,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": buckets
+        }
+
 
 class RequestMetrics:
     """
@@ -69,6 +128,17 @@ class RequestMetrics:
         self.intent_counts = {}
         self.tool_usage = {}
         self.session_stats = {}
+        
+        # Per-turn timing breakdown (fed by TurnTimingHandler)
+        self.turn_latency = LatencyHistogram()
+        self.node_latency: dict = {}
+        self.llm_latency = LatencyHistogram()
+        self.llm_ttft = LatencyHistogram()
+        self.tool_latency: dict = {}
+        self.queue_latency = LatencyHistogram()
+        self.db_latency = LatencyHistogram()
+        self.other_latency = LatencyHistogram()
+        self.token_totals = {"input": 0, "output": 0, "cached": 0}
     
     def record_request(self, intent: str, latency_ms: int, success: bool, tools_used: list = None):
         """Record request metrics."""
@@ -86,6 +156,41 @@ class RequestMetrics:
             for tool in tools_used:
                 self.tool_usage[tool] = self.tool_usage.get(tool, 0) + 1
     
+    def record_timing(self, timing: dict):
+        """Record a turn's timing breakdown from TurnTimingHandler.summary()."""
+        self.turn_latency.observe(timing.get("total_ms", 0))
+        self.queue_latency.observe(timing.get("queue_ms", 0))
+        self.db_latency.observe(timing.get("db_ms", 0))
+        self.other_latency.observe(timing.get("other_ms", 0))
+        
+        for node, node_ms in timing.get("nodes", {}).items():
+            self.node_latency.setdefault(node, LatencyHistogram()).observe(node_ms)
+        
+        for call in timing.get("llm_calls", []):
+            self.llm_latency.observe(call["ms"])
+            if call.get("ttft_ms") is not None:
+                self.llm_ttft.observe(call["ttft_ms"])
+        
+        for call in timing.get("tool_calls", []):
+            self.tool_latency.setdefault(call["name"], LatencyHistogram()).observe(call["ms"])
+        
+        for kind, count in timing.get("tokens", {}).items():
+            self.token_totals[kind] = self.token_totals.get(kind, 0) + count
+    
+    def get_timing_metrics(self) -> dict:
+        """Get latency histograms for each part of a conversation turn."""
+        return {
+            "turn": self.turn_latency.snapshot(),
+            "nodes": {node: h.snapshot() for node, h in self.node_latency.items()},
+            "llm_call": self.llm_latency.snapshot(),
+            "llm_time_to_first_token": self.llm_ttft.snapshot(),
+            "tools": {tool: h.snapshot() for tool, h in self.tool_latency.items()},
+            "queue_per_turn": self.queue_latency.snapshot(),
+            "db_per_turn": self.db_latency.snapshot(),
+            "other_per_turn": self.other_latency.snapshot(),
+            "tokens": dict(self.token_totals)
+        }
+    
     def get_metrics(self) -> dict:
         """Get current metrics summary."""
         avg_latency = (
@@ -205,43 +310,53 @@ def trace_operation(operation_name: str, **context):
     """
     Context manager for tracing operations with timing and logging.
     
+    Opens an OpenTelemetry span; the operation ID is the span's trace and
+    span ID, so log lines can be matched to traces.
+    
     Usage:
         with trace_operation("verify_user", session_id="123"):
             # Your operation here
             pass
     """
     start_time = time.time()
-    operation_id = f"{operation_name}_{int(start_time * 1000)}"
-    
-    logger.info(
-        f"Starting operation: {operation_name}",
-        operation_id=operation_id,
-        **context
-    )
     
-    try:
-        yield operation_id
+    with _tracer.start_as_current_span(operation_name) as span:
+        span_context = span.get_span_context()
+        if span_context.is_valid:
+            operation_id = f"{span_context.trace_id:032x}-{span_context.span_id:016x}"
+        else:
+            # Tracing not configured (no-op span)
+            operation_id = f"{operation_name}_{uuid.uuid4().hex[:16]}"
         
-        duration_ms = int((time.time() - start_time) * 1000)
         logger.info(
-            f"Completed operation: {operation_name}",
+            f"Starting operation: {operation_name}",
             operation_id=operation_id,
-            duration_ms=duration_ms,
-            success=True,
             **context
         )
         
-    except Exception as e:
-        duration_ms = int((time.time() - start_time) * 1000)
-        logger.error(
-            f"Failed operation: {operation_name}",
-            operation_id=operation_id,
-            duration_ms=duration_ms,
-            success=False,
-            error=str(e),
-            **context
-        )
-        raise
+        try:
+            yield operation_id
+            
+            duration_ms = int((time.time() - start_time) * 1000)
+            logger.info(
+                f"Completed operation: {operation_name}",
+                operation_id=operation_id,
+                duration_ms=duration_ms,
+                success=True,
+                **context
+            )
+            
+        except Exception as e:
+            duration_ms = int((time.time() - start_time) * 1000)
+            logger.error(
+                f"Failed operation: {operation_name}",
+                operation_id=operation_id,
+                duration_ms=duration_ms,
+                success=False,
+                error=str(e),
+                **context
+            )
+            raise
 
 
 def log_conversation_flow(session_id: str, flow_steps: list) -> None:
@@ -265,6 +380,7 @@ def get_observability_summary() -> dict:
     """
     return {
         "metrics": metrics.get_metrics(),
+        "timing": metrics.get_timing_metrics(),
         "system_info": {
             "timestamp": datetime.utcnow().isoformat(),
             "version": "0.1.0"
@@ -0,0 +1,126 @@
+"""
+CPU-bound work offloading for the LumaHealth Conversational AI Service.
+
+Guardrail scans, PII masking and identity extraction are regex-heavy and
+run synchronously. For short chat messages that is cheaper than a thread
+hop, but a multi-KB message stalls the event loop for every other session.
+This module applies a size-based policy: work on inputs above
+OFFLOAD_THRESHOLD_CHARS runs in a bounded thread or process pool
+(OFFLOAD_MODE), everything else runs inline.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+
+from .observability import setup_logging, LatencyHistogram
+from .settings import settings
+
+# Setup logging
+logger = setup_logging()
+
+OFFLOAD_MODES = ("off", "thread", "process")
+
+
+class CPUOffloader:
+    """
+    Size-based dispatcher of blocking work to a bounded executor.
+
+    Only functions marked process_safe (picklable, no shared state) go to
+    the process pool; everything else uses the thread pool, which still
+    releases the event loop. At most max_pending jobs are submitted at a
+    time; further callers wait their turn instead of growing the queue.
+    """
+
+    def __init__(self, mode: str = "thread", threshold_chars: int = 2000, max_workers: int = 4, max_pending: int = 32):
+        if mode not in OFFLOAD_MODES:
+            raise ValueError(f"OFFLOAD_MODE must be one of {', '.join(OFFLOAD_MODES)}, got {mode!r}")
+
+        self.mode = mode
+        self.threshold_chars = threshold_chars
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executors: Dict[str, Executor] = {}
+        self._lock = Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+
+        # Counters
+        self.inline_calls = 0
+        self.offloaded_calls: Dict[str, int] = {"thread": 0, "process": 0}
+        self.peak_pending = 0
+        self.offload_latency = LatencyHistogram()
+
+    def should_offload(self, size: int) -> bool:
+        """Whether work on an input of this size leaves the event loop."""
+        return self.mode != "off" and size >= self.threshold_chars
+
+    def _executor(self, kind: str) -> Executor:
+        with self._lock:
+            executor = self._executors.get(kind)
+            if executor is None:
+                if kind == "process":
+                    # spawn: forking a process that already runs threads is unsafe
+                    executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cpu-offload")
+                self._executors[kind] = executor
+            return executor
+
+    async def run(self, func: Callable, *args, size: int = 0, process_safe: bool = False, **kwargs) -> Any:
+        """Call func(*args, **kwargs), off the event loop when size is over the threshold."""
+        if not self.should_offload(size):
+            self.inline_calls += 1
+            return func(*args, **kwargs)
+
+        kind = "process" if self.mode == "process" and process_safe else "thread"
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        start = time.perf_counter()
+        async with self._slots:
+            self._pending += 1
+            self.peak_pending = max(self.peak_pending, self._pending)
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor(kind), partial(func, *args, **kwargs))
+            finally:
+                self._pending -= 1
+                self.offloaded_calls[kind] += 1
+                self.offload_latency.observe((time.perf_counter() - start) * 1000)
+
+    def shutdown(self) -> None:
+        """Stop the worker pools (application shutdown)."""
+        with self._lock:
+            executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> dict:
+        """Get offload statistics for monitoring."""
+        return {
+            "mode": self.mode,
+            "threshold_chars": self.threshold_chars,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "peak_pending": self.peak_pending,
+            "inline_calls": self.inline_calls,
+            "offloaded_calls": dict(self.offloaded_calls),
+            "offload_latency": self.offload_latency.snapshot()
+        }
+
+
+# Global CPU offloader instance
+cpu_offloader = CPUOffloader(
+    mode=settings.OFFLOAD_MODE,
+    threshold_chars=settings.OFFLOAD_THRESHOLD_CHARS,
+    max_workers=settings.OFFLOAD_MAX_WORKERS,
+    max_pending=settings.OFFLOAD_MAX_PENDING
+)
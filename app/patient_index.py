@@ -0,0 +1,272 @@
+"""
+In-memory verification lookup index for the LumaHealth Conversational AI Service.
+
+Every verification attempt hashes a lookup key (see Patient.make_lookup_key).
+This module keeps those keys in memory so brute-force or typo-heavy
+verification traffic does not reach the database: a Bloom filter rejects
+keys that belong to no patient, and an optional key -> patient ID map turns
+a hit into a single primary-key lookup. For fuzzy name matching the filter
+also holds a DOB + phone "contact" key per patient, so a near-miss on the
+name is only looked up when that contact exists. Patients created by other
+processes are picked up by a background refresh every
+PATIENT_INDEX_REFRESH_SECONDS; while a refresh is due, a miss is not
+trusted and falls back to the indexed query.
+"""
+
+import math
+import threading
+import time
+from threading import Lock
+from typing import Iterable, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from .models import Patient
+from .observability import setup_logging
+from .settings import settings
+
+# Setup logging
+logger = setup_logging()
+
+# Lookup keys are hex HMAC-SHA256 digests; the map keeps a 64-bit prefix
+MAP_KEY_HEX_CHARS = 16
+
+LOAD_BATCH_SIZE = 50_000
+
+
+class BloomFilter:
+    """
+    Bit-array Bloom filter over hex digests.
+
+    Keys are already uniformly distributed HMAC outputs, so bit positions
+    are slices of the key itself and no extra hashing is needed.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float = 0.01):
+        self.capacity = max(capacity, 1024)
+        self.fp_rate = fp_rate
+        self.size_bits = max(8, int(-self.capacity * math.log(fp_rate) / math.log(2) ** 2))
+        # 8 hex chars (32 bits) per position; a SHA-256 digest gives 8 of them
+        self.hash_count = max(1, min(8, round(self.size_bits / self.capacity * math.log(2))))
+        self.bits = bytearray((self.size_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        for i in range(self.hash_count):
+            yield int(key[i * 8:(i + 1) * 8], 16) % self.size_bits
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class PatientLookupIndex:
+    """
+    Bloom filter (and optional ID map) of patient lookup keys.
+
+    lookup() answers without touching the database: a definite miss, a hit
+    with the patient ID (to be confirmed by primary key), or, when only the
+    Bloom filter is kept, "maybe present" for the caller to resolve with an
+    indexed query. A miss is only definite while the index is fresh; once
+    it is older than refresh_seconds a miss is "maybe present" too, until
+    the background refresh catches up. Until load() has run the index is
+    not ready and callers go to the database.
+    """
+
+    def __init__(self, enabled: bool = True, map_enabled: bool = True, contact_keys: bool = False,
+                 fp_rate: float = 0.01, refresh_seconds: float = 30.0):
+        self.enabled = enabled
+        self.map_enabled = map_enabled
+        self.contact_keys = contact_keys
+        self.fp_rate = fp_rate
+        self.refresh_seconds = refresh_seconds
+        self._lock = Lock()
+        self._bloom: Optional[BloomFilter] = None
+        self._ids: dict = {}
+        self._max_id = 0
+        self._refreshed_at = 0.0
+        self._refreshing = False
+
+        # Counters
+        self.rejected = 0
+        self.map_hits = 0
+        self.maybe = 0
+        self.contact_rejected = 0
+        self.stale_misses = 0
+        self.refreshes = 0
+        self.rebuilds = 0
+        self.load_ms = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and self._bloom is not None
+    
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() - self._refreshed_at >= self.refresh_seconds
+    
+    @property
+    def _entries_per_patient(self) -> int:
+        return 2 if self.contact_keys else 1
+    
+    @staticmethod
+    def _columns():
+        return select(Patient.id, Patient.lookup_key, Patient.dob, Patient.phone_hash)
+
+    def load(self, engine) -> int:
+        """Build the index from the patient table; returns the number of keys."""
+        if not self.enabled:
+            return 0
+
+        started = time.perf_counter()
+        with Session(engine) as session:
+            last_id = session.exec(select(Patient.id).order_by(Patient.id.desc()).limit(1)).first() or 0
+            # Room to grow before the filter has to be rebuilt
+            bloom = BloomFilter(capacity=last_id * 2 * self._entries_per_patient, fp_rate=self.fp_rate)
+            ids: dict = {}
+            max_id = 0
+            while True:
+                rows = session.exec(
+                    self._columns()
+                    .where(Patient.id > max_id)
+                    .order_by(Patient.id)
+                    .limit(LOAD_BATCH_SIZE)
+                ).all()
+                if not rows:
+                    break
+                self._add_rows(bloom, ids, rows)
+                max_id = rows[-1][0]
+
+        with self._lock:
+            self._bloom, self._ids, self._max_id = bloom, ids, max_id
+            self._refreshed_at = time.monotonic()
+        self.load_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Patient lookup index loaded: {bloom.count} keys in {self.load_ms:.0f}ms")
+        return bloom.count
+
+    def _add_rows(self, bloom: BloomFilter, ids: dict, rows: Iterable[Tuple[int, Optional[str], str, str]]) -> None:
+        for patient_id, lookup_key, dob, phone_hash in rows:
+            if not lookup_key:
+                continue
+            bloom.add(lookup_key)
+            if self.contact_keys:
+                bloom.add(Patient.make_contact_key(dob, phone_hash))
+            if self.map_enabled:
+                ids[int(lookup_key[:MAP_KEY_HEX_CHARS], 16)] = patient_id
+
+    def add(self, patient: Patient) -> None:
+        """Add a patient created by this process."""
+        if not self.ready or not patient.lookup_key:
+            return
+        with self._lock:
+            if self._bloom.count >= self._bloom.capacity:
+                # Over capacity the false-positive rate climbs; rebuild on the next refresh
+                self._refreshed_at = 0.0
+            # _max_id is left alone: other processes may have created patients with lower IDs since the last refresh
+            self._add_rows(self._bloom, self._ids, [(patient.id, patient.lookup_key, patient.dob, patient.phone_hash)])
+
+    def refresh_if_stale(self, engine) -> None:
+        """Start a background refresh if the index is older than refresh_seconds (never blocks the caller)."""
+        if not self.ready or not self.stale or self._refreshing:
+            return
+
+        with self._lock:
+            if self._refreshing or not self.stale:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, args=(engine,), name="patient-index-refresh", daemon=True).start()
+
+    def _refresh(self, engine) -> None:
+        """Rebuild the filter if it is over capacity, then add patients created since the last refresh."""
+        try:
+            if self._bloom.count >= self._bloom.capacity:
+                self.load(engine)
+                self.rebuilds += 1
+
+            with Session(engine) as session:
+                while True:
+                    rows = session.exec(
+                        self._columns()
+                        .where(Patient.id > self._max_id)
+                        .order_by(Patient.id)
+                        .limit(LOAD_BATCH_SIZE)
+                    ).all()
+                    if not rows:
+                        break
+                    with self._lock:
+                        self._add_rows(self._bloom, self._ids, rows)
+                        self._max_id = rows[-1][0]
+            self._refreshed_at = time.monotonic()
+            self.refreshes += 1
+        except Exception as e:
+            logger.error(f"Patient lookup index refresh failed: {e}", exc_info=True)
+        finally:
+            self._refreshing = False
+
+    def lookup(self, lookup_key: str) -> Tuple[bool, Optional[int]]:
+        """(possibly present, patient ID if known). (False, None) is a definite miss."""
+        if lookup_key not in self._bloom:
+            return self._miss()
+
+        if self.map_enabled:
+            patient_id = self._ids.get(int(lookup_key[:MAP_KEY_HEX_CHARS], 16))
+            if patient_id is None:
+                # Bloom false positive: the map holds every key
+                return self._miss()
+            self.map_hits += 1
+            return True, patient_id
+
+        self.maybe += 1
+        return True, None
+
+    def _miss(self) -> Tuple[bool, Optional[int]]:
+        if self.stale:
+            # Another process may have created the patient since the last refresh
+            self.stale_misses += 1
+            return True, None
+        self.rejected += 1
+        return False, None
+
+    def may_know_contact(self, dob: str, phone_hash: str) -> bool:
+        """False only if no patient has this DOB and phone (checked without the database)."""
+        if not self.ready or not self.contact_keys:
+            return True
+        if self.stale or Patient.make_contact_key(dob, phone_hash) in self._bloom:
+            return True
+        self.contact_rejected += 1
+        return False
+
+    def get_stats(self) -> dict:
+        """Get lookup index statistics for monitoring."""
+        bloom = self._bloom
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "keys": bloom.count if bloom else 0,
+            "bloom_kb": round(len(bloom.bits) / 1024, 1) if bloom else 0,
+            "bloom_hash_count": bloom.hash_count if bloom else 0,
+            "map_enabled": self.map_enabled,
+            "contact_keys": self.contact_keys,
+            "rejected_without_db": self.rejected,
+            "contact_rejected_without_db": self.contact_rejected,
+            "map_hits": self.map_hits,
+            "maybe_present": self.maybe,
+            "stale_misses": self.stale_misses,
+            "refreshes": self.refreshes,
+            "rebuilds": self.rebuilds,
+            "load_ms": round(self.load_ms, 2)
+        }
+
+
+# Global patient lookup index instance
+patient_lookup_index = PatientLookupIndex(
+    enabled=settings.PATIENT_INDEX_ENABLED,
+    map_enabled=settings.PATIENT_INDEX_MAP_ENABLED,
+    contact_keys=settings.PATIENT_NAME_MATCH == "fuzzy",
+    fp_rate=settings.PATIENT_INDEX_FP_RATE,
+    refresh_seconds=settings.PATIENT_INDEX_REFRESH_SECONDS
+)
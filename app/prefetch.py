@@ -0,0 +1,200 @@
+"""
+Speculative appointment prefetch for the LumaHealth Conversational AI Service.
+
+The turn after a successful verification is nearly always "list my
+appointments". This module starts loading the first page of the patient's
+upcoming appointments in the background as soon as verification succeeds
+and stores it in the session's appointment context, so the next default
+listing is served from memory instead of the database. Hit rate is
+reported on /metrics.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from sqlmodel import Session
+
+from .db import AppointmentCRUD, AppointmentArchiveCRUD, engine, archive_engine, resolve_appointment_filters
+from .observability import setup_logging
+from .session_manager import SessionManager
+from .settings import settings
+
+logger = setup_logging()
+
+
+def serialize_appointment(appointment) -> dict:
+    """Appointment as returned by list_appointments (and kept in the session's last_list)."""
+    return {
+        "id": appointment.id,
+        "date": appointment.when_utc.strftime("%Y-%m-%d"),
+        "time": appointment.when_utc.strftime("%H:%M"),
+        "datetime_utc": appointment.when_utc.isoformat(),
+        "doctor": appointment.doctor_name,
+        "location": appointment.location,
+        "status": appointment.status.value,
+        "notes": appointment.notes
+    }
+
+
+def load_appointment_page(patient_id: int, cursor: Optional[str] = None, archived: bool = False, **filters) -> dict:
+    """Load and serialize one page of a patient's appointments (blocking).
+
+    filters are resolve_appointment_filters arguments; none means the first
+    page of upcoming appointments. archived=True reads archived history
+    instead, where no filters means all of it.
+    """
+    crud, bind = (AppointmentArchiveCRUD, archive_engine) if archived else (AppointmentCRUD, engine)
+    with Session(bind) as db:
+        appointments, next_cursor = crud.list_by_patient_id(
+            db, patient_id, cursor=cursor, **resolve_appointment_filters(**filters, upcoming_by_default=not archived)
+        )
+    return {"appointments": [serialize_appointment(apt) for apt in appointments], "next_cursor": next_cursor}
+
+
+class AppointmentPrefetcher:
+    """
+    Background loader of a verified patient's appointments.
+
+    Results live on the SessionState (prefetched_page), so they expire with
+    the session; in-flight loads are tracked here so a listing that arrives
+    first can wait briefly for the load instead of repeating it. Only the
+    default listing (upcoming, first page) is prefetched.
+    """
+
+    def __init__(self, enabled: bool = True, ttl_seconds: int = 120, wait_seconds: float = 0.25):
+        self.enabled = enabled
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.wait_seconds = wait_seconds
+        self._inflight: Dict[str, Tuple[int, asyncio.Task]] = {}
+        self._lock = Lock()
+
+        # Counters
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.hits = 0
+        self.inflight_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    def start(self, session_manager: SessionManager, session_id: str, patient_id: int) -> Optional[asyncio.Task]:
+        """Start prefetching a patient's appointments into the session."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            inflight = self._inflight.get(session_id)
+            if inflight and inflight[0] == patient_id and not inflight[1].done():
+                return inflight[1]
+
+            task = asyncio.create_task(self._prefetch(session_manager, session_id, patient_id))
+            self._inflight[session_id] = (patient_id, task)
+            self.started += 1
+            return task
+
+    async def _prefetch(self, session_manager: SessionManager, session_id: str, patient_id: int) -> Optional[dict]:
+        try:
+            page = await asyncio.to_thread(load_appointment_page, patient_id)
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"Appointment prefetch failed for session {session_id}: {e}")
+            return None
+        finally:
+            with self._lock:
+                inflight = self._inflight.get(session_id)
+                if inflight and inflight[1] is asyncio.current_task():
+                    del self._inflight[session_id]
+
+        session_state = session_manager.get_session(session_id)
+        if session_state is None or session_state.patient_id != patient_id:
+            return None
+
+        session_state.prefetched_page = page
+        session_state.prefetched_at = datetime.utcnow()
+        self.completed += 1
+        logger.info(f"Prefetched {len(page['appointments'])} appointments for session: {session_id}")
+        return page
+
+    async def wait_for(self, session_id: str, timeout: float) -> Optional[dict]:
+        """Wait up to timeout for an in-flight prefetch; None if it is not done in time."""
+        with self._lock:
+            inflight = self._inflight.get(session_id)
+        if not inflight:
+            return None
+        try:
+            return await asyncio.wait_for(asyncio.shield(inflight[1]), timeout)
+        except asyncio.TimeoutError:
+            return None
+        except asyncio.CancelledError:
+            # The prefetch was invalidated while we waited
+            if inflight[1].cancelled():
+                return None
+            raise
+
+    async def get(self, session_manager: SessionManager, session_id: str) -> Optional[dict]:
+        """Prefetched first page for a verified session, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        session_state = session_manager.get_session(session_id)
+        if session_state is None or not session_state.is_verified:
+            return None
+
+        page = session_state.prefetched_page
+        if page is not None:
+            if datetime.utcnow() - session_state.prefetched_at <= self.ttl:
+                self.hits += 1
+                return page
+            self.expired += 1
+            self.invalidate(session_manager, session_id, count=False)
+
+        page = await self.wait_for(session_id, self.wait_seconds)
+        if page is not None:
+            self.hits += 1
+            self.inflight_hits += 1
+            return page
+
+        self.misses += 1
+        return None
+
+    def invalidate(self, session_manager: SessionManager, session_id: str, count: bool = True) -> None:
+        """Drop prefetched appointments after they change (confirm/cancel)."""
+        session_state = session_manager.get_session(session_id)
+        if session_state is not None and session_state.prefetched_page is not None:
+            session_state.prefetched_page = None
+            session_state.prefetched_at = None
+            if count:
+                self.invalidations += 1
+
+        with self._lock:
+            inflight = self._inflight.pop(session_id, None)
+        if inflight:
+            inflight[1].cancel()
+
+    def get_stats(self) -> dict:
+        """Get prefetch statistics for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "inflight_hits": self.inflight_hits,
+            "misses": self.misses,
+            "hit_rate_percent": round(self.hits / lookups * 100, 2) if lookups else 0,
+            "expired": self.expired,
+            "invalidations": self.invalidations
+        }
+
+
+# Global appointment prefetcher instance
+appointment_prefetcher = AppointmentPrefetcher(
+    enabled=settings.PREFETCH_ENABLED,
+    ttl_seconds=settings.PREFETCH_TTL_SECONDS,
+    wait_seconds=settings.PREFETCH_WAIT_SECONDS
+)
@@ -0,0 +1,227 @@
+"""
+On-demand profiling for the LumaHealth Conversational AI Service.
+
+Admin endpoints use this module to look inside a live process:
+
+- a sampling CPU profiler that reads thread stacks from a background
+  thread for a bounded time and returns collapsed ("folded") stacks,
+  ready for flamegraph.pl, speedscope or inferno;
+- a cProfile run over the event-loop thread for the same window;
+- tracemalloc snapshots with top allocators and a diff against the
+  snapshot taken when tracing started.
+
+Nothing is installed or traced until an endpoint asks for it, so there is
+no overhead when profiling is not in use. One CPU profile runs at a time.
+"""
+
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+
+from .observability import setup_logging
+from .settings import settings
+
+# Setup logging
+logger = setup_logging()
+
+CPROFILE_SORT_KEYS = ("cumulative", "tottime", "calls")
+MEMORY_GROUPINGS = ("lineno", "filename", "traceback")
+
+
+class ProfilerBusy(Exception):
+    """Raised when a CPU profile is requested while another one is running."""
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename.replace("\\", "/")
+    short = "/".join(filename.rsplit("/", 2)[-2:])
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> str:
+    """Stack of a frame in folded format: root;...;leaf."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Background thread that samples thread stacks into folded-stack counts."""
+
+    def __init__(self, interval_seconds: float, thread_ids: Optional[List[int]] = None):
+        self.interval = interval_seconds
+        self.thread_ids = thread_ids
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+    def run(self, seconds: float) -> None:
+        """Sample for the given number of seconds (blocking; call from a worker thread)."""
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                thread_name = names.get(thread_id) or f"thread-{thread_id}"
+                self.stacks[f"{thread_name};{_collapse(frame)}"] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def folded(self) -> str:
+        """Collapsed stacks, one "stack count" line each, most frequent first."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+class Profiler:
+    """
+    Coordinator for on-demand CPU and memory profiling.
+
+    CPU profiles are time-bounded and exclusive. Memory tracing stays on
+    from start_memory() until stop_memory(), because tracemalloc slows
+    every allocation while it is active.
+    """
+
+    def __init__(self, max_seconds: float = 30.0):
+        self.max_seconds = max_seconds
+        self._cpu_lock = asyncio.Lock()
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._memory_started_at: Optional[float] = None
+
+        # Counters
+        self.cpu_profiles = 0
+        self.memory_snapshots = 0
+
+    def _bounded(self, seconds: float) -> float:
+        if seconds <= 0:
+            raise ValueError("seconds must be positive")
+        return min(seconds, self.max_seconds)
+
+    async def sample_cpu(self, seconds: float, interval_ms: float = 5.0, all_threads: bool = False) -> dict:
+        """Sample stacks of the event-loop thread (or all threads) for a bounded time."""
+        seconds = self._bounded(seconds)
+        if self._cpu_lock.locked():
+            raise ProfilerBusy("A CPU profile is already running")
+
+        async with self._cpu_lock:
+            sampler = StackSampler(max(interval_ms, 1.0) / 1000, None if all_threads else [threading.get_ident()])
+            logger.info(f"Sampling CPU profile for {seconds}s (every {interval_ms}ms)")
+            await asyncio.to_thread(sampler.run, seconds)
+            self.cpu_profiles += 1
+            return {"samples": sampler.samples, "seconds": seconds, "folded": sampler.folded()}
+
+    async def cprofile(self, seconds: float, limit: int = 40, sort: str = "cumulative") -> dict:
+        """Run cProfile over everything the event loop executes for a bounded time."""
+        seconds = self._bounded(seconds)
+        if sort not in CPROFILE_SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(CPROFILE_SORT_KEYS)}")
+        if self._cpu_lock.locked():
+            raise ProfilerBusy("A CPU profile is already running")
+        if sys.getprofile() is not None:
+            raise ProfilerBusy("Another profiler is active in this process")
+
+        async with self._cpu_lock:
+            profile = cProfile.Profile()
+            logger.info(f"Running cProfile for {seconds}s")
+            profile.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profile.disable()
+            self.cpu_profiles += 1
+
+            stats = pstats.Stats(profile, stream=io.StringIO())
+            stats.sort_stats(sort)
+            stats.print_stats(limit)
+            return {
+                "seconds": seconds,
+                "report": stats.stream.getvalue(),
+                # Same bytes pstats.dump_stats writes: load with snakeviz or pstats.Stats(path)
+                "prof": marshal.dumps(stats.stats)
+            }
+
+    def start_memory(self, nframes: int = 10) -> dict:
+        """Start tracemalloc and take the baseline snapshot for diffs."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(nframes)
+            self._memory_started_at = time.time()
+            logger.info(f"tracemalloc started ({nframes} frames)")
+        self._baseline = tracemalloc.take_snapshot()
+        return {"tracing": True, "nframes": tracemalloc.get_traceback_limit()}
+
+    def stop_memory(self) -> dict:
+        """Stop tracemalloc and drop the baseline."""
+        was_tracing = tracemalloc.is_tracing()
+        if was_tracing:
+            tracemalloc.stop()
+            logger.info("tracemalloc stopped")
+        self._baseline = None
+        self._memory_started_at = None
+        return {"tracing": False, "was_tracing": was_tracing}
+
+    def memory_snapshot(self, limit: int = 20, group_by: str = "lineno") -> dict:
+        """Top allocators now and growth since the baseline snapshot."""
+        if group_by not in MEMORY_GROUPINGS:
+            raise ValueError(f"group_by must be one of {', '.join(MEMORY_GROUPINGS)}")
+        if not tracemalloc.is_tracing():
+            raise ValueError("Memory tracing is not running; start it first")
+
+        # Leave out tracemalloc's own bookkeeping
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        snapshot = tracemalloc.take_snapshot().filter_traces(filters)
+        self.memory_snapshots += 1
+
+        current, peak = tracemalloc.get_traced_memory()
+        result = {
+            "traced_current_kb": round(current / 1024, 1),
+            "traced_peak_kb": round(peak / 1024, 1),
+            "tracing_seconds": round(time.time() - self._memory_started_at, 1) if self._memory_started_at else None,
+            "top": [self._format_stat(stat) for stat in snapshot.statistics(group_by)[:limit]],
+            "diff": []
+        }
+        if self._baseline is not None:
+            diff = snapshot.compare_to(self._baseline.filter_traces(filters), group_by)
+            result["diff"] = [self._format_diff(stat) for stat in diff[:limit]]
+        return result
+
+    @staticmethod
+    def _format_stat(stat) -> dict:
+        return {
+            "location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count
+        }
+
+    @staticmethod
+    def _format_diff(stat) -> dict:
+        return {
+            "location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+            "size_kb": round(stat.size / 1024, 1),
+            "size_diff_kb": round(stat.size_diff / 1024, 1),
+            "count": stat.count,
+            "count_diff": stat.count_diff
+        }
+
+    def get_stats(self) -> Dict[str, object]:
+        """Get profiler state for monitoring."""
+        return {
+            "cpu_profile_running": self._cpu_lock.locked(),
+            "cpu_profiles": self.cpu_profiles,
+            "memory_tracing": tracemalloc.is_tracing(),
+            "memory_snapshots": self.memory_snapshots
+        }
+
+
+# Global profiler instance
+profiler = Profiler(max_seconds=settings.PROFILING_MAX_SECONDS)
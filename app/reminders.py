@@ -0,0 +1,396 @@
+"""
+Appointment reminders for the LumaHealth Conversational AI Service.
+
+This module pushes a reminder for every PENDING appointment starting within
+REMINDER_HORIZON_HOURS. Due appointments are read in (when_utc, id) order,
+one keyset chunk at a time, so memory stays flat however many are due.
+Each chunk goes out through a pluggable sender with bounded concurrency and
+is then marked as sent with one bulk UPDATE that also advances the run's
+checkpoint, so a run that crashes resumes after the last recorded chunk.
+The job runs from the CLI (scripts/send_reminders.py) or periodically from
+the application lifespan when REMINDERS_ENABLED is set.
+"""
+
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import httpx
+from sqlalchemy import func, tuple_
+from sqlmodel import Session, select, update
+
+from .db import engine
+from .models import Appointment, AppointmentStatus, ReminderCheckpoint
+from .observability import setup_logging
+from .settings import settings
+
+logger = setup_logging()
+
+JOB_NAME = "appointment_reminders"
+
+REMINDER_COLUMNS = ("id", "patient_id", "when_utc", "location", "doctor_name")
+
+
+def build_reminder(row: Mapping) -> Dict[str, Any]:
+    """Reminder payload for one due appointment."""
+    when_utc = row["when_utc"].isoformat()
+    return {
+        "appointment_id": row["id"],
+        "patient_id": row["patient_id"],
+        "when_utc": when_utc,
+        "location": row["location"],
+        "doctor_name": row["doctor_name"],
+        # Delivery is at-least-once; a rescheduled appointment gets a new key
+        "idempotency_key": f"reminder:{row['id']}:{when_utc}"
+    }
+
+
+class ReminderSender(ABC):
+    """Delivers reminders; subclasses plug in the transport by implementing send()."""
+
+    name = "base"
+
+    def __init__(self):
+        self.last_error: Optional[str] = None
+
+    async def start(self) -> None:
+        """Open connections or files before the first send."""
+
+    @abstractmethod
+    async def send(self, reminder: Dict[str, Any]) -> bool:
+        """Deliver one reminder; True once it has been accepted."""
+
+    async def send_many(self, reminders: Sequence[Dict[str, Any]], concurrency: int) -> List[bool]:
+        """Deliver a chunk with at most `concurrency` sends in flight; one result per reminder."""
+        results = [False] * len(reminders)
+        position = iter(range(len(reminders)))
+
+        # A fixed pool of workers rather than a task per reminder
+        async def worker() -> None:
+            for i in position:
+                try:
+                    results[i] = await self.send(reminders[i])
+                except Exception as e:
+                    self.last_error = f"{type(e).__name__}: {e}"
+
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(reminders)))))
+        return results
+
+    async def flush(self) -> None:
+        """Make everything sent so far durable (called before a chunk is recorded)."""
+
+    async def close(self) -> None:
+        """Release what start() opened."""
+
+
+class FileReminderSender(ReminderSender):
+    """Appends reminders as NDJSON lines: a local stand-in for the messaging service."""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._file = None
+
+    async def start(self) -> None:
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    async def send(self, reminder: Dict[str, Any]) -> bool:
+        self._file.write(json.dumps(reminder, ensure_ascii=False) + "\n")
+        return True
+
+    async def send_many(self, reminders: Sequence[Dict[str, Any]], concurrency: int) -> List[bool]:
+        # One write per chunk
+        self._file.write("".join(json.dumps(reminder, ensure_ascii=False) + "\n" for reminder in reminders))
+        return [True] * len(reminders)
+
+    async def flush(self) -> None:
+        self._file.flush()
+
+    async def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class HttpReminderSender(ReminderSender):
+    """POSTs each reminder as JSON, with its idempotency key as a header."""
+
+    name = "http"
+
+    def __init__(self, url: str, timeout: float = 10.0, max_connections: int = 32):
+        super().__init__()
+        self.url = url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        )
+
+    async def send(self, reminder: Dict[str, Any]) -> bool:
+        response = await self._client.post(
+            self.url, json=reminder, headers={"Idempotency-Key": reminder["idempotency_key"]}
+        )
+        # Raised so the job records the status as last_send_error
+        response.raise_for_status()
+        return True
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def build_sender(kind: Optional[str] = None, concurrency: Optional[int] = None) -> ReminderSender:
+    """Sender configured by REMINDER_SENDER (or kind)."""
+    kind = kind or settings.REMINDER_SENDER
+    if kind == "file":
+        return FileReminderSender(settings.REMINDER_FILE_PATH)
+    if kind == "http":
+        if not settings.REMINDER_WEBHOOK_URL:
+            raise ValueError("REMINDER_WEBHOOK_URL is required for the http reminder sender")
+        return HttpReminderSender(
+            settings.REMINDER_WEBHOOK_URL,
+            timeout=settings.REMINDER_SEND_TIMEOUT_SECONDS,
+            max_connections=concurrency or settings.REMINDER_CONCURRENCY
+        )
+    raise ValueError(f"Unknown reminder sender: {kind}")
+
+
+class ReminderJob:
+    """
+    Chunked reminder pipeline: read due appointments, send, record.
+
+    The next chunk is read while the current one is being sent. A chunk is
+    recorded (reminder_sent_at for the delivered ones, plus the checkpoint)
+    in one transaction after the sender has flushed it, so a crash re-sends
+    at most the chunks that were in flight. Failed deliveries stay unmarked
+    and are retried by the next run.
+    """
+
+    def __init__(self, engine, horizon_hours: float = 24.0, chunk_size: int = 1000, concurrency: int = 32,
+                 job_name: str = JOB_NAME):
+        self.engine = engine
+        self.horizon_hours = horizon_hours
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.job_name = job_name
+        self._lock = asyncio.Lock()
+
+        # Counters
+        self.runs = 0
+        self.resumed_runs = 0
+        self.sent_total = 0
+        self.failed_total = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_run_sent = 0
+        self.last_run_failed = 0
+        self.last_run_ms = 0.0
+        self.last_error: Optional[str] = None
+        self.last_send_error: Optional[str] = None
+
+    def _due(self, statement, now: datetime, window_end: datetime):
+        return statement.where(
+            Appointment.status == AppointmentStatus.PENDING,
+            Appointment.reminder_sent_at.is_(None),
+            Appointment.when_utc >= now,
+            Appointment.when_utc <= window_end
+        )
+
+    def count_due(self, horizon_hours: Optional[float] = None) -> int:
+        """Number of appointments a new run would remind."""
+        now = datetime.utcnow()
+        window_end = now + timedelta(hours=self.horizon_hours if horizon_hours is None else horizon_hours)
+        with Session(self.engine) as session:
+            statement = self._due(select(func.count()).select_from(Appointment), now, window_end)
+            return session.exec(statement).one()
+
+    def _start_run(self, horizon_hours: float, now: datetime) -> Tuple[ReminderCheckpoint, bool]:
+        """Resume the unfinished run, if its window is still ahead, or start a new one."""
+        with Session(self.engine) as session:
+            checkpoint = session.get(ReminderCheckpoint, self.job_name)
+            if checkpoint is not None and checkpoint.completed_at is None and checkpoint.window_end > now:
+                session.expunge(checkpoint)
+                return checkpoint, True
+
+            if checkpoint is None:
+                checkpoint = ReminderCheckpoint(job=self.job_name, window_end=now)
+            checkpoint.window_end = now + timedelta(hours=horizon_hours)
+            checkpoint.last_when_utc = None
+            checkpoint.last_appointment_id = None
+            checkpoint.sent = checkpoint.failed = 0
+            checkpoint.started_at = checkpoint.updated_at = now
+            checkpoint.completed_at = None
+            session.add(checkpoint)
+            session.commit()
+            session.refresh(checkpoint)
+            session.expunge(checkpoint)
+            return checkpoint, False
+
+    def _fetch_chunk(self, now: datetime, window_end: datetime, after: Optional[Tuple[datetime, int]]) -> Sequence[Mapping]:
+        """The next chunk of due appointments after the keyset position."""
+        # A single when_utc lower bound at the keyset position, so the index seek skips the rows
+        # already sent instead of scanning past them (SQLite uses only one lower bound)
+        lower = now if after is None else max(now, after[0])
+        statement = self._due(select(*[getattr(Appointment, name) for name in REMINDER_COLUMNS]), lower, window_end)
+        if after is not None:
+            statement = statement.where(tuple_(Appointment.when_utc, Appointment.id) > after)
+        statement = statement.order_by(Appointment.when_utc, Appointment.id).limit(self.chunk_size)
+        # Plain Core rows: this runs for every due appointment
+        with self.engine.connect() as conn:
+            return conn.execute(statement).mappings().all()
+
+    def _record_chunk(self, sent_ids: Sequence[int], failed: int, last: Tuple[datetime, int]) -> None:
+        """Mark delivered reminders and advance the checkpoint in one transaction."""
+        now = datetime.utcnow()
+        with Session(self.engine) as session:
+            if sent_ids:
+                session.exec(update(Appointment).where(Appointment.id.in_(sent_ids)).values(reminder_sent_at=now))
+            session.exec(
+                update(ReminderCheckpoint)
+                .where(ReminderCheckpoint.job == self.job_name)
+                .values(
+                    last_when_utc=last[0],
+                    last_appointment_id=last[1],
+                    sent=ReminderCheckpoint.sent + len(sent_ids),
+                    failed=ReminderCheckpoint.failed + failed,
+                    updated_at=now
+                )
+            )
+            session.commit()
+
+    def _complete_run(self) -> None:
+        now = datetime.utcnow()
+        with Session(self.engine) as session:
+            session.exec(
+                update(ReminderCheckpoint)
+                .where(ReminderCheckpoint.job == self.job_name)
+                .values(completed_at=now, updated_at=now)
+            )
+            session.commit()
+
+    async def _send_chunk(self, sender: ReminderSender, rows: Sequence[Mapping]) -> Tuple[List[int], int]:
+        """Send one chunk with at most `concurrency` reminders in flight; returns (sent IDs, failures)."""
+        results = await sender.send_many([build_reminder(row) for row in rows], self.concurrency)
+        await sender.flush()
+        if sender.last_error:
+            self.last_send_error = sender.last_error
+        sent_ids = [row["id"] for row, delivered in zip(rows, results) if delivered]
+        return sent_ids, len(rows) - len(sent_ids)
+
+    async def run(self, sender: ReminderSender, horizon_hours: Optional[float] = None,
+                  max_chunks: Optional[int] = None) -> dict:
+        """Send all due reminders (resuming an unfinished run); returns a run summary."""
+        # One run at a time (background loop and an admin trigger in the same process)
+        async with self._lock:
+            started = time.perf_counter()
+            now = datetime.utcnow()
+            horizon = self.horizon_hours if horizon_hours is None else horizon_hours
+            sent, failed, chunks = 0, 0, 0
+            resumed = False
+            completed = False
+
+            await sender.start()
+            try:
+                checkpoint, resumed = await asyncio.to_thread(self._start_run, horizon, now)
+                window_end = checkpoint.window_end
+                after = None
+                if checkpoint.last_when_utc is not None:
+                    after = (checkpoint.last_when_utc, checkpoint.last_appointment_id)
+                    logger.info(f"Resuming reminder run after {after[0].isoformat()} (appointment {after[1]})")
+
+                rows = await asyncio.to_thread(self._fetch_chunk, now, window_end, after)
+                while rows and (max_chunks is None or chunks < max_chunks):
+                    last = (rows[-1]["when_utc"], rows[-1]["id"])
+                    # Read ahead while this chunk is being sent
+                    next_rows = asyncio.create_task(asyncio.to_thread(self._fetch_chunk, now, window_end, last))
+                    try:
+                        sent_ids, chunk_failed = await self._send_chunk(sender, rows)
+                        await asyncio.to_thread(self._record_chunk, sent_ids, chunk_failed, last)
+                    except BaseException:
+                        next_rows.cancel()
+                        raise
+                    sent += len(sent_ids)
+                    failed += chunk_failed
+                    chunks += 1
+                    rows = await next_rows
+
+                if not rows:
+                    await asyncio.to_thread(self._complete_run)
+                    completed = True
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Reminder run failed after {sent} reminders: {e}", exc_info=True)
+                raise
+            finally:
+                await sender.close()
+                self.runs += 1
+                self.resumed_runs += resumed
+                self.sent_total += sent
+                self.failed_total += failed
+                self.last_run_at = datetime.utcnow()
+                self.last_run_sent = sent
+                self.last_run_failed = failed
+                self.last_run_ms = (time.perf_counter() - started) * 1000
+
+            if failed:
+                logger.warning(f"{failed} reminders failed and will be retried next run (last error: {self.last_send_error})")
+            logger.info(f"Sent {sent} reminders up to {window_end.isoformat()} in {chunks} chunks via {sender.name}")
+            return {
+                "sent": sent,
+                "failed": failed,
+                "chunks": chunks,
+                "resumed": resumed,
+                "completed": completed,
+                "window_end": window_end.isoformat(),
+                "duration_ms": round(self.last_run_ms, 2)
+            }
+
+    async def run_periodically(self, interval_seconds: float) -> None:
+        """Send due reminders on a fixed interval until cancelled (lifespan background task)."""
+        while True:
+            try:
+                await self.run(build_sender(concurrency=self.concurrency))
+            except Exception:
+                # Logged in run(); the checkpoint lets the next run pick up where this one stopped
+                pass
+            await asyncio.sleep(interval_seconds)
+
+    def get_stats(self) -> dict:
+        """Get reminder job statistics for monitoring."""
+        return {
+            "enabled": settings.REMINDERS_ENABLED,
+            "sender": settings.REMINDER_SENDER,
+            "horizon_hours": self.horizon_hours,
+            "chunk_size": self.chunk_size,
+            "concurrency": self.concurrency,
+            "running": self._lock.locked(),
+            "runs": self.runs,
+            "resumed_runs": self.resumed_runs,
+            "sent_total": self.sent_total,
+            "failed_total": self.failed_total,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_run_sent": self.last_run_sent,
+            "last_run_failed": self.last_run_failed,
+            "last_run_ms": round(self.last_run_ms, 2),
+            "last_error": self.last_error,
+            "last_send_error": self.last_send_error
+        }
+
+
+# Global reminder job instance
+reminder_job = ReminderJob(
+    engine,
+    horizon_hours=settings.REMINDER_HORIZON_HOURS,
+    chunk_size=settings.REMINDER_CHUNK_SIZE,
+    concurrency=settings.REMINDER_CONCURRENCY
+)
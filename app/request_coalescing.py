@@ -0,0 +1,124 @@
+"""
+Request coalescing for the LumaHealth Conversational AI Service.
+
+This module provides a per-session single-flight layer for conversation turns.
+Identical messages that arrive while the first one is still being processed
+share its result, and different messages on the same session are serialized
+so they never interleave in the LangGraph checkpoint.
+"""
+
+import asyncio
+import copy
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from .observability import setup_logging
+
+# Setup logging
+logger = setup_logging()
+
+
+class RequestCoalescer:
+    """
+    Single-flight executor keyed by session and message hash.
+
+    The first request for a (session_id, message) pair starts the work; any
+    duplicate arriving while it is in flight awaits the same task instead of
+    starting a new one. Work for a session runs under a per-session asyncio
+    lock, so different messages on the same session are processed in order.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}
+
+        # Counters
+        self.total_requests = 0
+        self.coalesced_requests = 0
+        self.serialized_requests = 0
+
+    @staticmethod
+    def hash_message(message: str) -> str:
+        """Hash a message for in-flight deduplication."""
+        return hashlib.sha256((message or "").strip().encode()).hexdigest()
+
+    async def run(
+        self,
+        session_id: str,
+        message: str,
+        func: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Run ``func`` for a session message, coalescing in-flight duplicates.
+
+        Returns:
+            - result: Any - A private copy of the shared result
+            - coalesced: bool - Whether this call joined an in-flight request
+        """
+        self.total_requests += 1
+        key = (session_id, self.hash_message(message))
+
+        task = self._inflight.get(key)
+        coalesced = task is not None
+
+        if coalesced:
+            self.coalesced_requests += 1
+            logger.info(f"Coalesced duplicate in-flight message for session: {session_id}")
+        else:
+            task = asyncio.ensure_future(self._run_serialized(session_id, func))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, t))
+
+        # Shield the shared task so a disconnecting caller does not cancel
+        # the work other callers are waiting on.
+        result = await asyncio.shield(task)
+
+        # Callers may mutate the result (e.g. adding latency), so each one
+        # gets its own copy.
+        return copy.deepcopy(result), coalesced
+
+    async def _run_serialized(self, session_id: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run work under the per-session lock."""
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._session_locks[session_id] = lock
+        self._lock_users[session_id] = self._lock_users.get(session_id, 0) + 1
+
+        try:
+            if lock.locked():
+                self.serialized_requests += 1
+
+            async with lock:
+                return await func()
+
+        finally:
+            # Drop the lock once nobody is using it to keep memory bounded
+            self._lock_users[session_id] -= 1
+            if self._lock_users[session_id] == 0:
+                del self._lock_users[session_id]
+                del self._session_locks[session_id]
+
+    def _on_done(self, key: Tuple[str, str], task: asyncio.Task) -> None:
+        """Remove a finished task from the in-flight table."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+        # Mark the exception as retrieved when every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> dict:
+        """Get coalescing statistics for monitoring."""
+        return {
+            "total_requests": self.total_requests,
+            "coalesced_requests": self.coalesced_requests,
+            "serialized_requests": self.serialized_requests,
+            "inflight_requests": len(self._inflight),
+            "active_session_locks": len(self._session_locks)
+        }
+
+
+# Global request coalescer instance
+request_coalescer = RequestCoalescer()
@@ -0,0 +1,127 @@
+"""
+Exact response cache for the LumaHealth Conversational AI Service.
+
+This module caches Claude replies to stateless opening turns such as
+greetings and general questions. Entries are keyed on the model, a hash of
+the system prompt, the normalized message and the verification state, so
+the commonest first messages skip the LLM call entirely.
+"""
+
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Tuple
+
+from .model_router import IDENTITY_KEYWORDS
+from .observability import mask_pii
+from .settings import settings
+
+# Longer messages are unlikely to repeat verbatim
+MAX_CACHEABLE_MESSAGE_LENGTH = 200
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache with TTL for stateless LLM replies.
+
+    Only turns without history, tool calls or PII are cached, so a cached
+    reply never depends on who the patient is.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: int = 3600, enabled: bool = True):
+        self._entries: "OrderedDict[Tuple, Tuple[float, str]]" = OrderedDict()
+        self._lock = Lock()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def normalize_message(message: str) -> str:
+        """Normalize case, whitespace and trailing punctuation."""
+        normalized = re.sub(r"\s+", " ", (message or "").casefold()).strip()
+        return normalized.rstrip(" .!?,;")
+
+    def is_cacheable_message(self, message: str) -> bool:
+        """Check whether a message is safe to serve from the cache."""
+        if not self.enabled or not message or len(message) > MAX_CACHEABLE_MESSAGE_LENGTH:
+            return False
+
+        # Digits usually mean dates, phone numbers or appointment IDs
+        if any(ch.isdigit() for ch in message):
+            return False
+
+        if mask_pii(message) != message:
+            return False
+
+        # Messages mentioning identity details are never cached
+        normalized = self.normalize_message(message)
+        return not any(keyword in normalized for keyword in IDENTITY_KEYWORDS)
+
+    def make_key(self, model: str, system_prompt: str, message: str, is_verified: bool) -> Tuple:
+        """Build the cache key for a turn."""
+        prompt_hash = hashlib.sha256(system_prompt.encode()).hexdigest()[:16]
+        return (model, prompt_hash, self.normalize_message(message), bool(is_verified))
+
+    def get(self, key: Tuple) -> Optional[str]:
+        """Get a cached reply, or None on a miss."""
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple, reply: str) -> None:
+        """Store a reply, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, reply)
+            self._entries.move_to_end(key)
+            self.stores += 1
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_stats(self) -> dict:
+        """Get cache statistics for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate_percent": round(self.hits / lookups * 100, 2) if lookups else 0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
+# Global response cache instance
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    enabled=settings.RESPONSE_CACHE_ENABLED
+)
@@ -13,6 +13,7 @@ from dataclasses import dataclass
 from collections import defaultdict, deque
 
 from .observability import setup_logging
+from .offload import cpu_offloader
 
 # Setup logging
 logger = setup_logging()
@@ -189,11 +190,15 @@ class GuardrailsEngine:
         message: str, 
         tool_name: str,
         is_verified: Optional[bool] = None,
-        context: Dict[str, Any] = None
+        context: Dict[str, Any] = None,
+        content_violations: Optional[List[SecurityViolation]] = None
     ) -> Tuple[bool, Optional[str], List[SecurityViolation]]:
         """
         Execute before-tool guardrails.
         
+        content_violations, if given, is a scan_content result computed by
+        the caller (e.g. off the event loop) and is used instead of scanning.
+        
         Returns:
             - allowed: bool - Whether to allow the tool execution
             - reason: Optional[str] - Reason for blocking if not allowed
@@ -224,7 +229,8 @@ class GuardrailsEngine:
             return False, rate_reason, violations
         
         # Content filtering
-        content_violations = self.content_filter.scan_content(message, context)
+        if content_violations is None:
+            content_violations = self.content_filter.scan_content(message, context)
         violations.extend(content_violations)
         
         # Check violation severity
@@ -379,15 +385,22 @@ def with_guardrails(tool_name: str):
         async def wrapper(*args, **kwargs):
             # Extract session info from kwargs
             session_id = kwargs.get("session_id", "unknown")
-            message = kwargs.get("message", "")
+            message = str(kwargs.get("message", ""))
+            context = {"function": func.__name__, "args": len(args), "kwargs": list(kwargs.keys())}
+            
+            # Long messages are scanned off the event loop
+            content_violations = await cpu_offloader.run(
+                guardrails.content_filter.scan_content, message, context, size=len(message), process_safe=True
+            )
             
             # Before-tool guardrails
             allowed, reason, violations = guardrails.before_tool_guardrails(
                 session_id=session_id,
-                message=str(message),
+                message=message,
                 tool_name=tool_name,
                 is_verified=kwargs.get("is_verified", False),
-                context={"function": func.__name__, "args": len(args), "kwargs": list(kwargs.keys())}
+                context=context,
+                content_violations=content_violations
             )
             
             if not allowed:
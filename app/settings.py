@@ -23,6 +23,117 @@ class Settings(BaseSettings):
     # Claude LLM Configuration
     ANTHROPIC_API_KEY: str | None = Field(default=None, description="Anthropic API key for Claude")
     CLAUDE_MODEL: str = Field(default="claude-3-5-sonnet-20241022", description="Claude model to use")
+    LLM_PROVIDER: str = Field(default="anthropic", description="LLM backend: anthropic, or fake for offline runs")
+    FAKE_LLM_PROFILE: str = Field(default="claude-sonnet", description="Latency profile for the fake LLM: instant, fast, claude-haiku, claude-sonnet")
+    FAKE_LLM_SEED: int = Field(default=0, description="Seed for the fake LLM's deterministic latency jitter")
+    FAKE_LLM_SMALL_PROFILE: str = Field(default="", description="Fake LLM latency profile for the small model tier (default: FAKE_LLM_PROFILE)")
+
+    # Model Routing (small model for simple turns)
+    MODEL_ROUTING_ENABLED: bool = Field(default=True, description="Route simple turns to CLAUDE_SMALL_MODEL")
+    CLAUDE_SMALL_MODEL: str = Field(default="claude-3-5-haiku-20241022", description="Model for greetings, confirmations and listing")
+    ROUTING_SMALL_MAX_CHARS: int = Field(default=160, description="Longer messages always use the large model")
+
+    ANTHROPIC_BASE_URL: str | None = Field(default=None, description="Override the Anthropic API base URL (e.g. a local mock server)")
+    TOOL_SPEC_CACHE_DIR: str = Field(default="", description="Private directory for cached tool JSON schemas (default: .cache/tool-specs in the project)")
+
+    # Anthropic HTTP Client (shared connection pool)
+    LLM_HTTP_MAX_CONNECTIONS: int = Field(default=20, description="Maximum open connections to the Anthropic API")
+    LLM_HTTP_MAX_KEEPALIVE: int = Field(default=10, description="Idle keep-alive connections kept in the pool")
+    LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = Field(default=60.0, description="Idle time before a pooled connection is closed")
+    LLM_HTTP2: bool = Field(default=True, description="Use HTTP/2 when the h2 package is installed")
+    LLM_CONNECT_TIMEOUT_SECONDS: float = Field(default=5.0, description="Connect (and pool wait) timeout for Claude calls")
+    LLM_READ_TIMEOUT_SECONDS: float = Field(default=60.0, description="Read timeout for Claude calls")
+    LLM_MAX_RETRIES: int = Field(default=3, description="Retries for 429/5xx/529 and connection errors")
+    LLM_RETRY_BACKOFF_BASE_SECONDS: float = Field(default=0.5, description="Base delay for jittered exponential backoff")
+    LLM_RETRY_BACKOFF_MAX_SECONDS: float = Field(default=8.0, description="Maximum retry delay, including Retry-After")
+
+    # Chat Input Limits and CPU Offload
+    CHAT_MAX_MESSAGE_CHARS: int = Field(default=8000, description="Longest chat message accepted; longer ones are rejected with 422")
+    OFFLOAD_MODE: str = Field(default="thread", description="Where regex-heavy work on long messages runs: off, thread, process")
+    OFFLOAD_THRESHOLD_CHARS: int = Field(default=2000, description="Messages at least this long are scanned off the event loop")
+    OFFLOAD_MAX_WORKERS: int = Field(default=4, description="Worker threads/processes for offloaded work")
+    OFFLOAD_MAX_PENDING: int = Field(default=32, description="Offloaded jobs submitted at once; further callers wait")
+
+    # Event-Loop Monitoring
+    LOOP_MONITOR_ENABLED: bool = Field(default=True, description="Sample event-loop lag and report blocking callbacks")
+    LOOP_MONITOR_INTERVAL_MS: float = Field(default=100.0, description="Lag sampler interval")
+    LOOP_SLOW_CALLBACK_MS: float = Field(default=100.0, description="Log the loop's stack when it is blocked longer than this")
+
+    # Admin and Profiling
+    ADMIN_TOKEN: str | None = Field(default=None, description="Token for /admin endpoints (X-Admin-Token); unset disables them")
+    PROFILING_MAX_SECONDS: float = Field(default=30.0, description="Longest CPU profile an admin can request")
+
+    # Verification Lookup Index
+    VERIFICATION_LOOKUP_SECRET: str = Field(default="lumahealth-dev-lookup-secret", description="HMAC key for patient lookup keys (changing it rebuilds them at startup)")
+    PATIENT_INDEX_ENABLED: bool = Field(default=True, description="Keep an in-memory Bloom filter of lookup keys so misses skip the database")
+    PATIENT_INDEX_MAP_ENABLED: bool = Field(default=False, description="Also map lookup keys to patient IDs so hits are fetched by primary key (about 100 bytes per patient)")
+    PATIENT_INDEX_FP_RATE: float = Field(default=0.01, description="Target Bloom filter false-positive rate")
+    PATIENT_INDEX_REFRESH_SECONDS: float = Field(default=30.0, description="How often the index picks up patients created by other processes")
+    PATIENT_NAME_MATCH: str = Field(default="fuzzy", description="Verification name matching: exact, normalized (accents, case, spaces) or fuzzy (also small typos)")
+    PATIENT_NAME_MIN_SIMILARITY: float = Field(default=0.7, description="Trigram similarity a fuzzy name match needs; DOB and phone must still match exactly")
+
+    # LLM Admission Control
+    LLM_MAX_IN_FLIGHT: int = Field(default=8, description="Maximum concurrent conversation turns calling Claude")
+    LLM_MAX_QUEUE: int = Field(default=32, description="Maximum turns waiting for an LLM slot before shedding")
+    LLM_QUEUE_TIMEOUT_SECONDS: float = Field(default=15.0, description="Maximum time a turn waits for an LLM slot")
+
+    # Response Cache (stateless opening turns only)
+    RESPONSE_CACHE_ENABLED: bool = Field(default=True, description="Cache replies to stateless opening turns")
+    RESPONSE_CACHE_MAX_ENTRIES: int = Field(default=1024, description="Maximum cached replies")
+    RESPONSE_CACHE_TTL_SECONDS: int = Field(default=3600, description="Cached reply lifetime")
+
+    # Appointment Listing
+    APPOINTMENTS_PAGE_SIZE: int = Field(default=10, description="Appointments per page when no limit is given")
+    APPOINTMENTS_MAX_PAGE_SIZE: int = Field(default=50, description="Largest page a client or the agent may request")
+
+    # Appointment Archival (hot/cold split)
+    ARCHIVE_ENABLED: bool = Field(default=False, description="Run the archival job periodically in the background")
+    ARCHIVE_AFTER_DAYS: int = Field(default=365, description="Archive confirmed/cancelled appointments older than this")
+    ARCHIVE_BATCH_SIZE: int = Field(default=500, description="Appointments moved per transaction")
+    ARCHIVE_INTERVAL_HOURS: float = Field(default=24.0, description="Hours between background archival runs")
+    ARCHIVE_DATABASE_URL: str | None = Field(default=None, description="Separate database for archived appointments (default: main database)")
+
+    # Appointment Reminders (outbound batch job)
+    REMINDERS_ENABLED: bool = Field(default=False, description="Run the reminder job periodically in the background")
+    REMINDER_HORIZON_HOURS: float = Field(default=24.0, description="Remind PENDING appointments starting within this many hours")
+    REMINDER_INTERVAL_MINUTES: float = Field(default=15.0, description="Minutes between background reminder runs")
+    REMINDER_CHUNK_SIZE: int = Field(default=1000, description="Due appointments read, sent and marked per chunk")
+    REMINDER_CONCURRENCY: int = Field(default=32, description="Reminders in flight at once")
+    REMINDER_SENDER: str = Field(default="file", description="Reminder transport: file (NDJSON stand-in) or http")
+    REMINDER_FILE_PATH: str = Field(default="reminders.ndjson", description="File the file sender appends reminders to")
+    REMINDER_WEBHOOK_URL: str | None = Field(default=None, description="Endpoint the http sender POSTs each reminder to")
+    REMINDER_SEND_TIMEOUT_SECONDS: float = Field(default=10.0, description="Timeout for one reminder delivery")
+
+    # Provider Availability (open-slot search and rescheduling)
+    SLOT_INDEX_ENABLED: bool = Field(default=True, description="Answer open-slot searches from an in-memory per-provider index")
+    SLOT_INDEX_REFRESH_SECONDS: float = Field(default=5.0, description="How often slot changes made by other processes are picked up")
+    SLOT_SEARCH_LIMIT: int = Field(default=5, description="Open slots returned per search when no limit is given")
+    SLOT_DURATION_MINUTES: int = Field(default=30, description="Length of generated schedule slots")
+
+    # Report Exports (admin)
+    EXPORT_CHUNK_SIZE: int = Field(default=2000, description="Rows read and encoded per chunk of a streamed export")
+    EXPORT_MAX_CONCURRENT: int = Field(default=2, description="Exports streaming at once; further requests get 429")
+
+    # Audit Log (appointment_event)
+    AUDIT_LOG_ENABLED: bool = Field(default=True, description="Record appointment changes in the append-only appointment_event table")
+    AUDIT_FLUSH_MS: float = Field(default=20.0, description="Longest an audit event waits before its batch is committed")
+    AUDIT_BATCH_SIZE: int = Field(default=500, description="Most audit events committed in one transaction")
+    AUDIT_QUEUE_MAX: int = Field(default=10000, description="Queued audit events before writers insert synchronously")
+    AUDIT_RECOVERY_INTERVAL_SECONDS: int = Field(default=300, description="How often recovery re-checks for appointments whose audit events were lost")
+
+    # Appointment Prefetch (after verification)
+    PREFETCH_ENABLED: bool = Field(default=True, description="Load a patient's appointments in the background right after verification")
+    PREFETCH_TTL_SECONDS: int = Field(default=120, description="How long prefetched appointments are served")
+    PREFETCH_WAIT_SECONDS: float = Field(default=0.25, description="How long a listing waits for an in-flight prefetch")
+    PREFETCH_INLINE_WAIT_SECONDS: float = Field(default=0.05, description="How long verification waits to include upcoming appointments in its result")
+
+    # Date references
+    DATE_RESOLVER_CACHE_SIZE: int = Field(default=1024, description="Parsed date/time phrases kept in the LRU cache")
+
+    # Tracing (OpenTelemetry)
+    TRACING_EXPORTER: str = Field(default="none", description="Span exporter: none, console, memory, otlp")
+    TRACING_SAMPLE_RATIO: float = Field(default=0.1, description="Fraction of new traces to sample")
+    TRACING_SERVICE_NAME: str = Field(default="lumahealth-conversational-ai", description="service.name resource attribute")
 
     # Database Configuration
     DATABASE_URL: str = Field(default="sqlite:///./clinic.db", description="Database connection URL")
@@ -46,9 +157,14 @@ class Settings(BaseSettings):
     # Security & Rate Limiting
     RATE_LIMIT_VERIFIED_PER_MIN: int = Field(default=30, description="Rate limit for verified users")
     RATE_LIMIT_UNVERIFIED_PER_MIN: int = Field(default=10, description="Rate limit for unverified users")
-    
+
+    # Idempotency Configuration
+    IDEMPOTENCY_TTL_SECONDS: int = Field(default=3600, description="How long idempotent responses are replayable")
+    IDEMPOTENCY_MAX_KEYS: int = Field(default=10000, description="Maximum stored idempotent responses")
+
     # Health Check Configuration
     STARTUP_TIMEOUT_SECONDS: int = Field(default=300, description="Startup timeout for production")
+    READINESS_WAIT_SECONDS: float = Field(default=30.0, description="How long a request waits for warmup before 503")
     
     def is_production(self) -> bool:
         """Check if running in production environment."""
@@ -0,0 +1,199 @@
+"""
+Tool registry for the LumaHealth Conversational AI Service.
+
+This module builds each tool set once per process, derives the tool JSON
+schemas once per code version (cached on disk, keyed by a hash of the code
+that defines the tools), and shares compiled agent graphs and the
+conversation checkpointer across LumaHealthAgent instances and tool
+re-initializations. The cached schemas are sent to the model as-is, so the
+cache directory must be private: it is created with mode 0700 and is
+ignored if another user owns it or can write to it.
+"""
+
+import hashlib
+import json
+import os
+import time
+from threading import RLock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import langchain_core
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from .observability import setup_logging
+from .settings import settings
+
+logger = setup_logging()
+
+# Source files whose contents determine the tool schemas
+TOOL_SOURCE_FILES = ("mcp_tools.py", "tool_registry.py")
+
+# Default cache directory, next to the app package
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "tool-specs")
+
+
+class ToolRegistry:
+    """
+    Process-wide registry of tools, tool specs and compiled agent graphs.
+
+    Tool specs are OpenAI-format tool dicts; chat models bind them without
+    re-deriving Pydantic schemas, and create_react_agent recognizes them
+    as already bound.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self._lock = RLock()
+        self._code_hash: Optional[str] = None
+        self._tools: Dict[str, List[BaseTool]] = {}
+        self._specs: Dict[str, List[dict]] = {}
+        self._graphs: Dict[Tuple, Any] = {}
+        self._checkpointer = None
+
+        # Counters
+        self.spec_memory_hits = 0
+        self.spec_disk_hits = 0
+        self.spec_derivations = 0
+        self.graph_builds = 0
+        self.graph_reuses = 0
+        self.last_derivation_ms = 0.0
+        self.last_graph_build_ms = 0.0
+        self.unsafe_cache_dir = False
+
+    def code_hash(self) -> str:
+        """Hash of the tool-defining source files and the LangChain version."""
+        if self._code_hash is None:
+            digest = hashlib.sha256(langchain_core.__version__.encode())
+            package_dir = os.path.dirname(os.path.abspath(__file__))
+            for filename in TOOL_SOURCE_FILES:
+                with open(os.path.join(package_dir, filename), "rb") as f:
+                    digest.update(f.read())
+            self._code_hash = digest.hexdigest()[:16]
+        return self._code_hash
+
+    def get_tools(self, mode: str, factory: Callable[[], List[BaseTool]]) -> List[BaseTool]:
+        """Get the tool set for a mode ("fallback" or "mcp"), building it once."""
+        with self._lock:
+            if mode not in self._tools:
+                self._tools[mode] = factory()
+            return self._tools[mode]
+
+    def get_tool_specs(self, mode: str, tools: List[BaseTool]) -> List[dict]:
+        """Get OpenAI-format tool specs, from memory, disk, or by deriving them."""
+        with self._lock:
+            if mode in self._specs:
+                self.spec_memory_hits += 1
+                return self._specs[mode]
+
+            names = [tool.name for tool in tools]
+            specs = self._load_specs(mode, names)
+
+            if specs is not None:
+                self.spec_disk_hits += 1
+            else:
+                start = time.perf_counter()
+                specs = [convert_to_openai_tool(tool) for tool in tools]
+                self.last_derivation_ms = (time.perf_counter() - start) * 1000
+                self.spec_derivations += 1
+                self._save_specs(mode, specs)
+
+            self._specs[mode] = specs
+            return specs
+
+    def get_graph(self, key: Tuple, builder: Callable[[], Any]) -> Any:
+        """Get the compiled graph for a key, compiling it on first use."""
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is not None:
+                self.graph_reuses += 1
+                return graph
+
+            start = time.perf_counter()
+            graph = builder()
+            self.last_graph_build_ms = (time.perf_counter() - start) * 1000
+            self.graph_builds += 1
+
+            if graph is not None:
+                self._graphs[key] = graph
+            return graph
+
+    @property
+    def checkpointer(self):
+        """Conversation checkpointer shared by every compiled graph."""
+        with self._lock:
+            if self._checkpointer is None:
+                from langgraph.checkpoint.memory import MemorySaver
+                self._checkpointer = MemorySaver()
+            return self._checkpointer
+
+    def clear(self) -> None:
+        """Drop in-memory tools, specs and graphs (the disk cache is kept)."""
+        with self._lock:
+            self._tools.clear()
+            self._specs.clear()
+            self._graphs.clear()
+
+    def _spec_path(self, mode: str) -> str:
+        return os.path.join(self.cache_dir, f"tool_specs_{mode}_{self.code_hash()}.json")
+
+    def _cache_dir_is_private(self) -> bool:
+        """True if the cache directory is owned by this user and nobody else can write to it."""
+        try:
+            info = os.stat(self.cache_dir)
+        except OSError:
+            return False
+        getuid = getattr(os, "getuid", None)
+        private = (getuid is None or info.st_uid == getuid()) and not info.st_mode & 0o022
+        if not private and not self.unsafe_cache_dir:
+            self.unsafe_cache_dir = True
+            logger.warning(f"Ignoring tool spec cache {self.cache_dir}: it is shared with other users")
+        return private
+
+    def _load_specs(self, mode: str, names: List[str]) -> Optional[List[dict]]:
+        if not self._cache_dir_is_private():
+            return None
+        try:
+            with open(self._spec_path(mode), encoding="utf-8") as f:
+                specs = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Guard against a cache written for a different tool set
+        if [spec.get("function", {}).get("name") for spec in specs] != names:
+            return None
+        return specs
+
+    def _save_specs(self, mode: str, specs: List[dict]) -> None:
+        path = self._spec_path(mode)
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            if not self._cache_dir_is_private():
+                return
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(specs, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write tool spec cache {path}: {e}")
+
+    def get_stats(self) -> dict:
+        """Get registry statistics for monitoring."""
+        with self._lock:
+            return {
+                "code_hash": self.code_hash(),
+                "tool_sets": sorted(self._tools),
+                "compiled_graphs": len(self._graphs),
+                "spec_memory_hits": self.spec_memory_hits,
+                "spec_disk_hits": self.spec_disk_hits,
+                "spec_derivations": self.spec_derivations,
+                "graph_builds": self.graph_builds,
+                "graph_reuses": self.graph_reuses,
+                "last_derivation_ms": round(self.last_derivation_ms, 2),
+                "last_graph_build_ms": round(self.last_graph_build_ms, 2),
+                "unsafe_cache_dir": self.unsafe_cache_dir
+            }
+
+
+# Global tool registry instance
+tool_registry = ToolRegistry(cache_dir=settings.TOOL_SPEC_CACHE_DIR or None)
@@ -0,0 +1,195 @@
+"""
+OpenTelemetry tracing for the LumaHealth Conversational AI Service.
+
+This module configures the tracer provider (sampler + pluggable exporter)
+and provides the span sources: an ASGI middleware for HTTP requests,
+SQLAlchemy statement hooks, and helpers that carry trace context into the
+MCP subprocess through tool call metadata. Graph node, LLM and tool spans
+come from TracingCallbackHandler in app.instrumentation.
+
+It deliberately imports nothing from LangChain, so app.main stays cheap
+to import.
+
+Tracing is off by default (TRACING_EXPORTER=none). Without the OpenTelemetry
+SDK installed, every tracer is the API's no-op tracer.
+"""
+
+from typing import Any, Dict, Optional
+
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+
+from .db import engine
+from .observability import setup_logging
+from .settings import settings
+
+# Optional SDK (exporters and samplers live there, not in the API)
+try:
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    OTEL_SDK_AVAILABLE = True
+except ImportError:
+    OTEL_SDK_AVAILABLE = False
+
+logger = setup_logging()
+
+tracer = trace.get_tracer("lumahealth")
+
+# Set by setup_tracing() when TRACING_EXPORTER=memory (inspect spans in tests/scripts)
+memory_exporter = None
+
+_tracing_enabled = False
+
+
+def setup_tracing(service_name: Optional[str] = None) -> bool:
+    """
+    Configure the global tracer provider from settings.
+
+    Returns True when spans are being exported. Safe to call more than once.
+    """
+    global memory_exporter, _tracing_enabled
+
+    if _tracing_enabled:
+        return True
+
+    exporter_name = settings.TRACING_EXPORTER.lower()
+    if exporter_name == "none":
+        return False
+
+    if not OTEL_SDK_AVAILABLE:
+        logger.warning("TRACING_EXPORTER is set but opentelemetry-sdk is not installed; tracing disabled")
+        return False
+
+    if exporter_name == "console":
+        processor = SimpleSpanProcessor(ConsoleSpanExporter())
+    elif exporter_name == "memory":
+        memory_exporter = InMemorySpanExporter()
+        processor = SimpleSpanProcessor(memory_exporter)
+    elif exporter_name == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("TRACING_EXPORTER=otlp but opentelemetry-exporter-otlp-proto-http is not installed")
+            return False
+        # Endpoint and headers come from the standard OTEL_EXPORTER_OTLP_* variables
+        processor = BatchSpanProcessor(OTLPSpanExporter())
+    else:
+        logger.warning(f"Unknown TRACING_EXPORTER '{exporter_name}'; tracing disabled")
+        return False
+
+    # Sample a fraction of new traces; always follow the caller's decision
+    provider = TracerProvider(
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+        resource=Resource.create({"service.name": service_name or settings.TRACING_SERVICE_NAME})
+    )
+    provider.add_span_processor(processor)
+    trace.set_tracer_provider(provider)
+
+    _tracing_enabled = True
+    return True
+
+
+def is_tracing_enabled() -> bool:
+    """Check whether setup_tracing() configured an exporter."""
+    return _tracing_enabled
+
+
+# HTTP
+
+class TracingMiddleware:
+    """ASGI middleware that opens a server span per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _tracing_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        parent = propagate.extract(headers)
+        method = scope.get("method", "GET")
+
+        with tracer.start_as_current_span(
+            f"{method} {scope.get('path', '')}",
+            context=parent,
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope.get("path", "")}
+        ) as span:
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    span.set_attribute("http.response.status_code", status)
+                    if status >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
+
+            # Name the span after the route template once routing has happened
+            route = scope.get("route")
+            if route is not None and getattr(route, "path", None):
+                span.update_name(f"{method} {route.path}")
+                span.set_attribute("http.route", route.path)
+
+
+# MCP trace context propagation
+
+def inject_trace_context() -> Dict[str, str]:
+    """W3C trace context headers for the current span, for MCP request _meta."""
+    carrier: Dict[str, str] = {}
+    if _tracing_enabled:
+        propagate.inject(carrier)
+    return carrier
+
+
+def extract_trace_context(meta: Any):
+    """Rebuild the caller's context from MCP request _meta (or a plain dict)."""
+    if meta is None:
+        return otel_context.get_current()
+    carrier = meta if isinstance(meta, dict) else (getattr(meta, "model_extra", None) or {})
+    return propagate.extract({k: v for k, v in carrier.items() if isinstance(v, str)})
+
+
+# SQL
+
+def instrument_engine(db_engine) -> None:
+    """Emit a span per SQL statement issued inside a sampled trace."""
+
+    @event.listens_for(db_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not _tracing_enabled or not trace.get_current_span().is_recording():
+            return
+        operation = statement.split(None, 1)[0].upper() if statement else "SQL"
+        span = tracer.start_span(
+            f"db {operation}",
+            kind=SpanKind.CLIENT,
+            # Statements are parameterized, so no PII ends up in the span
+            attributes={"db.system": db_engine.dialect.name, "db.statement": statement[:1000]}
+        )
+        conn.info.setdefault("trace_spans", []).append(span)
+
+    @event.listens_for(db_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            spans.pop().end()
+
+    @event.listens_for(db_engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("trace_spans") if conn is not None else None
+        if spans:
+            span = spans.pop()
+            span.record_exception(exception_context.original_exception)
+            span.set_status(Status(StatusCode.ERROR))
+            span.end()
+
+
+instrument_engine(engine)
@@ -0,0 +1,88 @@
+"""
+Compare two pytest-benchmark JSON runs and flag regressions.
+
+Usage:
+    pytest benchmarks --benchmark-json=baseline.json
+    # ... change code ...
+    pytest benchmarks --benchmark-json=current.json
+    python benchmarks/compare.py baseline.json current.json --threshold 10
+
+Exits with status 1 when any benchmark's chosen statistic is slower than
+the baseline by more than the threshold percentage.
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict
+
+
+def load_stats(path: str, stat: str) -> Dict[str, float]:
+    """Map benchmark fullname to the chosen statistic (seconds)."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {bench["fullname"]: bench["stats"][stat] for bench in data.get("benchmarks", [])}
+
+
+def compare(baseline: Dict[str, float], current: Dict[str, float], threshold: float) -> list:
+    """Return rows of (name, baseline, current, change_percent, verdict)."""
+    rows = []
+    for name in sorted(set(baseline) | set(current)):
+        if name not in current:
+            rows.append((name, baseline[name], None, None, "missing"))
+            continue
+        if name not in baseline:
+            rows.append((name, None, current[name], None, "new"))
+            continue
+
+        before, after = baseline[name], current[name]
+        change = (after - before) / before * 100 if before else 0.0
+        if change > threshold:
+            verdict = "REGRESSION"
+        elif change < -threshold:
+            verdict = "improved"
+        else:
+            verdict = "ok"
+        rows.append((name, before, after, change, verdict))
+    return rows
+
+
+def format_time(seconds) -> str:
+    if seconds is None:
+        return "-"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.3f}s"
+
+
+def main():
+    """Main function to compare benchmark runs."""
+    parser = argparse.ArgumentParser(description="Flag benchmark regressions between two runs")
+    parser.add_argument("baseline", help="Baseline pytest-benchmark JSON")
+    parser.add_argument("current", help="Current pytest-benchmark JSON")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent")
+    parser.add_argument("--stat", default="median", choices=["min", "median", "mean", "max"],
+                        help="Statistic to compare")
+    args = parser.parse_args()
+
+    rows = compare(load_stats(args.baseline, args.stat), load_stats(args.current, args.stat), args.threshold)
+
+    width = max([len(row[0]) for row in rows] + [10])
+    print(f"{'benchmark':<{width}}  {'baseline':>10}  {'current':>10}  {'change':>8}  verdict")
+    for name, before, after, change, verdict in rows:
+        change_str = f"{change:+.1f}%" if change is not None else "-"
+        print(f"{name:<{width}}  {format_time(before):>10}  {format_time(after):>10}  {change_str:>8}  {verdict}")
+
+    regressions = [row for row in rows if row[4] == "REGRESSION"]
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) above {args.threshold}% ({args.stat})")
+        return 1
+
+    print(f"\n✅ No regressions above {args.threshold}% ({args.stat})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
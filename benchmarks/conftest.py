@@ -0,0 +1,132 @@
+"""
+Shared fixtures for the LumaHealth microbenchmarks.
+
+Each database benchmark runs against its own temporary SQLite file, seeded
+with bulk inserts, so the committed clinic.db is never touched.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+from sqlmodel import SQLModel, Session, create_engine
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import Appointment, AppointmentStatus, Patient
+
+# Appointments per seeded patient
+APPOINTMENTS_PER_PATIENT = 10
+
+DOCTORS = ["Dr. Silva", "Dr. Santos", "Dr. Oliveira", "Dr. Costa"]
+LOCATIONS = ["Clínica Central", "Unidade Norte", "Unidade Sul"]
+STATUSES = [AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED, AppointmentStatus.CANCELLED]
+
+
+def patient_identity(index: int) -> tuple:
+    """Deterministic (full_name, dob, phone) for the index-th seeded patient."""
+    return (
+        f"Patient {index:06d}",
+        f"{1950 + index % 50}-{index % 12 + 1:02d}-{index % 28 + 1:02d}",
+        f"+5511{index:09d}"
+    )
+
+
+def seed_patients(conn, patients: int, now: datetime, batch_size: int = 100_000) -> None:
+    """Bulk insert patients (with their verification lookup keys) in batches."""
+    for start in range(0, patients, batch_size):
+        rows = []
+        for i in range(start, min(start + batch_size, patients)):
+            name, dob, phone = patient_identity(i)
+            phone_hash = Patient.hash_phone(phone)
+            rows.append({
+                "id": i + 1,
+                "full_name": name,
+                "name_normalized": Patient.normalize_name(name),
+                "dob": dob,
+                "phone_hash": phone_hash,
+                "lookup_key": Patient.make_lookup_key(name, dob, phone_hash),
+                "created_at": now
+            })
+        conn.execute(insert(Patient.__table__), rows)
+
+
+def seed_database(engine, appointment_rows: int) -> None:
+    """Seed patients and appointments with bulk inserts."""
+    patients = max(1, appointment_rows // APPOINTMENTS_PER_PATIENT)
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        seed_patients(conn, patients, now)
+        conn.execute(insert(Appointment.__table__), [
+            {
+                "patient_id": i % patients + 1,
+                "when_utc": now + timedelta(hours=i),
+                "location": LOCATIONS[i % len(LOCATIONS)],
+                "status": STATUSES[i % len(STATUSES)].name,
+                "doctor_name": DOCTORS[i % len(DOCTORS)],
+                "created_at": now,
+                "updated_at": now
+            }
+            for i in range(appointment_rows)
+        ])
+
+
+@pytest.fixture(scope="session")
+def seeded_engine_factory(tmp_path_factory):
+    """Build (and cache) a seeded database engine per appointment-table size."""
+    engines = {}
+
+    def factory(appointment_rows: int):
+        if appointment_rows not in engines:
+            path = tmp_path_factory.mktemp("db") / f"bench_{appointment_rows}.db"
+            engine = create_engine(f"sqlite:///{path}")
+            SQLModel.metadata.create_all(engine)
+            seed_database(engine, appointment_rows)
+            engines[appointment_rows] = engine
+        return engines[appointment_rows]
+
+    yield factory
+
+    for engine in engines.values():
+        engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def patient_engine_factory(tmp_path_factory):
+    """Build (and cache) a patients-only database engine per patient count."""
+    engines = {}
+
+    def factory(patients: int):
+        if patients not in engines:
+            path = tmp_path_factory.mktemp("db") / f"patients_{patients}.db"
+            engine = create_engine(f"sqlite:///{path}")
+            SQLModel.metadata.create_all(engine)
+            with engine.begin() as conn:
+                seed_patients(conn, patients, datetime.utcnow())
+            engines[patients] = engine
+        return engines[patients]
+
+    yield factory
+
+    for engine in engines.values():
+        engine.dispose()
+
+
+@pytest.fixture
+def db_session_factory(seeded_engine_factory):
+    """Open sessions on a seeded database; closed after the benchmark."""
+    sessions = []
+
+    def factory(appointment_rows: int) -> Session:
+        session = Session(seeded_engine_factory(appointment_rows))
+        sessions.append(session)
+        return session
+
+    yield factory
+
+    for session in sessions:
+        session.close()
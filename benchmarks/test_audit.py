@@ -0,0 +1,199 @@
+"""
+Audit log cost on confirm/cancel, and recovery after a crash.
+
+Each round confirms or cancels a set of PENDING appointments (reset
+between rounds) through AppointmentCRUD with the audit log off ("none"),
+with every event
+inserted in its own transaction right after the change ("sync", the plain
+approach), and with events group-committed by the audit writer ("group",
+flushed at the end of the round so every event is durable in all modes).
+Read the "Mean" column as the time for one round.
+
+Run with:
+    pytest benchmarks/test_audit.py --benchmark-columns=mean,ops
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, insert, update
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.audit import RECOVERY_GRACE_SECONDS, AuditLog, audit_log
+from app.db import AppointmentCRUD
+from app.models import Appointment, AppointmentEvent, AppointmentStatus
+
+from .conftest import seed_database
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APPOINTMENTS = 1000
+CHANGES_PER_ROUND = 500
+
+CRASH_MUTATIONS = 1000
+
+# Runs in a child process that dies (os._exit) right after its last change, with events still queued
+CRASH_SCRIPT = """
+import json, os, sys
+from sqlmodel import Session, create_engine
+from app.audit import audit_channel, audit_log
+from app.db import AppointmentCRUD
+from app.models import Appointment
+
+engine = create_engine(f"sqlite:///{sys.argv[1]}")
+audit_log.flush_ms, audit_log.batch_size = 1000, 64
+changes = []
+with Session(engine) as session, audit_channel("rest", "crash-test"):
+    for i in range(int(sys.argv[2])):
+        appointment = session.get(Appointment, i + 1)
+        if i % 2:
+            AppointmentCRUD.cancel_appointment(session, appointment.id, appointment.patient_id)
+            changes.append([appointment.id, "CANCELLED"])
+        else:
+            AppointmentCRUD.confirm_appointment(session, appointment.id, appointment.patient_id)
+            changes.append([appointment.id, "CONFIRMED"])
+print(json.dumps(changes), flush=True)
+os._exit(0)
+"""
+
+
+def _new_engine(tmp_path, name: str, appointments: int):
+    engine = create_engine(f"sqlite:///{tmp_path / name}")
+    SQLModel.metadata.create_all(engine)
+    seed_database(engine, appointments)
+    _reset_to_pending(engine)
+    return engine
+
+
+def _reset_to_pending(engine) -> None:
+    """Make every appointment PENDING again (confirm and cancel only start from PENDING)."""
+    with engine.begin() as conn:
+        conn.execute(update(Appointment).values(status=AppointmentStatus.PENDING))
+
+
+@pytest.fixture
+def audit_enabled():
+    """Restore the global audit log's switch after a benchmark turns it off."""
+    enabled = audit_log.enabled
+    yield
+    audit_log.flush()
+    audit_log.enabled = enabled
+
+
+def _sync_record(session: Session, appointment: Appointment, action: str) -> None:
+    """The plain approach: insert the event in its own transaction after the change."""
+    with session.get_bind().begin() as conn:
+        conn.execute(insert(AppointmentEvent.__table__), [{
+            "appointment_id": appointment.id,
+            "patient_id": appointment.patient_id,
+            "action": action,
+            "status": appointment.status,
+            "when_utc": appointment.when_utc,
+            "channel": "rest",
+            "occurred_at": appointment.updated_at,
+            "recorded_at": datetime.utcnow()
+        }])
+
+
+def _change_round(session: Session, targets: list, mode: str) -> None:
+    for i, (appointment_id, patient_id) in enumerate(targets):
+        if i % 2:
+            appointment, _ = AppointmentCRUD.cancel_appointment(session, appointment_id, patient_id)
+        else:
+            appointment, _ = AppointmentCRUD.confirm_appointment(session, appointment_id, patient_id)
+        if mode == "sync":
+            _sync_record(session, appointment, appointment.status.value.lower())
+    if mode == "group":
+        assert audit_log.flush(timeout=30)
+
+
+@pytest.mark.parametrize("mode", ["none", "sync", "group"])
+def test_confirm_cancel_with_audit(benchmark, tmp_path, audit_enabled, mode):
+    """CHANGES_PER_ROUND confirms and cancels, each recorded according to `mode`."""
+    engine = _new_engine(tmp_path, f"audit_{mode}.db", APPOINTMENTS)
+    audit_log.enabled = mode == "group"
+    with Session(engine) as session:
+        targets = [tuple(row) for row in session.exec(
+            select(Appointment.id, Appointment.patient_id).order_by(Appointment.id).limit(CHANGES_PER_ROUND)
+        ).all()]
+        batches_before = audit_log.batches
+        rounds = []
+
+        def change_round():
+            rounds.append(mode)
+            _change_round(session, targets, mode)
+
+        benchmark.pedantic(change_round, setup=lambda: _reset_to_pending(engine), rounds=5, iterations=1)
+
+        events = session.exec(select(func.count()).select_from(AppointmentEvent)).one()
+    changes = len(rounds) * CHANGES_PER_ROUND
+    assert events == (0 if mode == "none" else changes)
+    if mode == "group":
+        # Events were committed in groups, not one transaction each
+        assert audit_log.batches - batches_before < changes / 2
+    engine.dispose()
+
+
+def test_events_consistent_after_crash(tmp_path):
+    """
+    A process killed with events still queued loses only a tail of them.
+
+    Committed groups are a prefix of the changes, in order. A restart right
+    after the crash still recovers them: recover() skips changes inside the
+    default grace period, and the periodic runner waits it out first. Then
+    every appointment's latest event matches its row, and a rerun adds none.
+    """
+    path = tmp_path / "crash.db"
+    engine = _new_engine(tmp_path, "crash.db", CRASH_MUTATIONS)
+
+    child = subprocess.run(
+        [sys.executable, "-c", CRASH_SCRIPT, str(path), str(CRASH_MUTATIONS)],
+        cwd=ROOT, env={**os.environ, "PYTHONPATH": ROOT}, capture_output=True, text=True, timeout=300
+    )
+    crashed_at = time.monotonic()
+    assert child.returncode == 0, child.stderr
+    changes = json.loads(child.stdout.strip().splitlines()[-1])
+    assert len(changes) == CRASH_MUTATIONS
+
+    with Session(engine) as session:
+        events = session.exec(select(AppointmentEvent).order_by(AppointmentEvent.id)).all()
+        recorded = [[event.appointment_id, event.status.value] for event in events]
+        assert 0 < len(recorded) < len(changes)
+        assert recorded == changes[:len(recorded)]
+        assert {(event.channel, event.session_id) for event in events} == {("rest", "crash-test")}
+
+    recovery = AuditLog(enabled=True)
+    # The last change is inside the grace period, so an immediate run leaves it
+    assert time.monotonic() - crashed_at < RECOVERY_GRACE_SECONDS
+    recovery.recover(engine)
+    with Session(engine) as session:
+        last_id = changes[-1][0]
+        assert session.exec(select(AppointmentEvent).where(AppointmentEvent.appointment_id == last_id)).first() is None
+
+    async def restart():
+        runs = recovery.recovery_runs
+        runner = asyncio.create_task(recovery.run_periodically(engine, interval_seconds=3600))
+        while recovery.recovery_runs == runs:
+            await asyncio.sleep(0.1)
+        runner.cancel()
+
+    asyncio.run(asyncio.wait_for(restart(), timeout=RECOVERY_GRACE_SECONDS + 60))
+    assert recovery.events_recovered > 0
+    assert recovery.recover(engine) == 0
+
+    with Session(engine) as session:
+        latest = {}
+        for event in session.exec(select(AppointmentEvent).order_by(AppointmentEvent.occurred_at, AppointmentEvent.id)):
+            latest[event.appointment_id] = event
+        for appointment in session.exec(select(Appointment)).all():
+            event = latest[appointment.id]
+            assert (event.status, event.when_utc, event.occurred_at) == (
+                appointment.status, appointment.when_utc, appointment.updated_at
+            ), appointment.id
+    engine.dispose()
@@ -0,0 +1,169 @@
+"""
+Open-slot search and reschedule races.
+
+Compares "next 5 open slots for doctor X at location Y after Z" answered
+by the in-memory SlotIndex against the same search as SQL queries, over
+a schedule of ~200k slots (half of them booked). Also checks that racing
+reschedules into one slot never double-book it.
+
+Run with:
+    pytest benchmarks/test_availability.py --benchmark-columns=mean,ops
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.availability import SlotIndex
+from app.db import AppointmentCRUD, SlotCRUD
+from app.models import Appointment, AppointmentStatus, Provider, Slot
+
+from .conftest import LOCATIONS, seed_patients
+
+PROVIDERS = 200
+DAYS = 90
+SLOTS_PER_DAY = 16
+RACERS = 8
+
+
+def _provider_name(index: int) -> str:
+    return f"Dr. Provider {index:03d}"
+
+
+@pytest.fixture(scope="module")
+def slot_engine(tmp_path_factory):
+    """A database of provider schedules: each provider alternates two locations by day."""
+    path = tmp_path_factory.mktemp("db") / "slots.db"
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    now = datetime.utcnow()
+    first_day = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    with engine.begin() as conn:
+        seed_patients(conn, RACERS, now)
+        conn.execute(insert(Provider.__table__), [
+            {"id": p + 1, "name": _provider_name(p), "created_at": now} for p in range(PROVIDERS)
+        ])
+        rows = []
+        for p in range(PROVIDERS):
+            for day in range(DAYS):
+                location = LOCATIONS[(p + day) % 2]
+                for s in range(SLOTS_PER_DAY):
+                    start = first_day + timedelta(days=day, hours=9, minutes=30 * s)
+                    rows.append({
+                        "provider_id": p + 1,
+                        "location": location,
+                        "start_utc": start,
+                        "end_utc": start + timedelta(minutes=30),
+                        # Every other slot is booked (by a placeholder appointment ID)
+                        "appointment_id": 10_000_000 + len(rows) if s % 2 else None,
+                        "updated_at": now
+                    })
+        conn.execute(insert(Slot.__table__), rows)
+
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def loaded_index(slot_engine):
+    index = SlotIndex(enabled=True, refresh_seconds=3600)
+    index.load(slot_engine)
+    return index
+
+
+def _query(day: int = 30):
+    return _provider_name(117), LOCATIONS[1], datetime.utcnow() + timedelta(days=day)
+
+
+def test_find_open_index(benchmark, loaded_index):
+    """Search answered from the per-provider sorted arrays."""
+    doctor, location, after = _query()
+    slots = benchmark(loaded_index.find, doctor, location, after, 5)
+    assert len(slots) == 5
+
+
+def test_find_open_db(benchmark, slot_engine):
+    """The same search as SQL (the fallback before the index is loaded)."""
+    doctor, location, after = _query()
+    with Session(slot_engine) as session:
+        slots = benchmark(SlotCRUD.find_open_in_db, session, doctor, location, after, 5)
+    assert len(slots) == 5
+
+
+def test_index_matches_db(slot_engine, loaded_index):
+    """The index and SQL return the same slots for a mix of searches."""
+    queries = [
+        (_provider_name(3), None, None),
+        (_provider_name(42), LOCATIONS[0], datetime.utcnow() + timedelta(days=10)),
+        ("provider 199", "unidade norte", datetime.utcnow() + timedelta(days=80)),
+        (None, LOCATIONS[1], datetime.utcnow() + timedelta(days=45)),
+        (_provider_name(7), LOCATIONS[2], None)
+    ]
+    with Session(slot_engine) as session:
+        for doctor, location, after in queries:
+            from_db = SlotCRUD.find_open_in_db(session, doctor, location, after, 5)
+            assert loaded_index.find(doctor, location, after, 5) == from_db, (doctor, location, after)
+
+
+def test_reschedule_race_single_winner(slot_engine):
+    """Racing reschedules into one open slot: exactly one wins, the others see slot_taken."""
+    now = datetime.utcnow()
+    with Session(slot_engine) as session:
+        appointments = [
+            AppointmentCRUD.create(session, patient_id=i + 1, when_utc=now + timedelta(days=200 + i),
+                                   location=LOCATIONS[0], doctor_name=_provider_name(0))
+            for i in range(RACERS)
+        ]
+        appointment_ids = [(appointment.id, appointment.patient_id) for appointment in appointments]
+        target = SlotCRUD.find_open_in_db(session, _provider_name(5), None, now + timedelta(days=20), 1)[0]["slot_id"]
+
+    barrier = threading.Barrier(RACERS)
+    outcomes = {}
+
+    def racer(appointment_id: int, patient_id: int) -> None:
+        with Session(slot_engine) as session:
+            barrier.wait()
+            appointment, reason = AppointmentCRUD.reschedule(session, appointment_id, patient_id, target)
+            outcomes[appointment_id] = "moved" if appointment else reason
+
+    threads = [threading.Thread(target=racer, args=ids) for ids in appointment_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    winners = [appointment_id for appointment_id, outcome in outcomes.items() if outcome == "moved"]
+    assert len(winners) == 1, outcomes
+    assert sorted(set(outcomes.values())) == ["moved", "slot_taken"]
+    with Session(slot_engine) as session:
+        slot = session.get(Slot, target)
+        assert slot.appointment_id == winners[0]
+        assert session.get(Appointment, winners[0]).when_utc == slot.start_utc
+
+
+def test_cancelled_appointment_cannot_be_confirmed(slot_engine):
+    """A cancelled appointment's slot can be rebooked, so confirming it again is refused."""
+    now = datetime.utcnow()
+    with Session(slot_engine) as session:
+        first, second = [
+            AppointmentCRUD.create(session, patient_id=i + 1, when_utc=now + timedelta(days=300 + i),
+                                   location=LOCATIONS[0], doctor_name=_provider_name(0))
+            for i in range(2)
+        ]
+        slot_id = SlotCRUD.find_open_in_db(session, _provider_name(9), None, now + timedelta(days=25), 1)[0]["slot_id"]
+
+        assert AppointmentCRUD.reschedule(session, first.id, first.patient_id, slot_id)[0] is not None
+        assert AppointmentCRUD.cancel_appointment(session, first.id, first.patient_id)[0].status == AppointmentStatus.CANCELLED
+        assert AppointmentCRUD.reschedule(session, second.id, second.patient_id, slot_id)[0] is not None
+
+        assert AppointmentCRUD.confirm_appointment(session, first.id, first.patient_id) == (None, "cancelled")
+        assert session.get(Appointment, first.id, populate_existing=True).status == AppointmentStatus.CANCELLED
+        assert session.get(Slot, slot_id, populate_existing=True).appointment_id == second.id
+        # Confirming the rebooked one still works, and repeating it is a no-op success
+        for _ in range(2):
+            appointment, reason = AppointmentCRUD.confirm_appointment(session, second.id, second.patient_id)
+            assert reason is None and appointment.status == AppointmentStatus.CONFIRMED
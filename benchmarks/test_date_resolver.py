@@ -0,0 +1,104 @@
+"""
+Benchmarks for resolving date/time references against a session's appointments.
+
+Compares a cold parse with a cached one, and the per-session bisect index
+with the linear scan over last_list the tools used before. The phrase
+corpus checks how many typical references resolve to exactly one
+appointment without the model working out the date.
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.date_resolver import DateResolver, parse_reference
+
+# A Monday
+TODAY = date(2026, 10, 19)
+
+# Phrases patients use for the appointments seeded below
+PHRASES = [
+    "next Tuesday afternoon", "tuesday at 3pm", "amanhã às 15h", "na terça à tarde", "tomorrow afternoon",
+    "2026-10-20 15:00", "20/10 15h", "October 20th at 3 pm", "20 de outubro às 15h",
+    "wednesday morning", "quarta-feira de manhã", "quarta-feira 9h30", "in 2 days at 9:30",
+    "day after tomorrow in the morning", "Friday", "sexta-feira", "sábado", "saturday at 3",
+    "next Monday", "segunda que vem", "hoje de manhã", "sunday 9:30",
+]
+
+
+def _appointments(count: int) -> list:
+    """count appointments, one a day from today, alternating 09:30 and 15:00 (serialize_appointment format)."""
+    appointments = []
+    for i in range(count):
+        when = datetime.combine(TODAY + timedelta(days=i), datetime.min.time())
+        when += timedelta(hours=15) if i % 2 else timedelta(hours=9, minutes=30)
+        appointments.append({
+            "id": i + 1,
+            "date": when.strftime("%Y-%m-%d"),
+            "time": when.strftime("%H:%M"),
+            "datetime_utc": when.isoformat(),
+            "status": "PENDING"
+        })
+    return appointments
+
+
+def _linear_match(appointments: list, date_text: str, time_text: str):
+    """The previous tool logic: exact YYYY-MM-DD (and HH:MM) string compare."""
+    for apt in appointments:
+        if apt.get("date") == date_text and (not time_text or apt.get("time") == time_text):
+            return apt["id"]
+    return None
+
+
+def test_parse_cold(benchmark):
+    """Parse a phrase without the cache."""
+    reference = benchmark(parse_reference, "next Tuesday afternoon at 3pm")
+
+    assert reference is not None and reference.times
+
+
+def test_parse_cached(benchmark):
+    """Parse a phrase that is already in the LRU cache."""
+    resolver = DateResolver()
+    resolver.parse("next Tuesday afternoon at 3pm")
+
+    reference = benchmark(resolver.parse, "next Tuesday afternoon at 3pm")
+
+    assert reference is not None
+
+
+@pytest.mark.parametrize("count", [10, 1_000])
+def test_match_indexed(benchmark, count):
+    """Cached phrase + reused per-session index (bisect)."""
+    resolver = DateResolver()
+    appointments = _appointments(count)
+    last = appointments[-1]
+
+    matches = benchmark(resolver.match, "bench", appointments, last["date"], last["time"], TODAY)
+
+    assert len(matches) == 1
+
+
+@pytest.mark.parametrize("count", [10, 1_000])
+def test_match_linear_baseline(benchmark, count):
+    """Previous behaviour: linear string compare over last_list."""
+    appointments = _appointments(count)
+    last = appointments[-1]
+
+    appointment_id = benchmark(_linear_match, appointments, last["date"], last["time"])
+
+    assert appointment_id is not None
+
+
+def test_phrase_corpus(benchmark):
+    """Resolve every corpus phrase against a week of appointments."""
+    resolver = DateResolver()
+    appointments = _appointments(28)
+
+    def resolve_all():
+        return [resolver.match("corpus", appointments, phrase, today=TODAY) for phrase in PHRASES]
+
+    results = benchmark(resolve_all)
+
+    unique = sum(1 for matches in results if matches is not None and len(matches) == 1)
+    assert unique / len(PHRASES) >= 0.9, list(zip(PHRASES, results))
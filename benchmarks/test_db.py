@@ -0,0 +1,65 @@
+"""
+Benchmarks for the CRUD hot paths used by the MCP tools.
+
+Run with:
+    pytest benchmarks/test_db.py --benchmark-json=bench.json
+"""
+
+import pytest
+
+from app.db import AppointmentCRUD, PatientCRUD, resolve_appointment_filters
+
+from .conftest import patient_identity
+
+TABLE_SIZES = [10, 1_000, 100_000]
+
+
+@pytest.mark.parametrize("rows", TABLE_SIZES)
+def test_patient_get_by_name_dob_and_phone(benchmark, db_session_factory, rows):
+    """verify_user lookup: name + DOB + phone hash."""
+    session = db_session_factory(rows)
+    full_name, dob, phone = patient_identity(0)
+
+    patient = benchmark(PatientCRUD.get_by_name_dob_and_phone, session, full_name, dob, phone)
+
+    assert patient is not None and patient.full_name == full_name
+
+
+@pytest.mark.parametrize("rows", TABLE_SIZES)
+def test_appointment_get_by_patient_id(benchmark, db_session_factory, rows):
+    """list_appointments query for one patient, by appointment-table size."""
+    session = db_session_factory(rows)
+
+    appointments = benchmark(AppointmentCRUD.get_by_patient_id, session, 1)
+
+    assert len(appointments) == min(rows, 10)
+
+
+@pytest.mark.parametrize("rows", TABLE_SIZES)
+def test_appointment_list_upcoming_page(benchmark, db_session_factory, rows):
+    """Default list_appointments page (upcoming, keyset-ordered) for one patient."""
+    session = db_session_factory(rows)
+    filters = resolve_appointment_filters(limit=5)
+
+    appointments, _ = benchmark(AppointmentCRUD.list_by_patient_id, session, 1, **filters)
+
+    assert 0 < len(appointments) <= 5
+
+
+@pytest.mark.parametrize("rows", TABLE_SIZES)
+def test_appointment_list_all_pages(benchmark, db_session_factory, rows):
+    """Walk every page of one patient's appointments with the keyset cursor."""
+    session = db_session_factory(rows)
+    filters = resolve_appointment_filters(from_date="2000-01-01", status="all", limit=3)
+
+    def walk():
+        seen, cursor = [], None
+        while True:
+            page, cursor = AppointmentCRUD.list_by_patient_id(session, 1, cursor=cursor, **filters)
+            seen += [apt.id for apt in page]
+            if cursor is None:
+                return seen
+
+    ids = benchmark(walk)
+
+    assert len(ids) == len(set(ids)) == min(rows, 10)
@@ -0,0 +1,74 @@
+"""
+Benchmarks for the guardrails engine and the with_guardrails decorator.
+
+The global rate limiter is reset before every round, so each measurement
+takes the full allow path rather than the cheaper rate-limited rejection.
+"""
+
+import asyncio
+
+import pytest
+
+from app.security import guardrails, with_guardrails
+
+ROUNDS = 2000
+
+TOOL_MESSAGE = "I'm Maria Santos, born 1990-07-22, phone +5511876543210. Please list my appointments."
+
+
+def _reset_guardrails():
+    guardrails.rate_limiter.requests.clear()
+    guardrails.rate_limiter.violations.clear()
+    guardrails.blocked_sessions.clear()
+
+
+@pytest.fixture
+def event_loop_runner():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+async def _tool(session_id: str, message: str):
+    return {"success": True, "message": "ok"}
+
+
+def test_before_tool_guardrails(benchmark):
+    """Rate limit + content filter + tool checks for one tool call."""
+    result = benchmark.pedantic(
+        guardrails.before_tool_guardrails,
+        kwargs={
+            "session_id": "bench-session",
+            "message": TOOL_MESSAGE,
+            "tool_name": "verify_user",
+            "is_verified": False
+        },
+        setup=_reset_guardrails,
+        rounds=ROUNDS
+    )
+
+    assert result[0] is True
+
+
+def test_tool_call_undecorated(benchmark, event_loop_runner):
+    """Baseline for test_tool_call_with_guardrails: the bare coroutine."""
+    result = benchmark.pedantic(
+        lambda: event_loop_runner(_tool(session_id="bench-session", message=TOOL_MESSAGE)),
+        setup=_reset_guardrails,
+        rounds=ROUNDS
+    )
+
+    assert result["success"] is True
+
+
+def test_tool_call_with_guardrails(benchmark, event_loop_runner):
+    """Same coroutine wrapped in with_guardrails; the difference is the overhead."""
+    guarded = with_guardrails("list_appointments")(_tool)
+
+    result = benchmark.pedantic(
+        lambda: event_loop_runner(guarded(session_id="bench-session", message=TOOL_MESSAGE)),
+        setup=_reset_guardrails,
+        rounds=ROUNDS
+    )
+
+    assert result["success"] is True
@@ -0,0 +1,66 @@
+"""
+Import-time budget for app.main (Cloud Run cold start).
+
+LangChain, LangGraph, the Anthropic SDK and MCP are loaded by the warmup
+task after the server is listening; importing app.main must not pull them
+in. The budget is checked with ``python -X importtime`` in a fresh
+interpreter, taking the best of a few runs to smooth out noise.
+
+The default budget is 2000ms rather than sub-second: FastAPI, SQLModel,
+httpx and pydantic-settings alone take about 1.3s to import on a slow
+machine, before any app code runs. It still catches the agent stack
+(several seconds) creeping back into the import. Override the budget with
+IMPORT_TIME_BUDGET_MS.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2000"))
+RUNS = 3
+
+# Heavy packages that must only load during warmup
+DEFERRED_PACKAGES = ("langchain", "langchain_core", "langchain_anthropic", "langgraph", "langsmith", "anthropic", "mcp")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def import_app_main() -> tuple:
+    """Import app.main in a fresh interpreter; return (cumulative_ms, module names)."""
+    env = {**os.environ, "PYTHONPATH": ROOT, "DATABASE_URL": "sqlite:///:memory:"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+    cumulative_ms, modules = None, set()
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        modules.add(match.group(4))
+        if match.group(4) == "app.main":
+            cumulative_ms = int(match.group(2)) / 1000
+
+    assert cumulative_ms is not None, "app.main missing from -X importtime output"
+    return cumulative_ms, modules
+
+
+def test_app_main_defers_heavy_imports():
+    """app.main must not import the LLM/agent stack at module level."""
+    _, modules = import_app_main()
+
+    eager = sorted(m for m in modules if m.split(".")[0] in DEFERRED_PACKAGES)
+    assert not eager, f"app.main eagerly imports: {eager[:10]}"
+
+
+def test_app_main_import_time_budget():
+    """Best-of-N import time of app.main stays under the budget."""
+    best_ms = min(import_app_main()[0] for _ in range(RUNS))
+    assert best_ms <= IMPORT_TIME_BUDGET_MS, (
+        f"app.main import took {best_ms:.0f}ms, over the {IMPORT_TIME_BUDGET_MS:.0f}ms budget"
+    )
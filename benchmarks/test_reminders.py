@@ -0,0 +1,122 @@
+"""
+Reminder job throughput, memory and crash recovery.
+
+Every seeded appointment is PENDING and due within the horizon, so a run
+reads, sends (to an NDJSON file) and marks all of them. Read the "Mean"
+column as the time for one full run; peak traced memory should not grow
+with the number of due reminders, only with the chunk size.
+
+Run with:
+    pytest benchmarks/test_reminders.py --benchmark-columns=mean
+"""
+
+import asyncio
+import json
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, insert, update
+from sqlmodel import SQLModel, create_engine
+
+from app.models import Appointment, ReminderCheckpoint
+from app.reminders import FileReminderSender, ReminderJob
+
+from .conftest import DOCTORS, LOCATIONS, seed_patients
+
+REMINDER_COUNTS = [100_000, 1_000_000]
+
+PATIENTS = 10_000
+
+
+@pytest.fixture(scope="session")
+def reminder_engine_factory(tmp_path_factory):
+    """Build (and cache) a database whose appointments are all due reminders."""
+    engines = {}
+
+    def factory(due: int):
+        if due not in engines:
+            path = tmp_path_factory.mktemp("db") / f"reminders_{due}.db"
+            engine = create_engine(f"sqlite:///{path}")
+            SQLModel.metadata.create_all(engine)
+            now = datetime.utcnow()
+            with engine.begin() as conn:
+                seed_patients(conn, PATIENTS, now)
+                for start in range(0, due, 100_000):
+                    conn.execute(insert(Appointment.__table__), [
+                        {
+                            "patient_id": i % PATIENTS + 1,
+                            # Spread over the next ~23 hours
+                            "when_utc": now + timedelta(hours=1, seconds=i * 80_000 // due),
+                            "location": LOCATIONS[i % len(LOCATIONS)],
+                            "status": "PENDING",
+                            "doctor_name": DOCTORS[i % len(DOCTORS)],
+                            "created_at": now,
+                            "updated_at": now
+                        }
+                        for i in range(start, min(start + 100_000, due))
+                    ])
+            engines[due] = engine
+        return engines[due]
+
+    yield factory
+
+    for engine in engines.values():
+        engine.dispose()
+
+
+def _reset(engine) -> None:
+    """Forget sent reminders and checkpoints so the next run starts over."""
+    with engine.begin() as conn:
+        conn.execute(update(Appointment).values(reminder_sent_at=None))
+        conn.execute(delete(ReminderCheckpoint))
+
+
+def _run(job: ReminderJob, path: str, max_chunks=None) -> dict:
+    return asyncio.run(job.run(FileReminderSender(path), max_chunks=max_chunks))
+
+
+@pytest.mark.parametrize("due", REMINDER_COUNTS)
+def test_reminder_run(benchmark, reminder_engine_factory, tmp_path, due):
+    """One full run: keyset chunks, file sender, bulk sent-state updates."""
+    engine = reminder_engine_factory(due)
+    job = ReminderJob(engine, horizon_hours=24, chunk_size=1000, concurrency=32)
+
+    result = benchmark.pedantic(
+        _run, args=(job, str(tmp_path / "reminders.ndjson")),
+        setup=lambda: _reset(engine), rounds=1, iterations=1
+    )
+
+    assert result["sent"] == due and result["completed"]
+
+
+def test_reminder_memory_is_flat(reminder_engine_factory, tmp_path):
+    """Peak traced memory for 10x the due reminders stays about the same."""
+    peaks = {}
+    for due in (10_000, 100_000):
+        engine = reminder_engine_factory(due)
+        _reset(engine)
+        job = ReminderJob(engine, horizon_hours=24, chunk_size=1000, concurrency=32)
+        tracemalloc.start()
+        try:
+            _run(job, str(tmp_path / f"reminders_{due}.ndjson"))
+            peaks[due] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    assert peaks[100_000] < peaks[10_000] * 1.5, peaks
+
+
+def test_reminder_resume_after_crash(reminder_engine_factory, tmp_path):
+    """A run stopped mid-way resumes from its checkpoint; every reminder goes out once."""
+    engine = reminder_engine_factory(100_000)
+    _reset(engine)
+    path = str(tmp_path / "reminders.ndjson")
+
+    first = _run(ReminderJob(engine, horizon_hours=24, chunk_size=1000), path, max_chunks=30)
+    second = _run(ReminderJob(engine, horizon_hours=24, chunk_size=1000), path)
+
+    assert not first["completed"] and second["resumed"] and second["completed"]
+    with open(path, encoding="utf-8") as f:
+        ids = [json.loads(line)["appointment_id"] for line in f]
+    assert len(ids) == len(set(ids)) == 100_000
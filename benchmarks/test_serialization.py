@@ -0,0 +1,57 @@
+"""
+Benchmarks for PII masking and API response serialization.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.main import format_appointment_response
+from app.models import Appointment, AppointmentStatus
+from app.observability import mask_pii
+
+MESSAGES = {
+    "short": "List my appointments please",
+    "identity": "I'm Maria Santos, born 1990-07-22, phone 11876543210, email maria@example.com",
+    "long": "Can you tell me about the clinic and my upcoming visits? " * 40,
+}
+
+
+@pytest.mark.parametrize("kind", sorted(MESSAGES))
+def test_mask_pii(benchmark, kind):
+    """mask_pii on the message shapes seen in request logs."""
+    result = benchmark(mask_pii, MESSAGES[kind])
+
+    assert "1990-07-22" not in result
+
+
+def test_format_appointment_response(benchmark):
+    """Appointment row to AppointmentResponse, as used by /appointments."""
+    appointment = Appointment(
+        id=1,
+        patient_id=1,
+        when_utc=datetime(2026, 3, 14, 9, 30),
+        location="Clínica Central",
+        status=AppointmentStatus.PENDING,
+        doctor_name="Dr. Silva"
+    )
+
+    response = benchmark(format_appointment_response, appointment)
+
+    assert response.formatted_datetime == "2026-03-14 09:30"
+
+
+def test_format_appointment_response_json(benchmark):
+    """Response model serialized to JSON, as FastAPI does for each list entry."""
+    appointment = Appointment(
+        id=1,
+        patient_id=1,
+        when_utc=datetime(2026, 3, 14, 9, 30),
+        location="Clínica Central",
+        status=AppointmentStatus.PENDING,
+        doctor_name="Dr. Silva"
+    )
+
+    payload = benchmark(lambda: format_appointment_response(appointment).model_dump_json())
+
+    assert '"status":"PENDING"' in payload
@@ -0,0 +1,37 @@
+"""
+Benchmarks for SessionManager under thread contention.
+
+Every thread alternates get_or_create_session and update_session on its
+own slice of sessions, so the cost measured is the shared lock.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.session_manager import SessionManager
+
+OPERATIONS_PER_THREAD = 500
+SESSIONS_PER_THREAD = 50
+
+
+def _worker(manager: SessionManager, thread_index: int) -> None:
+    for i in range(OPERATIONS_PER_THREAD):
+        session_id = f"bench-{thread_index}-{i % SESSIONS_PER_THREAD}"
+        state = manager.get_or_create_session(session_id)
+        state.last_intent = "list"
+        manager.update_session(session_id, state)
+
+
+@pytest.mark.parametrize("threads", [1, 4, 16])
+def test_session_get_update_contention(benchmark, threads):
+    """get_or_create + update round-trips across N threads."""
+    manager = SessionManager()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        def run():
+            list(pool.map(lambda index: _worker(manager, index), range(threads)))
+
+        benchmark(run)
+
+    assert manager.get_session_count() == threads * SESSIONS_PER_THREAD
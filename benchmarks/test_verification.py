@@ -0,0 +1,170 @@
+"""
+Verification throughput against large patient tables.
+
+verify_user used to match on name + DOB + phone hash; it now hashes one
+lookup key and asks the in-memory index first. These benchmarks compare
+the legacy three-column query, the indexed lookup_key query, and the
+index paths for a known patient (one primary-key fetch) and an unknown
+one (no query at all), plus the normalized and fuzzy name paths. Read the
+"OPS" column as verifications per second.
+
+Run with:
+    pytest benchmarks/test_verification.py --benchmark-columns=mean,ops
+"""
+
+import time
+
+import pytest
+from sqlmodel import select
+
+import app.db
+from app.db import PatientCRUD
+from app.models import Patient
+from app.patient_index import PatientLookupIndex
+
+from .conftest import patient_identity
+
+PATIENT_COUNTS = [10_000, 1_000_000]
+
+
+@pytest.fixture
+def verification_session(patient_engine_factory, monkeypatch):
+    """Session on a patients-only database, with a lookup index loaded from it."""
+    sessions = []
+
+    def factory(patients: int, map_enabled: bool = True):
+        engine = patient_engine_factory(patients)
+        index = PatientLookupIndex(map_enabled=map_enabled, contact_keys=True, refresh_seconds=3600)
+        index.load(engine)
+        monkeypatch.setattr(app.db, "patient_lookup_index", index)
+        session = app.db.Session(engine)
+        sessions.append(session)
+        return session, index
+
+    yield factory
+
+    for session in sessions:
+        session.close()
+
+
+def _legacy_lookup(session, full_name: str, dob: str, phone: str):
+    """The pre-index verify_user query: exact name, DOB and phone hash."""
+    statement = select(Patient).where(
+        Patient.full_name == full_name,
+        Patient.dob == dob,
+        Patient.phone_hash == Patient.hash_phone(phone)
+    )
+    return session.exec(statement).first()
+
+
+@pytest.mark.parametrize("patients", PATIENT_COUNTS)
+def test_verify_legacy_query(benchmark, verification_session, patients):
+    """Baseline: three-column match."""
+    session, _ = verification_session(patients)
+    full_name, dob, phone = patient_identity(patients // 2)
+
+    patient = benchmark(_legacy_lookup, session, full_name, dob, phone)
+
+    assert patient is not None and patient.full_name == full_name
+
+
+@pytest.mark.parametrize("patients", PATIENT_COUNTS)
+def test_verify_lookup_key_query(benchmark, verification_session, patients):
+    """Indexed lookup_key column, index disabled."""
+    session, index = verification_session(patients)
+    index.enabled = False
+    full_name, dob, phone = patient_identity(patients // 2)
+
+    patient = benchmark(PatientCRUD.get_by_name_dob_and_phone, session, full_name, dob, phone)
+
+    assert patient is not None and patient.full_name == full_name
+
+
+@pytest.mark.parametrize("patients", PATIENT_COUNTS)
+def test_verify_index_hit(benchmark, verification_session, patients):
+    """Known patient: index resolves the ID, one primary-key fetch."""
+    session, index = verification_session(patients)
+    full_name, dob, phone = patient_identity(patients // 2)
+
+    patient = benchmark(PatientCRUD.get_by_name_dob_and_phone, session, full_name, dob, phone)
+
+    assert patient is not None and patient.full_name == full_name
+    assert index.map_hits > 0
+
+
+@pytest.mark.parametrize("patients", PATIENT_COUNTS)
+def test_verify_index_miss(benchmark, verification_session, patients):
+    """Unknown identity (wrong phone): rejected without touching the database."""
+    session, index = verification_session(patients)
+    full_name, dob, _ = patient_identity(patients // 2)
+
+    patient = benchmark(PatientCRUD.get_by_name_dob_and_phone, session, full_name, dob, "+5599000000000")
+
+    assert patient is None
+    assert index.rejected > 0 and index.contact_rejected > 0
+
+
+@pytest.mark.parametrize("patients", PATIENT_COUNTS)
+def test_verify_bloom_only_hit(benchmark, verification_session, patients):
+    """Known patient with PATIENT_INDEX_MAP_ENABLED off: Bloom filter then lookup_key query."""
+    session, index = verification_session(patients, map_enabled=False)
+    full_name, dob, phone = patient_identity(patients // 2)
+
+    patient = benchmark(PatientCRUD.get_by_name_dob_and_phone, session, full_name, dob, phone)
+
+    assert patient is not None and patient.full_name == full_name
+    assert index.maybe > 0
+
+
+@pytest.mark.parametrize("patients", PATIENT_COUNTS)
+def test_verify_fuzzy_name(benchmark, verification_session, patients):
+    """Typo in the name, exact DOB and phone: key miss, then one phone-hash query and a trigram score."""
+    session, _ = verification_session(patients)
+    full_name, dob, phone = patient_identity(patients // 2)
+    typo = full_name.upper().replace("PATIENT", "PATIENTT")
+
+    patient = benchmark(PatientCRUD.get_by_name_dob_and_phone, session, typo, dob, phone)
+
+    assert patient is not None and patient.full_name == full_name
+
+
+@pytest.mark.parametrize("patients", PATIENT_COUNTS)
+def test_verify_name_and_dob_normalized(benchmark, verification_session, patients):
+    """/verify lookup: normalized name + DOB on the (dob, name_normalized) index."""
+    session, _ = verification_session(patients)
+    full_name, dob, _ = patient_identity(patients // 2)
+
+    patient = benchmark(PatientCRUD.get_by_name_and_dob, session, f"  {full_name.upper()} ", dob)
+
+    assert patient is not None and patient.full_name == full_name
+
+
+def test_stale_index_miss_falls_back_to_query(verification_session):
+    """A patient created by another process verifies before the index has picked it up."""
+    session, index = verification_session(1_000)
+    full_name, dob, phone = "Other Process Patient", "1970-01-01", "+5599123456789"
+    phone_hash = Patient.hash_phone(phone)
+    # Inserted directly, as another process would: this index never sees add()
+    session.add(Patient(
+        full_name=full_name, name_normalized=Patient.normalize_name(full_name), dob=dob, phone_hash=phone_hash,
+        lookup_key=Patient.make_lookup_key(full_name, dob, phone_hash)
+    ))
+    session.commit()
+
+    # Fresh index: the miss is trusted
+    assert PatientCRUD.get_by_name_dob_and_phone(session, full_name, dob, phone) is None
+
+    # Due for a refresh: the miss goes to the database, and the refresh runs in the background
+    index.refresh_seconds = 0
+    patient = PatientCRUD.get_by_name_dob_and_phone(session, full_name, dob, phone)
+    assert patient is not None and patient.full_name == full_name
+    assert index.stale_misses > 0
+
+    deadline = time.monotonic() + 30
+    while index.refreshes == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index.refreshes == 1
+    index.refresh_seconds = 3600
+    map_hits = index.map_hits
+    assert PatientCRUD.get_by_name_dob_and_phone(session, full_name, dob, phone).id == patient.id
+    assert index.map_hits == map_hits + 1
@@ -0,0 +1,55 @@
+"""
+Archive old appointments for the LumaHealth Conversational AI Service.
+
+Moves confirmed and cancelled appointments older than the horizon from the
+appointment table into appointment_archive (ARCHIVE_DATABASE_URL, if set),
+in batches. Safe to re-run; an interrupted run resumes where it stopped.
+
+    python scripts/archive_appointments.py --dry-run
+    python scripts/archive_appointments.py --older-than-days 180 --batch-size 1000
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.archival import appointment_archiver
+from app.db import create_db_and_tables
+from app.settings import settings
+
+
+def main():
+    """Main function to archive old appointments."""
+    parser = argparse.ArgumentParser(description="Move old appointments to the archive table")
+    parser.add_argument("--older-than-days", type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                        help="Archive appointments older than this many days")
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE,
+                        help="Appointments moved per transaction")
+    parser.add_argument("--max-batches", type=int, help="Stop after this many batches")
+    parser.add_argument("--dry-run", action="store_true", help="Only count eligible appointments")
+    args = parser.parse_args()
+
+    print("🗄️  LumaHealth Appointment Archival")
+    print("=" * 50)
+
+    # Make sure appointment_archive exists (and the archive database, if separate)
+    create_db_and_tables()
+
+    appointment_archiver.batch_size = args.batch_size
+    cutoff = appointment_archiver.cutoff(args.older_than_days)
+    eligible = appointment_archiver.count_eligible(args.older_than_days)
+    print(f"   - {eligible} confirmed/cancelled appointments before {cutoff:%Y-%m-%d %H:%M} UTC")
+
+    if args.dry_run or not eligible:
+        print("\n✅ Nothing moved")
+        return
+
+    result = appointment_archiver.run(after_days=args.older_than_days, max_batches=args.max_batches)
+    print(f"\n✅ Archived {result['archived']} appointments in {result['batches']} batches "
+          f"({result['duration_ms']:.0f}ms)")
+
+
+if __name__ == "__main__":
+    main()
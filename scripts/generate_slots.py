@@ -0,0 +1,76 @@
+"""
+Generate provider schedules for the LumaHealth Conversational AI Service.
+
+Creates a Provider for every doctor with upcoming appointments and
+publishes weekday slots for them at each location they see patients,
+then attaches the upcoming appointments to their slots. Safe to re-run:
+existing slots are kept.
+
+    python scripts/generate_slots.py --days 14
+    python scripts/generate_slots.py --days 30 --slot-minutes 20 --start-hour 8 --end-hour 18
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import Session, select
+
+from app.db import create_db_and_tables, engine, SlotCRUD
+from app.models import Appointment, AppointmentStatus
+from app.settings import settings
+
+
+def main():
+    """Main function to generate provider slots."""
+    parser = argparse.ArgumentParser(description="Publish open slots for the doctors in the appointment table")
+    parser.add_argument("--days", type=int, default=14, help="Days of schedule to generate, starting today")
+    parser.add_argument("--slot-minutes", type=int, default=settings.SLOT_DURATION_MINUTES, help="Slot length")
+    parser.add_argument("--start-hour", type=int, default=9, help="First slot of the day (UTC hour)")
+    parser.add_argument("--end-hour", type=int, default=17, help="End of the last slot of the day (UTC hour)")
+    args = parser.parse_args()
+
+    print("🗓️ LumaHealth Provider Schedules")
+    print("=" * 50)
+
+    # Make sure the provider and slot tables exist
+    create_db_and_tables()
+
+    with Session(engine) as session:
+        # A doctor's schedule is split across the locations of their upcoming appointments
+        schedules = session.exec(
+            select(Appointment.doctor_name, Appointment.location)
+            .where(
+                Appointment.when_utc > datetime.utcnow(),
+                Appointment.status != AppointmentStatus.CANCELLED,
+                Appointment.doctor_name.is_not(None)
+            )
+            .distinct()
+        ).all()
+
+        locations_by_doctor = {}
+        for doctor_name, location in schedules:
+            locations_by_doctor.setdefault(doctor_name, []).append(location)
+
+        created = 0
+        for doctor_name, locations in sorted(locations_by_doctor.items()):
+            provider = SlotCRUD.get_or_create_provider(session, doctor_name)
+            # Later locations only get the starts earlier ones left free
+            for location in sorted(locations):
+                count = SlotCRUD.generate_schedule(
+                    session, provider, location, datetime.utcnow(), args.days,
+                    slot_minutes=args.slot_minutes, day_start_hour=args.start_hour, day_end_hour=args.end_hour
+                )
+                created += count
+                print(f"   - {doctor_name} @ {location}: {count} new slots")
+
+        linked = SlotCRUD.link_appointments(session)
+
+    print(f"\n✅ Created {created} slots for {len(locations_by_doctor)} doctors; {linked} appointments linked to their slots")
+
+
+if __name__ == "__main__":
+    main()
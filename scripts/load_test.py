@@ -0,0 +1,219 @@
+"""
+Load generator for the LumaHealth Conversational AI Service.
+
+This script replays multi-turn conversation scripts against ``/chat`` with
+many concurrent virtual users and reports throughput, latency percentiles,
+error rate, and per-turn and per-node breakdowns.
+
+Run it against a server started with the fake LLM to measure the service
+itself with no network access:
+
+    LLM_PROVIDER=fake FAKE_LLM_PROFILE=claude-sonnet uvicorn app.main:app --port 8080
+    python scripts/load_test.py --users 20 --conversations 200
+
+or in-process, without starting a server:
+
+    LLM_PROVIDER=fake python scripts/load_test.py --in-process
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+
+# Default conversation scripts: (label, message) turns
+DEFAULT_SCRIPTS: Dict[str, List[List[str]]] = {
+    "verify_list_confirm": [
+        ["greeting", "Hi!"],
+        ["verify", "I'm Maria Santos, born 1990-07-22, phone +5511876543210"],
+        ["list", "List my appointments"],
+        ["confirm", "Confirm the first one"],
+    ],
+    "verify_cancel": [
+        ["verify", "I'm Maria Santos, born 1990-07-22, phone +5511876543210"],
+        ["list", "Show my appointments"],
+        ["cancel", "Cancel the last appointment"],
+    ],
+    "faq": [
+        ["greeting", "Hello"],
+        ["faq", "What can you do?"],
+    ],
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class LoadTestStats:
+    """Collects per-request results for the final report."""
+
+    def __init__(self):
+        self.latencies_ms: List[float] = []
+        self.errors = 0
+        self.status_counts: Dict[int, int] = defaultdict(int)
+        self.by_turn: Dict[str, List[float]] = defaultdict(list)
+        self.by_node: Dict[str, List[float]] = defaultdict(list)
+
+    def record(self, label: str, latency_ms: float, status: int, observability: Optional[dict]) -> None:
+        self.latencies_ms.append(latency_ms)
+        self.status_counts[status] += 1
+        self.by_turn[label].append(latency_ms)
+
+        if status != 200:
+            self.errors += 1
+            return
+
+        # Server-side timing breakdown, when the service reports one
+        timing = (observability or {}).get("timing") or {}
+        for node, node_ms in (timing.get("nodes") or {}).items():
+            self.by_node[node].append(node_ms)
+        for key in ("llm_ms", "tools_ms", "db_ms"):
+            if key in timing:
+                self.by_node[key].append(timing[key])
+
+    @staticmethod
+    def summarize(values: List[float]) -> dict:
+        return {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+            "max_ms": round(max(values), 2) if values else 0,
+        }
+
+    def report(self, elapsed_seconds: float) -> dict:
+        total = len(self.latencies_ms)
+        return {
+            "requests": total,
+            "elapsed_seconds": round(elapsed_seconds, 2),
+            "throughput_rps": round(total / elapsed_seconds, 2) if elapsed_seconds else 0,
+            "error_rate_percent": round(self.errors / total * 100, 2) if total else 0,
+            "status_counts": dict(self.status_counts),
+            "latency": self.summarize(self.latencies_ms),
+            "by_turn": {label: self.summarize(v) for label, v in sorted(self.by_turn.items())},
+            "by_node": {node: self.summarize(v) for node, v in sorted(self.by_node.items())},
+        }
+
+
+async def run_conversation(client: httpx.AsyncClient, script: List[List[str]], stats: LoadTestStats) -> None:
+    """Run one scripted conversation on a fresh session."""
+    session_id = f"load-{uuid.uuid4().hex[:12]}"
+
+    for label, message in script:
+        start = time.perf_counter()
+        try:
+            response = await client.post("/chat", json={"session_id": session_id, "message": message})
+            status = response.status_code
+            observability = response.json().get("observability") if status == 200 else None
+        except httpx.HTTPError:
+            status, observability = 0, None
+        stats.record(label, (time.perf_counter() - start) * 1000, status, observability)
+
+        if status != 200:
+            # A failed turn breaks the rest of the conversation
+            return
+
+
+async def run_load(client: httpx.AsyncClient, scripts: Dict[str, list], users: int, conversations: int) -> dict:
+    """Run conversations with a fixed number of concurrent virtual users."""
+    stats = LoadTestStats()
+    names = sorted(scripts)
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(conversations):
+        queue.put_nowait(scripts[names[i % len(names)]])
+
+    async def virtual_user():
+        while not queue.empty():
+            script = queue.get_nowait()
+            await run_conversation(client, script, stats)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[virtual_user() for _ in range(users)])
+    return stats.report(time.perf_counter() - start)
+
+
+async def main_async(args) -> dict:
+    scripts = DEFAULT_SCRIPTS
+    if args.scripts:
+        with open(args.scripts, encoding="utf-8") as f:
+            scripts = json.load(f)
+
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    timeout = httpx.Timeout(args.timeout)
+
+    if args.in_process:
+        from app.main import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=timeout) as client:
+                return await run_load(client, scripts, args.users, args.conversations)
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        return await run_load(client, scripts, args.users, args.conversations)
+
+
+def print_report(report: dict) -> None:
+    """Print a human-readable report."""
+    print("\n📊 Load Test Results")
+    print("=" * 50)
+    print(f"   Requests:    {report['requests']} in {report['elapsed_seconds']}s")
+    print(f"   Throughput:  {report['throughput_rps']} req/s")
+    print(f"   Error rate:  {report['error_rate_percent']}%  {report['status_counts']}")
+    lat = report["latency"]
+    print(f"   Latency:     p50 {lat['p50_ms']}ms | p95 {lat['p95_ms']}ms | p99 {lat['p99_ms']}ms | max {lat['max_ms']}ms")
+
+    for title, key in (("Per turn", "by_turn"), ("Per node (server-side)", "by_node")):
+        if report[key]:
+            print(f"\n   {title}:")
+            for name, s in report[key].items():
+                print(f"   - {name:<22} n={s['count']:<6} p50 {s['p50_ms']}ms | p95 {s['p95_ms']}ms | p99 {s['p99_ms']}ms")
+
+
+def main():
+    """Main function to run the load test."""
+    parser = argparse.ArgumentParser(description="Replay conversation scripts against /chat")
+    parser.add_argument("--base-url", default="http://localhost:8080", help="Service base URL")
+    parser.add_argument("--in-process", action="store_true", help="Run the app in-process instead of over HTTP")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--conversations", type=int, default=50, help="Total conversations to run")
+    parser.add_argument("--scripts", help="JSON file mapping script names to [[label, message], ...]")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    print("🚦 LumaHealth Load Test")
+    print("=" * 50)
+    print(f"   {args.conversations} conversations, {args.users} virtual users, "
+          f"{'in-process' if args.in_process else args.base_url}")
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.output}")
+
+    return 1 if report["error_rate_percent"] > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Event-loop lag with and without the CPU offload policy.
+
+Each arm starts the app in a fresh interpreter with its own freshly seeded
+database and OFFLOAD_MODE set to off, thread or process. It then sends
+long chat messages (pasted text full of phone numbers, emails and dates)
+from several sessions while short "quiet" sessions chat alongside. A
+sampler coroutine records how late a 5 ms sleep wakes up; that is the
+event-loop lag every other session sees.
+
+    python scripts/measure_loop_lag.py
+    python scripts/measure_loop_lag.py --modes off thread --message-chars 7900 --noisy 8 --turns 20
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PASTED_LINE = "Paciente Maria Santos 22/07/1990 tel 11987654321 email maria.santos@example.com consulta 2025-09-19. "
+
+# Executed in a child interpreter; prints one JSON line with the arm's results
+CHILD = r"""
+import asyncio, json, statistics, sys, time, uuid
+import httpx
+from app import main
+from app.db import create_db_and_tables, seed_database
+from app.offload import cpu_offloader
+
+message_chars, noisy, quiet, turns, interval_ms, pasted_line = json.loads(sys.argv[1])
+create_db_and_tables()
+seed_database()
+
+def percentile(values, pct):
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))], 2) if values else 0.0
+
+async def sample_lag(lags, stop):
+    interval = interval_ms / 1000
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - start - interval) * 1000)
+
+async def chat_session(client, message, latencies, rejected):
+    session_id = f"lag-{uuid.uuid4().hex[:12]}"
+    for _ in range(turns):
+        start = time.perf_counter()
+        response = await client.post("/chat", json={"session_id": session_id, "message": message})
+        if response.status_code == 422:
+            rejected.append(1)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+async def run():
+    long_message = (pasted_line * (message_chars // len(pasted_line) + 1))[:message_chars]
+    async with main.app.router.lifespan_context(main.app):
+        await main.service_ready
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://lag", timeout=120) as client:
+            # One warm-up turn of each kind so first-call setup is not counted as lag
+            await client.post("/chat", json={"session_id": "lag-warmup", "message": long_message})
+            await client.post("/chat", json={"session_id": "lag-warmup-quiet", "message": "what can you do"})
+            lags, noisy_ms, quiet_ms, rejected, stop = [], [], [], [], asyncio.Event()
+            sampler = asyncio.create_task(sample_lag(lags, stop))
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(chat_session(client, long_message, noisy_ms, rejected) for _ in range(noisy)),
+                *(chat_session(client, "what can you do", quiet_ms, rejected) for _ in range(quiet))
+            )
+            elapsed = time.perf_counter() - start
+            stop.set()
+            await sampler
+    return {
+        "lag_p50_ms": percentile(lags, 50),
+        "lag_p99_ms": percentile(lags, 99),
+        "lag_max_ms": round(max(lags), 2) if lags else 0.0,
+        "lag_mean_ms": round(statistics.mean(lags), 2) if lags else 0.0,
+        "quiet_p50_ms": percentile(quiet_ms, 50),
+        "quiet_p99_ms": percentile(quiet_ms, 99),
+        "noisy_p50_ms": percentile(noisy_ms, 50),
+        "rejected": len(rejected),
+        "elapsed_seconds": round(elapsed, 2),
+        "offload": cpu_offloader.get_stats()
+    }
+
+print("LAG " + json.dumps(asyncio.run(run())))
+"""
+
+
+def run_arm(mode: str, params: list, env: dict) -> dict:
+    """Run one offload mode in a fresh interpreter with a fresh database."""
+    with tempfile.TemporaryDirectory(prefix="lumahealth-lag-") as tmp:
+        arm_env = {
+            **env,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'lag.db')}",
+            "OFFLOAD_MODE": mode,
+        }
+        proc = subprocess.run(
+            [sys.executable, "-c", CHILD, json.dumps(params)],
+            cwd=ROOT, env=arm_env, capture_output=True, text=True
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+
+    for line in proc.stdout.splitlines():
+        if line.startswith("LAG "):
+            return json.loads(line[len("LAG "):])
+    raise RuntimeError("child did not report results")
+
+
+def main():
+    """Main function to compare event-loop lag across offload modes."""
+    parser = argparse.ArgumentParser(description="Measure event-loop lag with and without CPU offload")
+    parser.add_argument("--modes", nargs="+", default=["off", "thread", "process"], help="OFFLOAD_MODE values to compare")
+    parser.add_argument("--message-chars", type=int, default=7900, help="Length of the long pasted messages")
+    parser.add_argument("--noisy", type=int, default=6, help="Sessions sending long messages")
+    parser.add_argument("--quiet", type=int, default=2, help="Sessions sending short messages")
+    parser.add_argument("--turns", type=int, default=15, help="Messages per session")
+    parser.add_argument("--interval-ms", type=float, default=5.0, help="Lag sampler sleep interval")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "LLM_PROVIDER": os.getenv("LLM_PROVIDER", "fake"),
+        "FAKE_LLM_PROFILE": os.getenv("FAKE_LLM_PROFILE", "instant"),
+        "LLM_MAX_IN_FLIGHT": str(args.noisy + args.quiet),
+        "LOG_LEVEL": "warning",
+    }
+    params = [args.message_chars, args.noisy, args.quiet, args.turns, args.interval_ms, PASTED_LINE]
+
+    print("⏱️  LumaHealth Event-Loop Lag")
+    print("=" * 50)
+    print(f"   - {args.noisy} sessions x {args.turns} messages of {args.message_chars} chars, "
+          f"{args.quiet} quiet sessions, provider {env['LLM_PROVIDER']}")
+
+    report = {mode: run_arm(mode, params, env) for mode in args.modes}
+
+    print(f"\n   {'mode':<9}{'lag p50':>9}{'lag p99':>9}{'lag max':>9}{'quiet p50':>11}{'quiet p99':>11}{'offloaded':>11}")
+    for mode, r in report.items():
+        offloaded = sum(r["offload"]["offloaded_calls"].values())
+        print(f"   {mode:<9}{r['lag_p50_ms']:>9.2f}{r['lag_p99_ms']:>9.2f}{r['lag_max_ms']:>9.2f}"
+              f"{r['quiet_p50_ms']:>11.1f}{r['quiet_p99_ms']:>11.1f}{offloaded:>11}")
+
+    rejected = sum(r["rejected"] for r in report.values())
+    if rejected:
+        print(f"\n⚠️  {rejected} messages were over CHAT_MAX_MESSAGE_CHARS and rejected with 422")
+    print(f"\n✅ Lag values are in milliseconds past a {args.interval_ms:.0f} ms sleep")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"   Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+LLM calls spent per successful verification, by name-matching mode.
+
+Each arm starts the app in a fresh interpreter with its own freshly seeded
+database and PATIENT_NAME_MATCH set to exact, normalized or fuzzy. Every
+patient then verifies over /chat once per name variant (as typed on a
+phone: no accents, all caps, extra spaces, a doubled letter). When
+verification fails the simulated user retries with the name exactly as
+registered, the way people do after the assistant asks them to check it.
+Impostors (right DOB and phone, different first name) never retry; any
+of them that get through are reported as false accepts.
+
+    python scripts/measure_verification_retries.py
+    python scripts/measure_verification_retries.py --modes exact fuzzy --max-attempts 3
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Accented names on top of the default seed, where exact matching hurts most
+EXTRA_PATIENTS = [
+    ["José Antônio Conceição", "1979-06-02", "+5521998877665"],
+    ["Inês Gonçalves", "1993-01-27", "+5531987766554"],
+    ["Márcia Araújo Lins", "1968-10-09", "+5541976655443"],
+]
+
+VARIANTS = ("exact", "no_accents", "upper", "extra_spaces", "typo", "impostor")
+
+# Executed in a child interpreter; prints one JSON line with the arm's results
+CHILD = r"""
+import asyncio, json, sys, unicodedata, uuid
+import httpx
+from sqlmodel import Session, select
+from app import main
+from app.db import PatientCRUD, create_db_and_tables, engine, seed_database
+from app.models import Patient
+from app.security import guardrails
+
+extra_patients, variants, max_attempts, phones = json.loads(sys.argv[1])
+create_db_and_tables()
+seed_database()
+with Session(engine) as db:
+    for full_name, dob, phone in extra_patients:
+        PatientCRUD.create(db, full_name, dob, phone)
+    patients = [(p.full_name, p.dob) for p in db.exec(select(Patient).order_by(Patient.id)).all()]
+
+def variant_name(full_name, kind):
+    if kind == "no_accents":
+        return "".join(c for c in unicodedata.normalize("NFKD", full_name) if not unicodedata.combining(c))
+    if kind == "upper":
+        return full_name.upper()
+    if kind == "extra_spaces":
+        return "  " + "   ".join(full_name.split())
+    if kind == "typo":
+        return full_name + full_name[-1]
+    if kind == "impostor":
+        first, _, rest = full_name.partition(" ")
+        return ("Roberto" if first != "Roberto" else "Fernando") + " " + rest
+    return full_name
+
+async def verify(client, name, dob, phone):
+    # Tool calls share one rate-limit bucket; keep it from throttling the simulated users
+    guardrails.rate_limiter.requests.clear()
+    session_id = f"verify-{uuid.uuid4().hex[:12]}"
+    message = f"Hi, I'm {name}, born {dob}, phone {phone}"
+    response = (await client.post("/chat", json={"session_id": session_id, "message": message})).json()
+    # verified_this_turn is a text heuristic; a patient ID is only set by a real match
+    verified = response.get("state", {}).get("patient_id") is not None
+    return verified, len(response.get("observability", {}).get("timing", {}).get("llm_calls", []))
+
+async def run():
+    results = {kind: {"users": 0, "verified": 0, "first_try": 0, "attempts": 0, "llm_calls": 0} for kind in variants}
+    async with main.app.router.lifespan_context(main.app):
+        await main.service_ready
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://verify", timeout=120) as client:
+            for full_name, dob in patients:
+                phone = phones[full_name]
+                for kind in variants:
+                    r = results[kind]
+                    r["users"] += 1
+                    name = variant_name(full_name, kind)
+                    for attempt in range(max_attempts):
+                        verified, calls = await verify(client, name, dob, phone)
+                        r["attempts"] += 1
+                        r["llm_calls"] += calls
+                        if verified:
+                            r["verified"] += 1
+                            r["first_try"] += attempt == 0
+                            break
+                        if kind == "impostor":
+                            break
+                        name = full_name
+    return results
+
+print("VERIFY " + json.dumps(asyncio.run(run())))
+"""
+
+
+def run_arm(mode: str, params: list, env: dict) -> dict:
+    """Run one name-matching mode in a fresh interpreter with a fresh database."""
+    with tempfile.TemporaryDirectory(prefix="lumahealth-verify-") as tmp:
+        arm_env = {
+            **env,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'verify.db')}",
+            "PATIENT_NAME_MATCH": mode,
+        }
+        proc = subprocess.run(
+            [sys.executable, "-c", CHILD, json.dumps(params)],
+            cwd=ROOT, env=arm_env, capture_output=True, text=True
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+
+    for line in proc.stdout.splitlines():
+        if line.startswith("VERIFY "):
+            return json.loads(line[len("VERIFY "):])
+    raise RuntimeError("child did not report results")
+
+
+def main():
+    """Main function to compare verification retries across name-matching modes."""
+    parser = argparse.ArgumentParser(description="Measure LLM calls per successful verification")
+    parser.add_argument("--modes", nargs="+", default=["exact", "normalized", "fuzzy"], help="PATIENT_NAME_MATCH values to compare")
+    parser.add_argument("--max-attempts", type=int, default=2, help="Verification attempts per user (the retry uses the exact name)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "LLM_PROVIDER": os.getenv("LLM_PROVIDER", "fake"),
+        "FAKE_LLM_PROFILE": os.getenv("FAKE_LLM_PROFILE", "instant"),
+        "LOG_LEVEL": "warning",
+    }
+    phones = {"João Silva": "+5511987654321", "Maria Santos": "+5511876543210"}
+    phones.update({name: phone for name, _, phone in EXTRA_PATIENTS})
+    params = [EXTRA_PATIENTS, list(VARIANTS), args.max_attempts, phones]
+
+    print("🔐 LumaHealth Verification Retries")
+    print("=" * 50)
+    print(f"   - {len(phones)} patients x {len(VARIANTS)} name variants, up to {args.max_attempts} attempts, "
+          f"provider {env['LLM_PROVIDER']}")
+
+    report = {mode: run_arm(mode, params, env) for mode in args.modes}
+
+    print(f"\n   {'mode':<12}{'first try':>11}{'verified':>10}{'LLM calls/verified':>20}{'false accepts':>15}")
+    for mode, results in report.items():
+        legit = [r for kind, r in results.items() if kind != "impostor"]
+        users = sum(r["users"] for r in legit)
+        verified = sum(r["verified"] for r in legit)
+        first_try = sum(r["first_try"] for r in legit)
+        calls = sum(r["llm_calls"] for r in legit)
+        per_verified = calls / verified if verified else float("nan")
+        print(f"   {mode:<12}{first_try:>6}/{users:<4}{verified:>6}/{users:<4}{per_verified:>19.2f}"
+              f"{results['impostor']['verified']:>10}/{results['impostor']['users']}")
+
+    print("\n   First-try verifications by variant:")
+    print(f"   {'variant':<14}" + "".join(f"{mode:>12}" for mode in report))
+    for kind in VARIANTS:
+        print(f"   {kind:<14}" + "".join(
+            f"{report[mode][kind]['first_try']:>8}/{report[mode][kind]['users']:<3}" for mode in report
+        ))
+
+    print("\n✅ Impostors share the DOB and phone but not the first name; they should never verify")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"   Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
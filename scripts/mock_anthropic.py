@@ -0,0 +1,177 @@
+"""
+Mock Anthropic Messages API for the LumaHealth Conversational AI Service.
+
+Serves POST /v1/messages (plain JSON and SSE streaming) with configurable
+latency and injected failures, so the pooled HTTP client can be exercised
+locally: connection reuse, HTTP/2, timeouts and retries with Retry-After.
+
+    python scripts/mock_anthropic.py --port 8099 --fail-rate 0.2
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8099 uvicorn app.main:app
+
+    # Start the server in-process and send waves of N concurrent Claude calls through it
+    python scripts/mock_anthropic.py --demo 50 --fail-rate 0.2 --retry-after 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REPLY_TEXT = "This is a mock reply from the local Anthropic API."
+
+
+def create_mock_app(latency_ms: float, fail_rate: float, fail_status: int, retry_after: float) -> FastAPI:
+    """Build the mock API app."""
+    mock_app = FastAPI(title="Mock Anthropic API")
+    mock_app.state.counts = {"requests": 0, "failures": 0}
+
+    @mock_app.post("/v1/messages")
+    async def messages(request: Request):
+        body = await request.json()
+        mock_app.state.counts["requests"] += 1
+        await asyncio.sleep(latency_ms / 1000)
+
+        if random.random() < fail_rate:
+            mock_app.state.counts["failures"] += 1
+            headers = {"retry-after": str(retry_after)} if retry_after >= 0 else {}
+            error_type = "overloaded_error" if fail_status == 529 else "api_error"
+            return JSONResponse(
+                {"type": "error", "error": {"type": error_type, "message": "Injected failure"}},
+                status_code=fail_status,
+                headers=headers
+            )
+
+        message_id = f"msg_mock_{uuid.uuid4().hex[:16]}"
+        model = body.get("model", "claude-mock")
+        usage = {"input_tokens": 12, "output_tokens": len(REPLY_TEXT.split())}
+
+        if not body.get("stream"):
+            return {
+                "id": message_id,
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": [{"type": "text", "text": REPLY_TEXT}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": usage
+            }
+
+        async def events():
+            def sse(event: str, data: dict) -> str:
+                return f"event: {event}\ndata: {json.dumps({'type': event, **data})}\n\n"
+
+            yield sse("message_start", {"message": {
+                "id": message_id, "type": "message", "role": "assistant", "model": model,
+                "content": [], "stop_reason": None, "stop_sequence": None,
+                "usage": {"input_tokens": usage["input_tokens"], "output_tokens": 0}
+            }})
+            yield sse("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+            for word in REPLY_TEXT.split(" "):
+                yield sse("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": word + " "}})
+            yield sse("content_block_stop", {"index": 0})
+            yield sse("message_delta", {
+                "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                "usage": {"output_tokens": usage["output_tokens"]}
+            })
+            yield sse("message_stop", {})
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return mock_app
+
+
+async def run_demo(base_url: str, calls: int, stream: bool, waves: int) -> dict:
+    """Send waves of concurrent ChatAnthropic calls through the shared pooled client."""
+    from langchain_anthropic import ChatAnthropic
+    from app.http_client import anthropic_http
+
+    llm = ChatAnthropic(model="claude-mock", api_key="mock-key", base_url=base_url, max_tokens=64)
+    anthropic_http.configure_chat_anthropic(llm)
+
+    async def one_call():
+        if stream:
+            async for _ in llm.astream("hello"):
+                pass
+        else:
+            await llm.ainvoke("hello")
+
+    start = time.perf_counter()
+    results = []
+    for _ in range(waves):
+        # Later waves should find warm keep-alive connections in the pool
+        results += await asyncio.gather(*(one_call() for _ in range(calls)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    await anthropic_http.aclose()
+
+    errors = [r for r in results if isinstance(r, Exception)]
+    return {
+        "calls": len(results),
+        "succeeded": len(results) - len(errors),
+        "errors": len(errors),
+        "elapsed_seconds": round(elapsed, 2),
+        "client": anthropic_http.get_stats()
+    }
+
+
+def main():
+    """Main function to run the mock Anthropic API."""
+    parser = argparse.ArgumentParser(description="Mock Anthropic Messages API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Delay before each response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--fail-status", type=int, default=529, help="Status code for injected failures")
+    parser.add_argument("--retry-after", type=float, default=-1, help="Retry-After seconds on failures (-1 to omit)")
+    parser.add_argument("--demo", type=int, default=0, help="Run N concurrent client calls against the mock and exit")
+    parser.add_argument("--waves", type=int, default=3, help="Consecutive bursts of --demo calls")
+    parser.add_argument("--stream", action="store_true", help="Use streaming calls in --demo")
+    args = parser.parse_args()
+
+    mock_app = create_mock_app(args.latency_ms, args.fail_rate, args.fail_status, args.retry_after)
+    config = uvicorn.Config(mock_app, host=args.host, port=args.port, log_level="warning")
+    server = uvicorn.Server(config)
+
+    print("🧪 Mock Anthropic API")
+    print("=" * 50)
+    print(f"   - http://{args.host}:{args.port}/v1/messages")
+    print(f"   - latency {args.latency_ms:.0f}ms, fail rate {args.fail_rate:.0%} ({args.fail_status})")
+
+    if not args.demo:
+        server.run()
+        return
+
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        results = asyncio.run(run_demo(f"http://{args.host}:{args.port}", args.demo, args.stream, args.waves))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+    client = results["client"]
+    print(f"\n📊 {results['succeeded']}/{results['calls']} calls succeeded in {results['elapsed_seconds']}s")
+    print(f"   - server saw {mock_app.state.counts['requests']} requests ({mock_app.state.counts['failures']} injected failures)")
+    print(f"   - connections opened: {client['connections_opened']} for {client['attempts']} attempts "
+          f"({client['connection_reuse_percent']}% reused)")
+    print(f"   - retries: {client['retries']} {client['retries_by_reason']}, "
+          f"Retry-After honored: {client['retry_after_honored']}")
+    print("\n" + json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
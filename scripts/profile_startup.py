@@ -0,0 +1,121 @@
+"""
+Startup profile for the LumaHealth Conversational AI Service.
+
+Measures, in fresh interpreters, how long it takes to import the agent
+stack and to construct LumaHealthAgent (tools, schemas, tool binding and
+graph compilation), for a cold process and for a process that finds the
+tool spec cache already on disk.
+
+    python scripts/profile_startup.py
+    python scripts/profile_startup.py --runs 5 --cprofile
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executed in a child interpreter; prints one JSON line with phase timings
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app.graph as graph_module
+t1 = time.perf_counter()
+from app.session_manager import SessionManager
+agent = graph_module.LumaHealthAgent("profile-dummy-key", SessionManager())
+t2 = time.perf_counter()
+agent_2 = graph_module.LumaHealthAgent("profile-dummy-key", SessionManager())
+t3 = time.perf_counter()
+assert agent.graph is not None and agent_2.graph is not None
+print("PROFILE " + json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "first_agent_ms": (t2 - t1) * 1000,
+    "second_agent_ms": (t3 - t2) * 1000,
+}))
+"""
+
+CPROFILE_CHILD = r"""
+import cProfile, pstats, io
+import app.graph as graph_module
+from app.session_manager import SessionManager
+profiler = cProfile.Profile()
+profiler.enable()
+graph_module.LumaHealthAgent("profile-dummy-key", SessionManager())
+profiler.disable()
+out = io.StringIO()
+pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(25)
+print(out.getvalue())
+"""
+
+
+def run_child(code: str, env: dict) -> str:
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    return proc.stdout
+
+
+def profile_once(env: dict) -> dict:
+    for line in run_child(CHILD, env).splitlines():
+        if line.startswith("PROFILE "):
+            return json.loads(line[len("PROFILE "):])
+    raise RuntimeError("child did not report timings")
+
+
+def summarize(samples: list) -> dict:
+    return {key: round(statistics.median(s[key] for s in samples), 1) for key in samples[0]}
+
+
+def main():
+    """Main function to profile agent startup."""
+    parser = argparse.ArgumentParser(description="Profile agent construction at startup")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per scenario")
+    parser.add_argument("--cprofile", action="store_true", help="Also print a cProfile of agent construction")
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="lumahealth-profile-")
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "LLM_PROVIDER": os.getenv("LLM_PROVIDER", "fake"),
+        "DATABASE_URL": "sqlite:///:memory:",
+        "TOOL_SPEC_CACHE_DIR": cache_dir,
+    }
+
+    print("⏱️  LumaHealth Startup Profile")
+    print("=" * 50)
+
+    try:
+        cold = []
+        for _ in range(args.runs):
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            cold.append(profile_once(env))
+
+        # The last cold run left the spec cache on disk
+        warm = [profile_once(env) for _ in range(args.runs)]
+
+        results = {"cold_cache": summarize(cold), "warm_disk_cache": summarize(warm)}
+        for scenario, timings in results.items():
+            print(f"\n   {scenario} (median of {args.runs}):")
+            print(f"   - import app.graph:        {timings['import_ms']:>8.1f}ms")
+            print(f"   - first LumaHealthAgent:   {timings['first_agent_ms']:>8.1f}ms")
+            print(f"   - second LumaHealthAgent:  {timings['second_agent_ms']:>8.1f}ms")
+
+        if args.cprofile:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            print("\n🔬 cProfile of first agent construction (cold cache):")
+            print(run_child(CPROFILE_CHILD, env))
+
+        print("\n" + json.dumps(results))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
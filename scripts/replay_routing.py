@@ -0,0 +1,189 @@
+"""
+A/B replay of recorded conversations with and without model routing.
+
+Each arm replays the same conversations through LumaHealthAgent in a fresh
+interpreter with its own freshly seeded database: arm A sends every turn
+to CLAUDE_MODEL, arm B lets the model router send simple turns to
+CLAUDE_SMALL_MODEL. The report compares turn latency and estimated spend.
+
+By default the fake LLM is used with Sonnet-like latency for the large
+model and Haiku-like latency for the small one:
+
+    python scripts/replay_routing.py
+    python scripts/replay_routing.py --conversations recorded.json --repeat 3
+
+Recorded conversations are JSON: {"name": [["label", "message"], ...], ...}
+(the same format as scripts/load_test.py --scripts).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sample recorded conversations
+RECORDED_CONVERSATIONS = {
+    "verify_list_confirm": [
+        ["greeting", "Hi!"],
+        ["verify", "I'm Maria Santos, born 1990-07-22, phone +5511876543210"],
+        ["list", "List my appointments"],
+        ["confirm", "Confirm the first one"],
+        ["thanks", "Thanks"],
+    ],
+    "verify_cancel": [
+        ["greeting", "Hello"],
+        ["verify", "My name is Maria Santos, I was born on 1990-07-22 and my phone is +5511876543210"],
+        ["list", "Show my appointments"],
+        ["cancel", "Cancel the last appointment"],
+        ["ack", "ok"],
+    ],
+    "complex": [
+        ["verify", "I'm Maria Santos, born 1990-07-22, phone +5511876543210"],
+        ["list", "Show my schedule"],
+        ["reschedule", "Can I move the first one to a later date instead, or cancel both if that is not possible?"],
+    ],
+    "faq": [
+        ["greeting", "Hey"],
+        ["faq", "What can you do?"],
+    ],
+}
+
+# Executed in a child interpreter; prints one JSON line with per-turn results
+CHILD = r"""
+import asyncio, json, sys, uuid
+from app.db import create_db_and_tables, seed_database
+from app.graph import LumaHealthAgent
+from app.model_router import model_router
+from app.response_cache import response_cache
+from app.session_manager import SessionManager
+
+conversations, repeat = json.loads(sys.argv[1]), int(sys.argv[2])
+create_db_and_tables()
+seed_database()
+response_cache.enabled = False
+
+async def replay():
+    agent = LumaHealthAgent("replay-dummy-key", SessionManager())
+    turns = []
+    for _ in range(repeat):
+        for name, script in conversations.items():
+            session_id = f"replay-{uuid.uuid4().hex[:12]}"
+            for label, message in script:
+                result = await agent.process_conversation(session_id, message)
+                obs = result.get("observability", {})
+                turns.append({
+                    "conversation": name,
+                    "label": label,
+                    "tier": obs.get("model_tier"),
+                    "reason": obs.get("routing_reason"),
+                    "ms": obs.get("timing", {}).get("total_ms", 0.0),
+                    "cost_usd": obs.get("estimated_cost_usd", 0.0),
+                })
+    return turns
+
+turns = asyncio.run(replay())
+print("REPLAY " + json.dumps({"turns": turns, "routing": model_router.get_stats()}))
+"""
+
+
+def run_arm(conversations: dict, repeat: int, routing_enabled: bool, env: dict) -> dict:
+    """Replay all conversations in a fresh interpreter with a fresh database."""
+    with tempfile.TemporaryDirectory(prefix="lumahealth-replay-") as tmp:
+        arm_env = {
+            **env,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'replay.db')}",
+            "MODEL_ROUTING_ENABLED": "true" if routing_enabled else "false",
+        }
+        proc = subprocess.run(
+            [sys.executable, "-c", CHILD, json.dumps(conversations), str(repeat)],
+            cwd=ROOT, env=arm_env, capture_output=True, text=True
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+
+    for line in proc.stdout.splitlines():
+        if line.startswith("REPLAY "):
+            return json.loads(line[len("REPLAY "):])
+    raise RuntimeError("child did not report results")
+
+
+def summarize(turns: list) -> dict:
+    latencies = [turn["ms"] for turn in turns]
+    return {
+        "turns": len(turns),
+        "mean_ms": round(statistics.mean(latencies), 1) if latencies else 0,
+        "p50_ms": round(statistics.median(latencies), 1) if latencies else 0,
+        "total_ms": round(sum(latencies), 1),
+        "cost_usd": round(sum(turn["cost_usd"] for turn in turns), 6),
+        "small_tier_turns": sum(1 for turn in turns if turn["tier"] == "small"),
+    }
+
+
+def percent_saved(baseline: float, routed: float) -> float:
+    return round((baseline - routed) / baseline * 100, 1) if baseline else 0.0
+
+
+def main():
+    """Main function to compare routed and unrouted replays."""
+    parser = argparse.ArgumentParser(description="A/B replay of conversations with and without model routing")
+    parser.add_argument("--conversations", help="JSON file of recorded conversations")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay every conversation N times")
+    parser.add_argument("--large-profile", default="claude-sonnet", help="Fake LLM latency profile for the large model")
+    parser.add_argument("--small-profile", default="claude-haiku", help="Fake LLM latency profile for the small model")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    conversations = RECORDED_CONVERSATIONS
+    if args.conversations:
+        with open(args.conversations, encoding="utf-8") as f:
+            conversations = json.load(f)
+
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "LLM_PROVIDER": os.getenv("LLM_PROVIDER", "fake"),
+        "FAKE_LLM_PROFILE": args.large_profile,
+        "FAKE_LLM_SMALL_PROFILE": args.small_profile,
+    }
+
+    print("🔀 LumaHealth Model Routing Replay")
+    print("=" * 50)
+    print(f"   - {len(conversations)} conversations x {args.repeat}, provider {env['LLM_PROVIDER']}")
+
+    baseline = run_arm(conversations, args.repeat, False, env)
+    routed = run_arm(conversations, args.repeat, True, env)
+
+    report = {
+        "baseline": summarize(baseline["turns"]),
+        "routed": summarize(routed["turns"]),
+        "routing": routed["routing"]["decisions_by_reason"],
+    }
+    report["latency_saved_percent"] = percent_saved(report["baseline"]["total_ms"], report["routed"]["total_ms"])
+    report["cost_saved_percent"] = percent_saved(report["baseline"]["cost_usd"], report["routed"]["cost_usd"])
+
+    print(f"\n   {'arm':<10}{'turns':>7}{'small':>7}{'mean ms':>10}{'p50 ms':>10}{'cost $':>12}")
+    for arm in ("baseline", "routed"):
+        s = report[arm]
+        print(f"   {arm:<10}{s['turns']:>7}{s['small_tier_turns']:>7}{s['mean_ms']:>10.1f}{s['p50_ms']:>10.1f}{s['cost_usd']:>12.6f}")
+
+    print("\n   Per turn (routed):")
+    for base_turn, routed_turn in zip(baseline["turns"], routed["turns"]):
+        turn_name = f"{routed_turn['conversation']}/{routed_turn['label']}"
+        print(f"   - {turn_name:<32} {routed_turn['tier']:<6} "
+              f"{base_turn['ms']:>8.1f}ms -> {routed_turn['ms']:>8.1f}ms  ({routed_turn['reason']})")
+
+    print(f"\n✅ Latency saved: {report['latency_saved_percent']}%, spend saved: {report['cost_saved_percent']}%")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"   Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
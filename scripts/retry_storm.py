@@ -0,0 +1,142 @@
+"""
+Retry-storm write amplification measurement for LumaHealth.
+
+This script replays confirm/cancel retries against an in-memory database and
+reports how many statements and row writes each strategy costs:
+
+- legacy: the original read-modify-commit on every retry
+- conditional: ``UPDATE ... WHERE status != target`` through AppointmentCRUD
+- idempotent: an Idempotency-Key replay in front of the conditional update
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from sqlmodel import SQLModel, Session, create_engine
+
+from app.audit import audit_log
+from app.db import PatientCRUD, AppointmentCRUD
+from app.idempotency import IdempotencyStore, request_fingerprint
+from app.models import Appointment, AppointmentStatus
+
+
+class WriteCounter:
+    """Counts statements and written rows on an engine."""
+
+    def __init__(self, engine):
+        self.statements = 0
+        self.update_statements = 0
+        self.rows_written = 0
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+        if statement.lstrip().upper().startswith("UPDATE"):
+            self.update_statements += 1
+            self.rows_written += max(cursor.rowcount, 0)
+
+    def reset(self):
+        self.statements = 0
+        self.update_statements = 0
+        self.rows_written = 0
+
+
+def legacy_transition(session: Session, appointment_id: int, patient_id: int, target: AppointmentStatus):
+    """The original read-modify-commit transition, kept for comparison."""
+    appointment = session.get(Appointment, appointment_id)
+    if appointment and appointment.patient_id == patient_id:
+        appointment.status = target
+        appointment.updated_at = datetime.utcnow()
+        session.commit()
+        session.refresh(appointment)
+        return appointment
+    return None
+
+
+def setup_database(appointments: int):
+    """Create an in-memory database with one patient and N pending appointments."""
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        patient_id = PatientCRUD.create(session, "Retry Storm", "1990-01-01", "+5511000000000").id
+        base = datetime.utcnow() + timedelta(days=1)
+        ids = [
+            AppointmentCRUD.create(session, patient_id, base + timedelta(hours=i), "Clínica Central").id
+            for i in range(appointments)
+        ]
+
+    return engine, patient_id, ids
+
+
+def run_strategy(strategy: str, appointments: int, retries: int) -> dict:
+    """Run a retry storm for one strategy and return its write counts."""
+    # Only appointment writes are counted; the in-memory database is not visible to the audit writer thread
+    audit_log.enabled = False
+    engine, patient_id, appointment_ids = setup_database(appointments)
+    counter = WriteCounter(engine)
+    store = IdempotencyStore()
+    counter.reset()
+
+    with Session(engine) as session:
+        for appointment_id in appointment_ids:
+            key = f"confirm-{appointment_id}"
+            fingerprint = request_fingerprint({"appointment_id": appointment_id})
+            for _ in range(retries):
+                if strategy == "legacy":
+                    legacy_transition(session, appointment_id, patient_id, AppointmentStatus.CONFIRMED)
+                elif strategy == "conditional":
+                    AppointmentCRUD.confirm_appointment(session, appointment_id, patient_id)
+                else:
+                    if store.get("confirm_appointment", "storm", key, fingerprint) is not None:
+                        continue
+                    appointment, _ = AppointmentCRUD.confirm_appointment(session, appointment_id, patient_id)
+                    store.put("confirm_appointment", "storm", key, fingerprint, {"id": appointment.id})
+
+    return {
+        "strategy": strategy,
+        "requests": appointments * retries,
+        "statements": counter.statements,
+        "update_statements": counter.update_statements,
+        "rows_written": counter.rows_written
+    }
+
+
+def main():
+    """Main function to run the retry-storm measurement."""
+    parser = argparse.ArgumentParser(description="Measure write amplification under retries")
+    parser.add_argument("--appointments", type=int, default=100, help="Appointments to confirm")
+    parser.add_argument("--retries", type=int, default=5, help="Attempts per appointment (1 = no retry)")
+    args = parser.parse_args()
+
+    print("🌩️  LumaHealth Retry-Storm Measurement")
+    print("=" * 50)
+    print(f"   {args.appointments} appointments x {args.retries} attempts\n")
+
+    results = [run_strategy(s, args.appointments, args.retries) for s in ("legacy", "conditional", "idempotent")]
+    baseline = results[0]
+
+    print(f"{'strategy':<12} {'requests':>9} {'statements':>11} {'updates':>8} {'rows written':>13}")
+    for r in results:
+        print(
+            f"{r['strategy']:<12} {r['requests']:>9} {r['statements']:>11} "
+            f"{r['update_statements']:>8} {r['rows_written']:>13}"
+        )
+
+    print("\n📉 Write amplification (rows written per unique transition):")
+    for r in results:
+        amplification = r["rows_written"] / args.appointments if args.appointments else 0
+        saved = 100 - (r["rows_written"] / baseline["rows_written"] * 100) if baseline["rows_written"] else 0
+        print(f"   - {r['strategy']}: {amplification:.2f}x ({saved:.0f}% fewer writes than legacy)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
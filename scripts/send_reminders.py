@@ -0,0 +1,69 @@
+"""
+Send appointment reminders for the LumaHealth Conversational AI Service.
+
+Pushes a reminder for every PENDING appointment starting within the
+horizon, in chunks, through the file (NDJSON) or http sender. Safe to
+re-run: an interrupted run resumes from its checkpoint, and appointments
+already reminded are skipped.
+
+    python scripts/send_reminders.py --dry-run
+    python scripts/send_reminders.py --hours 48 --sender file --output /tmp/reminders.ndjson
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import create_db_and_tables
+from app.reminders import reminder_job, build_sender
+from app.settings import settings
+
+
+def main():
+    """Main function to send due appointment reminders."""
+    parser = argparse.ArgumentParser(description="Send reminders for upcoming PENDING appointments")
+    parser.add_argument("--hours", type=float, default=settings.REMINDER_HORIZON_HOURS,
+                        help="Remind appointments starting within this many hours (ignored when resuming)")
+    parser.add_argument("--chunk-size", type=int, default=settings.REMINDER_CHUNK_SIZE,
+                        help="Appointments read, sent and marked per chunk")
+    parser.add_argument("--concurrency", type=int, default=settings.REMINDER_CONCURRENCY,
+                        help="Reminders in flight at once")
+    parser.add_argument("--sender", choices=["file", "http"], default=settings.REMINDER_SENDER,
+                        help="Reminder transport")
+    parser.add_argument("--output", help="File for the file sender (default: REMINDER_FILE_PATH)")
+    parser.add_argument("--max-chunks", type=int, help="Stop after this many chunks (the next run resumes)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count due appointments")
+    args = parser.parse_args()
+
+    print("🔔 LumaHealth Appointment Reminders")
+    print("=" * 50)
+
+    # Make sure reminder_sent_at and reminder_checkpoint exist
+    create_db_and_tables()
+
+    due = reminder_job.count_due(args.hours)
+    print(f"   - {due} PENDING appointments in the next {args.hours:g}h without a reminder")
+
+    if args.dry_run:
+        print("\n✅ Nothing sent")
+        return
+
+    if args.output:
+        settings.REMINDER_FILE_PATH = args.output
+    reminder_job.chunk_size = args.chunk_size
+    reminder_job.concurrency = args.concurrency
+    sender = build_sender(args.sender, concurrency=args.concurrency)
+
+    result = asyncio.run(reminder_job.run(sender, horizon_hours=args.hours, max_chunks=args.max_chunks))
+    resumed = " (resumed)" if result["resumed"] else ""
+    print(f"\n✅ Sent {result['sent']} reminders in {result['chunks']} chunks{resumed} "
+          f"({result['duration_ms']:.0f}ms), {result['failed']} failed")
+    if not result["completed"]:
+        print("   Run stopped early; run again to resume from the checkpoint")
+
+
+if __name__ == "__main__":
+    main()